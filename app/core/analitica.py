@@ -0,0 +1,460 @@
+# app/core/analitica.py
+"""
+Exportación incremental de ventas y movimientos a Parquet, para análisis fuera de la caja.
+
+    ANALITICA_DIR/
+      boletas/mes=2025-01/part-<desde>-<hasta>.parquet
+      detalles/mes=2025-01/...          (líneas de boleta + folio y created_at de la boleta)
+      movimientos/mes=2025-01/...       (ledger de stock)
+
+- Marca de agua en SyncState:
+    "analitica.ventas"       last_sync = hasta dónde (created_at, exclusivo) se exportó.
+                             Se corta en ahora - ANALITICA_LAG_S: una venta en curso
+                             (created_at ya fijado, sin commit) no queda atrás de la marca.
+    "analitica.movimientos"  last_version = último id exportado (SQLite asigna los id
+                             en orden de commit: un solo escritor a la vez).
+- Cada corrida agrega archivos nuevos (no reescribe los anteriores). Se escriben como
+  .tmp y se renombran al final; si la marca no alcanzó a guardarse, la corrida siguiente
+  parte del mismo 'desde' y borra antes los archivos que la anterior dejó con ese prefijo.
+- compactar() junta las partes de un mes cerrado en un solo archivo.
+- Las columnas de cada tabla están en _esquemas(). Una columna nueva (p.ej.
+  detalles.descuento/promocion) sólo va en las partes nuevas: las anteriores no
+  se reescriben, y leer()/compactar() las leen con el esquema vigente (null).
+- Consultas vectorizadas (pyarrow.dataset + pyarrow.compute): leer(), ventas_por_dia(),
+  ventas_por_producto(), movimientos_por_motivo(). Poda por partición mes=.
+- ExportadorAnalitica corre la exportación en un PROCESO aparte cada ANALITICA_INTERVALO_S
+  (iniciar_exportador / detener_exportador en main.py): la caja no comparte GIL ni
+  espera; con WAL la lectura larga no bloquea a los escritores.
+
+Las boletas ya archivadas (app/core/archivo.py) no se exportan: el archivo sólo toma
+meses cerrados, muy posteriores a la marca.
+
+    python -m app.core.analitica exportar
+    python -m app.core.analitica compactar 2025-01
+    python -m app.core.analitica ventas 2025-01-01 2025-03-31 [--por dia|producto]
+    python -m app.core.analitica movimientos 2025-01-01 2025-03-31
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import BigInteger, func, select, type_coerce
+
+from app.core.config import ANALITICA_DIR, ANALITICA_INTERVALO_S, ANALITICA_LAG_S, DB_PATH
+from app.core.models import Boleta, BoletaDetalle, MovimientoStock, SyncState
+from app.core.tiempo import ENTERO
+
+TABLAS = ("boletas", "detalles", "movimientos")
+CLAVE_VENTAS = "analitica.ventas"
+CLAVE_MOVIMIENTOS = "analitica.movimientos"
+BLOQUE = 50_000
+
+
+def _arrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Para la exportación analítica instala 'pyarrow'") from e
+    return pa, pc, ds, pq
+
+
+def _ts(col):
+    # con marcas enteras se leen los µs tal cual (pyarrow los toma sin convertir a datetime)
+    return type_coerce(col, BigInteger).label(col.name) if ENTERO else col
+
+
+def _us(d: datetime) -> int:
+    return (d - datetime(1970, 1, 1)) // timedelta(microseconds=1)
+
+
+def _esquemas() -> dict:
+    """Columnas y tipos Arrow de cada tabla exportada (en el orden de las consultas)."""
+    pa, _, _, _ = _arrow()
+    ts = pa.timestamp("us")
+    return {
+        "boletas": pa.schema([("id", pa.string()), ("folio", pa.string()), ("created_at", ts),
+                              ("total", pa.int64())]),
+        "detalles": pa.schema([("id", pa.string()), ("boleta_id", pa.string()), ("folio", pa.string()),
+                               ("created_at", ts), ("codigo_producto", pa.string()),
+                               ("descripcion", pa.string()), ("precio_unitario", pa.int64()),
+                               ("cantidad", pa.int64()), ("subtotal", pa.int64()),
+                               ("descuento", pa.int64()), ("promocion", pa.string())]),
+        "movimientos": pa.schema([("id", pa.int64()), ("codigo_producto", pa.string()), ("delta", pa.int64()),
+                                  ("existencias", pa.int64()), ("motivo", pa.string()),
+                                  ("referencia", pa.string()), ("created_at", ts)]),
+    }
+
+
+# =========================
+# Escritura
+# =========================
+class _Escritor:
+    """Un ParquetWriter por partición mes=; todo a .tmp hasta confirmar()."""
+
+    def __init__(self, directorio: Path, tabla: str, nombre: str):
+        self.base = Path(directorio) / tabla
+        self.nombre = nombre
+        self._w = {}
+        self.filas = 0
+
+    def escribir(self, t):
+        pa, pc, _, pq = _arrow()
+        if not t.num_rows:
+            return
+        meses = pc.strftime(t["created_at"], format="%Y-%m")
+        for mes in pc.unique(meses).to_pylist():
+            parte = t.filter(pc.equal(meses, mes))
+            w = self._w.get(mes)
+            if w is None:
+                d = self.base / f"mes={mes}"
+                d.mkdir(parents=True, exist_ok=True)
+                w = self._w[mes] = pq.ParquetWriter(d / f"{self.nombre}.tmp", parte.schema, compression="zstd")
+            w.write_table(parte)
+            self.filas += parte.num_rows
+
+    def confirmar(self):
+        for mes, w in self._w.items():
+            w.close()
+            d = self.base / f"mes={mes}"
+            os.replace(d / f"{self.nombre}.tmp", d / f"{self.nombre}.parquet")
+        self._w.clear()
+
+    def descartar(self):
+        for mes, w in self._w.items():
+            w.close()
+            (self.base / f"mes={mes}" / f"{self.nombre}.tmp").unlink(missing_ok=True)
+        self._w.clear()
+
+
+def _limpiar_restos(directorio: Path, tabla: str, prefijo: str):
+    """Partes de una corrida que no alcanzó a guardar su marca (mismo 'desde')."""
+    base = Path(directorio) / tabla
+    if base.is_dir():
+        for p in base.glob(f"mes=*/{prefijo}*"):
+            p.unlink()
+        for p in base.glob("mes=*/*.tmp"):
+            p.unlink()
+
+
+def _volcar(conn, q, esquema, escritor):
+    pa, _, _, _ = _arrow()
+    res = conn.execution_options(stream_results=True).execute(q)
+    while True:
+        filas = res.fetchmany(BLOQUE)
+        if not filas:
+            break
+        cols = list(zip(*filas))
+        escritor.escribir(pa.table([pa.array(c, type=t) for c, t in zip(cols, esquema.types)], schema=esquema))
+
+
+def _estado(engine, clave: str) -> SyncState:
+    from sqlalchemy.orm import Session
+
+    with Session(engine) as s:
+        return s.get(SyncState, clave) or SyncState(table_name=clave, last_sync=None, last_version=None)
+
+
+def _marcar(engine, clave: str, **valores):
+    """
+    Mueve la marca con un UPSERT: la primera sentencia de la transacción es la
+    escritura, así espera el lock (busy_timeout) en vez de fallar con
+    SQLITE_BUSY_SNAPSHOT si la caja escribió después de leer la marca.
+    """
+    from sqlalchemy.dialects.sqlite import insert
+
+    with engine.begin() as conn:
+        conn.execute(insert(SyncState).values(table_name=clave, **valores)
+                     .on_conflict_do_update(index_elements=["table_name"], set_=valores))
+
+
+def exportar_ventas(engine, directorio: Path | str = ANALITICA_DIR, *, lag_s: float = ANALITICA_LAG_S,
+                    ahora: datetime | None = None) -> int:
+    """Boletas y detalles con created_at en [marca, ahora - lag). Devuelve boletas exportadas."""
+    esq = _esquemas()
+    hasta = (ahora or datetime.utcnow()) - timedelta(seconds=lag_s)
+    desde = _estado(engine, CLAVE_VENTAS).last_sync
+    if desde is not None and desde >= hasta:
+        return 0
+    nombre = f"part-{_us(desde) if desde else 0}-{_us(hasta)}"
+    prefijo = f"part-{_us(desde) if desde else 0}-"
+    for t in ("boletas", "detalles"):
+        _limpiar_restos(directorio, t, prefijo)
+
+    B, D = Boleta.__table__, BoletaDetalle.__table__
+    rango = [B.c.created_at < hasta] + ([B.c.created_at >= desde] if desde else [])
+    eb, ed = _Escritor(directorio, "boletas", nombre), _Escritor(directorio, "detalles", nombre)
+    try:
+        # una sola transacción de lectura: boletas y detalles del mismo snapshot
+        with engine.connect() as conn, conn.begin():
+            _volcar(conn, select(B.c.id, B.c.folio, _ts(B.c.created_at), B.c.total)
+                    .where(*rango).order_by(B.c.created_at), esq["boletas"], eb)
+            _volcar(conn, select(D.c.id, D.c.boleta_id, B.c.folio, _ts(B.c.created_at), D.c.codigo_producto,
+                                 D.c.descripcion, D.c.precio_unitario, D.c.cantidad, D.c.subtotal,
+                                 D.c.descuento, D.c.promocion)
+                    .join(B, B.c.id == D.c.boleta_id).where(*rango).order_by(B.c.created_at),
+                    esq["detalles"], ed)
+        eb.confirmar()
+        ed.confirmar()
+    except BaseException:
+        eb.descartar()
+        ed.descartar()
+        raise
+    _marcar(engine, CLAVE_VENTAS, last_sync=hasta)
+    return eb.filas
+
+
+def exportar_movimientos(engine, directorio: Path | str = ANALITICA_DIR) -> int:
+    """Movimientos con id > marca. Devuelve cuántos exportó."""
+    esquema = _esquemas()["movimientos"]
+    M = MovimientoStock.__table__
+    desde = _estado(engine, CLAVE_MOVIMIENTOS).last_version or 0
+    with engine.connect() as conn:
+        hasta = conn.execute(select(func.max(M.c.id))).scalar_one() or 0
+    if hasta <= desde:
+        return 0
+    nombre = f"part-{desde}-{hasta}"
+    _limpiar_restos(directorio, "movimientos", f"part-{desde}-")
+    em = _Escritor(directorio, "movimientos", nombre)
+    try:
+        with engine.connect() as conn, conn.begin():
+            _volcar(conn, select(M.c.id, M.c.codigo_producto, M.c.delta, M.c.existencias, M.c.motivo,
+                                 M.c.referencia, _ts(M.c.created_at))
+                    .where(M.c.id > desde, M.c.id <= hasta).order_by(M.c.id), esquema, em)
+        em.confirmar()
+    except BaseException:
+        em.descartar()
+        raise
+    _marcar(engine, CLAVE_MOVIMIENTOS, last_version=hasta)
+    return em.filas
+
+
+def exportar_todo(engine, directorio: Path | str = ANALITICA_DIR, **kw) -> dict[str, int]:
+    return {"boletas": exportar_ventas(engine, directorio, **kw),
+            "movimientos": exportar_movimientos(engine, directorio)}
+
+
+def compactar(mes: str, directorio: Path | str = ANALITICA_DIR) -> dict[str, int]:
+    """Junta las partes de mes=AAAA-MM (un mes ya cerrado) en un archivo por tabla."""
+    _, _, ds, pq = _arrow()
+    if mes >= f"{datetime.utcnow():%Y-%m}":
+        raise ValueError(f"El mes {mes} no está cerrado: el exportador aún le agrega partes")
+    out = {}
+    for tabla in TABLAS:
+        d = Path(directorio) / tabla / f"mes={mes}"
+        partes = sorted(d.glob("part-*.parquet"))
+        if len(partes) < 2:
+            continue
+        # con el esquema vigente: una parte anterior a una columna nueva la trae en null
+        t = ds.dataset([str(p) for p in partes], schema=_esquemas()[tabla], format="parquet").to_table()
+        tmp = d / "compacto.tmp"
+        pq.write_table(t, tmp, compression="zstd")
+        # el nombre conserva el rango total: primer 'desde' y último 'hasta'
+        desde = partes[0].stem.split("-")[1]
+        hasta = max(int(p.stem.split("-")[2]) for p in partes)
+        os.replace(tmp, d / f"part-{desde}-{hasta}.parquet")
+        for p in partes:
+            if p.name != f"part-{desde}-{hasta}.parquet":
+                p.unlink()
+        out[tabla] = len(partes)
+    return out
+
+
+# =========================
+# Consultas
+# =========================
+def leer(tabla: str, desde: date | datetime | None = None, hasta: date | datetime | None = None,
+         columnas: list[str] | None = None, directorio: Path | str = ANALITICA_DIR):
+    """pa.Table de 'tabla' con created_at en [desde, hasta] (fechas: día completo)."""
+    pa, _, ds, _ = _arrow()
+    if tabla not in TABLAS:
+        raise ValueError(f"Tabla desconocida: {tabla!r} (use {', '.join(TABLAS)})")
+    base = Path(directorio) / tabla
+    if not base.is_dir():
+        return None
+    esquema = _esquemas()[tabla].append(pa.field("mes", pa.string()))
+    dset = ds.dataset(str(base), schema=esquema, format="parquet", partitioning="hive")
+    filtro = None
+    ts = pa.timestamp("us")
+    if desde is not None:
+        a = desde if isinstance(desde, datetime) else datetime(desde.year, desde.month, desde.day)
+        filtro = (ds.field("mes") >= f"{a:%Y-%m}") & (ds.field("created_at") >= pa.scalar(a, ts))
+    if hasta is not None:
+        b = hasta if isinstance(hasta, datetime) else datetime(hasta.year, hasta.month, hasta.day) + timedelta(days=1)
+        f = (ds.field("mes") <= f"{b:%Y-%m}") & (ds.field("created_at") < pa.scalar(b, ts))
+        filtro = f if filtro is None else filtro & f
+    return dset.to_table(columns=columnas, filter=filtro)
+
+
+def ventas_por_dia(desde=None, hasta=None, directorio: Path | str = ANALITICA_DIR):
+    """[dia, boletas, total] ordenado por día."""
+    _, pc, _, _ = _arrow()
+    t = leer("boletas", desde, hasta, ["created_at", "total"], directorio)
+    if t is None:
+        return []
+    t = t.append_column("dia", pc.strftime(t["created_at"], format="%Y-%m-%d"))
+    g = t.group_by("dia").aggregate([("total", "count"), ("total", "sum")])
+    g = g.sort_by("dia")
+    return list(zip(g["dia"].to_pylist(), g["total_count"].to_pylist(), g["total_sum"].to_pylist()))
+
+
+def ventas_por_producto(desde=None, hasta=None, top: int | None = None, directorio: Path | str = ANALITICA_DIR):
+    """[codigo, cantidad, subtotal] de mayor a menor subtotal."""
+    t = leer("detalles", desde, hasta, ["codigo_producto", "cantidad", "subtotal"], directorio)
+    if t is None:
+        return []
+    g = t.group_by("codigo_producto").aggregate([("cantidad", "sum"), ("subtotal", "sum")])
+    g = g.sort_by([("subtotal_sum", "descending")])
+    if top:
+        g = g.slice(0, top)
+    return list(zip(g["codigo_producto"].to_pylist(), g["cantidad_sum"].to_pylist(), g["subtotal_sum"].to_pylist()))
+
+
+def movimientos_por_motivo(desde=None, hasta=None, directorio: Path | str = ANALITICA_DIR):
+    """[motivo, movimientos, suma de delta]."""
+    t = leer("movimientos", desde, hasta, ["motivo", "delta"], directorio)
+    if t is None:
+        return []
+    g = t.group_by("motivo").aggregate([("delta", "count"), ("delta", "sum")]).sort_by("motivo")
+    return list(zip(g["motivo"].to_pylist(), g["delta_count"].to_pylist(), g["delta_sum"].to_pylist()))
+
+
+# =========================
+# Proceso en segundo plano
+# =========================
+def _proceso(db_path: str, directorio: str, lag_s: float):
+    """Cuerpo del proceso hijo: engine propio, prioridad baja."""
+    if hasattr(os, "nice"):
+        try:
+            os.nice(10)
+        except OSError:
+            pass
+    from app.core.db_local import make_engine
+
+    engine = make_engine(db_path)
+    try:
+        exportar_todo(engine, directorio, lag_s=lag_s)
+    finally:
+        engine.dispose()
+
+
+class ExportadorAnalitica:
+    """
+    Hilo daemon que cada 'intervalo' segundos lanza la exportación en un proceso
+    (spawn: sirve igual en Windows y en el .exe de PyInstaller) y espera a que
+    termine antes de programar la siguiente. Un fallo sólo queda en ultimo_error.
+    """
+    def __init__(self, db_path: str | Path = DB_PATH, directorio: str | Path = ANALITICA_DIR, *,
+                 intervalo: float = ANALITICA_INTERVALO_S, lag_s: float = ANALITICA_LAG_S):
+        self.db_path = str(db_path)
+        self.directorio = str(directorio)
+        self.intervalo = intervalo
+        self.lag_s = lag_s
+        self.corridas = 0
+        self.ultimo_error: str | None = None
+        self._ctx = multiprocessing.get_context("spawn")
+        self._proc = None
+        self._parar = threading.Event()
+        self._hilo = threading.Thread(target=self._loop, name="exportador-analitica", daemon=True)
+        self._hilo.start()
+
+    def _loop(self):
+        while not self._parar.wait(self.intervalo):
+            self.correr()
+
+    def correr(self):
+        p = self._ctx.Process(target=_proceso, args=(self.db_path, self.directorio, self.lag_s),
+                              name="exportar-analitica", daemon=True)
+        self._proc = p
+        p.start()
+        p.join()
+        self.corridas += 1
+        self.ultimo_error = None if p.exitcode == 0 else f"exportación terminó con código {p.exitcode}"
+
+    def detener(self, timeout: float | None = 30.0):
+        self._parar.set()
+        self._hilo.join(timeout)
+        p = self._proc
+        if p is not None and p.is_alive():
+            p.terminate()          # lo escrito queda en .tmp y la marca sin mover: se repite la próxima vez
+
+
+_exportador: ExportadorAnalitica | None = None
+_exportador_lock = threading.Lock()
+
+
+def iniciar_exportador(**kw) -> ExportadorAnalitica | None:
+    """Exportador único de la app; None si falta pyarrow (la caja funciona igual)."""
+    global _exportador
+    try:
+        _arrow()
+    except RuntimeError:
+        return None
+    with _exportador_lock:
+        if _exportador is None:
+            _exportador = ExportadorAnalitica(**kw)
+        return _exportador
+
+
+def detener_exportador(timeout: float = 30.0):
+    global _exportador
+    with _exportador_lock:
+        ex, _exportador = _exportador, None
+    if ex is not None:
+        ex.detener(timeout)
+
+
+# =========================
+# CLI
+# =========================
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m app.core.analitica", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--dir", default=str(ANALITICA_DIR))
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("exportar", help="exportar lo nuevo desde la última marca")
+    pc_ = sub.add_parser("compactar", help="juntar las partes de un mes cerrado")
+    pc_.add_argument("mes", help="AAAA-MM")
+    pv = sub.add_parser("ventas")
+    pv.add_argument("desde", type=date.fromisoformat)
+    pv.add_argument("hasta", type=date.fromisoformat)
+    pv.add_argument("--por", choices=("dia", "producto"), default="dia")
+    pv.add_argument("--top", type=int, default=20)
+    pm = sub.add_parser("movimientos")
+    pm.add_argument("desde", type=date.fromisoformat)
+    pm.add_argument("hasta", type=date.fromisoformat)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "exportar":
+        from app.core.db_local import engine, init_db
+        init_db()
+        t0 = time.perf_counter()
+        res = exportar_todo(engine, args.dir)
+        print(f"{res['boletas']} boletas y {res['movimientos']} movimientos en {time.perf_counter() - t0:.1f}s → {args.dir}")
+    elif args.cmd == "compactar":
+        res = compactar(args.mes, args.dir)
+        print(", ".join(f"{t}: {n} partes → 1" for t, n in res.items()) or "Nada que compactar")
+    elif args.cmd == "ventas" and args.por == "dia":
+        filas = ventas_por_dia(args.desde, args.hasta, args.dir)
+        for dia, n, total in filas:
+            print(f"{dia}  {n:6d}  {total:14,d}")
+    elif args.cmd == "ventas":
+        for cod, cant, sub_ in ventas_por_producto(args.desde, args.hasta, args.top, args.dir):
+            print(f"{cod:16} {cant:8d}  {sub_:14,d}")
+    else:
+        for motivo, n, delta in movimientos_por_motivo(args.desde, args.hasta, args.dir):
+            print(f"{motivo:12} {n:8d}  {delta:+10d}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
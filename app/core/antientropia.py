@@ -0,0 +1,379 @@
+# app/core/antientropia.py
+"""
+Anti-entropía del catálogo: detectar y reparar diferencias entre réplicas de
+productos sin comparar la tabla completa.
+
+Cada producto vivo cae en una hoja según el hash de su codigo (16**profundidad hojas,
+repartidas parejo aunque los códigos no lo estén). La hoja guarda la suma
+(mod 2**64) de los hashes de (codigo, version, existencias) de sus productos y
+cada nodo interno el hash de sus 16 hijos: un árbol de Merkle. Los tombstones
+(deleted_at) no entran: cada réplica los purga a su tiempo (mantenimiento) y eso
+no es una diferencia. Un borrado que sólo tiene el par se ve como solo_local y
+reparar() lo trae.
+
+El árbol se construye una vez (recorriendo productos) y después se mantiene:
+los triggers de productos anotan cada cambio en ae_cambios (models.CambioCatalogo)
+y el Indice, al notar commits (PRAGMA data_version), suma/resta sólo esas filas
+y rehace los nodos de las hojas tocadas.
+
+Comparar contra el par (servidor u otra terminal) es bajar por el árbol: primero
+la raíz; si difiere, los 16 hijos; y así sólo por las ramas distintas. En las
+hojas distintas se intercambian (version, existencias) por codigo y reparar()
+pide sólo esas filas. Con catálogos iguales el intercambio es la raíz (≈100 bytes).
+
+    python -m app.core.antientropia estado | comparar | reparar   # contra BASE_URL
+
+El par se modela con hijos() / hojas() / productos(): Par (local, lo que sirve
+el servidor) y ParRemoto (HTTP, app/core/net.py).
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import sys
+import threading
+import zlib
+from datetime import datetime
+from hashlib import blake2b
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.core.config import AE_PROFUNDIDAD
+from app.core.models import CambioCatalogo, Producto
+from app.core.repositories import cuadrar_ledger, existencias_de
+
+RAMAS = 16
+LOTE = 500
+_MASCARA = (1 << 64) - 1
+_P = Producto.__table__
+_C = CambioCatalogo.__table__
+_TIEMPOS = {"updated_at", "deleted_at"}
+
+
+def _hoja(codigo: str, profundidad: int) -> int:
+    return zlib.crc32(codigo.encode()) >> (32 - 4 * profundidad)
+
+
+def _digest(codigo: str, version, existencias) -> int:
+    return int.from_bytes(blake2b(f"{codigo}\x1f{version}\x1f{existencias}".encode(), digest_size=8).digest(), "big")
+
+
+def _nodo(hijos: list[bytes]) -> bytes:
+    return blake2b(b"".join(hijos), digest_size=8).digest()
+
+
+# =========================
+# Árbol
+# =========================
+class Arbol:
+    """niveles[0] = [raíz] ... niveles[profundidad] = hojas; cada nodo, 8 bytes."""
+
+    def __init__(self, profundidad: int):
+        self.profundidad = profundidad
+        self.sumas = [0] * (RAMAS ** profundidad)
+        self.filas = 0
+        self.niveles: list[list[bytes]] = []
+
+    def sumar(self, codigo: str, version, existencias, signo: int = 1) -> int:
+        i = _hoja(codigo, self.profundidad)
+        self.sumas[i] = (self.sumas[i] + signo * _digest(codigo, version, existencias)) & _MASCARA
+        self.filas += signo
+        return i
+
+    def rehacer(self, hojas=None):
+        """Nodos desde las hojas: todos, o sólo los ancestros de 'hojas'."""
+        if hojas is None:
+            nivel = [s.to_bytes(8, "big") for s in self.sumas]
+            self.niveles = [nivel]
+            while len(nivel) > 1:
+                nivel = [_nodo(nivel[i:i + RAMAS]) for i in range(0, len(nivel), RAMAS)]
+                self.niveles.insert(0, nivel)
+            return
+        hojas = set(hojas)
+        for i in hojas:
+            self.niveles[-1][i] = self.sumas[i].to_bytes(8, "big")
+        for k in range(self.profundidad - 1, -1, -1):
+            hojas = {i // RAMAS for i in hojas}
+            abajo = self.niveles[k + 1]
+            for p in hojas:
+                self.niveles[k][p] = _nodo(abajo[p * RAMAS:(p + 1) * RAMAS])
+
+    @property
+    def raiz(self) -> str:
+        return self.niveles[0][0].hex()
+
+    def hijos(self, nivel: int, padres: list[int]) -> bytes:
+        """Nodos de 'nivel' hijos de 'padres' (del nivel anterior), 8 bytes c/u; nivel 0: la raíz."""
+        if nivel == 0:
+            return self.niveles[0][0]
+        fila = self.niveles[nivel]
+        return b"".join(b"".join(fila[p * RAMAS:(p + 1) * RAMAS]) for p in padres)
+
+
+def _secuencia(c) -> int:
+    """Último id entregado en ae_cambios (aunque ya esté purgado)."""
+    return c.execute(text("SELECT seq FROM sqlite_sequence WHERE name = :t"), {"t": _C.name}).scalar() or 0
+
+
+class Indice:
+    """
+    Árbol de un engine. Se construye la primera vez; después, si hubo commits
+    (PRAGMA data_version de una conexión que se mantiene abierta), aplica sólo
+    lo nuevo de ae_cambios. Reconstruye si le purgaron cambios sin leer o si son
+    tantos que recorrer productos sale más barato.
+    """
+
+    def __init__(self, engine, profundidad: int = AE_PROFUNDIDAD):
+        self.engine = engine
+        self.profundidad = profundidad
+        self.reconstrucciones = 0
+        self._arbol: Arbol | None = None
+        self._conn = None
+        self._version = None
+        self._ultimo = 0
+        self._lock = threading.Lock()
+
+    def _construir(self, c):
+        a = Arbol(self.profundidad)
+        self._ultimo = _secuencia(c)            # misma transacción: ni un cambio de más ni de menos
+        for codigo, version, existencias in c.execute(select(_P.c.codigo, _P.c.version, _P.c.existencias)
+                                                      .where(_P.c.deleted_at.is_(None))):
+            a.sumar(codigo, version, existencias)
+        a.rehacer()
+        self._arbol = a
+        self.reconstrucciones += 1
+
+    def _al_dia(self):
+        if self._conn is None:
+            self._conn = self.engine.connect()
+        c = self._conn
+        try:
+            v = c.exec_driver_sql("PRAGMA data_version").scalar()
+            if self._arbol is not None and v == self._version:
+                return
+            self._version = v
+            if self._arbol is None:
+                return self._construir(c)
+            seq = _secuencia(c)
+            if seq == self._ultimo:
+                return
+            primero = c.execute(select(func.min(_C.c.id)).where(_C.c.id > self._ultimo)).scalar()
+            if primero is None or primero > self._ultimo + 1 or seq - self._ultimo > self._arbol.filas // 4:
+                return self._construir(c)
+            tocadas = {self._arbol.sumar(*fila) for fila in c.execute(
+                select(_C.c.codigo, _C.c.version, _C.c.existencias, _C.c.signo)
+                .where(_C.c.id > self._ultimo, _C.c.id <= seq).order_by(_C.c.id))}
+            self._arbol.rehacer(tocadas)
+            self._ultimo = seq
+        finally:
+            c.rollback()            # no retener un snapshot de lectura (frena checkpoints)
+
+    def arbol(self) -> Arbol:
+        """El árbol al día. Sólo para leer desde un hilo: los demás usan hijos()."""
+        with self._lock:
+            self._al_dia()
+            return self._arbol
+
+    def hijos(self, nivel: int, padres: list[int]) -> bytes:
+        with self._lock:
+            self._al_dia()
+            return self._arbol.hijos(nivel, padres)
+
+    def cerrar(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def filas_de_hojas(engine, hojas, profundidad: int = AE_PROFUNDIDAD) -> dict[str, list[int]]:
+    """{codigo: [version, existencias]} de los productos vivos de esas hojas."""
+    hojas = set(hojas)
+    if not hojas:
+        return {}
+    with engine.connect() as c:
+        return {codigo: [version, existencias]
+                for codigo, version, existencias in c.execute(select(_P.c.codigo, _P.c.version, _P.c.existencias)
+                                                              .where(_P.c.deleted_at.is_(None)))
+                if _hoja(codigo, profundidad) in hojas}
+
+
+def productos(engine, codigos) -> list[dict]:
+    """Filas completas (JSON: fechas en ISO) de esos codigos."""
+    codigos = list(codigos)
+    out = []
+    with engine.connect() as c:
+        for i in range(0, len(codigos), LOTE):
+            for r in c.execute(select(_P).where(_P.c.codigo.in_(codigos[i:i + LOTE]))).mappings():
+                out.append({k: v.isoformat() if isinstance(v, datetime) else v for k, v in r.items()})
+    return out
+
+
+# =========================
+# Pares
+# =========================
+class Par:
+    """El lado que responde (servidor o terminal): árbol mantenido sobre su engine."""
+
+    def __init__(self, engine, profundidad: int = AE_PROFUNDIDAD):
+        self.indice = Indice(engine, profundidad)
+        self.profundidad = profundidad
+
+    def hijos(self, nivel: int, padres: list[int]) -> str:
+        return base64.b64encode(self.indice.hijos(nivel, padres)).decode()
+
+    def hojas(self, hojas: list[int]) -> dict[str, list[int]]:
+        return filas_de_hojas(self.indice.engine, hojas, self.profundidad)
+
+    def productos(self, codigos: list[str]) -> list[dict]:
+        return productos(self.indice.engine, codigos)
+
+    def responder(self, accion: str, cuerpo: dict):
+        """Atiende un POST /sync/ae/productos/<accion> (lo usa el servidor)."""
+        prof = cuerpo.get("profundidad", self.profundidad)
+        if prof != self.profundidad:
+            raise ValueError(f"Profundidad {prof} distinta de la del par ({self.profundidad})")
+        if accion == "hijos":
+            return self.hijos(cuerpo["nivel"], cuerpo["padres"])
+        if accion == "hojas":
+            return self.hojas(cuerpo["hojas"])
+        if accion == "productos":
+            return self.productos(cuerpo["codigos"])
+        raise ValueError(f"Acción desconocida: {accion}")
+
+
+class ParRemoto:
+    """El par detrás de BASE_URL; cuenta los bytes de los cuerpos intercambiados."""
+
+    def __init__(self, profundidad: int = AE_PROFUNDIDAD):
+        self.profundidad = profundidad
+        self.bytes = 0
+        self.viajes = 0
+
+    def _post(self, accion: str, cuerpo: dict):
+        from app.core.net import api_antientropia
+
+        cuerpo = {"profundidad": self.profundidad, **cuerpo}
+        res = api_antientropia("productos", accion, cuerpo)
+        self.bytes += len(json.dumps(cuerpo)) + len(json.dumps(res))
+        self.viajes += 1
+        return res
+
+    def hijos(self, nivel, padres):
+        return self._post("hijos", {"nivel": nivel, "padres": padres})
+
+    def hojas(self, hojas):
+        return self._post("hojas", {"hojas": hojas})
+
+    def productos(self, codigos):
+        return self._post("productos", {"codigos": codigos})
+
+
+# =========================
+# Comparar / reparar
+# =========================
+def comparar(indice: Indice, remoto) -> dict:
+    """
+    Baja por el árbol sólo donde difiere. Devuelve las hojas distintas y, de sus
+    productos: distintos (ambos lo tienen, otra version/existencias), solo_local
+    y solo_remoto.
+    """
+    prof = indice.profundidad
+    if remoto.profundidad != prof:
+        raise ValueError(f"Profundidad local {prof} y del par {remoto.profundidad}")
+    padres = []
+    for nivel in range(prof + 1):
+        mio, suyo = indice.hijos(nivel, padres), base64.b64decode(remoto.hijos(nivel, padres))
+        if len(mio) != len(suyo):
+            raise ValueError("El par respondió otra cantidad de nodos")
+        indices = [0] if nivel == 0 else [p * RAMAS + j for p in padres for j in range(RAMAS)]
+        padres = [i for n, i in enumerate(indices) if mio[8 * n:8 * n + 8] != suyo[8 * n:8 * n + 8]]
+        if not padres:
+            break
+    hojas = padres
+    res = {"iguales": not hojas, "hojas": hojas, "distintos": [], "solo_local": [], "solo_remoto": [],
+           "versiones": {}}
+    if hojas:
+        suyas = remoto.hojas(hojas)
+        mias = filas_de_hojas(indice.engine, hojas, prof)
+        res["distintos"] = sorted(c for c in mias.keys() & suyas.keys() if mias[c] != suyas[c])
+        res["solo_local"] = sorted(mias.keys() - suyas.keys())
+        res["solo_remoto"] = sorted(suyas.keys() - mias.keys())
+        res["versiones"] = {c: (mias.get(c, [None])[0], suyas.get(c, [None])[0])
+                            for c in res["distintos"] + res["solo_remoto"] + res["solo_local"]}
+    return res
+
+
+def reparar(indice: Indice, remoto, diferencias: dict | None = None) -> dict:
+    """
+    Trae del par sólo las filas que difieren y las aplica si su version es mayor o
+    igual a la local (empate: gana el par, que es la referencia). Las que la
+    terminal tiene más nuevas quedan informadas (son para el push). Las que sólo
+    ella tiene vivas también se piden: si el par las tiene borradas llega el
+    tombstone; un tombstone que la terminal ya purgó no se vuelve a insertar.
+    Lo que cambia de existencias queda en el ledger como ajuste.
+    """
+    dif = diferencias if diferencias is not None else comparar(indice, remoto)
+    pedir = [c for c, (mia, suya) in dif["versiones"].items() if suya is not None and (mia is None or suya >= mia)]
+    filas = remoto.productos(pedir + dif["solo_local"]) if pedir or dif["solo_local"] else []
+    solo_remoto, solo_local = set(dif["solo_remoto"]), set(dif["solo_local"])
+    filas = [f for f in filas
+             if not (f.get("deleted_at") and f["codigo"] in solo_remoto)
+             and not (f["codigo"] in solo_local and f["version"] < dif["versiones"][f["codigo"]][0])]
+    for f in filas:
+        for k in _TIEMPOS:
+            if isinstance(f.get(k), str):
+                f[k] = datetime.fromisoformat(f[k])
+    excluded = sqlite_insert(_P).excluded
+    with indice.engine.connect().execution_options(inmediata=True) as c, c.begin():
+        antes = existencias_de(c, (f["codigo"] for f in filas))
+        for i in range(0, len(filas), LOTE):
+            ins = sqlite_insert(_P).values(filas[i:i + LOTE])
+            c.execute(ins.on_conflict_do_update(
+                index_elements=["codigo"],
+                set_={col.name: excluded[col.name] for col in _P.columns if col.name != "codigo"},
+                where=excluded.version >= _P.c.version))
+        if antes:
+            cuadrar_ledger(c, antes, referencia="antientropía")
+    traidas = {f["codigo"] for f in filas}
+    return {"aplicadas": len(filas),
+            "local_mas_nuevo": sorted(set(dif["distintos"]) - set(pedir)),
+            "solo_local": [c for c in dif["solo_local"] if c not in traidas]}
+
+
+# =========================
+# CLI
+# =========================
+def main(argv=None):
+    from app.core.db_local import engine
+
+    ap = argparse.ArgumentParser(prog="python -m app.core.antientropia", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("cmd", choices=["estado", "comparar", "reparar"])
+    ap.add_argument("--profundidad", type=int, default=AE_PROFUNDIDAD)
+    args = ap.parse_args(argv)
+
+    indice = Indice(engine, args.profundidad)
+    try:
+        if args.cmd == "estado":
+            a = indice.arbol()
+            print(f"{a.filas:,} productos en {RAMAS ** a.profundidad:,} hojas; raíz {a.raiz}")
+            return 0
+        remoto = ParRemoto(args.profundidad)
+        dif = comparar(indice, remoto)
+        print(f"{'iguales' if dif['iguales'] else 'distintos'}: {len(dif['hojas'])} hojas, "
+              f"{len(dif['distintos'])} con otra version/existencias, {len(dif['solo_local'])} sólo acá, "
+              f"{len(dif['solo_remoto'])} sólo en el servidor ({remoto.bytes:,} bytes, {remoto.viajes} viajes)")
+        if args.cmd == "reparar" and not dif["iguales"]:
+            r = reparar(indice, remoto, dif)
+            print(f"reparadas {r['aplicadas']} filas; más nuevas acá: {len(r['local_mas_nuevo'])}, "
+                  f"sólo acá: {len(r['solo_local'])} (quedan para el push)")
+        return 0 if dif["iguales"] or args.cmd == "reparar" else 1
+    finally:
+        indice.cerrar()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
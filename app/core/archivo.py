@@ -0,0 +1,414 @@
+# app/core/archivo.py
+"""
+Archivo de boletas antiguas en un SQLite por mes (ARCHIVO_DIR/boletas_AAAA_MM.db).
+
+mi_app.db sólo guarda los últimos ARCHIVO_MESES_VIVOS meses de boletas: la BD
+"caliente" queda chica (cabe en caché, respaldos rápidos, _next_folio y las
+consultas de ventas recorren menos filas). Los meses cerrados se mueven con
+archivar_mes() y se leen adjuntándolos con ATTACH DATABASE sólo cuando hace falta:
+
+    with historico(engine, desde, hasta) as conn:      # vistas TEMP boletas_todas / boleta_detalles_todas
+        conn.execute(select(BOLETAS_TODAS.c.total).where(...))
+    ventas_por_dia(engine, desde, hasta)               # reparte en tramos si hay muchos meses
+    buscar_boleta(engine, "BLT-20250114-000012")       # va directo al archivo del mes del folio
+
+El movimiento es en dos fases (copiar y confirmar en el archivo, verificar, y
+recién entonces borrar de mi_app.db): con WAL, una transacción sobre varias BD
+adjuntas no es atómica entre ellas. Repetirlo tras una caída es seguro.
+
+Sólo se archiva lo que ya subió: push() (app/core/sync_client) sube las boletas
+con created_at posterior a SyncState["boletas:push"] y las busca en mi_app.db,
+así que una boleta más nueva que esa marca se queda hasta la próxima subida (el
+mes queda repartido entre mi_app.db y su archivo; las lecturas ven ambos). Sin
+marca (nunca se subió) no se archiva nada.
+
+Los archivos se crean con el esquema vigente (ID_FORMATO/TS_FORMATO): las
+conversiones de app/core/migraciones sólo tocan mi_app.db. Las columnas que se
+agregan después (p.ej. boleta_detalles.descuento) se completan al adjuntar.
+
+    python -m app.core.archivo listar
+    python -m app.core.archivo archivar [--meses-vivos 3] [--vacuum]
+    python -m app.core.archivo reporte 2025-01-01 2025-06-30
+    python -m app.core.archivo boleta BLT-20250114-000012
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import sqlite3
+import sys
+from contextlib import contextmanager
+from datetime import date, datetime
+from pathlib import Path
+
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, delete, func, select, type_coerce
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.core.config import ARCHIVO_DIR, ARCHIVO_MESES_VIVOS
+from app.core.migraciones import completar_columnas
+from app.core.models import Boleta, BoletaDetalle, SyncState
+from app.core.tiempo import ENTERO
+
+CLAVE_PUSH_BOLETAS = "boletas:push"         # marca de subida de boletas (app/core/sync_client.push)
+
+_RE_ARCHIVO = re.compile(r"^boletas_(\d{4})_(\d{2})\.db$")
+_RE_FOLIO = re.compile(r"^BLT-(\d{4})(\d{2})\d{2}-")
+
+_B = Boleta.__table__
+_D = BoletaDetalle.__table__
+
+# mismas tablas dentro del archivo adjunto como "arch" (ver _adjuntar)
+_md_arch = MetaData()
+_B_ARCH = _B.to_metadata(_md_arch, schema="arch")
+_D_ARCH = _D.to_metadata(_md_arch, schema="arch")
+
+
+def _vista(nombre: str, tabla: Table) -> Table:
+    # columnas con los mismos tipos (IdCompacto/MarcaTiempo convierten al leer), sin FK ni índices
+    return Table(nombre, MetaData(), *[Column(c.name, c.type, key=c.key) for c in tabla.columns])
+
+
+BOLETAS_TODAS = _vista("boletas_todas", _B)
+DETALLES_TODOS = _vista("boleta_detalles_todas", _D)
+
+
+# =========================
+# Meses y archivos
+# =========================
+def _mes(d: date | datetime) -> tuple[int, int]:
+    return d.year, d.month
+
+
+def _sumar_meses(anio: int, mes: int, n: int) -> tuple[int, int]:
+    k = anio * 12 + (mes - 1) + n
+    return k // 12, k % 12 + 1
+
+
+def _inicio(anio: int, mes: int) -> datetime:
+    return datetime(anio, mes, 1)
+
+
+def ruta_mes(anio: int, mes: int, directorio: Path | str = ARCHIVO_DIR) -> Path:
+    return Path(directorio) / f"boletas_{anio:04d}_{mes:02d}.db"
+
+
+def meses_archivados(directorio: Path | str = ARCHIVO_DIR) -> list[tuple[int, int]]:
+    d = Path(directorio)
+    if not d.is_dir():
+        return []
+    out = []
+    for p in d.iterdir():
+        m = _RE_ARCHIVO.match(p.name)
+        if m:
+            out.append((int(m.group(1)), int(m.group(2))))
+    return sorted(out)
+
+
+def primer_mes_vivo(hoy: date | None = None, meses_vivos: int = ARCHIVO_MESES_VIVOS) -> tuple[int, int]:
+    """Los meses anteriores a éste están cerrados y se pueden archivar."""
+    hoy = hoy or datetime.utcnow().date()
+    return _sumar_meses(hoy.year, hoy.month, -(max(1, meses_vivos) - 1))
+
+
+def _limite_adjuntos(dbapi) -> int:
+    # SQLITE_MAX_ATTACHED (10 por defecto); getlimit existe desde Python 3.11
+    try:
+        return dbapi.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+    except AttributeError:
+        return 10
+
+
+def _crear_archivo(path: Path):
+    """Archivo nuevo con el DDL de boletas/boleta_detalles (journal clásico: se escribe una vez)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    eng = create_engine(f"sqlite:///{path}")
+    try:
+        _B.metadata.create_all(bind=eng, tables=[_B, _D])
+    finally:
+        eng.dispose()
+
+
+@contextmanager
+def _adjuntar(conn, adjuntos: dict[str, Path]):
+    """
+    ATTACH sobre la conexión DBAPI (fuera de transacción: SQLite no permite
+    ATTACH dentro de una) y DETACH al salir, para no devolver al pool una
+    conexión con BD adjuntas. Un archivo de antes de una columna nueva la recibe
+    aquí (las vistas y la copia usan las columnas del modelo).
+    """
+    dbapi = conn.connection.driver_connection
+    hechos = []
+    try:
+        for alias, path in adjuntos.items():
+            dbapi.execute(f"ATTACH DATABASE ? AS {alias}", (str(path),))
+            hechos.append(alias)
+            completar_columnas(dbapi, [_B, _D], alias)
+        yield conn
+    finally:
+        if conn.in_transaction():
+            conn.rollback()
+        for alias in reversed(hechos):
+            dbapi.execute(f"DETACH DATABASE {alias}")
+
+
+# =========================
+# Archivar
+# =========================
+def _rango(anio: int, mes: int):
+    a = _inicio(anio, mes)
+    b = _inicio(*_sumar_meses(anio, mes, 1))
+    return (_B.c.created_at >= a) & (_B.c.created_at < b)
+
+
+def _subido(engine) -> datetime:
+    """Marca de subida de boletas; ValueError si nunca se subió (ver docstring del módulo)."""
+    with engine.connect() as c:
+        subido = c.execute(select(SyncState.last_sync)
+                           .where(SyncState.table_name == CLAVE_PUSH_BOLETAS)).scalar_one_or_none()
+    if subido is None:
+        raise ValueError(f"Sin marca de subida de boletas (SyncState['{CLAVE_PUSH_BOLETAS}']): "
+                         "sincronice antes de archivar")
+    return subido
+
+
+def archivar_mes(engine, anio: int, mes: int, *, directorio: Path | str = ARCHIVO_DIR,
+                 hoy: date | None = None, meses_vivos: int = ARCHIVO_MESES_VIVOS) -> int:
+    """
+    Mueve las boletas (y sus detalles) del mes al archivo; devuelve cuántas boletas
+    movió. Las posteriores a la marca de subida se quedan en mi_app.db.
+    """
+    if (anio, mes) >= primer_mes_vivo(hoy, meses_vivos):
+        raise ValueError(f"El mes {anio}-{mes:02d} no está cerrado (se conservan {meses_vivos} meses)")
+    subido = _subido(engine)
+    path = ruta_mes(anio, mes, directorio)
+    if not path.exists():
+        _crear_archivo(path)
+
+    rango = _rango(anio, mes) & (_B.c.created_at <= subido)
+    ids_mes = select(_B.c.id).where(rango)
+    with engine.connect() as conn, _adjuntar(conn, {"arch": path}):
+        # 1) copiar (OR IGNORE: un reintento tras caída no duplica) y confirmar en el archivo
+        with conn.begin():
+            cols_b = [c.name for c in _B.columns]
+            cols_d = [c.name for c in _D.columns]
+            conn.execute(sqlite_insert(_B_ARCH).prefix_with("OR IGNORE")
+                         .from_select(cols_b, select(*[_B.c[n] for n in cols_b]).where(rango)))
+            conn.execute(sqlite_insert(_D_ARCH).prefix_with("OR IGNORE")
+                         .from_select(cols_d, select(*[_D.c[n] for n in cols_d])
+                                      .where(_D.c.boleta_id.in_(ids_mes))))
+        # 2) verificar y borrar de la BD caliente
+        with conn.begin():
+            faltan = conn.execute(
+                select(func.count()).select_from(_B).where(rango, _B.c.id.not_in(select(_B_ARCH.c.id)))
+            ).scalar_one()
+            faltan += conn.execute(
+                select(func.count()).select_from(_D)
+                .where(_D.c.boleta_id.in_(ids_mes), _D.c.id.not_in(select(_D_ARCH.c.id)))
+            ).scalar_one()
+            if faltan:
+                raise RuntimeError(f"Archivo {path.name} incompleto ({faltan} filas sin copiar): no se borra nada")
+            conn.execute(delete(_D).where(_D.c.boleta_id.in_(ids_mes)))
+            n = conn.execute(delete(_B).where(rango)).rowcount
+    return n
+
+
+def archivar_antiguas(engine, *, meses_vivos: int = ARCHIVO_MESES_VIVOS, directorio: Path | str = ARCHIVO_DIR,
+                      hoy: date | None = None, vacuum: bool = False, log=print) -> dict[tuple[int, int], int]:
+    """Archiva todos los meses cerrados que aún estén en mi_app.db (hasta la marca de subida)."""
+    with engine.connect() as c:
+        primero = c.execute(select(func.min(_B.c.created_at))).scalar_one()
+    if primero is None:
+        return {}
+    tope = primer_mes_vivo(hoy, meses_vivos)
+    subido = _subido(engine)
+    out = {}
+    ym = _mes(primero)
+    while ym < tope:
+        n = archivar_mes(engine, *ym, directorio=directorio, hoy=hoy, meses_vivos=meses_vivos)
+        if n:
+            out[ym] = n
+            log(f"  {ym[0]}-{ym[1]:02d}: {n} boletas → {ruta_mes(*ym, directorio).name}")
+        ym = _sumar_meses(*ym, 1)
+    with engine.connect() as c:
+        pendientes = c.execute(select(func.count()).select_from(_B)
+                               .where(_B.c.created_at > subido, _B.c.created_at < _inicio(*tope))).scalar_one()
+    if pendientes:
+        log(f"  {pendientes} boletas de meses cerrados sin subir: se archivan después de la próxima subida")
+    if vacuum and out:
+        # sin auto_vacuum las páginas liberadas se reutilizan pero el archivo no se achica
+        with engine.connect() as c:
+            c.connection.driver_connection.execute("VACUUM")
+    return out
+
+
+# =========================
+# Lectura (vistas y enrutador)
+# =========================
+def _meses_en(desde: date | datetime | None, hasta: date | datetime | None,
+              directorio: Path | str) -> list[tuple[int, int]]:
+    meses = meses_archivados(directorio)
+    if desde is not None:
+        meses = [m for m in meses if m >= _mes(desde)]
+    if hasta is not None:
+        meses = [m for m in meses if m <= _mes(hasta)]
+    return meses
+
+
+@contextmanager
+def _historico_meses(engine, meses: list[tuple[int, int]], directorio: Path | str):
+    adjuntos = {f"a_{a:04d}{m:02d}": ruta_mes(a, m, directorio) for a, m in meses}
+    with engine.connect() as conn:
+        dbapi = conn.connection.driver_connection
+        limite = _limite_adjuntos(dbapi)
+        if len(adjuntos) > limite:
+            raise ValueError(f"El rango abarca {len(adjuntos)} meses archivados y SQLite adjunta "
+                             f"a lo más {limite}: acote el rango o use ventas_por_dia()")
+        with _adjuntar(conn, adjuntos):
+            # vistas TEMP: son las únicas que pueden leer de otras BD adjuntas
+            for vista, tabla in ((BOLETAS_TODAS, _B), (DETALLES_TODOS, _D)):
+                cols = ", ".join(c.name for c in tabla.columns)
+                partes = [f"SELECT {cols} FROM main.{tabla.name}"]
+                partes += [f"SELECT {cols} FROM {a}.{tabla.name}" for a in adjuntos]
+                dbapi.execute(f"CREATE TEMP VIEW {vista.name} AS " + " UNION ALL ".join(partes))
+            try:
+                yield conn
+            finally:
+                if conn.in_transaction():
+                    conn.rollback()
+                for vista in (BOLETAS_TODAS, DETALLES_TODOS):
+                    dbapi.execute(f"DROP VIEW IF EXISTS temp.{vista.name}")
+
+
+@contextmanager
+def historico(engine, desde: date | datetime | None = None, hasta: date | datetime | None = None, *,
+              directorio: Path | str = ARCHIVO_DIR):
+    """
+    Conexión con las vistas TEMP boletas_todas / boleta_detalles_todas (BOLETAS_TODAS /
+    DETALLES_TODOS para consultar con Core): mi_app.db + los meses archivados del rango.
+    """
+    with _historico_meses(engine, _meses_en(desde, hasta, directorio), directorio) as conn:
+        yield conn
+
+
+def _dia(col):
+    # created_at → 'AAAA-MM-DD' según el formato guardado (app/core/tiempo)
+    if ENTERO:
+        return func.date(type_coerce(col, Integer) / 1_000_000, "unixepoch")
+    return func.date(col)
+
+
+def ventas_por_dia(engine, desde: date | datetime, hasta: date | datetime, *,
+                   directorio: Path | str = ARCHIVO_DIR) -> list[tuple[str, int, int]]:
+    """
+    [(AAAA-MM-DD, boletas, total)] entre desde y hasta (inclusive), vivas y archivadas.
+    Enrutador: adjunta los meses en tramos que respetan el límite de ATTACH.
+    """
+    a = desde if isinstance(desde, datetime) else datetime(desde.year, desde.month, desde.day)
+    b = hasta if isinstance(hasta, datetime) else datetime(hasta.year, hasta.month, hasta.day, 23, 59, 59, 999999)
+    meses = _meses_en(a, b, directorio)
+    q_vivas = (select(_dia(_B.c.created_at).label("dia"), func.count(), func.sum(_B.c.total))
+               .where(_B.c.created_at >= a, _B.c.created_at <= b).group_by("dia"))
+    acum: dict[str, list[int]] = {}
+
+    def _sumar(filas):
+        for dia, n, total in filas:
+            x = acum.setdefault(dia, [0, 0])
+            x[0] += n
+            x[1] += total or 0
+
+    with engine.connect() as conn:
+        _sumar(conn.execute(q_vivas))
+        tramo = max(1, _limite_adjuntos(conn.connection.driver_connection))
+    for i in range(0, len(meses), tramo):
+        parte = meses[i:i + tramo]
+        adjuntos = {f"a_{y:04d}{m:02d}": ruta_mes(y, m, directorio) for y, m in parte}
+        with engine.connect() as conn, _adjuntar(conn, adjuntos):
+            for alias in adjuntos:
+                t = _B.to_metadata(MetaData(), schema=alias)
+                _sumar(conn.execute(
+                    select(_dia(t.c.created_at).label("dia"), func.count(), func.sum(t.c.total))
+                    .where(t.c.created_at >= a, t.c.created_at <= b).group_by("dia")
+                ))
+    return [(d, n, t) for d, (n, t) in sorted(acum.items())]
+
+
+def buscar_boleta(engine, folio: str, *, directorio: Path | str = ARCHIVO_DIR) -> dict | None:
+    """Boleta + detalles por folio: primero en mi_app.db, si no en el archivo del mes del folio."""
+    def _leer(conn, tb, td):
+        b = conn.execute(select(tb).where(tb.c.folio == folio)).mappings().first()
+        if b is None:
+            return None
+        dets = conn.execute(select(td).where(td.c.boleta_id == b["id"])).mappings().all()
+        return {**b, "detalles": [dict(d) for d in dets]}
+
+    with engine.connect() as conn:
+        r = _leer(conn, _B, _D)
+    if r is not None:
+        return r
+    m = _RE_FOLIO.match(folio)
+    if not m:
+        return None
+    path = ruta_mes(int(m.group(1)), int(m.group(2)), directorio)
+    if not path.exists():
+        return None
+    with engine.connect() as conn, _adjuntar(conn, {"arch": path}):
+        return _leer(conn, _B_ARCH, _D_ARCH)
+
+
+# =========================
+# CLI
+# =========================
+def _fecha(s: str) -> date:
+    return date.fromisoformat(s)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m app.core.archivo", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--dir", default=str(ARCHIVO_DIR), help="carpeta de los archivos mensuales")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("listar", help="meses archivados")
+    pa = sub.add_parser("archivar", help="mover los meses cerrados a su archivo")
+    pa.add_argument("--meses-vivos", type=int, default=ARCHIVO_MESES_VIVOS)
+    pa.add_argument("--vacuum", action="store_true", help="compactar mi_app.db al terminar")
+    pr = sub.add_parser("reporte", help="boletas y total por día (vivas + archivadas)")
+    pr.add_argument("desde", type=_fecha)
+    pr.add_argument("hasta", type=_fecha)
+    pb = sub.add_parser("boleta", help="mostrar una boleta por folio")
+    pb.add_argument("folio")
+    args = ap.parse_args(argv)
+
+    from app.core.db_local import engine, init_db
+    init_db()
+
+    if args.cmd == "listar":
+        for a, m in meses_archivados(args.dir):
+            p = ruta_mes(a, m, args.dir)
+            print(f"{a}-{m:02d}  {p.stat().st_size / 2**20:8.1f} MB  {p}")
+        return 0
+    if args.cmd == "archivar":
+        try:
+            res = archivar_antiguas(engine, meses_vivos=args.meses_vivos, directorio=args.dir, vacuum=args.vacuum)
+        except ValueError as e:
+            print(e)
+            return 1
+        print(f"{sum(res.values())} boletas archivadas en {len(res)} meses")
+        return 0
+    if args.cmd == "reporte":
+        filas = ventas_por_dia(engine, args.desde, args.hasta, directorio=args.dir)
+        for dia, n, total in filas:
+            print(f"{dia}  {n:6d}  {total:14,d}")
+        print(f"{'total':10}  {sum(f[1] for f in filas):6d}  {sum(f[2] for f in filas):14,d}")
+        return 0
+    b = buscar_boleta(engine, args.folio, directorio=args.dir)
+    if b is None:
+        print(f"Boleta {args.folio} no encontrada")
+        return 1
+    print(f"{b['folio']}  {b['created_at']:%Y-%m-%d %H:%M}  total {b['total']:,d}")
+    for d in b["detalles"]:
+        print(f"  {d['codigo_producto']:14} {d['cantidad']:4d} x {d['precio_unitario']:>9,d} = {d['subtotal']:>10,d}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+# app/core/bootstrap.py
+"""
+Arranque de una terminal nueva desde un snapshot SQLite del catálogo.
+
+Con SyncState.last_sync = None, el primer pull pide el catálogo completo como una
+sola lista JSON y lo aplica fila a fila.
+En cambio acá:
+
+  origen   crear_snapshot(): VACUUM INTO (copia consistente sin bloquear escritores),
+           deja sólo las tablas del catálogo (sin triggers), comprime (gzip) y escribe
+           un manifiesto con sha256, filas, la marca de agua (max updated_at de
+           productos) y, si el origen lo da, el cursor de su secuencia de cambios.
+  terminal bootstrap(): descarga (GET /sync/snapshot) o copia desde una carpeta,
+           verifica sha256 e integrity_check, lo carga en mi_app.db en una sola
+           transacción (API de backup: o queda todo el snapshot o nada), crea las
+           tablas locales que faltan y fija SyncState("productos").last_sync = marca
+           (y last_version = cursor): el siguiente pull sólo trae lo cambiado después
+           del snapshot.
+
+Sólo para terminales vacías: si hay boletas, outbox pendiente o ya se sincronizó,
+bootstrap() no toca nada (ValueError).
+
+    python -m app.core.bootstrap crear CARPETA [--db servidor.db]   # en el origen
+    python -m app.core.bootstrap cargar [--desde CARPETA]            # en la terminal (sin --desde: BASE_URL)
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.core.config import DB_PATH, ID_FORMATO, TS_FORMATO
+from app.core.models import Boleta, Outbox, Producto, SyncState
+
+TABLAS_SNAPSHOT = ("productos", "alembic_version")
+MANIFIESTO = "manifiesto.json"
+BLOQUE = 1 << 20
+
+
+def _sha256(ruta: Path) -> str:
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        while b := f.read(BLOQUE):
+            h.update(b)
+    return h.hexdigest()
+
+
+def _formatos(ruta: Path) -> dict:
+    from app.core.migraciones import formato_ids_actual, formato_ts_actual
+
+    eng = create_engine(f"sqlite:///{ruta}")
+    try:
+        with eng.connect() as c:
+            return {"ids": formato_ids_actual(c), "tiempos": formato_ts_actual(c)}
+    finally:
+        eng.dispose()
+
+
+# =========================
+# Origen
+# =========================
+def crear_snapshot(db_path: str | Path, directorio: str | Path, *, cursor: int | None = None) -> dict:
+    """
+    Snapshot comprimido del catálogo de db_path en 'directorio' + manifiesto.json.
+    El manifiesto se escribe al final (os.replace): un cliente nunca ve un
+    manifiesto que apunte a un archivo a medio escribir. 'cursor' (secuencia de
+    cambios del origen, ver sync_client.pull) se lee antes de la copia: a lo más
+    hace bajar otra vez algo que el snapshot ya trae.
+    """
+    d = Path(directorio)
+    d.mkdir(parents=True, exist_ok=True)
+    marca = datetime.utcnow()
+    copia = d / f"snapshot-{marca:%Y%m%d%H%M%S%f}.db"
+    try:
+        src = sqlite3.connect(str(db_path))
+        try:
+            src.execute("VACUUM INTO ?", (str(copia),))
+        finally:
+            src.close()
+        con = sqlite3.connect(str(copia), isolation_level=None)
+        try:
+            sobran = [r[0] for r in con.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")
+                if r[0] not in TABLAS_SNAPSHOT]
+            for t in sobran:
+                con.execute(f'DROP TABLE "{t}"')
+            # los de la app se recrean en la terminal con sus tablas (actualizar_bd);
+            # los propios del origen apuntan a tablas que la terminal no tiene
+            for (trg,) in con.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'").fetchall():
+                con.execute(f'DROP TRIGGER "{trg}"')
+            con.execute("VACUUM")
+            con.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            con.close()
+
+        eng = create_engine(f"sqlite:///{copia}")
+        try:
+            with eng.connect() as c:
+                filas, hwm = c.execute(select(func.count(), func.max(Producto.updated_at))).one()
+        finally:
+            eng.dispose()
+        formatos = _formatos(copia)
+
+        gz = copia.with_suffix(".db.gz")
+        with open(copia, "rb") as f, gzip.open(gz, "wb", compresslevel=6) as g:
+            shutil.copyfileobj(f, g, BLOQUE)
+        manifiesto = {
+            "archivo": gz.name,
+            "sha256": _sha256(gz),
+            "bytes": gz.stat().st_size,
+            "sha256_db": _sha256(copia),
+            "bytes_db": copia.stat().st_size,
+            "filas": filas,
+            "hwm": hwm.isoformat() if hwm else None,
+            "cursor": cursor,
+            "creado": marca.isoformat(),
+            **formatos,
+        }
+    finally:
+        if copia.exists():
+            copia.unlink()
+    tmp = d / (MANIFIESTO + ".tmp")
+    tmp.write_text(json.dumps(manifiesto, indent=2), encoding="utf-8")
+    os.replace(tmp, d / MANIFIESTO)
+    # snapshots anteriores: ya no los apunta ningún manifiesto
+    for viejo in d.glob("snapshot-*.db.gz"):
+        if viejo.name != manifiesto["archivo"]:
+            viejo.unlink()
+    return manifiesto
+
+
+# =========================
+# Terminal
+# =========================
+def _terminal_vacia(engine) -> str | None:
+    """Motivo por el que la terminal NO está vacía (None si lo está)."""
+    from sqlalchemy import inspect
+
+    with engine.connect() as c:
+        tablas = set(inspect(c).get_table_names())
+        if "sync_state" in tablas and c.execute(
+                select(SyncState.last_sync).where(SyncState.table_name == "productos")).scalar():
+            return "ya sincronizó productos"
+        if "boletas" in tablas and c.execute(select(Boleta.id).limit(1)).first():
+            return "tiene boletas"
+        if "outbox" in tablas and c.execute(select(Outbox.id).where(Outbox.sent.is_(False)).limit(1)).first():
+            return "tiene cambios sin enviar"
+    return None
+
+
+def _obtener(desde, trabajo: Path) -> tuple[dict, Path]:
+    """(manifiesto, .db.gz local): copia desde una carpeta o descarga desde BASE_URL."""
+    if desde is not None:
+        d = Path(desde)
+        man = json.loads((d / MANIFIESTO).read_text(encoding="utf-8"))
+        gz = trabajo / man["archivo"]
+        shutil.copyfile(d / man["archivo"], gz)
+        return man, gz
+    from app.core.net import api_descargar, api_snapshot
+
+    man = api_snapshot()
+    gz = trabajo / man["archivo"]
+    api_descargar(f"/sync/snapshot/{man['archivo']}", gz)
+    return man, gz
+
+
+def bootstrap(engine=None, *, desde: str | Path | None = None, log=print) -> dict:
+    """
+    Carga el snapshot en la BD de 'engine' (por defecto la de la app) y deja la
+    marca de agua para el sync incremental. desde=None descarga de BASE_URL.
+    """
+    from app.core.migraciones import actualizar_bd
+    from app.core.respaldo import verificar
+
+    if engine is None:
+        from app.core.db_local import engine
+    db_path = Path(engine.url.database)
+    motivo = _terminal_vacia(engine) if db_path.exists() else None
+    if motivo:
+        raise ValueError(f"La terminal no está vacía ({motivo}): use el sync normal")
+
+    t0 = time.perf_counter()
+    trabajo = db_path.parent / "bootstrap"
+    trabajo.mkdir(parents=True, exist_ok=True)
+    try:
+        man, gz = _obtener(desde, trabajo)
+        seg_descarga = time.perf_counter() - t0
+        for que, local in (("ids", ID_FORMATO), ("tiempos", TS_FORMATO)):
+            if man.get(que) and man[que] != local:
+                raise ValueError(f"El snapshot usa {que} '{man[que]}' y esta terminal '{local}'")
+        if _sha256(gz) != man["sha256"]:
+            raise ValueError(f"Checksum del snapshot no coincide ({gz.name}): descarga incompleta o dañada")
+        db_tmp = trabajo / "snapshot.db"
+        with gzip.open(gz, "rb") as g, open(db_tmp, "wb") as f:
+            shutil.copyfileobj(g, f, BLOQUE)
+        if _sha256(db_tmp) != man["sha256_db"]:
+            raise ValueError("Checksum del snapshot descomprimido no coincide")
+        problemas = verificar(db_tmp)
+        if problemas:
+            raise ValueError(f"Snapshot dañado: {'; '.join(problemas[:5])}")
+
+        # una sola transacción de escritura sobre mi_app.db (el -wal viejo no se mezcla)
+        engine.dispose()
+        src = sqlite3.connect(f"file:{db_tmp}?mode=ro", uri=True)
+        dst = sqlite3.connect(str(db_path), isolation_level=None, timeout=30)
+        try:
+            src.backup(dst)
+            dst.execute("PRAGMA journal_mode=WAL")
+        finally:
+            dst.close()
+            src.close()
+        actualizar_bd(engine)            # tablas locales (boletas, outbox, ...) que el snapshot no trae
+        hwm = datetime.fromisoformat(man["hwm"]) if man.get("hwm") else None
+        marca = {"last_sync": hwm, "last_version": man.get("cursor")}
+        with engine.begin() as c:
+            c.execute(sqlite_insert(SyncState).values(table_name="productos", **marca)
+                      .on_conflict_do_update(index_elements=["table_name"], set_=marca))
+    finally:
+        shutil.rmtree(trabajo, ignore_errors=True)
+    res = {"filas": man["filas"], "hwm": hwm, "bytes": man["bytes"], "seg_descarga": seg_descarga,
+           "seg": time.perf_counter() - t0}
+    log(f"Snapshot cargado: {res['filas']:,} productos, {res['bytes'] / 2**20:.1f} MB, "
+        f"{res['seg']:.1f}s; sync incremental desde {hwm}")
+    return res
+
+
+# =========================
+# CLI
+# =========================
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m app.core.bootstrap", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    pc = sub.add_parser("crear", help="snapshot del catálogo en CARPETA (en el origen)")
+    pc.add_argument("carpeta")
+    pc.add_argument("--db", default=str(DB_PATH))
+    pl = sub.add_parser("cargar", help="arrancar esta terminal desde un snapshot")
+    pl.add_argument("--desde", help="carpeta con manifiesto.json (sin esto: descarga de BASE_URL)")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "crear":
+        man = crear_snapshot(args.db, args.carpeta)
+        print(f"{man['archivo']}: {man['filas']:,} productos, {man['bytes'] / 2**20:.1f} MB "
+              f"(sin comprimir {man['bytes_db'] / 2**20:.1f} MB), hwm {man['hwm']}")
+        return 0
+    bootstrap(desde=args.desde)
+    if args.desde is None:
+        from app.core.sync_client import resumen, pull
+        ok, msg = resumen("Pull", pull())       # productos desde la marca; el resto completo
+        print(msg)
+        return 0 if ok else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,308 @@
+# app/core/codigos_barra.py
+"""
+Lo que lee el escáner → (producto, cantidad, precio): códigos alternos, GS1 y balanza.
+
+    res = get_resolutor()
+    res.resolver("7801234567894")     # EAN del proveedor   → Lectura("P-0012", cantidad=1)
+    res.resolver("7801234000018*2")   # pack de 6, dos veces → Lectura("P-0012", cantidad=12)
+    res.resolver("2000123012346")     # etiqueta de balanza  → Lectura("P-0040", precio=1234, etiqueta=...)
+
+Orden al resolver un código (sin el sufijo de cantidad):
+  1. codigos_alternos: EAN del proveedor, packs ('unidades' por escaneo), PLU de balanza
+  2. el código del producto (productos.codigo)
+  3. etiqueta de balanza: EAN-13 con prefijo de BALANZA_PREFIJOS, dígito de control
+     válido; tras el prefijo van BALANZA_PLU dígitos de artículo (se busca como 1-2)
+     y el resto hasta el control es el valor: pesos o gramos según BALANZA_VALOR
+  4. un GTIN (8, 12, 13 o 14 dígitos) con dígito de control malo es una mala lectura:
+     ValueError, no "no existe"
+
+Cantidad: "COD*3", o "CODx3" si "CODx3" no es un código en sí mismo.
+
+Resolutor guarda cada lectura resuelta y la ficha de cada producto (lo que pide
+una línea del ticket: descripción, precio_venta, impuesto): un escaneo repetido
+es un dict lookup para la lectura y otro para la ficha, sin tocar la BD. Los
+alternos se cargan completos una vez; un commit que toque codigos_alternos
+(app/core/eventos) vacía todo. Un commit que toque productos (precio, borrado, el
+stock de cada venta) deja las fichas viejas: el siguiente escaneo relee en UNA
+consulta las últimas FICHAS_RECARGA fichas usadas y el resto se vuelve a leer de
+a una, al primer escaneo de cada producto. Un producto borrado no tiene ficha
+(→ "no existe").
+Lo que no se resuelve no se guarda (un alterno nuevo se ve al tiro).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from itertools import islice
+from typing import Callable, NamedTuple
+
+from sqlalchemy import select
+
+from app.core.config import BALANZA_PLU, BALANZA_PREFIJOS, BALANZA_VALOR, RESOLUCION_CACHE
+from app.core.eventos import get_bus
+from app.core.models import CodigoAlterno, Producto
+
+LARGOS_GTIN = (8, 12, 13, 14)
+VALORES = ("precio", "peso")
+FORMATO_CANTIDAD = "Usa: CODIGO o CODIGO*x (p.ej. ABC*3)"
+FICHAS_RECARGA = 500        # fichas que se releen juntas tras un commit en productos (una consulta)
+
+
+# =========================
+# GS1
+# =========================
+def digito_control(cuerpo: str) -> int:
+    """Dígito de control GS1 (módulo 10) de los dígitos sin el control; sirve para EAN-8/13, UPC-A y GTIN-14."""
+    suma = 0
+    for i, ch in enumerate(reversed(cuerpo)):
+        d = ord(ch) - 48
+        suma += d * 3 if i % 2 == 0 else d
+    return (10 - suma % 10) % 10
+
+
+def es_gtin(codigo: str) -> bool:
+    """Sólo dígitos y largo de GTIN (no dice si el control cuadra)."""
+    return len(codigo) in LARGOS_GTIN and codigo.isdigit()
+
+
+def gtin_valido(codigo: str) -> bool:
+    return es_gtin(codigo) and digito_control(codigo[:-1]) == ord(codigo[-1]) - 48
+
+
+def completar_gtin(cuerpo: str) -> str:
+    """Agrega el dígito de control (para armar códigos de prueba o de circulación interna)."""
+    return cuerpo + str(digito_control(cuerpo))
+
+
+# =========================
+# Etiquetas de balanza
+# =========================
+@dataclass(frozen=True)
+class FormatoBalanza:
+    prefijos: tuple = BALANZA_PREFIJOS    # EAN-13 que empiezan así son de balanza
+    plu: int = BALANZA_PLU                # dígitos del artículo tras el prefijo
+    valor: str = BALANZA_VALOR            # "precio" (pesos) | "peso" (gramos)
+
+    def __post_init__(self):
+        if self.valor not in VALORES:
+            raise ValueError(f"BALANZA_VALOR inválido: {self.valor}")
+        largos = {len(p) for p in self.prefijos}
+        if len(largos) > 1:
+            raise ValueError("Los prefijos de balanza deben tener todos el mismo largo")
+        if self.prefijos and 13 - 1 - largos.pop() - self.plu < 1:
+            raise ValueError("BALANZA_PLU no deja dígitos para el valor")
+
+    def decodificar(self, codigo: str) -> tuple[str, int] | None:
+        """(plu, valor) si 'codigo' es una etiqueta de balanza de este formato; None si no."""
+        if len(codigo) != 13 or not self.prefijos or not gtin_valido(codigo):
+            return None
+        lp = len(self.prefijos[0])
+        if codigo[:lp] not in self.prefijos:
+            return None
+        return codigo[lp:lp + self.plu], int(codigo[lp + self.plu:12])
+
+
+@dataclass(frozen=True)
+class Lectura:
+    codigo: str                    # productos.codigo
+    cantidad: int = 1
+    precio: int | None = None      # etiqueta con precio: lo que se cobra por ella
+    gramos: int | None = None      # etiqueta con peso
+    etiqueta: str | None = None    # el código leído, si es de balanza (va en su propia línea)
+
+    def precio_para(self, precio_venta: int) -> int:
+        """Precio unitario de la línea: el de la etiqueta, peso × precio_venta (por kg) o precio_venta."""
+        if self.precio is not None:
+            return self.precio
+        if self.gramos is not None:
+            return (self.gramos * int(precio_venta) + 500) // 1000
+        return int(precio_venta)
+
+
+class Ficha(NamedTuple):
+    descripcion: str
+    precio_venta: int
+    porcentaje_impuesto: int
+
+
+def separar_cantidad(raw: str) -> list[tuple[str, int]]:
+    """
+    Candidatos (codigo, cantidad) en orden: "COD*3" → [("COD", 3)];
+    "BOX12" → [("BOX12", 1), ("BO", 12)] (la x sólo separa si lo de antes no es un código).
+    ValueError si el formato no sirve o la cantidad no es positiva.
+    """
+    s = raw.strip()
+    if "*" in s:
+        cod, _, q = s.rpartition("*")
+        cod, q = cod.strip(), q.strip()
+        if not cod or not q.isdigit() or any(ch.isspace() for ch in cod):
+            raise ValueError(FORMATO_CANTIDAD)
+        return [(cod, _positiva(q))]
+    out = []
+    if s and not any(ch.isspace() for ch in s):
+        out.append((s, 1))
+    i = max(s.rfind("x"), s.rfind("X"))
+    if i > 0:
+        cod, q = s[:i].strip(), s[i + 1:].strip()
+        if cod and q.isdigit() and not any(ch.isspace() for ch in cod):
+            out.append((cod, _positiva(q)))
+    if not out:
+        raise ValueError(FORMATO_CANTIDAD)
+    return out
+
+
+def _positiva(q: str) -> int:
+    n = int(q)
+    if n <= 0:
+        raise ValueError("La cantidad debe ser mayor que 0.")
+    return n
+
+
+# =========================
+# Resolutor con caché
+# =========================
+class Resolutor:
+    def __init__(self, sesiones: Callable | None = None, *, formato: FormatoBalanza | None = None,
+                 tope: int = RESOLUCION_CACHE, bus=None):
+        if sesiones is None:
+            from app.core.db_local import SessionLocal as sesiones
+        self._sesiones = sesiones
+        self.formato = formato or FormatoBalanza()
+        self.tope = tope
+        self._cache: dict[str, Lectura] = {}
+        self._alternos: dict[str, tuple[str, int]] | None = None    # codigo_barra → (codigo, unidades)
+        self._generacion = 0
+        self._fichas: dict[str, Ficha] = {}                         # codigo → lo que pide la línea del ticket
+        self._fichas_viejas = False
+        self._generacion_fichas = 0
+        self.aciertos = 0
+        self.fallos = 0
+        bus = bus or get_bus()
+        self._desuscribir = [bus.suscribir(["codigos_alternos"], lambda _t: self.invalidar()),
+                             bus.suscribir(["productos"], lambda _t: self.invalidar_fichas())]
+
+    def invalidar(self):
+        self._generacion += 1
+        self._cache = {}
+        self._alternos = None
+        self.invalidar_fichas()
+
+    def invalidar_fichas(self):
+        self._generacion_fichas += 1
+        self._fichas_viejas = True
+
+    def cerrar(self):
+        for quitar in self._desuscribir:
+            quitar()
+
+    def _cargar_alternos(self) -> dict[str, tuple[str, int]]:
+        gen = self._generacion
+        with self._sesiones() as s:
+            filas = s.execute(
+                select(CodigoAlterno.codigo_barra, CodigoAlterno.codigo_producto, CodigoAlterno.unidades)
+                .where(CodigoAlterno.deleted_at.is_(None))
+            ).all()
+        alt = {b: (c, int(u or 1)) for b, c, u in filas}
+        if gen == self._generacion:         # si hubo un commit mientras se leía, se vuelve a cargar la próxima
+            self._alternos = alt
+        return alt
+
+    def _leer_fichas(self, codigos: list[str]) -> dict[str, Ficha]:
+        with self._sesiones() as s:
+            filas = s.execute(
+                select(Producto.codigo, Producto.descripcion, Producto.precio_venta, Producto.porcentaje_impuesto)
+                .where(Producto.codigo.in_(codigos), Producto.deleted_at.is_(None))
+            ).all()
+        return {c: Ficha(d, int(pv or 0), int(imp or 0)) for c, d, pv, imp in filas}
+
+    def _recargar_fichas(self):
+        """Tras un commit en productos: relee las últimas fichas usadas; las demás se olvidan."""
+        while self._fichas_viejas:
+            gen = self._generacion_fichas
+            self._fichas_viejas = False
+            recientes = list(islice(reversed(self._fichas), FICHAS_RECARGA))[::-1]
+            frescas = self._leer_fichas(recientes) if recientes else {}
+            if gen == self._generacion_fichas:
+                self._fichas = {c: frescas[c] for c in recientes if c in frescas}
+
+    def ficha(self, codigo: str) -> Ficha | None:
+        """Descripción, precio_venta e impuesto del producto vivo 'codigo' (None si no existe o está borrado)."""
+        if self._fichas_viejas:
+            self._recargar_fichas()
+        f = self._fichas.pop(codigo, None)
+        if f is not None:
+            self._fichas[codigo] = f        # al final: las últimas usadas son las que se releen
+            return f
+        gen = self._generacion_fichas
+        f = self._leer_fichas([codigo]).get(codigo)
+        if f is not None and gen == self._generacion_fichas:    # un commit mientras se leía: no se guarda
+            if len(self._fichas) >= self.tope:
+                self._fichas = {}
+            self._fichas[codigo] = f
+        return f
+
+    def _existe(self, codigo: str) -> bool:
+        return self.ficha(codigo) is not None
+
+    def _producto(self, codigo: str) -> tuple[str, int] | None:
+        """(codigo, unidades) por alterno o por código de producto."""
+        alt = self._alternos if self._alternos is not None else self._cargar_alternos()
+        hit = alt.get(codigo)
+        if hit is not None:
+            return hit
+        if self._existe(codigo):
+            return codigo, 1
+        return None
+
+    def _codigo(self, codigo: str) -> Lectura | None:
+        hit = self._producto(codigo)
+        if hit is not None:
+            return Lectura(hit[0], hit[1])
+        bal = self.formato.decodificar(codigo)
+        if bal is not None:
+            plu, valor = bal
+            hit = self._producto(plu)
+            if hit is None and plu.lstrip("0"):
+                hit = self._producto(plu.lstrip("0"))
+            if hit is not None:
+                if self.formato.valor == "precio":
+                    return Lectura(hit[0], 1, precio=valor, etiqueta=codigo)
+                return Lectura(hit[0], 1, gramos=valor, etiqueta=codigo)
+            return None
+        if es_gtin(codigo) and not gtin_valido(codigo):
+            raise ValueError(f"Código '{codigo}': dígito verificador inválido (vuelve a escanear).")
+        return None
+
+    def resolver(self, raw: str) -> Lectura | None:
+        """Lectura de lo escaneado (con cantidad); None si no existe; ValueError si el formato no sirve."""
+        lect = self._cache.get(raw)
+        if lect is not None:
+            self.aciertos += 1
+            return lect
+        self.fallos += 1
+        error = None
+        for cod, cant in separar_cantidad(raw):
+            try:
+                lect = self._codigo(cod)
+            except ValueError as e:
+                error = error or e
+                continue
+            if lect is not None:
+                if cant != 1:
+                    lect = Lectura(lect.codigo, lect.cantidad * cant, lect.precio, lect.gramos, lect.etiqueta)
+                if len(self._cache) >= self.tope:
+                    self._cache = {}
+                self._cache[raw] = lect
+                return lect
+        if error is not None:
+            raise error
+        return None
+
+
+_resolutor: Resolutor | None = None
+
+
+def get_resolutor() -> Resolutor:
+    global _resolutor
+    if _resolutor is None:
+        _resolutor = Resolutor()
+    return _resolutor
@@ -9,7 +9,72 @@ appdata = Path(os.getenv("LOCALAPPDATA", Path.home())) / APP_NAME
 appdata.mkdir(parents=True, exist_ok=True)
 
 DB_PATH = appdata / "mi_app.db"
+TICKETS_DB_PATH = appdata / "tickets.db"   # journal de carritos (aparte: no compite con mi_app.db)
+
+# Claves de boletas/detalles/OC/tránsito/outbox: UUIDv7 (ordenadas por tiempo)
+# "bin16" → BLOB de 16 bytes | "texto" → 36 caracteres (formato anterior)
+ID_FORMATO = os.getenv("SM_ID_FORMATO", "bin16")
+# created_at/updated_at/deleted_at: "us" → INTEGER µs desde epoch | "texto" → DateTime (formato anterior)
+TS_FORMATO = os.getenv("SM_TS_FORMATO", "us")
 
 BASE_URL = "https://api.ejemplo.com"  # <- cámbiala cuando tengas backend
 API_TOKEN = ""
 HTTP_TIMEOUT = 5.0
+
+# Recibos (boletas impresas)
+TIENDA_NOMBRE = "Santo Mardones"
+RECIBO_ANCHO = 42                     # columnas (80mm ≈ 42-48, 58mm ≈ 32)
+RECIBO_FORMATO = "texto"              # "texto" | "escpos" | "pdf"
+IMPRESORA = ""                        # "" → archivos en RECIBOS_DIR | "tcp://192.168.1.50:9100"
+RECIBOS_DIR = appdata / "recibos"
+
+# Diagnóstico de consultas (panel oculto Ctrl+Shift+D + log JSONL rotativo)
+DIAGNOSTICO = os.getenv("SM_DIAGNOSTICO", "1") != "0"
+DIAG_LENTA_MS = 50.0                  # consultas más lentas que esto se registran con parámetros
+DIAG_LOG = appdata / "diagnostico.jsonl"
+TRAZAS_PATH = appdata / "latencias.json"   # percentiles de escaneo→pantalla (se escribe al cerrar)
+
+# Archivo de boletas: los meses cerrados pasan a ARCHIVO_DIR/boletas_AAAA_MM.db (app/core/archivo.py)
+ARCHIVO_DIR = appdata / "archivo"
+ARCHIVO_MESES_VIVOS = 3               # mes actual + 2 anteriores quedan en mi_app.db
+
+# Exportación analítica a Parquet (app/core/analitica.py, proceso aparte)
+ANALITICA_DIR = appdata / "analitica"
+ANALITICA_INTERVALO_S = 900           # cada 15 min
+ANALITICA_LAG_S = 60                  # no exportar ventas más nuevas que esto (pueden estar sin commit)
+
+# Respaldos en caliente de mi_app.db (app/core/respaldo.py, API de backup de SQLite)
+RESPALDO_DIR = appdata / "respaldos"
+RESPALDO_INTERVALO_S = 6 * 3600       # uno cada 6 h de uso
+RESPALDO_GENERACIONES = 7             # se conservan los 7 más nuevos
+RESPALDO_PAGINAS = 128                # páginas por paso (128 × 4 KB = 512 KB)
+RESPALDO_PAUSA_S = 0.02               # pausa entre pasos con la caja quieta
+RESPALDO_PAUSA_ACTIVA_S = 0.25        # ... y si la caja hizo commit desde el paso anterior
+
+# Mantenimiento (app/core/mantenimiento.py): purgas, incremental_vacuum, ANALYZE
+MANT_RETENCION_DIAS = 30              # outbox enviado y tombstones sincronizados más viejos se borran
+MANT_OCIO_S = 120                     # sin commits durante esto = caja ociosa
+MANT_CADA_S = 20 * 3600               # una vez por jornada
+MANT_LIMITE_S = 2.0                   # tope de tiempo por tarea (en ocio)
+MANT_CIERRE_S = 10.0                  # tope por tarea al cerrar la app
+MANT_LOTE = 500                       # filas por transacción al purgar
+MANT_PAGINAS = 256                    # páginas por paso de incremental_vacuum
+MANT_VACUUM_MAX_MB = 512              # al cierre: VACUUM para activar auto_vacuum sólo bajo este tamaño
+
+# Anti-entropía del catálogo (app/core/antientropia.py): árbol de Merkle sobre productos
+AE_PROFUNDIDAD = 4                    # 16**4 = 65.536 hojas (~15 productos por hoja con 1M)
+AE_CAMBIOS_MAX = 200_000              # registro de cambios (ae_cambios) que conserva el mantenimiento
+
+# Sincronización (app/core/sync_client.py): tablas según su REGISTRO
+SYNC_HILOS = 4                        # pulls/pushes simultáneos (la espera es de red)
+
+# Impuestos del carrito (app/core/impuestos.py): la tasa es el porcentaje_impuesto de cada producto
+PRECIO_INCLUYE_IVA = True             # precio_venta ya trae el impuesto (boleta)
+IMPUESTO_REDONDEO = "linea"           # "linea" | "documento" (una vez por tasa sobre el acumulado)
+IVA_DEFAULT = 19                      # tasa de líneas sin producto conocido (tickets anteriores)
+
+# Códigos de barra (app/core/codigos_barra.py): alternos, GS1 y etiquetas de balanza
+BALANZA_PREFIJOS = tuple(str(n) for n in range(20, 30))   # EAN-13 "2x": circulación interna / balanza
+BALANZA_PLU = 5                       # dígitos del artículo tras el prefijo; el resto hasta el control es el valor
+BALANZA_VALOR = "precio"              # "precio": pesos | "peso": gramos (se cobra peso × precio_venta por kg)
+RESOLUCION_CACHE = 100_000            # lecturas resueltas que se recuerdan (al pasar el tope se vacía)
@@ -1,11 +1,58 @@
 # app/core/db_local.py
-from sqlalchemy import create_engine
+from collections import Counter
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from .config import DB_PATH
-from .models import Base
 
-engine = create_engine(f"sqlite:///{DB_PATH}", future=True)
+# BEGIN IMMEDIATE pedidos por archivo en este proceso (se cuentan antes de esperar
+# el lock): el mantenimiento cede entre lotes si cambió (mantenimiento._actividad)
+_INMEDIATAS: Counter = Counter()
+
+
+def _sqlite_pragmas(dbapi_conn, _record):
+    # el driver sqlite3 no abre transacción en los SELECT (sólo antes del primer
+    # INSERT/UPDATE): lo desactivamos y emitimos BEGIN nosotros en _sqlite_begin
+    dbapi_conn.isolation_level = None
+    # WAL: lectores no bloquean al escritor y cada commit es un append al -wal
+    # synchronous=NORMAL: en WAL sigue siendo seguro ante caída de la app (no del SO)
+    cur = dbapi_conn.cursor()
+    # sólo tiene efecto en una BD nueva (antes de crear tablas); las existentes: mantenimiento.activar_auto_vacuum
+    cur.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.close()
+
+
+def _sqlite_begin(conn):
+    # lectura + escritura quedan en la MISMA transacción (sin lost updates)
+    # execution_options(inmediata=True): BEGIN IMMEDIATE, toma el lock de escritura al empezar.
+    # Con BEGIN a secas, una transacción que lee y después escribe falla al instante
+    # ("database is locked", sin esperar busy_timeout) si otra conexión hizo commit entremedio.
+    if conn.get_execution_options().get("inmediata"):
+        _INMEDIATAS[conn.engine.url.database] += 1
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+    else:
+        conn.exec_driver_sql("BEGIN")
+
+
+def escrituras_pedidas(engine) -> int:
+    """Cuántas transacciones inmediatas se pidieron sobre la BD de 'engine' en este proceso."""
+    return _INMEDIATAS[engine.url.database]
+
+
+def make_engine(path, **kw):
+    """Engine SQLite con los PRAGMA de la app (también lo usan los benchmarks)."""
+    eng = create_engine(f"sqlite:///{path}", future=True, **kw)
+    event.listen(eng, "connect", _sqlite_pragmas)
+    event.listen(eng, "begin", _sqlite_begin)
+    return eng
+
+
+engine = make_engine(DB_PATH)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
 def init_db():
-    Base.metadata.create_all(bind=engine)
+    # create_all + migraciones pendientes (app/core/migraciones.py)
+    from .migraciones import actualizar_bd
+    actualizar_bd(engine)
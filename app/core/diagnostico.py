@@ -0,0 +1,289 @@
+# app/core/diagnostico.py
+"""
+Instrumentación de consultas SQL por acción de la UI.
+
+    from app.core.diagnostico import accion
+
+    @accion("ventas.escanear")
+    def _add_by_code(): ...
+
+    with accion("compras.listar"):
+        ...
+
+Con instalar(engine) se enganchan before/after_cursor_execute: cada consulta se
+atribuye a la acción en curso (contextvar; fuera de una acción → "(sin acción)")
+y se acumulan conteo y tiempo. Las consultas más lentas que DIAG_LENTA_MS se
+guardan con sus parámetros. Al log JSONL rotativo (DIAG_LOG) van las consultas
+lentas y, cada minuto, una línea por acción con lo acumulado en ese lapso; lo
+escribe un hilo aparte, así la caja no paga el costo de disco.
+
+El costo por consulta es un perf_counter y un par de sumas; sin instalar(),
+accion() sólo fija/restaura el contextvar.
+"""
+from __future__ import annotations
+
+import functools
+import inspect
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from queue import SimpleQueue, Empty
+
+from sqlalchemy import event
+
+from app.core.config import DIAG_LENTA_MS, DIAG_LOG
+
+SIN_ACCION = "(sin acción)"
+_MAX_PARAMS = 300          # caracteres de repr(parámetros) a guardar
+_MAX_SQL = 2000
+
+_accion: ContextVar["_Marca | None"] = ContextVar("diag_accion", default=None)
+
+
+@dataclass
+class EstadisticaAccion:
+    nombre: str
+    llamadas: int = 0
+    consultas: int = 0
+    sql_ms: float = 0.0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    @property
+    def consultas_por_llamada(self) -> float:
+        return self.consultas / self.llamadas if self.llamadas else float(self.consultas)
+
+
+@dataclass
+class ConsultaLenta:
+    cuando: str
+    accion: str
+    ms: float
+    sql: str
+    parametros: str
+
+
+class _Marca:
+    """Acumulador de la acción en curso (una por entrada a accion())."""
+    __slots__ = ("nombre", "consultas", "sql_ms")
+
+    def __init__(self, nombre: str):
+        self.nombre = nombre
+        self.consultas = 0
+        self.sql_ms = 0.0
+
+
+class Diagnostico:
+    def __init__(self, lento_ms: float = DIAG_LENTA_MS, log_path: str | Path | None = DIAG_LOG,
+                 max_lentas: int = 200, intervalo_log: float = 60.0):
+        self.lento_ms = lento_ms
+        self._lock = threading.Lock()
+        self._acciones: dict[str, EstadisticaAccion] = {}
+        self._volcado: dict[str, EstadisticaAccion] = {}   # lo ya escrito al log (para escribir deltas)
+        self._lentas: deque[ConsultaLenta] = deque(maxlen=max_lentas)
+        self._engines = []
+        self._cola: SimpleQueue | None = None
+        if log_path:
+            # el log lo escribe un hilo aparte: consultas lentas al momento y, cada
+            # intervalo_log segundos, una línea por acción con lo acumulado desde la anterior
+            self._cola = SimpleQueue()
+            self._handler = RotatingFileHandler(log_path, maxBytes=2_000_000, backupCount=5, encoding="utf-8")
+            threading.Thread(target=self._escritor, args=(self._cola, intervalo_log),
+                             name="diag-jsonl", daemon=True).start()
+
+    # ---------- enganche ----------
+    def instalar(self, engine):
+        event.listen(engine, "before_cursor_execute", self._antes)
+        event.listen(engine, "after_cursor_execute", self._despues)
+        self._engines.append(engine)
+
+    def desinstalar(self):
+        for eng in self._engines:
+            event.remove(eng, "before_cursor_execute", self._antes)
+            event.remove(eng, "after_cursor_execute", self._despues)
+        self._engines.clear()
+
+    def _antes(self, conn, cursor, statement, parameters, context, executemany):
+        context._diag_t0 = time.perf_counter()
+
+    def _despues(self, conn, cursor, statement, parameters, context, executemany):
+        ms = (time.perf_counter() - context._diag_t0) * 1e3
+        m = _accion.get()
+        if m is not None:
+            m.consultas += 1
+            m.sql_ms += ms
+        else:
+            with self._lock:
+                st = self._acciones.get(SIN_ACCION)
+                if st is None:
+                    st = self._acciones[SIN_ACCION] = EstadisticaAccion(SIN_ACCION)
+                st.consultas += 1
+                st.sql_ms += ms
+        if ms >= self.lento_ms:
+            self._lenta(m.nombre if m else SIN_ACCION, ms, statement, parameters)
+
+    def _lenta(self, nombre, ms, statement, parameters):
+        c = ConsultaLenta(
+            cuando=_hora(time.time()),
+            accion=nombre,
+            ms=round(ms, 3),
+            sql=" ".join(statement.split())[:_MAX_SQL],
+            parametros=repr(parameters)[:_MAX_PARAMS],
+        )
+        with self._lock:
+            self._lentas.append(c)
+        if self._cola is not None:
+            self._cola.put({"tipo": "lenta", **asdict(c)})
+
+    # ---------- log JSONL ----------
+    def _escritor(self, cola: SimpleQueue, intervalo: float):
+        proximo = time.monotonic() + intervalo
+        while True:
+            try:
+                obj = cola.get(timeout=max(0.0, proximo - time.monotonic()))
+            except Empty:
+                obj = {}
+            if obj is None:
+                self._volcar_acciones()
+                break
+            if obj:
+                self._linea(obj)
+            if time.monotonic() >= proximo:
+                self._volcar_acciones()
+                proximo = time.monotonic() + intervalo
+        self._handler.close()
+
+    def _linea(self, obj: dict):
+        try:
+            self._handler.emit(logging.makeLogRecord({"msg": json.dumps(obj, ensure_ascii=False)}))
+        except Exception:
+            pass
+
+    def _volcar_acciones(self):
+        cuando = _hora(time.time())
+        with self._lock:
+            actuales = [EstadisticaAccion(**asdict(a)) for a in self._acciones.values()]
+            previos, self._volcado = self._volcado, {a.nombre: a for a in actuales}
+        for a in actuales:
+            p = previos.get(a.nombre) or EstadisticaAccion(a.nombre)
+            if a.consultas == p.consultas and a.llamadas == p.llamadas:
+                continue
+            self._linea({
+                "tipo": "accion", "cuando": cuando, "accion": a.nombre,
+                "llamadas": a.llamadas - p.llamadas, "consultas": a.consultas - p.consultas,
+                "sql_ms": round(a.sql_ms - p.sql_ms, 3), "total_ms": round(a.total_ms - p.total_ms, 3),
+            })
+
+    def cerrar_log(self):
+        """Escribe lo pendiente y detiene el hilo del log."""
+        if self._cola is not None:
+            self._cola.put(None)
+            self._cola = None
+
+    # ---------- acciones ----------
+    def _cerrar(self, m: _Marca, total_ms: float):
+        with self._lock:
+            st = self._acciones.get(m.nombre)
+            if st is None:
+                st = self._acciones[m.nombre] = EstadisticaAccion(m.nombre)
+            st.llamadas += 1
+            st.consultas += m.consultas
+            st.sql_ms += m.sql_ms
+            st.total_ms += total_ms
+            if total_ms > st.max_ms:
+                st.max_ms = total_ms
+
+    # ---------- lectura ----------
+    def resumen(self) -> list[EstadisticaAccion]:
+        """Acciones ordenadas por tiempo SQL acumulado (copias)."""
+        with self._lock:
+            out = [EstadisticaAccion(**asdict(a)) for a in self._acciones.values()]
+        out.sort(key=lambda a: a.sql_ms, reverse=True)
+        return out
+
+    def lentas(self) -> list[ConsultaLenta]:
+        with self._lock:
+            return list(reversed(self._lentas))
+
+    def reiniciar(self):
+        with self._lock:
+            self._acciones.clear()
+            self._volcado.clear()
+            self._lentas.clear()
+
+
+def _hora(t: float) -> str:
+    return datetime.fromtimestamp(t).isoformat(timespec="milliseconds")
+
+
+_diag: Diagnostico | None = None
+
+
+class accion:
+    """
+    Context manager / decorador que atribuye las consultas a 'nombre'.
+    Como decorador descarta los argumentos posicionales sobrantes (igual que Qt
+    con los slots), así se puede conectar a clicked(bool), currentIndexChanged(int), etc.
+    """
+
+    def __init__(self, nombre: str):
+        self.nombre = nombre
+        self._token = self._marca = None
+        self._t0 = 0.0
+
+    def __call__(self, fn):
+        params = inspect.signature(fn).parameters.values()
+        n = None if any(p.kind is p.VAR_POSITIONAL for p in params) else sum(
+            p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD) for p in params)
+        nombre = self.nombre
+
+        @functools.wraps(fn)
+        def inner(*args, **kw):
+            # una instancia por llamada: reentrante y segura entre hilos
+            with accion(nombre):
+                return fn(*(args if n is None else args[:n]), **kw)
+        return inner
+
+    def __enter__(self):
+        self._marca = _Marca(self.nombre)
+        self._token = _accion.set(self._marca)
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        total_ms = (time.perf_counter() - self._t0) * 1e3
+        _accion.reset(self._token)
+        if _diag is not None:
+            _diag._cerrar(self._marca, total_ms)
+        return False
+
+
+def instalar(engine=None, **kw) -> Diagnostico:
+    """Activa la instrumentación sobre 'engine' (por defecto db_local.engine). Idempotente."""
+    global _diag
+    if engine is None:
+        from app.core.db_local import engine
+    if _diag is None:
+        _diag = Diagnostico(**kw)
+    if engine not in _diag._engines:
+        _diag.instalar(engine)
+    return _diag
+
+
+def desinstalar():
+    global _diag
+    if _diag is not None:
+        _diag.desinstalar()
+        _diag.cerrar_log()
+        _diag = None
+
+
+def get_diagnostico() -> Diagnostico | None:
+    return _diag
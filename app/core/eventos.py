@@ -0,0 +1,194 @@
+# app/core/eventos.py
+"""
+Bus de cambios por tabla: las páginas recargan sólo si sus tablas cambiaron.
+
+    from app.core.eventos import interes
+
+    _catalogo = interes("productos")
+
+    def enter_pro_catalogo(root):
+        ...
+        _catalogo.si_cambio(lambda: _refresh(page))     # nada que hacer → no toca la BD
+
+Con instalar(engine) se engancha after_cursor_execute: cada INSERT/UPDATE/DELETE
+anota su tabla en la conexión, y al commit se publican juntas (un rollback las
+descarta). Cubre repositorios, ORM, Core y text() que pasen por el engine.
+
+Los commits de fuera del engine (otro proceso, el mantenimiento con su conexión
+sqlite3 propia) se detectan con PRAGMA data_version sobre una conexión aparte:
+cambia si OTRA conexión hizo commit. revisar() lo consulta (microsegundos) cada
+vez que una página pregunta si_cambio(); si cambió sin commits locales entremedio,
+se publica TODAS (no se sabe qué tabla). Un commit externo que cae en el mismo
+intervalo que uno local se atribuye al local; el botón Refrescar sigue forzando.
+
+Las páginas no se llaman entre sí: escribir en productos ya deja sucia a toda
+página interesada en productos. suscribir() avisa en el hilo que hizo commit.
+"""
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+from collections import Counter
+from typing import Callable, Iterable
+
+from sqlalchemy import event
+
+TODAS = "*"
+_CLAVE = "eventos_tablas"      # conn.info: tablas escritas en la transacción en curso
+
+# primera palabra + tabla; lo demás (SELECT, PRAGMA, DDL) no publica nada
+_ESCRITURA = re.compile(
+    r"\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+[\"`\[]?(\w+)",
+    re.IGNORECASE,
+)
+
+
+class Bus:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versiones: Counter = Counter()    # tabla → commits que la tocaron (TODAS incluida)
+        self._subs: list[tuple[frozenset, Callable]] = []
+        self._engines = []
+        self._con: sqlite3.Connection | None = None
+        self._data_version: int | None = None
+        self._locales = 0                       # commits locales publicados
+        self._locales_vistos = 0                # ... al último revisar()
+        self.externos = 0
+
+    # ---------- enganche ----------
+    def instalar(self, engine):
+        event.listen(engine, "after_cursor_execute", self._anotar)
+        event.listen(engine, "commit", self._commit)
+        event.listen(engine, "rollback", self._rollback)
+        self._engines.append(engine)
+        if self._con is None and engine.url.database:
+            self._con = sqlite3.connect(engine.url.database, isolation_level=None, check_same_thread=False)
+            self._data_version = self._con.execute("PRAGMA data_version").fetchone()[0]
+
+    def desinstalar(self):
+        for eng in self._engines:
+            event.remove(eng, "after_cursor_execute", self._anotar)
+            event.remove(eng, "commit", self._commit)
+            event.remove(eng, "rollback", self._rollback)
+        self._engines.clear()
+        with self._lock:
+            if self._con is not None:
+                self._con.close()
+                self._con = None
+
+    def _anotar(self, conn, cursor, statement, parameters, context, executemany):
+        if statement[:1] in "SsPp":         # SELECT / PRAGMA: lo habitual, sin regex
+            return
+        m = _ESCRITURA.match(statement)
+        if m:
+            conn.info.setdefault(_CLAVE, set()).add(m.group(1).lower())
+
+    def _commit(self, conn):
+        tablas = conn.info.pop(_CLAVE, None)
+        if tablas:
+            self.publicar(tablas)
+
+    def _rollback(self, conn):
+        conn.info.pop(_CLAVE, None)
+
+    # ---------- publicar / consultar ----------
+    def publicar(self, tablas: Iterable[str], *, externo: bool = False):
+        tablas = frozenset(tablas)
+        with self._lock:
+            for t in tablas:
+                self._versiones[t] += 1
+            if externo:
+                self.externos += 1
+            else:
+                self._locales += 1
+            subs = list(self._subs)
+        for filtro, fn in subs:
+            if TODAS in tablas or filtro & tablas:
+                try:
+                    fn(tablas)
+                except Exception:
+                    pass                        # un suscriptor roto no corta el commit
+
+    def suscribir(self, tablas: Iterable[str], fn: Callable[[frozenset], None]) -> Callable[[], None]:
+        """fn(tablas) en cada commit que toque alguna de 'tablas'; devuelve la función para desuscribir."""
+        par = (frozenset(tablas), fn)
+        with self._lock:
+            self._subs.append(par)
+
+        def quitar():
+            with self._lock:
+                if par in self._subs:
+                    self._subs.remove(par)
+        return quitar
+
+    def revisar(self) -> bool:
+        """Sondea PRAGMA data_version; True si hubo un commit externo (y publica TODAS)."""
+        with self._lock:
+            if self._con is None:
+                return False
+            v = self._con.execute("PRAGMA data_version").fetchone()[0]
+            if v == self._data_version:
+                return False
+            self._data_version = v
+            solo_externo = self._locales == self._locales_vistos
+            self._locales_vistos = self._locales
+        if solo_externo:
+            self.publicar([TODAS], externo=True)
+        return solo_externo
+
+    def version(self, tablas: Iterable[str]) -> tuple[int, int]:
+        """Cambia (y nunca vuelve atrás) cada vez que se publica alguna de 'tablas'."""
+        with self._lock:
+            return sum(self._versiones[t] for t in tablas), self._versiones[TODAS]
+
+
+class Interes:
+    """Las tablas que mira una página y la versión del bus con que cargó por última vez."""
+
+    def __init__(self, tablas: Iterable[str], bus: Bus | None = None):
+        self.tablas = frozenset(t.lower() for t in tablas)
+        self._bus = bus
+        self._visto: tuple[int, int] | None = None
+
+    @property
+    def bus(self) -> Bus:
+        return self._bus or get_bus()
+
+    def cambio(self) -> bool:
+        self.bus.revisar()
+        return self._visto != self.bus.version(self.tablas)
+
+    def si_cambio(self, recargar: Callable[[], object], *, forzar: bool = False) -> bool:
+        """Llama a recargar() sólo si hubo cambios desde la última vez (o forzar). True si recargó."""
+        bus = self.bus
+        bus.revisar()
+        v = bus.version(self.tablas)          # antes de leer: lo que entre durante la carga queda pendiente
+        if not forzar and v == self._visto:
+            return False
+        recargar()
+        self._visto = v
+        return True
+
+    def invalidar(self):
+        self._visto = None
+
+
+_bus = Bus()
+
+
+def instalar(engine=None) -> Bus:
+    """Publica los commits de 'engine' (por defecto db_local.engine). Idempotente."""
+    if engine is None:
+        from app.core.db_local import engine
+    if engine not in _bus._engines:
+        _bus.instalar(engine)
+    return _bus
+
+
+def get_bus() -> Bus:
+    return _bus
+
+
+def interes(*tablas: str) -> Interes:
+    return Interes(tablas)
@@ -0,0 +1,97 @@
+# app/core/ids.py
+"""
+Claves primarias ordenadas por tiempo (UUIDv7, RFC 9562).
+
+- gen_id(): UUIDv7 como texto canónico. Los primeros 48 bits son el instante en
+  ms, así las inserciones caen al final del B-tree (no dispersas como uuid4) y
+  "lo más reciente" es simplemente ORDER BY id DESC.
+- IdCompacto: tipo de columna. Con ID_FORMATO = "bin16" se guarda como BLOB de
+  16 bytes (vs 36 del texto, en la tabla y en cada índice/FK que la referencia);
+  con "texto" como String. En Python siempre es el str canónico, así que el
+  resto del código no cambia.
+
+Para convertir una BD existente: app/core/migraciones.py (Alembic).
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+import uuid
+
+from sqlalchemy import String, LargeBinary
+from sqlalchemy.types import TypeDecorator
+
+from app.core.config import ID_FORMATO
+
+BINARIO = ID_FORMATO == "bin16"
+
+_lock = threading.Lock()
+_ult_ms = 0
+_seq = 0
+
+
+def uuid7() -> uuid.UUID:
+    """
+    48 bits ms unix | ver 7 | 12 bits secuencia | variante | 62 bits aleatorios.
+    Dentro del mismo ms la secuencia se incrementa: los ids de un proceso son estrictamente crecientes.
+    """
+    global _ult_ms, _seq
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _ult_ms:
+            _ult_ms = ms
+            _seq = int.from_bytes(os.urandom(2), "big") & 0x07FF      # deja margen para incrementar
+        else:
+            _seq += 1
+            if _seq > 0x0FFF:                                            # desborde: "toma prestado" el ms siguiente
+                _ult_ms += 1
+                _seq = 0
+            ms = _ult_ms
+    rand_b = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+    n = (ms << 80) | (0x7 << 76) | (_seq << 64) | (0b10 << 62) | rand_b
+    return uuid.UUID(int=n)
+
+
+def gen_id() -> str:
+    return str(uuid7())
+
+
+def id_a_bd(v):
+    """str canónico → valor a guardar (bytes en bin16). Para SQL plano con text()."""
+    if v is None or not BINARIO:
+        return v
+    return a_bytes(v)
+
+
+def a_bytes(v) -> bytes:
+    if isinstance(v, (bytes, bytearray)):
+        return bytes(v) if len(v) == 16 else uuid.UUID(bytes(v).decode()).bytes
+    return uuid.UUID(str(v)).bytes
+
+
+def a_texto(v) -> str:
+    if isinstance(v, (bytes, bytearray)) and len(v) == 16:
+        return str(uuid.UUID(bytes=bytes(v)))
+    if isinstance(v, (bytes, bytearray)):
+        return bytes(v).decode()
+    return str(v)
+
+
+class IdCompacto(TypeDecorator):
+    """UUID como BLOB(16) (ID_FORMATO="bin16") o texto; en Python siempre str."""
+    impl = String
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        return dialect.type_descriptor(LargeBinary(16) if BINARIO else String(36))
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return a_bytes(value) if BINARIO else a_texto(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return a_texto(value)
@@ -0,0 +1,410 @@
+# app/core/importacion.py
+"""
+Importación / exportación masiva del catálogo de productos (CSV / XLSX).
+
+Uso por consola:
+    python -m app.core.importacion importar proveedor.csv [--errores errores.csv] [--lote 5000]
+    python -m app.core.importacion exportar catalogo.xlsx
+
+- Lectura en streaming (csv.reader / openpyxl read_only): nunca se carga el archivo entero.
+- Validación y cálculo de precio_venta por COLUMNAS dentro de cada bloque.
+- Upsert con executemany (INSERT ... ON CONFLICT(codigo) DO UPDATE), una transacción por bloque.
+- Un producto que ya existe sólo cambia en las columnas que trae el archivo (celda
+  vacía = se deja como está); precio_venta se recalcula sólo si viene margen o pv.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import sys
+import time
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.models import Producto
+from app.core.repositories import registrar_movimientos
+from app.ui.a_py.precios import calcular_precio_venta
+
+LOTE_DEFAULT = 5000
+IVA_DEFAULT = 19
+ALBERGADO_DEFAULT = "catalogado y albergado"
+
+# columna canónica → encabezados aceptados (normalizados: minúsculas, sin tildes ni espacios)
+ALIAS = {
+    "codigo":              ["codigo", "cod", "sku", "code"],
+    "descripcion":         ["descripcion", "desc", "nombre", "producto"],
+    "precio_costo":        ["precio_costo", "preciocosto", "costo", "pc"],
+    "ganancia":            ["ganancia", "ganancia_pct", "margen", "ganancia_esperada"],
+    "precio_venta":        ["precio_venta", "precioventa", "pv", "precio"],
+    "porcentaje_impuesto": ["porcentaje_impuesto", "impuesto", "iva", "imp"],
+    "existencias":         ["existencias", "stock", "hay", "cantidad"],
+    "inv_minimo":          ["inv_minimo", "minimo", "min"],
+    "inv_maximo":          ["inv_maximo", "maximo", "max"],
+    "albergado":           ["albergado"],
+}
+
+EXPORT_COLS = [
+    "codigo", "descripcion", "precio_costo", "precio_venta", "porcentaje_impuesto",
+    "existencias", "inv_minimo", "inv_maximo", "albergado",
+]
+
+
+@dataclass
+class ResultadoImportacion:
+    leidas: int = 0
+    insertadas_o_actualizadas: int = 0
+    errores: list[tuple[int, str, str]] = field(default_factory=list)  # (línea, código, motivo)
+    segundos: float = 0.0
+
+    def resumen(self) -> str:
+        return (f"{self.insertadas_o_actualizadas}/{self.leidas} filas importadas, "
+                f"{len(self.errores)} con error, {self.segundos:.2f}s")
+
+
+# =========================
+# Lectura en streaming
+# =========================
+def _norm(h) -> str:
+    h = unicodedata.normalize("NFKD", str(h or "")).encode("ascii", "ignore").decode()
+    return h.strip().lower().replace(" ", "_").replace(".", "").replace("%", "")
+
+
+def _mapear_encabezados(header: list) -> dict[str, int]:
+    idx = {_norm(h): i for i, h in enumerate(header)}
+    out = {}
+    for col, alias in ALIAS.items():
+        for a in alias:
+            if a in idx:
+                out[col] = idx[a]
+                break
+    if "codigo" not in out or "descripcion" not in out:
+        raise ValueError("El archivo debe tener columnas 'codigo' y 'descripcion'")
+    return out
+
+
+def _filas_csv(path: Path) -> Iterator[list]:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        muestra = f.read(4096)
+        f.seek(0)
+        try:
+            dialecto = csv.Sniffer().sniff(muestra, delimiters=",;\t")
+        except csv.Error:
+            dialecto = csv.excel
+        yield from csv.reader(f, dialecto)
+
+
+def _filas_xlsx(path: Path) -> Iterator[list]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError as e:
+        raise RuntimeError("Para leer .xlsx instala 'openpyxl'") from e
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for row in wb.active.iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        wb.close()
+
+
+def leer_filas(path: str | Path) -> Iterator[list]:
+    path = Path(path)
+    if path.suffix.lower() in (".xlsx", ".xlsm"):
+        return _filas_xlsx(path)
+    return _filas_csv(path)
+
+
+# =========================
+# Validación por columnas
+# =========================
+def _num(v) -> float | None:
+    """'1.990' / '$ 1.990' / '12,5' / 12 → número; vacío → None; inválido → NaN."""
+    if v is None:
+        return None
+    if isinstance(v, (int, float)):
+        return float(v)
+    t = str(v).strip().replace("$", "").replace(" ", "")
+    if not t:
+        return None
+    if "," in t:
+        t = t.replace(".", "").replace(",", ".")   # 1.234,5 → 1234.5
+    elif t.count(".") > 1 or (t.count(".") == 1 and len(t.split(".")[1]) == 3):
+        t = t.replace(".", "")                     # 1.234 (miles CLP) → 1234
+    try:
+        return float(t)
+    except ValueError:
+        return float("nan")
+
+
+def _columna(filas: list[list], idx: int | None) -> list:
+    if idx is None:
+        return [None] * len(filas)
+    return [f[idx] if idx < len(f) else None for f in filas]
+
+
+_NUMERICAS = ("precio_costo", "precio_venta", "porcentaje_impuesto", "inv_minimo", "inv_maximo")
+
+
+def _actuales(session: Session, codigos: list[str]) -> dict[str, tuple]:
+    """codigo → valores de _NUMERICAS de los productos que ya existen (para lo que el archivo no trae)."""
+    if not codigos:
+        return {}
+    q = select(Producto.codigo, *[getattr(Producto, c) for c in _NUMERICAS]).where(Producto.codigo.in_(codigos))
+    return {r[0]: tuple(r[1:]) for r in session.execute(q)}
+
+
+def _validar_bloque(filas: list[list], lineas: list[int], cols: dict[str, int],
+                    vistos: set[str], errores: list, actuales: dict[str, tuple] | None = None) -> list[dict]:
+    """
+    Procesa un bloque columna por columna y devuelve las filas válidas listas para el upsert.
+    'actuales' (ver _actuales) completa lo que una fila no trae en los productos que ya existen.
+    """
+    n = len(filas)
+    codigo = [str(c).strip() if c is not None else "" for c in _columna(filas, cols.get("codigo"))]
+    desc   = [str(d).strip() if d is not None else "" for d in _columna(filas, cols.get("descripcion"))]
+    num = {k: list(map(_num, _columna(filas, cols.get(k))))
+           for k in ("precio_costo", "ganancia", "precio_venta", "porcentaje_impuesto",
+                     "existencias", "inv_minimo", "inv_maximo")}
+    alb = [str(a).strip() if a not in (None, "") else ALBERGADO_DEFAULT
+           for a in _columna(filas, cols.get("albergado"))]
+
+    ok = [True] * n
+
+    def marcar(mascara, motivo):
+        for i in range(n):
+            if ok[i] and mascara[i]:
+                ok[i] = False
+                errores.append((lineas[i], codigo[i], motivo))
+
+    marcar([not c for c in codigo], "código vacío")
+    marcar([not d for d in desc], "descripción vacía")
+    for k, v in num.items():
+        marcar([x is not None and (x != x or x < 0) for x in v], f"{k} inválido")
+
+    dup = []
+    for i in range(n):
+        es_dup = ok[i] and codigo[i] in vistos
+        if ok[i]:
+            vistos.add(codigo[i])
+        dup.append(es_dup)
+    marcar(dup, "código repetido en el archivo")
+
+    # ya validado: las filas con NaN quedan fuera, aquí sólo se neutralizan para el cálculo.
+    # Lo que no viene (columna ausente o celda vacía) sale del producto actual o, si es nuevo, del default.
+    actuales = actuales or {}
+    defaults = {"precio_costo": 0.0, "precio_venta": 0.0, "porcentaje_impuesto": float(IVA_DEFAULT),
+                "inv_minimo": 0.0, "inv_maximo": 0.0}
+    limpio = {}
+    for k, v in num.items():
+        j = _NUMERICAS.index(k) if k in _NUMERICAS else None
+        col = []
+        for i, x in enumerate(v):
+            if x is not None and x == x:
+                col.append(x)
+            elif j is not None and codigo[i] in actuales:
+                col.append(float(actuales[codigo[i]][j] or 0))
+            else:
+                col.append(defaults.get(k, 0.0))
+        limpio[k] = col
+    pc, imp = limpio["precio_costo"], limpio["porcentaje_impuesto"]
+    # precio_venta: el del archivo; si no viene, desde costo + ganancia + impuesto cuando hay
+    # ganancia o el producto es nuevo; si no, el actual (un cambio de costo no mueve el precio)
+    pv = []
+    for i in range(n):
+        if num["precio_venta"][i] or num["ganancia"][i] is not None or codigo[i] not in actuales:
+            pv.append(num["precio_venta"][i] or calcular_precio_venta(pc[i], limpio["ganancia"][i], imp[i]))
+        else:
+            pv.append(limpio["precio_venta"][i])
+
+    now = datetime.utcnow()
+    return [
+        {
+            "codigo": codigo[i],
+            "descripcion": desc[i],
+            "precio_costo": int(round(pc[i])),
+            "precio_venta": int(round(pv[i])),
+            "porcentaje_impuesto": int(round(imp[i])),
+            "existencias": int(limpio["existencias"][i]),
+            "inv_minimo": int(limpio["inv_minimo"][i]),
+            "inv_maximo": int(limpio["inv_maximo"][i]),
+            "albergado": alb[i],
+            "updated_at": now,
+            "version": 1,
+        }
+        for i in range(n) if ok[i]
+    ]
+
+
+# =========================
+# Upsert por lotes
+# =========================
+def _upsert_stmt(cols: dict[str, int]):
+    """
+    Un producto existente sólo actualiza las columnas del encabezado (precio_venta
+    también si viene la ganancia). existencias sólo aplica a productos NUEVOS: el
+    stock vivo se mueve por el ledger.
+    """
+    ins = sqlite_insert(Producto.__table__)
+    exc = ins.excluded
+    set_ = {"descripcion": exc.descripcion}
+    for c in (*_NUMERICAS, "albergado"):
+        if c in cols or (c == "precio_venta" and "ganancia" in cols):
+            set_[c] = exc[c]
+    set_.update(updated_at=exc.updated_at, deleted_at=None, version=Producto.__table__.c.version + 1)
+    return ins.on_conflict_do_update(index_elements=["codigo"], set_=set_)
+
+
+def importar_productos(path: str | Path, session_factory: sessionmaker | None = None, *,
+                       lote: int = LOTE_DEFAULT,
+                       on_progress: Callable[[int, int], None] | None = None) -> ResultadoImportacion:
+    """
+    Importa/actualiza productos desde CSV o XLSX.
+    on_progress(filas_leidas, filas_importadas) se llama al cerrar cada bloque.
+    Un bloque con error de BD hace rollback sólo de ese bloque.
+    """
+    if session_factory is None:
+        from app.core.db_local import SessionLocal as session_factory
+
+    t0 = time.perf_counter()
+    res = ResultadoImportacion()
+    filas = leer_filas(path)
+    header = next(filas, None)
+    if header is None:
+        raise ValueError("Archivo vacío")
+    cols = _mapear_encabezados(header)
+
+    stmt = _upsert_stmt(cols)
+    vistos: set[str] = set()
+    linea = 1
+    while True:
+        bloque = [f for f in islice(filas, lote)]
+        if not bloque:
+            break
+        lineas = list(range(linea + 1, linea + 1 + len(bloque)))
+        linea += len(bloque)
+        # ignora filas totalmente vacías (típicas al final de un XLSX)
+        pares = [(f, l) for f, l in zip(bloque, lineas) if any(c not in (None, "") for c in f)]
+        if not pares:
+            continue
+        bloque, lineas = [p[0] for p in pares], [p[1] for p in pares]
+        res.leidas += len(bloque)
+
+        try:
+            # leer lo actual y escribir en la misma transacción: lo completado no queda viejo
+            with session_factory() as s, s.begin():
+                codigos = [str(c).strip() for c in _columna(bloque, cols["codigo"]) if c is not None]
+                actuales = _actuales(s, codigos)
+                validas = _validar_bloque(bloque, lineas, cols, vistos, res.errores, actuales)
+                if validas:
+                    s.execute(stmt, validas)
+                    # el stock inicial de los nuevos entra al ledger (los existentes no lo cambian)
+                    registrar_movimientos(s, [
+                        {"codigo_producto": v["codigo"], "delta": v["existencias"], "existencias": v["existencias"],
+                         "motivo": "ingreso", "referencia": "importación"}
+                        for v in validas if v["codigo"] not in actuales and v["existencias"]])
+            res.insertadas_o_actualizadas += len(validas)
+        except Exception as e:
+            res.errores.append((lineas[0], "", f"bloque {lineas[0]}-{lineas[-1]} rechazado: {e}"))
+        if on_progress:
+            on_progress(res.leidas, res.insertadas_o_actualizadas)
+
+    res.errores.sort(key=lambda e: e[0])
+    res.segundos = time.perf_counter() - t0
+    return res
+
+
+def escribir_reporte_errores(errores: Iterable[tuple[int, str, str]], path: str | Path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["linea", "codigo", "motivo"])
+        w.writerows(errores)
+
+
+# =========================
+# Exportación en streaming
+# =========================
+def _iter_catalogo(session: Session, incluir_eliminados: bool = False) -> Iterator[tuple]:
+    q = select(*[getattr(Producto, c) for c in EXPORT_COLS]).order_by(Producto.codigo.asc())
+    if not incluir_eliminados:
+        q = q.where(Producto.deleted_at.is_(None))
+    for row in session.execute(q.execution_options(yield_per=2000)):
+        yield tuple(row)
+
+
+def exportar_productos(path: str | Path, session_factory: sessionmaker | None = None, *,
+                       incluir_eliminados: bool = False) -> int:
+    """Escribe el catálogo fila a fila (CSV o XLSX write_only). Devuelve filas escritas."""
+    if session_factory is None:
+        from app.core.db_local import SessionLocal as session_factory
+
+    path = Path(path)
+    n = 0
+    with session_factory() as s:
+        filas = _iter_catalogo(s, incluir_eliminados)
+        if path.suffix.lower() == ".xlsx":
+            try:
+                from openpyxl import Workbook
+            except ImportError as e:
+                raise RuntimeError("Para escribir .xlsx instala 'openpyxl'") from e
+            wb = Workbook(write_only=True)
+            ws = wb.create_sheet("productos")
+            ws.append(EXPORT_COLS)
+            for row in filas:
+                ws.append(list(row)); n += 1
+            wb.save(path)
+        else:
+            with open(path, "w", newline="", encoding="utf-8-sig") as f:
+                w = csv.writer(f)
+                w.writerow(EXPORT_COLS)
+                for row in filas:
+                    w.writerow(row); n += 1
+    return n
+
+
+# =========================
+# CLI
+# =========================
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m app.core.importacion", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    pi = sub.add_parser("importar", help="importar/actualizar productos desde CSV o XLSX")
+    pi.add_argument("archivo")
+    pi.add_argument("--lote", type=int, default=LOTE_DEFAULT)
+    pi.add_argument("--errores", help="CSV donde dejar las filas rechazadas")
+    pe = sub.add_parser("exportar", help="exportar el catálogo a CSV o XLSX")
+    pe.add_argument("archivo")
+    pe.add_argument("--incluir-eliminados", action="store_true")
+    args = ap.parse_args(argv)
+
+    from app.core.db_local import init_db
+    init_db()
+
+    if args.cmd == "importar":
+        def _prog(leidas, ok):
+            print(f"\r  {leidas} leídas / {ok} importadas", end="", file=sys.stderr, flush=True)
+        res = importar_productos(args.archivo, lote=args.lote, on_progress=_prog)
+        print(file=sys.stderr)
+        print(res.resumen())
+        if res.errores and args.errores:
+            escribir_reporte_errores(res.errores, args.errores)
+            print(f"Errores en {args.errores}")
+        elif res.errores:
+            for ln, cod, motivo in res.errores[:20]:
+                print(f"  línea {ln} [{cod}]: {motivo}")
+        return 1 if res.errores else 0
+
+    n = exportar_productos(args.archivo, incluir_eliminados=args.incluir_eliminados)
+    print(f"{n} productos exportados a {args.archivo}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+# app/core/impuestos.py
+"""
+Impuestos del carrito por línea, con la tasa de cada producto (porcentaje_impuesto).
+
+    mot = MotorImpuestos(incluye_iva=True, redondeo="linea")
+    mot.fijar("7801", precio_unit=990, cant=2, tasa=19)     # O(1)
+    mot.fijar("PAN",  precio_unit=1500, cant=1, tasa=0)     # exento
+    mot.totales()    # Totales(neto=1664, iva=316, exento=1500, total=3480, por_tasa={...})
+
+Cada línea guarda lo que aporta (importe, neto, iva) y el motor lleva acumulados
+por tasa: fijar/agregar/quitar restan el aporte viejo y suman el nuevo, sin
+recorrer el carrito. totales() sólo recorre las tasas distintas (2 o 3 en la práctica).
+
+  incluye_iva  True: precio_unit ya trae el impuesto (neto = importe·100/(100+tasa));
+               False: precio_unit es neto (iva = neto·tasa/100, total = neto + iva)
+  redondeo     "linea": se redondea el neto/iva de cada línea y se suman;
+               "documento": se redondea una vez por tasa sobre el importe acumulado
+
+El descuento de una línea (promociones) se resta antes de desglosar: el impuesto
+va sobre lo que se cobra. Tasa 0 es exento: va a 'exento', no a 'neto'. Todo en pesos enteros, redondeo
+al entero más cercano (la mitad hacia arriba, no el de Python, que va al par).
+recalcular() es el cálculo completo de referencia (bench/impuestos.py los compara).
+"""
+from __future__ import annotations
+
+from typing import Iterable, NamedTuple
+
+REDONDEOS = ("linea", "documento")
+
+
+def _redondear(num: int, den: int) -> int:
+    """round(num/den) con la mitad alejándose de cero, en enteros (den > 0)."""
+    q = (2 * abs(num) + den) // (2 * den)
+    return q if num >= 0 else -q
+
+
+def _tasa(tasa) -> int:
+    return int(round(float(tasa or 0)))
+
+
+def desglosar(importe: int, tasa: int, incluye_iva: bool = True) -> tuple[int, int]:
+    """(neto, iva) de un importe a una tasa (%)."""
+    if tasa <= 0:
+        return importe, 0
+    if incluye_iva:
+        neto = _redondear(importe * 100, 100 + tasa)
+        return neto, importe - neto
+    return importe, _redondear(importe * tasa, 100)
+
+
+class Totales(NamedTuple):
+    neto: int            # base afecta
+    iva: int
+    exento: int
+    total: int
+    por_tasa: dict       # tasa → (neto, iva)
+
+
+class MotorImpuestos:
+    def __init__(self, *, incluye_iva: bool = True, redondeo: str = "linea"):
+        if redondeo not in REDONDEOS:
+            raise ValueError(f"Redondeo inválido: {redondeo}")
+        self.incluye_iva = incluye_iva
+        self.redondeo = redondeo
+        self._lineas: dict[str, tuple] = {}   # clave → (punit, cant, tasa, importe, neto, iva, descuento)
+        self._importe: dict[int, int] = {}     # tasa → suma de importes
+        self._neto: dict[int, int] = {}        # tasa → suma de netos por línea
+        self._iva: dict[int, int] = {}         # tasa → suma de iva por línea (una tasa sin líneas queda en 0)
+        self.bruto = 0                         # suma de importes (precio_unit × cant − descuento)
+        self.descuento = 0                     # suma de descuentos
+
+    def __len__(self) -> int:
+        return len(self._lineas)
+
+    def __contains__(self, clave) -> bool:
+        return clave in self._lineas
+
+    def _acumular(self, tasa: int, importe: int, neto: int, iva: int):
+        self._importe[tasa] = self._importe.get(tasa, 0) + importe
+        self._neto[tasa] = self._neto.get(tasa, 0) + neto
+        self._iva[tasa] = self._iva.get(tasa, 0) + iva
+        self.bruto += importe
+
+    # ---------- cambios O(1) ----------
+    def fijar(self, clave: str, precio_unit: int, cant: int, tasa, descuento: int = 0) -> None:
+        """Deja la línea 'clave' con esa cantidad y descuento (cantidad 0 la quita)."""
+        viejo = self._lineas.pop(clave, None)
+        if viejo is not None:
+            _p, _c, t, imp, neto, iva, dto = viejo
+            self._acumular(t, -imp, -neto, -iva)
+            self.descuento -= dto
+        if cant:
+            t = _tasa(tasa)
+            dto = int(descuento or 0)
+            imp = int(precio_unit) * int(cant) - dto
+            neto, iva = desglosar(imp, t, self.incluye_iva)
+            self._lineas[clave] = (int(precio_unit), int(cant), t, imp, neto, iva, dto)
+            self._acumular(t, imp, neto, iva)
+            self.descuento += dto
+
+    def agregar(self, clave: str, precio_unit: int, cant: int, tasa) -> None:
+        """
+        Suma 'cant' a la línea (la crea si no está). Precio, tasa y descuento quedan
+        los de la línea: si el descuento depende de la cantidad, quien lo calcula usa fijar().
+        """
+        l = self._lineas.get(clave)
+        if l is None:
+            self.fijar(clave, precio_unit, cant, tasa)
+        else:
+            self.fijar(clave, l[0], l[1] + int(cant), l[2], l[6])
+
+    def quitar(self, clave: str, cant: int | None = None) -> None:
+        """Resta 'cant' (None o todo lo que hay: quita la línea)."""
+        l = self._lineas.get(clave)
+        if l is None:
+            return
+        self.fijar(clave, l[0], 0 if cant is None or cant >= l[1] else l[1] - int(cant), l[2], l[6])
+
+    def vaciar(self) -> None:
+        self._lineas.clear()
+        self._importe.clear()
+        self._neto.clear()
+        self._iva.clear()
+        self.bruto = 0
+        self.descuento = 0
+
+    def linea(self, clave: str) -> tuple[int, int] | None:
+        """(neto, iva) de una línea."""
+        l = self._lineas.get(clave)
+        return None if l is None else (l[4], l[5])
+
+    # ---------- lectura ----------
+    def totales(self) -> Totales:
+        por_tasa, neto, iva, exento = {}, 0, 0, 0
+        for t, imp in self._importe.items():
+            if t <= 0:
+                exento += imp
+                continue
+            if self.redondeo == "linea":
+                n, i = self._neto[t], self._iva[t]
+            else:
+                n, i = desglosar(imp, t, self.incluye_iva)
+            if imp or n or i:
+                por_tasa[t] = (n, i)
+            neto += n
+            iva += i
+        return Totales(neto, iva, exento, neto + iva + exento, por_tasa)
+
+    @classmethod
+    def recalcular(cls, lineas: Iterable[tuple], *, incluye_iva: bool = True,
+                   redondeo: str = "linea") -> Totales:
+        """Cálculo completo desde (precio_unit, cant, tasa[, descuento]) por línea, sin estado."""
+        importes: dict[int, int] = {}
+        netos: dict[int, int] = {}
+        ivas: dict[int, int] = {}
+        for punit, cant, tasa, *dto in lineas:
+            t = _tasa(tasa)
+            imp = int(punit) * int(cant) - int(dto[0] if dto else 0)
+            importes[t] = importes.get(t, 0) + imp
+            if redondeo == "linea":
+                n, i = desglosar(imp, t, incluye_iva)
+                netos[t] = netos.get(t, 0) + n
+                ivas[t] = ivas.get(t, 0) + i
+        por_tasa, neto, iva, exento = {}, 0, 0, 0
+        for t, imp in importes.items():
+            if t <= 0:
+                exento += imp
+                continue
+            n, i = (netos[t], ivas[t]) if redondeo == "linea" else desglosar(imp, t, incluye_iva)
+            if imp or n or i:
+                por_tasa[t] = (n, i)
+            neto += n
+            iva += i
+        return Totales(neto, iva, exento, neto + iva + exento, por_tasa)
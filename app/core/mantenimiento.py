@@ -0,0 +1,508 @@
+# app/core/mantenimiento.py
+"""
+Mantenimiento programado de mi_app.db: purgas, incremental_vacuum y estadísticas del planner.
+
+Sin esto el outbox enviado y los productos borrados (tombstones) se acumulan para
+siempre, el archivo nunca se achica y SQLite elige índices sin sqlite_stat1.
+
+Tareas (correr() las ejecuta en este orden; cada una con tope de tiempo):
+  outbox        borra filas sent=True más viejas que MANT_RETENCION_DIAS
+  tombstones    borra productos con deleted_at ya subido al servidor (ver purgar_tombstones)
+  ae_cambios    deja sólo los AE_CAMBIOS_MAX cambios más nuevos del registro de anti-entropía
+  vacuum        PRAGMA incremental_vacuum por pasos (requiere auto_vacuum=INCREMENTAL)
+  estadisticas  ANALYZE acotado (analysis_limit) si están viejas; si no, PRAGMA optimize
+
+Para no trabar una venta, todo se hace en transacciones cortas (MANT_LOTE filas o
+MANT_PAGINAS páginas): la caja espera a lo más un lote, nunca la tarea completa.
+Entre lote y lote la tarea cede si la caja volvió: otra conexión hizo commit
+(PRAGMA data_version) o este proceso pidió un BEGIN IMMEDIATE (una venta esperando
+el lock, db_local.escrituras_pedidas). Sigue en el próximo ocio: correr() deja la
+marca del día sólo cuando todas terminaron.
+
+    iniciar_mantenimiento() / detener_mantenimiento()   # hilo: corre cuando la caja está ociosa
+    correr_al_cierre()                                   # al cerrar la app, si toca
+
+auto_vacuum=INCREMENTAL se fija al crear la BD (db_local._sqlite_pragmas). Una BD
+existente necesita un VACUUM completo para cambiar: lo hace el cierre si mide
+menos de MANT_VACUUM_MAX_MB, o a mano:
+
+    python -m app.core.mantenimiento estado
+    python -m app.core.mantenimiento correr [--limite 2]
+    python -m app.core.mantenimiento activar-vacuum
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, exists, func, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.core.config import (
+    AE_CAMBIOS_MAX, DB_PATH, MANT_CADA_S, MANT_CIERRE_S, MANT_LIMITE_S, MANT_LOTE, MANT_OCIO_S, MANT_PAGINAS,
+    MANT_RETENCION_DIAS, MANT_VACUUM_MAX_MB,
+)
+from app.core.db_local import escrituras_pedidas
+from app.core.models import CambioCatalogo, CodigoAlterno, DetalleOrden, Outbox, Producto, SyncState, Transito
+
+CLAVE_DIARIO = "mantenimiento.diario"
+CLAVE_PUSH_PRODUCTOS = "productos:push"     # marca de subida de productos (app/core/sync_client.push)
+CLAVE_ANALYZE = "mantenimiento.analyze"
+
+ANALYZE_LIMITE = 1000          # PRAGMA analysis_limit: filas muestreadas por índice
+ANALYZE_CAMBIO = 0.10          # re-ANALYZE si una tabla cambió más que esto
+ANALYZE_DIAS = 7               # ... o si las estadísticas tienen más de esto
+
+_BUSY_MS = 5000                # busy_timeout normal de las conexiones (sqlite3.connect timeout=5)
+
+_O = Outbox.__table__
+_P = Producto.__table__
+
+
+def _marca(engine, clave: str) -> datetime | None:
+    with Session(engine) as s:
+        st = s.get(SyncState, clave)
+        return st.last_sync if st else None
+
+
+def _marcar(engine, clave: str, cuando: datetime, plazo: float | None = None):
+    with (_plazo_lock(engine, plazo) if plazo is not None else engine.begin()) as c:
+        c.execute(sqlite_insert(SyncState).values(table_name=clave, last_sync=cuando)
+                  .on_conflict_do_update(index_elements=["table_name"], set_={"last_sync": cuando}))
+
+
+def _pragma(engine, nombre: str):
+    with engine.connect() as c:
+        return c.connection.driver_connection.execute(f"PRAGMA {nombre}").fetchone()[0]
+
+
+# =========================
+# Estado
+# =========================
+def espacio(engine) -> dict:
+    """Tamaño del archivo y del -wal, páginas libres y modo de auto_vacuum."""
+    ruta = engine.url.database
+    pag = _pragma(engine, "page_size")
+    return {
+        "bytes": os.path.getsize(ruta),
+        "bytes_wal": os.path.getsize(ruta + "-wal") if os.path.exists(ruta + "-wal") else 0,
+        "page_size": pag,
+        "libres": _pragma(engine, "freelist_count"),
+        "bytes_libres": _pragma(engine, "freelist_count") * pag,
+        "auto_vacuum": {0: "NONE", 1: "FULL", 2: "INCREMENTAL"}[_pragma(engine, "auto_vacuum")],
+    }
+
+
+def frescura(engine) -> list[dict]:
+    """
+    Por tabla: filas según sqlite_stat1 (al último ANALYZE) vs filas actuales.
+    'cambio' es la fracción de diferencia; None si la tabla nunca se analizó.
+    """
+    with engine.connect() as c:
+        hay = c.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")).first()
+        stat: dict[str, int] = {}
+        if hay:
+            for tbl, st in c.execute(text("SELECT tbl, stat FROM sqlite_stat1")):
+                n = int(str(st).split()[0])
+                stat[tbl] = max(n, stat.get(tbl, 0))
+        tablas = [r[0] for r in c.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"))]
+        out = []
+        for t in tablas:
+            filas = c.execute(text(f'SELECT count(*) FROM "{t}"')).scalar_one()
+            antes = stat.get(t)
+            cambio = None if antes is None else abs(filas - antes) / max(antes, 1)
+            out.append({"tabla": t, "filas_stat": antes, "filas": filas, "cambio": cambio})
+    return out
+
+
+def _estadisticas_viejas(engine, ahora: datetime) -> bool:
+    ultimo = _marca(engine, CLAVE_ANALYZE)
+    if ultimo is None or ahora - ultimo > timedelta(days=ANALYZE_DIAS):
+        return True
+    # tablas chicas (< 100 filas) no cambian el plan: no fuerzan ANALYZE
+    return any(f["filas"] >= 100 and (f["cambio"] is None or f["cambio"] > ANALYZE_CAMBIO)
+               for f in frescura(engine))
+
+
+# =========================
+# Tareas
+# =========================
+def _por_lotes(engine, pasos, plazo: float, lote: int) -> tuple[int, bool]:
+    """
+    Ejecuta 'pasos' (DELETE ... LIMIT lote; el último da el conteo) en una
+    transacción por lote, hasta que borre menos de 'lote', venza el plazo o la
+    caja vuelva a escribir (_actividad).
+    La primera sentencia escribe: así la transacción espera el lock en vez de
+    fallar por un snapshot de lectura viejo si la caja hizo commit entremedio.
+    La espera del lock se acota a lo que queda de plazo: si la caja no lo suelta,
+    la tarea termina incompleta y sigue la próxima vez.
+    """
+    total = 0
+    with engine.connect() as c:
+        dbapi = c.connection.driver_connection
+        quieta = _actividad(engine, dbapi)
+        while True:
+            try:
+                with _lock_acotado(c, plazo):
+                    for st in pasos:
+                        n = c.execute(st).rowcount
+            except OperationalError as e:
+                if "locked" not in str(e):
+                    raise
+                return total, False
+            total += n
+            # el checkpoint lo paga el mantenimiento: si no, lo hace el commit de la
+            # próxima venta (wal_autocheckpoint) con todas las páginas de los lotes
+            dbapi.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+            if n < lote:
+                return total, True
+            if time.monotonic() >= plazo or _actividad(engine, dbapi) != quieta:
+                return total, False
+
+
+def _actividad(engine, dbapi) -> tuple[int, int]:
+    """
+    (data_version de 'dbapi', BEGIN IMMEDIATE pedidos en este proceso). Cambia si
+    otra conexión hizo commit (los commits propios no mueven data_version) o si
+    alguien pidió el lock de escritura, aunque todavía esté esperando: una venta
+    que espera no hace commit mientras el mantenimiento siga tomando el lock.
+    """
+    return dbapi.execute("PRAGMA data_version").fetchone()[0], escrituras_pedidas(engine)
+
+
+@contextmanager
+def _lock_acotado(c, plazo: float):
+    """c.begin() con busy_timeout = lo que queda de plazo (mínimo 50 ms)."""
+    dbapi = c.connection.driver_connection
+    dbapi.execute(f"PRAGMA busy_timeout={max(50, int((plazo - time.monotonic()) * 1000))}")
+    try:
+        with c.begin():
+            yield c
+    finally:
+        dbapi.execute(f"PRAGMA busy_timeout={_BUSY_MS}")
+
+
+@contextmanager
+def _plazo_lock(engine, plazo: float):
+    """engine.begin() con busy_timeout = lo que queda de plazo."""
+    with engine.connect() as c, _lock_acotado(c, plazo):
+        yield c
+
+
+def purgar_outbox(engine, *, retencion_dias: int = MANT_RETENCION_DIAS, limite_s: float = MANT_LIMITE_S,
+                  lote: int = MANT_LOTE, ahora: datetime | None = None) -> dict:
+    """Borra el outbox ya enviado (sent=True) con más de retencion_dias."""
+    corte = (ahora or datetime.utcnow()) - timedelta(days=retencion_dias)
+    ids = select(_O.c.id).where(_O.c.sent.is_(True), _O.c.created_at < corte).limit(lote)
+    n, completo = _por_lotes(engine, [delete(_O).where(_O.c.id.in_(ids))], time.monotonic() + limite_s, lote)
+    return {"filas": n, "completo": completo}
+
+
+def purgar_tombstones(engine, *, retencion_dias: int = MANT_RETENCION_DIAS, limite_s: float = MANT_LIMITE_S,
+                      lote: int = MANT_LOTE, ahora: datetime | None = None) -> dict:
+    """
+    Borra productos con deleted_at más viejo que retencion_dias y no posterior a
+    la marca de subida de productos (SyncState["productos:push"]): push() sube lo
+    cambiado después de esa marca, así que un borrado más nuevo todavía no llegó
+    al servidor y su tombstone espera. Sin marca (nunca se subió) no se borra nada.
+
+    Su fila de tránsito (snapshot 1:1) se borra con él, salvo que tenga
+    mercadería en camino: entonces el producto se conserva. También se conservan
+    los que aparecen en líneas de órdenes de compra (FK). Sus códigos alternos se
+    borran en el mismo lote: el ON DELETE CASCADE de la FK no corre (SQLite sin
+    PRAGMA foreign_keys) y el Resolutor los seguiría leyendo.
+    """
+    subido = _marca(engine, CLAVE_PUSH_PRODUCTOS)
+    if subido is None:
+        return {"filas": 0, "completo": True, "corte": None}
+    corte = min((ahora or datetime.utcnow()) - timedelta(days=retencion_dias), subido)
+    T, D, A = Transito.__table__, DetalleOrden.__table__, CodigoAlterno.__table__
+    # mismo orden y condición en todas las sentencias: borrar el tránsito inactivo y
+    # los alternos no cambia la selección
+    codigos = (select(_P.c.codigo)
+               .where(_P.c.deleted_at.is_not(None), _P.c.deleted_at <= corte,
+                      ~exists().where(T.c.producto_codigo == _P.c.codigo, T.c.mas_existencias > 0),
+                      ~exists().where(D.c.codigo_producto == _P.c.codigo))
+               .order_by(_P.c.codigo)
+               .limit(lote))
+    n, completo = _por_lotes(engine, [delete(T).where(T.c.producto_codigo.in_(codigos)),
+                                      delete(A).where(A.c.codigo_producto.in_(codigos)),
+                                      delete(_P).where(_P.c.codigo.in_(codigos))],
+                             time.monotonic() + limite_s, lote)
+    return {"filas": n, "completo": completo, "corte": corte}
+
+
+def purgar_cambios_ae(engine, *, conservar: int = AE_CAMBIOS_MAX, limite_s: float = MANT_LIMITE_S,
+                      lote: int = MANT_LOTE) -> dict:
+    """
+    Recorta ae_cambios (app/core/antientropia.py) a los 'conservar' más nuevos.
+    Un Indice que todavía no leía lo purgado lo nota y reconstruye su árbol.
+    """
+    C = CambioCatalogo.__table__
+    with engine.connect() as c:
+        ultimo = c.execute(select(func.max(C.c.id))).scalar() or 0
+    ids = select(C.c.id).where(C.c.id <= ultimo - conservar).order_by(C.c.id).limit(lote)
+    n, completo = _por_lotes(engine, [delete(C).where(C.c.id.in_(ids))], time.monotonic() + limite_s, lote)
+    return {"filas": n, "completo": completo}
+
+
+def vacuum_incremental(engine, *, limite_s: float = MANT_LIMITE_S, paginas: int = MANT_PAGINAS) -> dict:
+    """Devuelve páginas libres al sistema de a 'paginas' por transacción."""
+    antes = espacio(engine)
+    if antes["auto_vacuum"] != "INCREMENTAL":
+        # nada que hacer hasta activar_auto_vacuum(): no deja pendiente la jornada
+        return {"paginas": 0, "completo": True, "nota": f"auto_vacuum={antes['auto_vacuum']}"}
+    plazo = time.monotonic() + limite_s
+    liberadas = 0
+    with engine.connect() as c:
+        dbapi = c.connection.driver_connection
+        quieta = _actividad(engine, dbapi)
+        while True:
+            libres = dbapi.execute("PRAGMA freelist_count").fetchone()[0]
+            if libres == 0:
+                break
+            # executescript: con execute() el pragma sólo avanza un paso
+            dbapi.executescript(f"PRAGMA incremental_vacuum({min(paginas, libres)})")
+            liberadas += libres - dbapi.execute("PRAGMA freelist_count").fetchone()[0]
+            dbapi.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()     # ver _por_lotes
+            if time.monotonic() >= plazo or _actividad(engine, dbapi) != quieta:
+                break
+        # en WAL el archivo se achica recién al hacer checkpoint (el del último paso; PASSIVE: no espera a nadie)
+    despues = espacio(engine)
+    return {"paginas": liberadas, "completo": despues["libres"] == 0,
+            "bytes_recuperados": antes["bytes"] - despues["bytes"]}
+
+
+def estadisticas(engine, *, forzar: bool = False, limite_s: float = MANT_LIMITE_S,
+                 ahora: datetime | None = None) -> dict:
+    """
+    Si las estadísticas están viejas (o forzar): ANALYZE muestreado tabla por
+    tabla, una transacción cada una, hasta el plazo. Si no: PRAGMA optimize.
+    """
+    ahora = ahora or datetime.utcnow()
+    if not (forzar or _estadisticas_viejas(engine, ahora)):
+        with engine.connect() as c:
+            c.connection.driver_connection.executescript("PRAGMA optimize")
+        return {"analyze": 0, "completo": True}
+    plazo = time.monotonic() + limite_s
+    with engine.connect() as c:
+        tablas = [r[0] for r in c.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"))]
+        dbapi = c.connection.driver_connection
+        # analysis_limit acota el costo: ANALYZE lee a lo más ~N filas por índice
+        dbapi.execute(f"PRAGMA analysis_limit={ANALYZE_LIMITE}").fetchall()
+        quieta = _actividad(engine, dbapi)
+        hechas = 0
+        try:
+            for t in tablas:
+                if time.monotonic() >= plazo or _actividad(engine, dbapi) != quieta:
+                    break
+                dbapi.execute(f"PRAGMA busy_timeout={max(50, int((plazo - time.monotonic()) * 1000))}")
+                dbapi.executescript(f'ANALYZE "{t}"')
+                hechas += 1
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e):
+                raise
+        finally:
+            dbapi.execute(f"PRAGMA busy_timeout={_BUSY_MS}")
+    completo = hechas == len(tablas)
+    if completo:
+        _marcar(engine, CLAVE_ANALYZE, ahora)
+    return {"analyze": hechas, "completo": completo}
+
+
+def activar_auto_vacuum(engine, max_mb: float | None = MANT_VACUUM_MAX_MB) -> bool:
+    """
+    Pasa una BD existente a auto_vacuum=INCREMENTAL (VACUUM completo: bloquea la
+    BD mientras dura). Con max_mb no lo hace si el archivo es más grande.
+    """
+    if _pragma(engine, "auto_vacuum") == 2:
+        return False
+    if max_mb is not None and espacio(engine)["bytes"] > max_mb * 2**20:
+        return False
+    with engine.connect() as c:
+        c.connection.driver_connection.executescript("PRAGMA auto_vacuum=INCREMENTAL; VACUUM;")
+    return True
+
+
+TAREAS = {
+    "outbox": lambda e, lim: purgar_outbox(e, limite_s=lim),
+    "tombstones": lambda e, lim: purgar_tombstones(e, limite_s=lim),
+    "ae_cambios": lambda e, lim: purgar_cambios_ae(e, limite_s=lim),
+    "vacuum": lambda e, lim: vacuum_incremental(e, limite_s=lim),
+    "estadisticas": lambda e, lim: estadisticas(e, limite_s=lim),
+}
+
+
+def correr(engine, *, limite_s: float = MANT_LIMITE_S, tareas=None, cierre: bool = False) -> list[dict]:
+    """
+    Ejecuta las tareas (todas por defecto) y devuelve un informe por tarea con
+    'seg' y, si falló, 'error' (una tarea que falla no impide las siguientes).
+    cierre=True además intenta activar auto_vacuum=INCREMENTAL.
+    """
+    informe = []
+    if cierre:
+        t0 = time.perf_counter()
+        try:
+            informe.append({"tarea": "activar_vacuum", "hecho": activar_auto_vacuum(engine)})
+        except Exception as e:
+            informe.append({"tarea": "activar_vacuum", "error": str(e)})
+        informe[-1]["seg"] = time.perf_counter() - t0
+    for nombre in tareas or TAREAS:
+        t0 = time.perf_counter()
+        try:
+            r = {"tarea": nombre, **TAREAS[nombre](engine, limite_s)}
+        except Exception as e:
+            r = {"tarea": nombre, "error": str(e)}
+        r["seg"] = time.perf_counter() - t0
+        informe.append(r)
+    # una tarea que cedió a la caja o no alcanzó sigue en el próximo ocio (errores no)
+    if tareas is None and all(r.get("completo", True) for r in informe):
+        try:
+            _marcar(engine, CLAVE_DIARIO, datetime.utcnow(), plazo=time.monotonic() + limite_s)
+        except OperationalError:
+            pass                # sin marca: se repite en el próximo ocio
+    return informe
+
+
+def toca(engine, cada_s: float = MANT_CADA_S) -> bool:
+    ultimo = _marca(engine, CLAVE_DIARIO)
+    return ultimo is None or (datetime.utcnow() - ultimo).total_seconds() >= cada_s
+
+
+# =========================
+# Servicio en segundo plano
+# =========================
+class Mantenedor:
+    """
+    Hilo daemon que sondea PRAGMA data_version: si ninguna conexión hizo commit
+    durante MANT_OCIO_S (caja ociosa) y el último mantenimiento tiene más de
+    MANT_CADA_S, corre todas las tareas. El último informe queda en 'informe'.
+    """
+    def __init__(self, engine=None, *, ocio_s: float = MANT_OCIO_S, cada_s: float = MANT_CADA_S,
+                 limite_s: float = MANT_LIMITE_S, sondeo_s: float | None = None):
+        if engine is None:
+            from app.core.db_local import engine
+        self.engine = engine
+        self.ocio_s = ocio_s
+        self.cada_s = cada_s
+        self.limite_s = limite_s
+        self.sondeo_s = sondeo_s if sondeo_s is not None else min(30.0, ocio_s / 4)
+        self.informe: list[dict] = []
+        self.ultimo_error: str | None = None
+        self._parar = threading.Event()
+        self._hilo = threading.Thread(target=self._loop, name="mantenimiento", daemon=True)
+        self._hilo.start()
+
+    def _loop(self):
+        from app.core.respaldo import bajar_prioridad
+        bajar_prioridad()
+        # conexión propia: data_version sólo cambia por commits de OTRAS conexiones
+        con = sqlite3.connect(self.engine.url.database, isolation_level=None, check_same_thread=False)
+        try:
+            version = con.execute("PRAGMA data_version").fetchone()[0]
+            quieto_desde = time.monotonic()
+            while not self._parar.wait(self.sondeo_s):
+                v = con.execute("PRAGMA data_version").fetchone()[0]
+                if v != version:
+                    version, quieto_desde = v, time.monotonic()
+                    continue
+                if time.monotonic() - quieto_desde < self.ocio_s:
+                    continue
+                try:
+                    if toca(self.engine, self.cada_s):
+                        self.informe = correr(self.engine, limite_s=self.limite_s)
+                        self.ultimo_error = None
+                except Exception as e:
+                    self.ultimo_error = str(e)
+                version = con.execute("PRAGMA data_version").fetchone()[0]
+                quieto_desde = time.monotonic()
+        finally:
+            con.close()
+
+    def detener(self, timeout: float | None = 10.0):
+        self._parar.set()
+        self._hilo.join(timeout)
+
+
+_mantenedor: Mantenedor | None = None
+_mantenedor_lock = threading.Lock()
+
+
+def iniciar_mantenimiento(**kw) -> Mantenedor:
+    """Mantenedor único de la app."""
+    global _mantenedor
+    with _mantenedor_lock:
+        if _mantenedor is None:
+            _mantenedor = Mantenedor(**kw)
+        return _mantenedor
+
+
+def detener_mantenimiento(timeout: float = 10.0):
+    global _mantenedor
+    with _mantenedor_lock:
+        m, _mantenedor = _mantenedor, None
+    if m is not None:
+        m.detener(timeout)
+
+
+def correr_al_cierre(engine=None, limite_s: float = MANT_CIERRE_S) -> list[dict]:
+    """Al cerrar la app (ya no hay ventas): mantenimiento completo si toca hoy."""
+    if engine is None:
+        from app.core.db_local import engine
+    if not toca(engine):
+        return []
+    return correr(engine, limite_s=limite_s, cierre=True)
+
+
+# =========================
+# CLI
+# =========================
+def _imprimir(informe: list[dict]):
+    for r in informe:
+        extra = "  ".join(f"{k}={v}" for k, v in r.items() if k not in ("tarea", "seg"))
+        print(f"{r['tarea']:14} {r['seg'] * 1000:8.0f} ms  {extra}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m app.core.mantenimiento", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("estado", help="espacio y frescura de las estadísticas")
+    pc = sub.add_parser("correr", help="todas las tareas ahora")
+    pc.add_argument("--limite", type=float, default=MANT_LIMITE_S, help="segundos por tarea")
+    sub.add_parser("activar-vacuum", help="VACUUM completo para pasar a auto_vacuum=INCREMENTAL")
+    args = ap.parse_args(argv)
+
+    from app.core.db_local import engine, init_db
+    init_db()
+
+    if args.cmd == "estado":
+        e = espacio(engine)
+        print(f"{DB_PATH}: {e['bytes'] / 2**20:.1f} MB (+ {e['bytes_wal'] / 2**20:.1f} MB -wal), "
+              f"{e['bytes_libres'] / 2**20:.1f} MB libres, "
+              f"auto_vacuum={e['auto_vacuum']}")
+        ultimo = _marca(engine, CLAVE_ANALYZE)
+        print(f"último ANALYZE: {ultimo:%Y-%m-%d %H:%M} UTC" if ultimo else "último ANALYZE: nunca")
+        for f in frescura(engine):
+            cambio = "sin estadísticas" if f["cambio"] is None else f"{f['cambio']:+.0%}"
+            print(f"  {f['tabla']:22} {f['filas']:>10,d} filas  {cambio}")
+        return 0
+    if args.cmd == "correr":
+        _imprimir(correr(engine, limite_s=args.limite))
+        return 0
+    print("Activado" if activar_auto_vacuum(engine, max_mb=None) else "Ya estaba en INCREMENTAL")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
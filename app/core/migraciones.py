@@ -0,0 +1,290 @@
+# app/core/migraciones.py
+"""
+Migraciones de esquema/datos (Alembic, scripts en migrations/).
+
+- actualizar_bd(engine): lo llama init_db() al arrancar. BD nueva → create_all +
+  stamp head; BD existente → crea tablas faltantes y corre upgrade head.
+- convertir_ids(op, formato): reescribe las claves UUID de TABLAS_ID entre texto
+  (36 chars) y BLOB de 16 bytes, recreando las tablas (WITHOUT ROWID donde
+  corresponde). La usa la revisión 0001 y el comando "ids".
+- convertir_tiempos(op, formato): ídem para las columnas MarcaTiempo, entre
+  DateTime texto y INTEGER µs. Revisión 0002 y comando "tiempos".
+- completar_columnas(dbapi, tablas, esquema): ALTER TABLE ADD COLUMN de las
+  columnas de los modelos que faltan (nullable o con server_default). Revisión
+  0003, actualizar_bd sin Alembic y los archivos de boletas al adjuntarlos.
+
+    python -m app.core.migraciones estado
+    python -m app.core.migraciones upgrade
+    python -m app.core.migraciones ids bin16|texto     (ajustar también SM_ID_FORMATO)
+    python -m app.core.migraciones tiempos us|texto    (ajustar también SM_TS_FORMATO)
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+from sqlalchemy import inspect, BigInteger, DateTime, LargeBinary, String
+from sqlalchemy.dialects import sqlite
+
+from app.core.config import DB_PATH, ID_FORMATO, TS_FORMATO
+from app.core.ids import a_bytes, a_texto
+from app.core.models import Base
+from app.core.tiempo import MarcaTiempo, a_us as ts_a_us, a_texto as ts_a_texto
+
+# tabla → (columnas UUID, ¿WITHOUT ROWID en bin16?)
+# detalles_orden/ordenes_compra/outbox conservan rowid: com_lis_page ordena por rowid
+TABLAS_ID = {
+    "boletas":         (("id",), True),
+    "boleta_detalles": (("id", "boleta_id"), True),
+    "transito":        (("id_transito",), True),
+    "ordenes_compra":  (("id_ordenes_com",), False),
+    "detalles_orden":  (("id_detalle_orden", "orden_id"), False),
+    "outbox":          (("id",), False),
+    "promociones":     (("id",), False),
+}
+
+FORMATOS = ("bin16", "texto")
+
+
+def _raiz() -> Path:
+    # en el ejecutable de PyInstaller los datos quedan bajo sys._MEIPASS
+    return Path(getattr(sys, "_MEIPASS", Path(__file__).resolve().parents[2]))
+
+
+def formato_tabla(conn, tabla: str) -> str | None:
+    """'bin16' | 'texto' según el tipo declarado de la PK; None si la tabla no existe."""
+    insp = inspect(conn)
+    if not insp.has_table(tabla):
+        return None
+    pk = TABLAS_ID[tabla][0][0]
+    tipo = next(c["type"] for c in insp.get_columns(tabla) if c["name"] == pk)
+    return "bin16" if "BLOB" in str(tipo).upper() else "texto"
+
+
+def formato_ids_actual(conn) -> str | None:
+    """Formato de las claves en la BD (None si aún no hay tablas); ValueError si está mezclado."""
+    vistos = {f for f in (formato_tabla(conn, t) for t in TABLAS_ID) if f}
+    if len(vistos) > 1:
+        raise ValueError(f"Formato de ids mezclado entre tablas: {sorted(vistos)}")
+    return vistos.pop() if vistos else None
+
+
+def _reescribir(op, tabla: str, cols, fn: str, nuevo, viejo, *, antes: bool = True, **table_kwargs):
+    """
+    UPDATE tabla SET col = fn(col) y recrea la tabla con el tipo declarado 'nuevo'
+    (SQLite no tiene ALTER COLUMN: batch copia a una tabla nueva con CAST al tipo
+    nuevo). antes=False hace el UPDATE después de copiar: CAST('2025-01-01 ...' AS
+    DATETIME) da 2025 (afinidad NUMERIC), así que a texto se copia el entero y
+    luego se formatea. Los triggers se quitan antes (p.ej. el append-only del
+    ledger bloquearía el UPDATE) y se vuelven a crear después: batch no los copia.
+    """
+    conn = op.get_bind()
+    triggers = conn.exec_driver_sql(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ?", (tabla,)
+    ).fetchall()
+    for nombre, _ in triggers:
+        op.execute(f"DROP TRIGGER {nombre}")
+    update = f"UPDATE {tabla} SET " + ", ".join(f"{c} = {fn}({c})" for c in cols)
+    if antes:
+        op.execute(update)
+    with op.batch_alter_table(tabla, recreate="always", table_kwargs=table_kwargs) as b:
+        for c in cols:
+            b.alter_column(c, type_=nuevo, existing_type=viejo)
+    if not antes:
+        op.execute(update)
+    for _, sql in triggers:
+        op.execute(sql)
+
+
+def convertir_ids(op, formato: str):
+    """Convierte las tablas de TABLAS_ID a 'formato' (las que ya lo tienen se saltan)."""
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de ids desconocido: {formato!r} (use {' | '.join(FORMATOS)})")
+    conn = op.get_bind()
+    dbapi = conn.connection.driver_connection
+    dbapi.create_function("uuid_a_blob", 1, lambda v: None if v is None else a_bytes(v), deterministic=True)
+    dbapi.create_function("uuid_a_texto", 1, lambda v: None if v is None else a_texto(v), deterministic=True)
+    fn = "uuid_a_blob" if formato == "bin16" else "uuid_a_texto"
+    nuevo, viejo = (LargeBinary(16), String(36)) if formato == "bin16" else (String(36), LargeBinary(16))
+
+    for tabla, (cols, sin_rowid) in TABLAS_ID.items():
+        actual = formato_tabla(conn, tabla)
+        if actual is None or actual == formato:
+            continue
+        # el FK de la hija se reescribe con la misma función → sigue apuntando al padre;
+        # rowid explícito en ambos sentidos: la reflexión conservaría el WITHOUT ROWID anterior
+        _reescribir(op, tabla, cols, fn, nuevo, viejo,
+                    sqlite_with_rowid=not (formato == "bin16" and sin_rowid))
+
+
+# =========================
+# Marcas de tiempo (app/core/tiempo.py)
+# =========================
+FORMATOS_TS = ("us", "texto")
+
+
+def tablas_ts() -> dict[str, tuple[str, ...]]:
+    """tabla → columnas MarcaTiempo, según los modelos."""
+    out = {}
+    for t in Base.metadata.sorted_tables:
+        cols = tuple(c.name for c in t.columns if isinstance(c.type, MarcaTiempo))
+        if cols:
+            out[t.name] = cols
+    return out
+
+
+def formato_ts_tabla(conn, tabla: str) -> str | None:
+    """'us' | 'texto' según el tipo declarado de la primera marca de tiempo; None si no existe."""
+    insp = inspect(conn)
+    if not insp.has_table(tabla):
+        return None
+    col = tablas_ts()[tabla][0]
+    tipo = next(c["type"] for c in insp.get_columns(tabla) if c["name"] == col)
+    return "us" if "INT" in str(tipo).upper() else "texto"
+
+
+def convertir_tiempos(op, formato: str):
+    """Convierte las marcas de tiempo de todas las tablas a 'formato' ("us" | "texto")."""
+    if formato not in FORMATOS_TS:
+        raise ValueError(f"Formato de marcas de tiempo desconocido: {formato!r} (use {' | '.join(FORMATOS_TS)})")
+    conn = op.get_bind()
+    dbapi = conn.connection.driver_connection
+    # NULL queda NULL; lo ya convertido (int/str) pasa igual
+    dbapi.create_function("ts_a_us", 1, lambda v: v if v is None or isinstance(v, int) else ts_a_us(v),
+                          deterministic=True)
+    dbapi.create_function("us_a_ts", 1, lambda v: None if v is None else ts_a_texto(v), deterministic=True)
+    fn = "ts_a_us" if formato == "us" else "us_a_ts"
+    nuevo, viejo = (BigInteger(), DateTime()) if formato == "us" else (DateTime(), BigInteger())
+
+    for tabla, cols in tablas_ts().items():
+        actual = formato_ts_tabla(conn, tabla)
+        if actual is None or actual == formato:
+            continue
+        _reescribir(op, tabla, cols, fn, nuevo, viejo, antes=formato == "us")
+
+
+def formato_ts_actual(conn) -> str | None:
+    vistos = {f for f in (formato_ts_tabla(conn, t) for t in tablas_ts()) if f}
+    if len(vistos) > 1:
+        raise ValueError(f"Formato de marcas de tiempo mezclado entre tablas: {sorted(vistos)}")
+    return vistos.pop() if vistos else None
+
+
+# =========================
+# Columnas nuevas
+# =========================
+def completar_columnas(dbapi, tablas=None, esquema: str = "main") -> list[str]:
+    """
+    Agrega a las tablas existentes de 'esquema' las columnas de los modelos que no
+    tienen (ADD COLUMN es sólo metadatos en SQLite, no reescribe filas). Sólo
+    sirve para columnas nullable o con server_default; devuelve "tabla.columna".
+    """
+    hechas = []
+    for t in (tablas if tablas is not None else Base.metadata.sorted_tables):
+        existentes = {r[1] for r in dbapi.execute(f"PRAGMA {esquema}.table_info({t.name})")}
+        if not existentes:
+            continue
+        for c in t.columns:
+            if c.name in existentes:
+                continue
+            ddl = f"{c.name} {c.type.compile(dialect=sqlite.dialect())}"
+            if c.server_default is not None:
+                ddl += f" NOT NULL DEFAULT {c.server_default.arg}" if not c.nullable else f" DEFAULT {c.server_default.arg}"
+            elif not c.nullable:
+                raise RuntimeError(f"{t.name}.{c.name}: NOT NULL sin server_default, necesita una migración propia")
+            dbapi.execute(f"ALTER TABLE {esquema}.{t.name} ADD COLUMN {ddl}")
+            hechas.append(f"{t.name}.{c.name}")
+    return hechas
+
+
+# =========================
+# Alembic
+# =========================
+def _config(engine=None):
+    from alembic.config import Config
+
+    cfg = Config(str(_raiz() / "alembic.ini"))
+    cfg.set_main_option("script_location", str(_raiz() / "migrations"))
+    if engine is not None:
+        cfg.attributes["engine"] = engine
+    return cfg
+
+
+def actualizar_bd(engine):
+    """Deja la BD en la última revisión (ver docstring del módulo)."""
+    with engine.connect() as c:
+        nueva = not inspect(c).get_table_names()
+    try:
+        from alembic import command
+    except ImportError:
+        # sin Alembic (entorno mínimo): tablas y columnas nuevas, y no arrancar con otro formato
+        Base.metadata.create_all(bind=engine)
+        with engine.connect() as c:
+            completar_columnas(c.connection.driver_connection)
+            pares = [("ids", formato_ids_actual(c), ID_FORMATO, "SM_ID_FORMATO"),
+                     ("marcas de tiempo", formato_ts_actual(c), TS_FORMATO, "SM_TS_FORMATO")]
+        for que, actual, app, env in pares:
+            if actual and actual != app:
+                raise RuntimeError(
+                    f"La BD usa {que} '{actual}' y la app '{app}': instale alembic y ejecute "
+                    f"'python -m app.core.migraciones upgrade' (o fije {env}={actual})."
+                )
+        return
+    Base.metadata.create_all(bind=engine)
+    cfg = _config(engine)
+    if nueva:
+        command.stamp(cfg, "head")
+    else:
+        command.upgrade(cfg, "head")
+
+
+def _convertir(engine, fn, formato: str):
+    """Conversión directa, fuera de la cadena de revisiones (p.ej. volver a texto)."""
+    from alembic.migration import MigrationContext
+    from alembic.operations import Operations
+
+    with engine.begin() as conn:
+        fn(Operations(MigrationContext.configure(conn)), formato)
+
+
+def main(argv=None):
+    from app.core.db_local import make_engine
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--db", default=str(DB_PATH))
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("estado")
+    sub.add_parser("upgrade")
+    p_ids = sub.add_parser("ids")
+    p_ids.add_argument("formato", choices=FORMATOS)
+    p_ts = sub.add_parser("tiempos")
+    p_ts.add_argument("formato", choices=FORMATOS_TS)
+    args = ap.parse_args(argv)
+
+    engine = make_engine(args.db)
+    try:
+        if args.cmd == "upgrade":
+            actualizar_bd(engine)
+        elif args.cmd == "ids":
+            _convertir(engine, convertir_ids, args.formato)
+            if args.formato != ID_FORMATO:
+                print(f"Recuerde fijar SM_ID_FORMATO={args.formato} antes de abrir la app.")
+        elif args.cmd == "tiempos":
+            _convertir(engine, convertir_tiempos, args.formato)
+            if args.formato != TS_FORMATO:
+                print(f"Recuerde fijar SM_TS_FORMATO={args.formato} antes de abrir la app.")
+        with engine.connect() as c:
+            print(f"BD: {args.db}")
+            print(f"ids en BD: {formato_ids_actual(c) or '(sin tablas)'}  |  app: {ID_FORMATO}")
+            for t in TABLAS_ID:
+                print(f"  {t:16} {formato_tabla(c, t) or '-'}")
+            print(f"marcas de tiempo en BD: {formato_ts_actual(c) or '(sin tablas)'}  |  app: {TS_FORMATO}")
+            for t in tablas_ts():
+                print(f"  {t:18} {formato_ts_tabla(c, t) or '-'}")
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
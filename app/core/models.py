@@ -1,15 +1,22 @@
 # app/core/models.py
 from sqlalchemy.orm import declarative_base, relationship
 from sqlalchemy import (
-    Column, String, Integer, DateTime, Date, Text, Boolean, Index, ForeignKey, UniqueConstraint
+    Column, String, Integer, Date, Text, Boolean, Index, ForeignKey, UniqueConstraint,
+    DDL, event
 )
 from datetime import datetime
-import uuid
+
+from app.core.ids import IdCompacto, gen_id, BINARIO
+from app.core.tiempo import MarcaTiempo
 
 Base = declarative_base()
 
-def gen_uuid():
-    return str(uuid.uuid4())
+# claves UUIDv7: ordenadas por tiempo (ver app/core/ids.py)
+gen_uuid = gen_id
+
+# con claves de 16 bytes la tabla ES el índice de la PK (sin rowid ni índice aparte);
+# sólo en tablas de filas chicas y mucho volumen
+_SIN_ROWID = {"sqlite_with_rowid": False} if BINARIO else {}
 
 
 # =========================
@@ -37,15 +44,15 @@ class Producto(Base):
         cascade="all, delete-orphan"
     )
 
-    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
-    deleted_at = Column(DateTime, nullable=True)
+    updated_at = Column(MarcaTiempo, nullable=False, default=datetime.utcnow)
+    deleted_at = Column(MarcaTiempo, nullable=True)
     version    = Column(Integer, nullable=False, default=1)
 
 
 class Transito(Base):
     __tablename__ = "transito"
 
-    id_transito = Column(String, primary_key=True, default=gen_uuid)
+    id_transito = Column(IdCompacto, primary_key=True, default=gen_uuid)
 
     # Estado agregado "en camino" para ESTE producto
     mas_existencias   = Column(Integer, nullable=False, default=0)
@@ -62,8 +69,8 @@ class Transito(Base):
     )
     producto = relationship("Producto", back_populates="transito")
 
-    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
-    deleted_at = Column(DateTime, nullable=True)
+    updated_at = Column(MarcaTiempo, nullable=False, default=datetime.utcnow)
+    deleted_at = Column(MarcaTiempo, nullable=True)
     version    = Column(Integer, nullable=False, default=1)
 
 
@@ -71,32 +78,86 @@ class Transito(Base):
 Index("idx_productos_updated", Producto.updated_at)
 
 
+# =========================
+# PRODUCTO 1 ─── N CÓDIGOS ALTERNOS (EAN del proveedor, packs, PLU de balanza)
+# =========================
+class CodigoAlterno(Base):
+    """Otro código de barras que lleva al mismo producto (app/core/codigos_barra.py)."""
+    __tablename__ = "codigos_alternos"
+
+    codigo_barra = Column(String, primary_key=True)        # lo que lee el escáner (o el PLU de la balanza)
+
+    codigo_producto = Column(
+        String,
+        ForeignKey("productos.codigo", ondelete="CASCADE"),
+        nullable=False,
+        index=True
+    )
+    unidades    = Column(Integer, nullable=False, default=1)   # pack: un escaneo = 'unidades' del producto
+    descripcion = Column(String,  nullable=True)               # p.ej. "Pack 6", "EAN proveedor"
+
+    updated_at = Column(MarcaTiempo, nullable=False, default=datetime.utcnow)
+    deleted_at = Column(MarcaTiempo, nullable=True)
+    version    = Column(Integer, nullable=False, default=1)
+
+
 
 class Boleta(Base):
     __tablename__ = "boletas"
-    id = Column(String, primary_key=True, default=gen_uuid)
+    __table_args__ = _SIN_ROWID
+    id = Column(IdCompacto, primary_key=True, default=gen_uuid)
     folio = Column(String, unique=True, nullable=False)         # ej: BLT-20251009-000001
     total = Column(Integer, nullable=False, default=0)
-    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    created_at = Column(MarcaTiempo, nullable=False, default=datetime.utcnow)
 
     detalles = relationship("BoletaDetalle", back_populates="boleta", cascade="all, delete-orphan")
 
 
 class BoletaDetalle(Base):
     __tablename__ = "boleta_detalles"
-    id = Column(String, primary_key=True, default=gen_uuid)
-    boleta_id = Column(String, ForeignKey("boletas.id", ondelete="CASCADE"), nullable=False, index=True)
+    __table_args__ = _SIN_ROWID
+    id = Column(IdCompacto, primary_key=True, default=gen_uuid)
+    boleta_id = Column(IdCompacto, ForeignKey("boletas.id", ondelete="CASCADE"), nullable=False, index=True)
 
     # snapshot de producto en el momento de la venta
     codigo_producto     = Column(String, nullable=False)
     descripcion         = Column(String, nullable=False)
     precio_unitario     = Column(Integer, nullable=False, default=0)
     cantidad            = Column(Integer, nullable=False, default=0)
-    subtotal            = Column(Integer, nullable=False, default=0)
+    subtotal            = Column(Integer, nullable=False, default=0)   # precio × cantidad − descuento
+
+    # promoción aplicada (app/core/promociones.py); nombre como snapshot, igual que la descripción
+    descuento           = Column(Integer, nullable=False, default=0, server_default="0")
+    promocion           = Column(String,  nullable=True)
 
     boleta = relationship("Boleta", back_populates="detalles")
 
 
+# =========================
+# PROMOCIONES (se bajan del servidor; app/core/promociones.py las compila)
+# =========================
+class Promocion(Base):
+    __tablename__ = "promociones"
+
+    id = Column(IdCompacto, primary_key=True, default=gen_uuid)
+
+    nombre     = Column(String,  nullable=False)          # va al recibo y a boleta_detalles.promocion
+    tipo       = Column(String,  nullable=False)          # "nxm" | "porcentaje" | "precio" | "combo"
+    codigos    = Column(Text,    nullable=True)           # códigos a los que aplica, separados por espacio o coma
+    prefijo    = Column(String,  nullable=True)           # ... y/o la familia: códigos que empiezan así
+    n          = Column(Integer, nullable=True)           # nxm: lleva n / combo: unidades del combo
+    m          = Column(Integer, nullable=True)           # nxm: paga m
+    porcentaje = Column(Integer, nullable=True)           # porcentaje: % de descuento
+    precio     = Column(Integer, nullable=True)           # precio: precio unitario / combo: precio de las n unidades
+    desde      = Column(MarcaTiempo, nullable=True)       # vigencia (UTC); None = sin límite
+    hasta      = Column(MarcaTiempo, nullable=True)
+    activa     = Column(Boolean, nullable=False, default=True)
+
+    updated_at = Column(MarcaTiempo, nullable=False, default=datetime.utcnow)
+    deleted_at = Column(MarcaTiempo, nullable=True)
+    version    = Column(Integer, nullable=False, default=1)
+
+
 # =========================
 # ORDEN DE COMPRA 1 ─── N DETALLE ORDEN  N ─── 1 PRODUCTO
 # (tabla puente que materializa OC↔Producto)
@@ -104,7 +165,7 @@ class BoletaDetalle(Base):
 class OrdenCompra(Base):
     __tablename__ = "ordenes_compra"
 
-    id_ordenes_com = Column(String, primary_key=True, default=gen_uuid)
+    id_ordenes_com = Column(IdCompacto, primary_key=True, default=gen_uuid)
 
     folio_orden         = Column(String, nullable=False)   # puedes marcar unique=True si quieres
     fecha_llegada_orden = Column(Date,   nullable=True)    # mejor Date/DateTime que String
@@ -121,19 +182,19 @@ class OrdenCompra(Base):
         UniqueConstraint("folio_orden", name="uq_ordenes_compra_folio"),
     )
 
-    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
-    deleted_at = Column(DateTime, nullable=True)
+    updated_at = Column(MarcaTiempo, nullable=False, default=datetime.utcnow)
+    deleted_at = Column(MarcaTiempo, nullable=True)
     version    = Column(Integer, nullable=False, default=1)
 
 
 class DetalleOrden(Base):
     __tablename__ = "detalles_orden"
 
-    id_detalle_orden = Column(String, primary_key=True, default=gen_uuid)
+    id_detalle_orden = Column(IdCompacto, primary_key=True, default=gen_uuid)
 
     # FK al header de la OC (padre)
     orden_id = Column(
-        String,
+        IdCompacto,
         ForeignKey("ordenes_compra.id_ordenes_com", ondelete="CASCADE"),
         nullable=False,
         index=True
@@ -158,26 +219,110 @@ class DetalleOrden(Base):
     orden    = relationship("OrdenCompra", back_populates="detalles")
     producto = relationship("Producto")
 
-    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
-    deleted_at = Column(DateTime, nullable=True)
+    updated_at = Column(MarcaTiempo, nullable=False, default=datetime.utcnow)
+    deleted_at = Column(MarcaTiempo, nullable=True)
     version    = Column(Integer, nullable=False, default=1)
 
 
+# =========================
+# MOVIMIENTOS DE STOCK (ledger append-only) + SNAPSHOTS diarios
+# =========================
+class MovimientoStock(Base):
+    __tablename__ = "movimientos_stock"
+
+    # PK entera: el orden de inserción = orden cronológico (append al final del B-tree)
+    id = Column(Integer, primary_key=True, autoincrement=True)
+
+    codigo_producto = Column(String,  nullable=False)
+    delta           = Column(Integer, nullable=False)   # + entra / - sale
+    existencias     = Column(Integer, nullable=True)    # stock resultante tras el movimiento
+    motivo          = Column(String,  nullable=False)   # "venta" | "recepcion" | "ingreso" | "ajuste"
+    referencia      = Column(String,  nullable=True)    # folio boleta / folio OC / nota libre
+    created_at      = Column(MarcaTiempo, nullable=False, default=datetime.utcnow)
+
+
+class SnapshotStock(Base):
+    __tablename__ = "snapshots_stock"
+
+    # existencias de cada producto al CIERRE del día 'fecha' (UTC)
+    fecha           = Column(Date,   primary_key=True)
+    codigo_producto = Column(String, primary_key=True)
+    existencias     = Column(Integer, nullable=False, default=0)
+    created_at      = Column(MarcaTiempo, nullable=False, default=datetime.utcnow)
+
+
+Index("idx_movstock_codigo_fecha", MovimientoStock.codigo_producto, MovimientoStock.created_at)
+Index("idx_movstock_fecha", MovimientoStock.created_at)
+Index("idx_snapstock_codigo_fecha", SnapshotStock.codigo_producto, SnapshotStock.fecha)
+
+# El ledger no se corrige: los errores se compensan con un movimiento nuevo.
+for _op in ("UPDATE", "DELETE"):
+    event.listen(
+        MovimientoStock.__table__, "after_create",
+        DDL(
+            f"CREATE TRIGGER IF NOT EXISTS trg_movstock_no_{_op.lower()} "
+            f"BEFORE {_op} ON movimientos_stock "
+            f"BEGIN SELECT RAISE(ABORT, 'movimientos_stock es append-only'); END"
+        ),
+    )
+
+
 # =========================
 # Infra de sincronización (como ya la tenías)
 # =========================
 class Outbox(Base):
     __tablename__ = "outbox"
-    id = Column(String, primary_key=True, default=gen_uuid)
+    id = Column(IdCompacto, primary_key=True, default=gen_uuid)
     table = Column(String, nullable=False)
     op = Column(String, nullable=False)      # "insert" | "update" | "delete"
     payload = Column(Text, nullable=False)   # dict serializado (str)
-    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    created_at = Column(MarcaTiempo, nullable=False, default=datetime.utcnow)
     sent = Column(Boolean, nullable=False, default=False)
 
 
 class SyncState(Base):
     __tablename__ = "sync_state"
     table_name = Column(String, primary_key=True)
-    last_sync = Column(DateTime, nullable=True)
+    last_sync = Column(MarcaTiempo, nullable=True)
     last_version = Column(Integer, nullable=True)
+
+
+# =========================
+# Anti-entropía: lo que cambió de (codigo, version, existencias) en productos
+# =========================
+class CambioCatalogo(Base):
+    """
+    Registro que llenan los triggers de productos; app/core/antientropia.Indice lo
+    lee para actualizar sólo las hojas tocadas del árbol de Merkle.
+    AUTOINCREMENT: los id no se reusan, así un Indice nota si el mantenimiento le
+    purgó cambios que no había leído (y reconstruye).
+    """
+    __tablename__ = "ae_cambios"
+    __table_args__ = {"sqlite_autoincrement": True}
+    id          = Column(Integer, primary_key=True, autoincrement=True)
+    codigo      = Column(String,  nullable=False)
+    version     = Column(Integer, nullable=True)
+    existencias = Column(Integer, nullable=True)
+    signo       = Column(Integer, nullable=False)    # +1 entra a su hoja, -1 sale
+
+
+# Sólo productos vivos (deleted_at IS NULL): los tombstones se purgan en cada
+# réplica a su tiempo (mantenimiento.purgar_tombstones) y no deben hacer distinto el árbol.
+_AE = "INSERT INTO ae_cambios (codigo, version, existencias, signo) "
+AE_TRIGGERS = {
+    "insert": "AFTER INSERT ON productos WHEN NEW.deleted_at IS NULL "
+              f"BEGIN {_AE}VALUES (NEW.codigo, NEW.version, NEW.existencias, 1); END",
+    "update": "AFTER UPDATE OF codigo, version, existencias, deleted_at ON productos "
+              "WHEN OLD.codigo IS NOT NEW.codigo OR OLD.version IS NOT NEW.version "
+              "OR OLD.existencias IS NOT NEW.existencias OR (OLD.deleted_at IS NULL) <> (NEW.deleted_at IS NULL) "
+              f"BEGIN {_AE}SELECT OLD.codigo, OLD.version, OLD.existencias, -1 WHERE OLD.deleted_at IS NULL; "
+              f"{_AE}SELECT NEW.codigo, NEW.version, NEW.existencias, 1 WHERE NEW.deleted_at IS NULL; END",
+    "delete": "AFTER DELETE ON productos WHEN OLD.deleted_at IS NULL "
+              f"BEGIN {_AE}VALUES (OLD.codigo, OLD.version, OLD.existencias, -1); END",
+}
+for _nombre, _cuerpo in AE_TRIGGERS.items():
+    # colgados de ae_cambios: en una BD existente se crean junto con la tabla nueva
+    event.listen(
+        CambioCatalogo.__table__, "after_create",
+        DDL(f"CREATE TRIGGER IF NOT EXISTS trg_productos_ae_{_nombre} {_cuerpo}"),
+    )
@@ -0,0 +1,227 @@
+# app/core/motor_precios.py
+"""
+Re-precio masivo: aplica una política de margen / impuesto / redondeo a miles de
+productos con aritmética de arreglos (NumPy), con vista previa y UPDATE en lote.
+
+Las fórmulas son las mismas de app/ui/a_py/precios.py, pero sobre columnas:
+    pv = round((pc + pc * g/100) * (1 + imp/100))
+    g  = round((100*pv/(100+imp) - pc) / (pc/100))
+Conservar el margen no pasa por el g redondeado (movería el precio): con el mismo
+impuesto se parte del pv vigente; con otro, del margen sin redondear.
+
+Uso por consola:
+    python -m app.core.motor_precios --ganancia 35 --redondeo 10            # vista previa
+    python -m app.core.motor_precios --redondeo 50 --modo arriba --aplicar  # mantiene margen
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterator
+
+import numpy as np
+from sqlalchemy import select, update, bindparam
+from sqlalchemy.orm import Session
+
+from app.core.models import Producto
+
+MODOS_REDONDEO = ("cercano", "arriba", "abajo")
+
+
+@dataclass
+class ReglaRedondeo:
+    multiplo: int = 1             # p.ej. 10 → a la decena más cercana (CLP)
+    modo: str = "cercano"         # "cercano" | "arriba" | "abajo"
+
+    def aplicar(self, x: np.ndarray) -> np.ndarray:
+        if self.modo not in MODOS_REDONDEO:
+            raise ValueError(f"Modo de redondeo inválido: {self.modo}")
+        m = max(1, int(self.multiplo))
+        if self.modo == "arriba":
+            return np.ceil(x / m) * m
+        if self.modo == "abajo":
+            return np.floor(x / m) * m
+        return np.round(x / m) * m
+
+
+@dataclass
+class PoliticaPrecio:
+    """
+    ganancia_pct:  None → conserva el margen actual de cada producto;
+                   número → mismo margen para todos;
+                   dict {codigo: pct} → margen por producto (los ausentes conservan el actual).
+    impuesto_pct:  None → el porcentaje_impuesto de cada producto; número → lo reemplaza.
+    """
+    ganancia_pct: float | dict[str, float] | None = None
+    impuesto_pct: float | None = None
+    redondeo: ReglaRedondeo = field(default_factory=ReglaRedondeo)
+
+
+@dataclass
+class VistaPrevia:
+    codigo: np.ndarray
+    pv_actual: np.ndarray
+    pv_nuevo: np.ndarray
+    imp_actual: np.ndarray
+    imp_nuevo: np.ndarray
+    ganancia_nueva: np.ndarray
+
+    @property
+    def cambia(self) -> np.ndarray:
+        return (self.pv_nuevo != self.pv_actual) | (self.imp_nuevo != self.imp_actual)
+
+    def filas(self, solo_cambios: bool = True) -> Iterator[tuple[str, int, int, int, float]]:
+        """(codigo, pv_actual, pv_nuevo, diferencia, variación %)."""
+        idx = np.flatnonzero(self.cambia) if solo_cambios else range(len(self.codigo))
+        for i in idx:
+            a, n = int(self.pv_actual[i]), int(self.pv_nuevo[i])
+            yield str(self.codigo[i]), a, n, n - a, (100.0 * (n - a) / a) if a else 0.0
+
+    def resumen(self) -> str:
+        d = self.pv_nuevo - self.pv_actual
+        n = int(np.count_nonzero(self.cambia))
+        base = np.where(self.pv_actual > 0, self.pv_actual, 1)
+        var = float(np.mean(d[d != 0] / base[d != 0]) * 100) if np.any(d) else 0.0
+        return (f"{len(self.codigo)} productos, {n} cambian "
+                f"({int(np.sum(d > 0))} suben / {int(np.sum(d < 0))} bajan), variación media {var:+.1f}%")
+
+
+# =========================
+# Núcleo vectorizado (espejo de precios.py)
+# =========================
+def precio_venta_vec(pc: np.ndarray, ganancia: np.ndarray, imp: np.ndarray) -> np.ndarray:
+    base = pc + pc * (ganancia / 100.0)
+    return np.round(base * (1.0 + imp / 100.0))
+
+
+def ganancia_desde_pv_vec(pc: np.ndarray, imp: np.ndarray, pv: np.ndarray, *,
+                          redondear: bool = True) -> np.ndarray:
+    neto = (100.0 * pv) / (100.0 + imp)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        g = (neto - pc) / (pc / 100.0)
+    if redondear:
+        g = np.round(g)
+    return np.where(pc > 0, g, 0.0)
+
+
+def cargar_columnas(session: Session, codigos: list[str] | None = None) -> dict[str, np.ndarray]:
+    q = select(
+        Producto.codigo, Producto.precio_costo, Producto.precio_venta, Producto.porcentaje_impuesto
+    ).where(Producto.deleted_at.is_(None)).order_by(Producto.codigo.asc())
+    if codigos is not None:
+        q = q.where(Producto.codigo.in_(list(codigos)))
+    rows = session.execute(q).all()
+    cod, pc, pv, imp = zip(*rows) if rows else ((), (), (), ())
+    return {
+        "codigo": np.array(cod, dtype=object),
+        "precio_costo": np.array(pc, dtype=np.float64),
+        "precio_venta": np.array(pv, dtype=np.float64),
+        "porcentaje_impuesto": np.array(imp, dtype=np.float64),
+    }
+
+
+def calcular(cols: dict[str, np.ndarray], politica: PoliticaPrecio) -> VistaPrevia:
+    pc, pv, imp = cols["precio_costo"], cols["precio_venta"], cols["porcentaje_impuesto"]
+
+    # margen vigente (con el costo actual: tras una recepción ya refleja el último costo), sin redondear
+    g_actual = ganancia_desde_pv_vec(pc, imp, pv, redondear=False)
+    g = politica.ganancia_pct
+    if g is None:
+        conserva = np.ones(len(pc), dtype=bool)
+        ganancia = g_actual
+    elif isinstance(g, dict):
+        over = np.array([g.get(c, np.nan) for c in cols["codigo"]], dtype=np.float64)
+        conserva = np.isnan(over)
+        ganancia = np.where(conserva, g_actual, over)
+    else:
+        conserva = np.zeros(len(pc), dtype=bool)
+        ganancia = np.full_like(pc, float(g))
+
+    imp_nuevo = imp if politica.impuesto_pct is None else np.full_like(imp, float(politica.impuesto_pct))
+    # margen e impuesto que no cambian: el pv vigente tal cual (sólo le toca la regla de redondeo)
+    base = np.where(conserva & (imp_nuevo == imp), pv, precio_venta_vec(pc, ganancia, imp_nuevo))
+    nuevo = politica.redondeo.aplicar(base)
+    # sin costo no hay margen que aplicar: se deja el precio vigente
+    nuevo = np.where(pc > 0, nuevo, pv)
+
+    return VistaPrevia(
+        codigo=cols["codigo"],
+        pv_actual=pv.astype(np.int64),
+        pv_nuevo=nuevo.astype(np.int64),
+        imp_actual=imp.astype(np.int64),
+        imp_nuevo=imp_nuevo.astype(np.int64),
+        ganancia_nueva=ganancia,
+    )
+
+
+def previsualizar(session: Session, politica: PoliticaPrecio,
+                  codigos: list[str] | None = None) -> VistaPrevia:
+    return calcular(cargar_columnas(session, codigos), politica)
+
+
+def aplicar(session: Session, vista: VistaPrevia) -> int:
+    """
+    Escribe SOLO los productos que cambian: un UPDATE preparado ejecutado con
+    executemany dentro de la transacción del caller. Devuelve filas actualizadas.
+    """
+    idx = np.flatnonzero(vista.cambia)
+    if not len(idx):
+        return 0
+    now = datetime.utcnow()
+    t = Producto.__table__
+    stmt = (
+        update(t)
+        .where(t.c.codigo == bindparam("b_codigo"), t.c.deleted_at.is_(None))
+        .values(
+            precio_venta=bindparam("b_pv"),
+            porcentaje_impuesto=bindparam("b_imp"),
+            updated_at=now,
+            version=t.c.version + 1,
+        )
+    )
+    session.execute(stmt, [
+        {"b_codigo": str(vista.codigo[i]), "b_pv": int(vista.pv_nuevo[i]), "b_imp": int(vista.imp_nuevo[i])}
+        for i in idx
+    ])
+    return int(len(idx))
+
+
+# =========================
+# CLI
+# =========================
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m app.core.motor_precios", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--ganancia", type=float, help="margen %% para todos (omitir = conservar el actual)")
+    ap.add_argument("--impuesto", type=float, help="reemplaza porcentaje_impuesto")
+    ap.add_argument("--redondeo", type=int, default=1, help="múltiplo de redondeo, p.ej. 10")
+    ap.add_argument("--modo", choices=MODOS_REDONDEO, default="cercano")
+    ap.add_argument("--codigos", nargs="*", help="limitar a estos códigos")
+    ap.add_argument("--aplicar", action="store_true", help="escribir (sin esto sólo muestra la vista previa)")
+    ap.add_argument("--mostrar", type=int, default=20, help="filas de la vista previa a imprimir")
+    args = ap.parse_args(argv)
+
+    from app.core.db_local import SessionLocal, init_db
+    init_db()
+    politica = PoliticaPrecio(
+        ganancia_pct=args.ganancia,
+        impuesto_pct=args.impuesto,
+        redondeo=ReglaRedondeo(args.redondeo, args.modo),
+    )
+    with SessionLocal() as s, s.begin():
+        vista = previsualizar(s, politica, args.codigos)
+        print(vista.resumen())
+        for i, (cod, a, n, d, pct) in enumerate(vista.filas()):
+            if i >= args.mostrar:
+                print("  ...")
+                break
+            print(f"  {cod:<16} {a:>10} → {n:>10}  ({d:+d}, {pct:+.1f}%)")
+        if args.aplicar:
+            print(f"{aplicar(s, vista)} productos actualizados")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,8 @@
 import httpx
 from .config import BASE_URL, API_TOKEN, HTTP_TIMEOUT
 
+CABECERA_CURSOR = "X-Sync-Cursor"
+
 def _headers():
     h = {"Content-Type": "application/json"}
     if API_TOKEN:
@@ -17,14 +19,46 @@ def api_healthcheck():
         return False
 
 def api_pull(resource: str, since_iso: str | None):
-    params = {"since": since_iso} if since_iso else {}
+    return api_pull_cursor(resource, since_iso)[0]
+
+def api_pull_cursor(resource: str, since_iso: str | None, cursor: int | None = None):
+    """
+    (filas, cursor): con cursor pide lo que el servidor recibió después de ese número
+    de su secuencia de cambios (since no se manda); el cursor nuevo viene en la
+    cabecera CABECERA_CURSOR (None si el servidor no la manda: queda since).
+    """
+    params = {"cursor": cursor} if cursor is not None else {"since": since_iso} if since_iso else {}
     with httpx.Client(timeout=HTTP_TIMEOUT) as c:
         r = c.get(f"{BASE_URL}/sync/pull/{resource}", params=params, headers=_headers())
         r.raise_for_status()
-        return r.json()
+        nuevo = r.headers.get(CABECERA_CURSOR)
+        return r.json(), int(nuevo) if nuevo is not None else None
 
 def api_push(resource: str, batch: list[dict]):
     with httpx.Client(timeout=HTTP_TIMEOUT) as c:
         r = c.post(f"{BASE_URL}/sync/push/{resource}", json=batch, headers=_headers())
         r.raise_for_status()
         return r.json()
+
+def api_snapshot():
+    """Manifiesto del snapshot del catálogo (ver app/core/bootstrap.py)."""
+    with httpx.Client(timeout=HTTP_TIMEOUT) as c:
+        r = c.get(f"{BASE_URL}/sync/snapshot", headers=_headers())
+        r.raise_for_status()
+        return r.json()
+
+def api_descargar(ruta: str, destino):
+    """GET en streaming de BASE_URL + ruta a 'destino' (archivos grandes: no pasa por memoria)."""
+    with httpx.Client(timeout=HTTP_TIMEOUT) as c:
+        with c.stream("GET", f"{BASE_URL}{ruta}", headers=_headers()) as r:
+            r.raise_for_status()
+            with open(destino, "wb") as f:
+                for parte in r.iter_bytes(1 << 20):
+                    f.write(parte)
+
+def api_antientropia(resource: str, accion: str, cuerpo: dict):
+    """POST /sync/ae/<resource>/<accion>: nodos del árbol, filas de hojas o productos (app/core/antientropia.py)."""
+    with httpx.Client(timeout=HTTP_TIMEOUT) as c:
+        r = c.post(f"{BASE_URL}/sync/ae/{resource}/{accion}", json=cuerpo, headers=_headers())
+        r.raise_for_status()
+        return r.json()
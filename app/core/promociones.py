@@ -0,0 +1,314 @@
+# app/core/promociones.py
+"""
+Promociones del carrito, compiladas en índices por código para evaluar por escaneo.
+
+    idx = compilar(reglas)                 # o vigentes(): las de la BD, recompiladas si cambian
+    car = Carrito(idx)
+    car.cambiar("7801", precio_unit=990, cant=3)   # → {codigo: (descuento, Regla | None)} que cambiaron
+
+Tipos (columna Promocion.tipo):
+  nxm         lleva n, paga m del MISMO código (3x2: n=3, m=2)
+  porcentaje  'porcentaje' % sobre la línea
+  precio      precio unitario especial (típicamente con vigencia desde/hasta)
+  combo       n unidades cualesquiera de los códigos de la regla por 'precio'
+              (mix & match); entran al combo las unidades más caras primero
+
+A qué códigos aplica: 'codigos' (lista) y/o 'prefijo' (familia de códigos: el
+catálogo no tiene categorías y los códigos de una familia comparten prefijo).
+
+compilar() arma un dict codigo → reglas y otro prefijo → reglas; reglas_de(codigo)
+los combina una vez por código y lo guarda, así un escaneo cuesta un dict lookup
+más las reglas que tocan ESE código. Carrito lleva el resultado de cada regla: al
+cambiar una línea sólo se reevalúan sus reglas (las de línea miran sólo esa línea;
+un combo mira sus miembros que están en el carrito), y sólo se vuelven a resolver
+las líneas cuyo resultado cambió.
+
+No se acumulan: cada línea se queda con el mayor descuento que le da alguna regla
+(empate: la primera en orden de compilación). La vigencia se mira al evaluar una
+regla por la línea que cambió (hora UTC del reloj); reevaluar() la vuelve a mirar
+en todo el carrito (al cobrar).
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Iterable
+
+from sqlalchemy import or_, select
+
+from app.core.db_local import SessionLocal
+from app.core.eventos import interes
+from app.core.models import Promocion
+
+TIPOS = ("nxm", "porcentaje", "precio", "combo")
+_VACIO: dict = {}
+_SEP = re.compile(r"[\s,;]+")
+
+
+# =========================
+# Reglas
+# =========================
+@dataclass(frozen=True, eq=False)
+class Regla:
+    id: str
+    nombre: str
+    tipo: str
+    codigos: frozenset = frozenset()
+    prefijo: str | None = None
+    n: int | None = None
+    m: int | None = None
+    porcentaje: int | None = None
+    precio: int | None = None
+    desde: datetime | None = None
+    hasta: datetime | None = None
+    # el descuento de una línea depende sólo de esa línea (todo menos combo)
+    de_linea: bool = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "de_linea", self.tipo != "combo")
+        if self.tipo not in TIPOS:
+            raise ValueError(f"Promoción '{self.nombre}': tipo desconocido {self.tipo!r}")
+        if not self.codigos and not self.prefijo:
+            raise ValueError(f"Promoción '{self.nombre}': sin códigos ni prefijo")
+        if self.tipo == "nxm" and not (self.n and self.m is not None and 0 <= self.m < self.n):
+            raise ValueError(f"Promoción '{self.nombre}': nxm necesita n > m >= 0")
+        if self.tipo == "porcentaje" and not (self.porcentaje and 0 < self.porcentaje <= 100):
+            raise ValueError(f"Promoción '{self.nombre}': porcentaje entre 1 y 100")
+        if self.tipo in ("precio", "combo") and (self.precio is None or self.precio < 0):
+            raise ValueError(f"Promoción '{self.nombre}': falta precio")
+        if self.tipo == "combo" and not (self.n and self.n > 0):
+            raise ValueError(f"Promoción '{self.nombre}': combo necesita n > 0")
+
+    def vigente(self, ahora: datetime) -> bool:
+        return (self.desde is None or self.desde <= ahora) and (self.hasta is None or ahora < self.hasta)
+
+    def aplica(self, codigo: str) -> bool:
+        return codigo in self.codigos or (self.prefijo is not None and codigo.startswith(self.prefijo))
+
+    def descuento_linea(self, precio_unit: int, cant: int) -> int:
+        imp = precio_unit * cant
+        if self.tipo == "nxm":
+            d = (cant // self.n) * (self.n - self.m) * precio_unit
+        elif self.tipo == "porcentaje":
+            d = (imp * self.porcentaje * 2 + 100) // 200      # redondeo a la mitad hacia arriba
+        else:
+            d = max(0, (precio_unit - self.precio) * cant)
+        return min(d, imp)
+
+    def descuentos_combo(self, lineas: dict[str, tuple[int, int]], miembros: Iterable[str]) -> dict[str, int]:
+        """{codigo: descuento} repartiendo el ahorro entre las líneas que entran al combo."""
+        orden = sorted(((lineas[c][0], c) for c in miembros if c in lineas), key=lambda x: (-x[0], x[1]))
+        unidades = sum(lineas[c][1] for _p, c in orden)
+        combos = unidades // self.n
+        if not combos:
+            return {}
+        resto, valor, aporte = combos * self.n, 0, []
+        for p, c in orden:
+            u = min(resto, lineas[c][1])
+            if u:
+                aporte.append((c, p * u))
+                valor += p * u
+                resto -= u
+            if not resto:
+                break
+        ahorro = valor - combos * self.precio
+        if ahorro <= 0:
+            return {}
+        out = {c: ahorro * v // valor for c, v in aporte}
+        out[aporte[0][0]] += ahorro - sum(out.values())      # lo que se pierde al truncar, a la más cara
+        return {c: d for c, d in out.items() if d}
+
+
+def regla_desde(p) -> Regla:
+    """Regla a partir de una fila de Promocion (ValueError si está mal armada)."""
+    return Regla(
+        id=str(p.id), nombre=p.nombre, tipo=p.tipo,
+        codigos=frozenset(c for c in _SEP.split(p.codigos or "") if c),
+        prefijo=p.prefijo or None, n=p.n, m=p.m, porcentaje=p.porcentaje, precio=p.precio,
+        desde=p.desde, hasta=p.hasta,
+    )
+
+
+# =========================
+# Índice compilado
+# =========================
+class Indice:
+    def __init__(self, reglas: Iterable[Regla]):
+        self.reglas: tuple[Regla, ...] = tuple(reglas)
+        self.por_codigo: dict[str, list[Regla]] = {}
+        self.por_prefijo: dict[str, list[Regla]] = {}
+        for r in self.reglas:
+            for c in r.codigos:
+                self.por_codigo.setdefault(c, []).append(r)
+            if r.prefijo:
+                self.por_prefijo.setdefault(r.prefijo, []).append(r)
+        self._largos = sorted({len(p) for p in self.por_prefijo})
+        self._orden = {r: i for i, r in enumerate(self.reglas)}
+        self._memo: dict[str, tuple[Regla, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self.reglas)
+
+    def reglas_de(self, codigo: str) -> tuple[Regla, ...]:
+        """Reglas que tocan 'codigo', en orden de compilación (se arma una vez por código)."""
+        rs = self._memo.get(codigo)
+        if rs is None:
+            vistas = set(self.por_codigo.get(codigo, ()))
+            for n in self._largos:
+                if n > len(codigo):
+                    break
+                vistas.update(self.por_prefijo.get(codigo[:n], ()))
+            rs = self._memo[codigo] = tuple(sorted(vistas, key=self._orden.__getitem__))
+        return rs
+
+
+def compilar(reglas: Iterable[Regla]) -> Indice:
+    return Indice(reglas)
+
+
+def cargar(session, *, ahora: datetime | None = None) -> list[Regla]:
+    """Las promociones activas que no terminaron; las mal armadas se saltan."""
+    ahora = ahora or datetime.utcnow()
+    filas = session.execute(
+        select(Promocion).where(
+            Promocion.deleted_at.is_(None),
+            Promocion.activa.is_(True),
+            or_(Promocion.hasta.is_(None), Promocion.hasta > ahora),
+        ).order_by(Promocion.id)
+    ).scalars().all()
+    out = []
+    for p in filas:
+        try:
+            out.append(regla_desde(p))
+        except ValueError:
+            pass
+    return out
+
+
+_cambios = interes("promociones")
+_vigentes: Indice = Indice(())
+
+
+def vigentes() -> Indice:
+    """Índice de las promociones de la BD; se recompila sólo si la tabla cambió (app/core/eventos)."""
+    def _recompilar():
+        global _vigentes
+        with SessionLocal() as s:
+            _vigentes = compilar(cargar(s))
+    _cambios.si_cambio(_recompilar)
+    return _vigentes
+
+
+# =========================
+# Evaluación incremental
+# =========================
+@dataclass
+class Carrito:
+    """Descuentos de un ticket; 'indice' puede ser un Indice o una función que lo devuelve (vigentes)."""
+    indice: Indice | Callable[[], Indice]
+    reloj: Callable[[], datetime] = datetime.utcnow
+    lineas: dict[str, tuple[int, int]] = field(default_factory=dict)          # codigo → (precio_unit, cant)
+    aplicado: dict[str, tuple[int, Regla]] = field(default_factory=dict)      # codigo → (descuento, regla)
+    _res: dict[Regla, dict[str, int]] = field(default_factory=dict)           # regla → {codigo: descuento}
+    _miembros: dict[Regla, set[str]] = field(default_factory=dict)            # combo → sus códigos en el carrito
+    _usado: Indice | None = None
+
+    def _idx(self) -> Indice:
+        return self.indice() if callable(self.indice) else self.indice
+
+    def _evaluar(self, r: Regla, codigo: str, ahora: datetime):
+        """Reevalúa r tras un cambio en 'codigo'; devuelve las líneas cuyo resultado de r cambió."""
+        viejo = self._res.get(r)
+        if r.de_linea:
+            # sólo cambia la entrada de esta línea: se toca en su lugar, sin copiar
+            l = self.lineas.get(codigo)
+            d = r.descuento_linea(*l) if l and r.vigente(ahora) else 0
+            if d == (viejo.get(codigo, 0) if viejo else 0):
+                return ()
+            if d:
+                self._res.setdefault(r, {})[codigo] = d
+            else:
+                del viejo[codigo]
+                if not viejo:
+                    del self._res[r]
+            return (codigo,)
+        viejo = viejo or {}
+        nuevo = r.descuentos_combo(self.lineas, self._miembros.get(r, ())) if r.vigente(ahora) else {}
+        if nuevo == viejo:
+            return ()
+        if nuevo:
+            self._res[r] = nuevo
+        else:
+            self._res.pop(r, None)
+        return {c for c in viejo.keys() | nuevo.keys() if viejo.get(c) != nuevo.get(c)}
+
+    def _resolver(self, codigos: Iterable[str], idx: Indice) -> dict[str, tuple[int, Regla | None]]:
+        cambios = {}
+        for c in codigos:
+            mejor, regla = 0, None
+            for r in idx.reglas_de(c):
+                d = self._res.get(r, _VACIO).get(c, 0)
+                if d > mejor:
+                    mejor, regla = d, r
+            antes = self.aplicado.get(c)
+            if regla is None:
+                if antes is not None:
+                    del self.aplicado[c]
+                    cambios[c] = (0, None)
+            elif antes != (mejor, regla):
+                self.aplicado[c] = (mejor, regla)
+                cambios[c] = (mejor, regla)
+        return cambios
+
+    def cambiar(self, codigo: str, precio_unit: int, cant: int) -> dict[str, tuple[int, Regla | None]]:
+        """Deja la línea con esa cantidad (0 la quita); devuelve {codigo: (descuento, regla)} de las que cambiaron."""
+        idx = self._idx()
+        if idx is not self._usado:
+            # promociones recompiladas: se rearma todo el ticket con el índice nuevo
+            self.lineas[codigo] = (int(precio_unit), int(cant))
+            if not cant:
+                del self.lineas[codigo]
+            return self.reevaluar(idx=idx)
+        if cant:
+            self.lineas[codigo] = (int(precio_unit), int(cant))
+        else:
+            self.lineas.pop(codigo, None)
+        ahora = self.reloj()
+        tocadas = {codigo}
+        for r in idx.reglas_de(codigo):
+            if not r.de_linea:
+                m = self._miembros.setdefault(r, set())
+                m.add(codigo) if cant else m.discard(codigo)
+            tocadas.update(self._evaluar(r, codigo, ahora))
+        return self._resolver(tocadas, idx)
+
+    def reevaluar(self, *, idx: Indice | None = None) -> dict[str, tuple[int, Regla | None]]:
+        """Todo el ticket de nuevo (índice nuevo o vigencias que vencieron); devuelve lo que cambió."""
+        idx = idx or self._idx()
+        self._usado = idx
+        self._res.clear()
+        self._miembros.clear()
+        ahora = self.reloj()
+        for c in self.lineas:
+            for r in idx.reglas_de(c):
+                if not r.de_linea:
+                    self._miembros.setdefault(r, set()).add(c)
+        combos = set()
+        for c in self.lineas:
+            for r in idx.reglas_de(c):
+                if r.de_linea:
+                    self._evaluar(r, c, ahora)
+                elif r not in combos:          # un combo mira a todos sus miembros: una vez
+                    combos.add(r)
+                    self._evaluar(r, c, ahora)
+        return self._resolver(set(self.lineas) | set(self.aplicado), idx)
+
+    def vaciar(self):
+        self.lineas.clear()
+        self.aplicado.clear()
+        self._res.clear()
+        self._miembros.clear()
+
+    def descuento(self, codigo: str) -> tuple[int, Regla | None]:
+        return self.aplicado.get(codigo, (0, None))
@@ -0,0 +1,359 @@
+# app/core/recibos.py
+"""
+Recibos de boleta: render desde una plantilla precompilada y cola de impresión en segundo plano.
+
+    recibo = Recibo.desde_items(folio, items)       # datos planos (sin ORM, sin sesión)
+    get_spooler().encolar(recibo)                   # vuelve al instante; imprime un hilo aparte
+
+Formatos: "texto" (UTF-8), "escpos" (bytes para impresora térmica), "pdf" (PDF mínimo, sin dependencias).
+Destinos: ImpresoraArchivo (un archivo por boleta, sirve de impresora de prueba) o ImpresoraRed (RAW 9100).
+"""
+from __future__ import annotations
+
+import os
+import queue
+import socket
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Iterable
+
+from app.core.config import (
+    TIENDA_NOMBRE, RECIBO_ANCHO, RECIBO_FORMATO, IMPRESORA, RECIBOS_DIR,
+)
+
+FORMATOS = ("texto", "escpos", "pdf")
+EXTENSION = {"texto": "txt", "escpos": "bin", "pdf": "pdf"}
+
+
+# =========================
+# Datos del recibo
+# =========================
+@dataclass
+class LineaRecibo:
+    codigo: str
+    descripcion: str
+    cantidad: int
+    precio_unit: int
+    descuento: int = 0
+    promocion: str | None = None
+
+    @property
+    def subtotal(self) -> int:
+        return self.cantidad * self.precio_unit - self.descuento
+
+
+@dataclass
+class Recibo:
+    folio: str
+    fecha: datetime
+    lineas: list[LineaRecibo]
+    total: int
+    iva: int | None = None
+
+    @classmethod
+    def desde_items(cls, folio: str, items: Iterable[dict], *, fecha: datetime | None = None,
+                    iva: int | None = None) -> "Recibo":
+        """items con la misma forma que recibe crear_boleta_con_detalles."""
+        lineas = [
+            LineaRecibo(str(it["codigo"]), str(it["descripcion"]), int(it["cantidad"]), int(it["precio_unit"]),
+                        int(it.get("descuento") or 0), it.get("promocion"))
+            for it in items
+        ]
+        return cls(folio=folio, fecha=fecha or datetime.now(), lineas=lineas,
+                   total=sum(l.subtotal for l in lineas), iva=iva)
+
+
+def _money(x: int) -> str:
+    return f"$ {x:,}".replace(",", ".")
+
+
+# =========================
+# Plantilla precompilada
+# =========================
+@dataclass(frozen=True)
+class Plantilla:
+    """Todo lo que no depende de la boleta se arma UNA vez por (ancho, tienda)."""
+    ancho: int
+    tienda: str
+    cabecera: tuple[str, ...]
+    pie: tuple[str, ...]
+    sep: str
+
+    def lineas_texto(self, r: Recibo) -> list[str]:
+        a = self.ancho
+        out = list(self.cabecera)
+        out.append(f"Boleta {r.folio}".center(a))
+        out.append(r.fecha.strftime("%d-%m-%Y %H:%M").center(a))
+        out.append(self.sep)
+        for l in r.lineas:
+            out.append(l.descripcion[:a])
+            izq = f"  {l.cantidad} x {_money(l.precio_unit)}"
+            out.append(izq + _money(l.cantidad * l.precio_unit).rjust(a - len(izq)))
+            if l.descuento:
+                izq = f"  {(l.promocion or 'Descuento')[:a - 14]}"
+                out.append(izq + ("-" + _money(l.descuento)).rjust(a - len(izq)))
+        out.append(self.sep)
+        out.append("TOTAL" + _money(r.total).rjust(a - 5))
+        if r.iva is not None:
+            out.append("IVA incluido" + _money(r.iva).rjust(a - 12))
+        out.extend(self.pie)
+        return out
+
+
+@lru_cache(maxsize=8)
+def plantilla(ancho: int = RECIBO_ANCHO, tienda: str = TIENDA_NOMBRE) -> Plantilla:
+    return Plantilla(
+        ancho=ancho,
+        tienda=tienda,
+        cabecera=(tienda.upper().center(ancho), "=" * ancho),
+        pie=("=" * ancho, "Gracias por su compra".center(ancho), ""),
+        sep="-" * ancho,
+    )
+
+
+# ---- ESC/POS ----
+_ESC_INIT    = b"\x1b@" + b"\x1bt\x10"          # reset + página de códigos WPC1252
+_ESC_CENTER  = b"\x1ba\x01"
+_ESC_LEFT    = b"\x1ba\x00"
+_ESC_BOLD_ON = b"\x1bE\x01"
+_ESC_BOLD_OFF = b"\x1bE\x00"
+_ESC_DOBLE   = b"\x1d!\x11"
+_ESC_NORMAL  = b"\x1d!\x00"
+_ESC_CORTE   = b"\n\n\n\x1dV\x42\x00"            # avance + corte parcial
+
+
+@lru_cache(maxsize=8)
+def _escpos_fijo(ancho: int, tienda: str) -> tuple[bytes, bytes]:
+    """Cabecera y pie ESC/POS ya codificados (cache por plantilla)."""
+    p = plantilla(ancho, tienda)
+    cab = (_ESC_INIT + _ESC_CENTER + _ESC_BOLD_ON + _ESC_DOBLE
+           + tienda.encode("cp1252", "replace") + b"\n"
+           + _ESC_NORMAL + _ESC_BOLD_OFF + _ESC_LEFT
+           + p.cabecera[1].encode("cp1252") + b"\n")
+    pie = ("\n".join(p.pie)).encode("cp1252", "replace") + _ESC_CORTE
+    return cab, pie
+
+
+def render_texto(r: Recibo, p: Plantilla | None = None) -> bytes:
+    return ("\n".join((p or plantilla()).lineas_texto(r)) + "\n").encode("utf-8")
+
+
+def render_escpos(r: Recibo, p: Plantilla | None = None) -> bytes:
+    p = p or plantilla()
+    cab, pie = _escpos_fijo(p.ancho, p.tienda)
+    cuerpo = p.lineas_texto(r)[len(p.cabecera):-len(p.pie)]
+    total_idx = next(i for i, t in enumerate(cuerpo) if t.startswith("TOTAL"))
+    out = [cab]
+    out.append("\n".join(cuerpo[:total_idx]).encode("cp1252", "replace") + b"\n")
+    out.append(_ESC_BOLD_ON + cuerpo[total_idx].encode("cp1252", "replace") + _ESC_BOLD_OFF + b"\n")
+    if cuerpo[total_idx + 1:]:
+        out.append("\n".join(cuerpo[total_idx + 1:]).encode("cp1252", "replace") + b"\n")
+    out.append(pie)
+    return b"".join(out)
+
+
+# ---- PDF mínimo (Courier, una página por recibo) ----
+def _pdf_str(t: str) -> bytes:
+    return t.encode("cp1252", "replace").replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def render_pdf(r: Recibo, p: Plantilla | None = None) -> bytes:
+    p = p or plantilla()
+    lineas = p.lineas_texto(r)
+    fs, lh, margen = 9, 11, 14
+    w = int(p.ancho * fs * 0.6) + 2 * margen
+    h = len(lineas) * lh + 2 * margen
+    cont = [b"BT /F1 %d Tf %d TL %d %d Td" % (fs, lh, margen, h - margen - fs)]
+    cont += [b"(" + _pdf_str(t) + b") Tj T*" for t in lineas]
+    cont.append(b"ET")
+    stream = b"\n".join(cont)
+
+    objs = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Resources << /Font << /F1 4 0 R >> >> "
+        b"/Contents 5 0 R >>" % (w, h),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offs = []
+    for i, o in enumerate(objs, 1):
+        offs.append(len(out))
+        out += b"%d 0 obj\n" % i + o + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offs)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%EOF\n" % (len(objs) + 1, xref)
+    return bytes(out)
+
+
+RENDER: dict[str, Callable[[Recibo, Plantilla | None], bytes]] = {
+    "texto": render_texto,
+    "escpos": render_escpos,
+    "pdf": render_pdf,
+}
+
+
+def render(r: Recibo, formato: str = RECIBO_FORMATO, ancho: int = RECIBO_ANCHO) -> bytes:
+    if formato not in RENDER:
+        raise ValueError(f"Formato de recibo desconocido: {formato}")
+    return RENDER[formato](r, plantilla(ancho))
+
+
+# =========================
+# Impresoras
+# =========================
+class ImpresoraArchivo:
+    """Escribe cada recibo como archivo (impresora de prueba / respaldo)."""
+    def __init__(self, directorio: str | Path = RECIBOS_DIR):
+        self.directorio = Path(directorio)
+        self.directorio.mkdir(parents=True, exist_ok=True)
+
+    def enviar(self, nombre: str, data: bytes):
+        destino = self.directorio / nombre
+        tmp = destino.with_suffix(destino.suffix + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, destino)     # nunca queda un recibo a medio escribir
+
+
+class ImpresoraRed:
+    """Impresora térmica en red (puerto RAW, normalmente 9100)."""
+    def __init__(self, host: str, puerto: int = 9100, timeout: float = 5.0):
+        self.host, self.puerto, self.timeout = host, puerto, timeout
+
+    def enviar(self, _nombre: str, data: bytes):
+        with socket.create_connection((self.host, self.puerto), timeout=self.timeout) as s:
+            s.sendall(data)
+
+
+def impresora_desde_config(destino: str = IMPRESORA):
+    if destino.startswith("tcp://"):
+        host, _, puerto = destino[len("tcp://"):].partition(":")
+        return ImpresoraRed(host, int(puerto or 9100))
+    return ImpresoraArchivo(destino or RECIBOS_DIR)
+
+
+# =========================
+# Cola de impresión
+# =========================
+@dataclass
+class _Trabajo:
+    recibo: Recibo
+    intentos: int = 0
+    error: str | None = None
+    encolado: float = field(default_factory=time.perf_counter)
+
+
+class Spooler:
+    """
+    Un hilo daemon consume la cola: render + envío, con reintentos y backoff exponencial.
+    encolar() sólo hace queue.put: el hilo de la UI nunca espera a la impresora.
+    """
+    def __init__(self, impresora=None, formato: str = RECIBO_FORMATO, *, ancho: int = RECIBO_ANCHO,
+                 max_intentos: int = 3, backoff: float = 0.5,
+                 on_error: Callable[[Recibo, str], None] | None = None):
+        self.impresora = impresora or impresora_desde_config()
+        self.formato = formato
+        self.ancho = ancho
+        self.max_intentos = max_intentos
+        self.backoff = backoff
+        self.on_error = on_error
+        self.fallidos: list[_Trabajo] = []
+        self.impresos = 0
+        self._q: queue.Queue[_Trabajo | None] = queue.Queue()
+        self._hilo = threading.Thread(target=self._loop, name="spooler-recibos", daemon=True)
+        self._hilo.start()
+
+    def encolar(self, recibo: Recibo):
+        self._q.put(_Trabajo(recibo))
+
+    def pendientes(self) -> int:
+        return self._q.unfinished_tasks
+
+    def esperar(self, timeout: float | None = None) -> bool:
+        """Espera a que la cola se vacíe (para cierre ordenado y benchmarks)."""
+        fin = None if timeout is None else time.monotonic() + timeout
+        while self._q.unfinished_tasks:
+            if fin is not None and time.monotonic() > fin:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def detener(self, timeout: float | None = 5.0):
+        self.esperar(timeout)
+        self._q.put(None)
+        self._hilo.join(timeout)
+
+    def _loop(self):
+        while True:
+            tr = self._q.get()
+            try:
+                if tr is None:
+                    return
+                self._procesar(tr)
+            except Exception as e:
+                # un recibo que no se puede armar (render) no reintenta ni corta el hilo
+                self._fallo(tr, f"{type(e).__name__}: {e}")
+            finally:
+                self._q.task_done()
+
+    def _fallo(self, tr: _Trabajo, error: str):
+        tr.error = error
+        self.fallidos.append(tr)
+        if self.on_error:
+            try:
+                self.on_error(tr.recibo, tr.error)
+            except Exception:
+                pass
+
+    def _procesar(self, tr: _Trabajo):
+        nombre = f"{tr.recibo.folio}.{EXTENSION.get(self.formato, 'bin')}"
+        data = render(tr.recibo, self.formato, self.ancho)
+        while True:
+            tr.intentos += 1
+            try:
+                self.impresora.enviar(nombre, data)
+                self.impresos += 1
+                return
+            except Exception as e:
+                if tr.intentos >= self.max_intentos:
+                    self._fallo(tr, str(e))
+                    return
+                tr.error = str(e)
+                time.sleep(self.backoff * 2 ** (tr.intentos - 1))
+
+    def reintentar_fallidos(self):
+        pend, self.fallidos = self.fallidos, []
+        for tr in pend:
+            self.encolar(tr.recibo)
+
+
+_spooler: Spooler | None = None
+_spooler_lock = threading.Lock()
+
+
+def get_spooler(on_error: Callable[[Recibo, str], None] | None = None) -> Spooler:
+    """
+    Spooler único de la app (se crea al primer uso). on_error(recibo, error) avisa
+    los recibos que no se pudieron imprimir; se llama desde el hilo del spooler.
+    """
+    global _spooler
+    with _spooler_lock:
+        if _spooler is None:
+            _spooler = Spooler(on_error=on_error)
+        elif on_error is not None:
+            _spooler.on_error = on_error
+        return _spooler
+
+
+def detener_spooler(timeout: float = 5.0):
+    global _spooler
+    with _spooler_lock:
+        sp, _spooler = _spooler, None
+    if sp is not None:
+        sp.detener(timeout)
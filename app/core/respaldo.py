@@ -0,0 +1,339 @@
+# app/core/respaldo.py
+"""
+Respaldos en caliente de mi_app.db con la API de backup de SQLite.
+
+Copiar el archivo mientras la app escribe puede dar una copia corrupta (y en WAL
+falta lo que está en -wal). sqlite3.Connection.backup copia página a página de
+forma consistente; acá se hace en pasos de RESPALDO_PAGINAS con una pausa entre
+pasos para no competir con la caja por disco ni CPU. La pausa se adapta a la caja:
+si hizo commit desde el paso anterior (PRAGMA data_version de una conexión aparte)
+es RESPALDO_PAUSA_ACTIVA_S, si no RESPALDO_PAUSA_S. La prioridad baja del hilo no
+alcanza: con un solo núcleo el planificador igual le da una fracción de la CPU
+mientras la caja vende.
+
+La copia se hace dentro de una transacción de lectura abierta en la conexión
+origen: con WAL los escritores no esperan a ese lector y la copia es el snapshot
+del inicio. Sin ella, cada commit de otra conexión reinicia el backup desde la
+primera página (con la caja vendiendo, podría no terminar nunca).
+
+    respaldar()                                  # RESPALDO_DIR/mi_app-AAAAMMDD-HHMMSS.db, verificado
+    iniciar_respaldos() / detener_respaldos()    # hilo de prioridad baja: uno cada RESPALDO_INTERVALO_S
+
+Cada respaldo se escribe como .tmp, se verifica con PRAGMA integrity_check y
+recién entonces toma su nombre; se conservan las últimas RESPALDO_GENERACIONES.
+
+    python -m app.core.respaldo crear
+    python -m app.core.respaldo listar
+    python -m app.core.respaldo verificar [ARCHIVO]
+    python -m app.core.respaldo restaurar ARCHIVO      # con la app cerrada
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+from app.core.config import (
+    DB_PATH, RESPALDO_DIR, RESPALDO_GENERACIONES, RESPALDO_INTERVALO_S, RESPALDO_PAGINAS, RESPALDO_PAUSA_ACTIVA_S,
+    RESPALDO_PAUSA_S,
+)
+
+_RE_RESPALDO = re.compile(r"^mi_app-(\d{8}-\d{6})\.db$")
+_RE_PREVIO = re.compile(r"^mi_app-(\d{8}-\d{6})-previo\.db$")    # lo que había antes de restaurar
+
+
+class RespaldoCancelado(Exception):
+    pass
+
+
+# =========================
+# Respaldo / verificación
+# =========================
+def _copiar(origen: str | Path, destino: Path, *, paginas: int, pausa: float, pausa_activa: float,
+            progreso: Callable[[int, int], None] | None = None, cancelar: threading.Event | None = None):
+    """backup() por pasos dentro de un snapshot de lectura del origen; destino queda en modo DELETE."""
+    src = sqlite3.connect(str(origen), isolation_level=None, timeout=30)
+    dst = sqlite3.connect(str(destino), isolation_level=None)
+    # data_version no se mueve dentro de la transacción de src: se mira desde otra conexión
+    vigia = sqlite3.connect(str(origen), isolation_level=None, timeout=30) if pausa_activa else None
+    try:
+        src.execute("BEGIN")
+        src.execute("SELECT count(*) FROM sqlite_master").fetchone()    # fija el snapshot
+        version = [vigia.execute("PRAGMA data_version").fetchone()[0] if vigia else None]
+
+        def _paso(_status, restantes, total):
+            if progreso is not None:
+                progreso(total - restantes, total)
+            if cancelar is not None and cancelar.is_set():
+                raise RespaldoCancelado("Respaldo cancelado")
+            if not restantes:
+                return
+            espera = pausa
+            if vigia is not None:
+                v = vigia.execute("PRAGMA data_version").fetchone()[0]
+                if v != version[0]:
+                    version[0], espera = v, max(pausa, pausa_activa)
+            if espera:
+                time.sleep(espera)
+
+        src.backup(dst, pages=paginas, progress=_paso)
+        src.execute("COMMIT")
+        # el encabezado copiado dice WAL: la copia debe ser un solo archivo autocontenido
+        dst.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        if vigia is not None:
+            vigia.close()
+        dst.close()
+        src.close()
+
+
+def verificar(ruta: str | Path) -> list[str]:
+    """Problemas encontrados por PRAGMA integrity_check ([] = íntegro)."""
+    ruta = Path(ruta)
+    if not ruta.is_file():
+        return [f"No existe {ruta}"]
+    try:
+        con = sqlite3.connect(f"file:{ruta}?mode=ro", uri=True)
+        try:
+            filas = [r[0] for r in con.execute("PRAGMA integrity_check")]
+            con.execute("SELECT count(*) FROM sqlite_master").fetchone()
+        finally:
+            con.close()
+    except sqlite3.DatabaseError as e:
+        return [str(e)]
+    return [] if filas == ["ok"] else filas
+
+
+def listar(directorio: str | Path = RESPALDO_DIR) -> list[Path]:
+    """Respaldos (y copias -previo de restauraciones), del más nuevo al más viejo."""
+    d = Path(directorio)
+    if not d.is_dir():
+        return []
+    ps = [p for p in d.iterdir() if _RE_RESPALDO.match(p.name) or _RE_PREVIO.match(p.name)]
+    return sorted(ps, key=lambda p: p.name[len("mi_app-"):len("mi_app-") + 15], reverse=True)
+
+
+def _rotar(directorio: Path, generaciones: int) -> list[Path]:
+    viejos = [p for p in listar(directorio) if _RE_RESPALDO.match(p.name)][generaciones:]
+    for p in viejos:
+        p.unlink()
+    return viejos
+
+
+def _nombre(directorio: Path, sufijo: str = "") -> Path:
+    marca = datetime.now()
+    while True:
+        p = directorio / f"mi_app-{marca:%Y%m%d-%H%M%S}{sufijo}.db"
+        if not p.exists():
+            return p
+        marca = datetime.fromtimestamp(marca.timestamp() + 1)
+
+
+def respaldar(db_path: str | Path = DB_PATH, directorio: str | Path = RESPALDO_DIR, *,
+              paginas: int = RESPALDO_PAGINAS, pausa: float = RESPALDO_PAUSA_S,
+              pausa_activa: float = RESPALDO_PAUSA_ACTIVA_S,
+              generaciones: int | None = RESPALDO_GENERACIONES,
+              progreso: Callable[[int, int], None] | None = None,
+              cancelar: threading.Event | None = None, _sufijo: str = "") -> Path:
+    """
+    Copia verificada de db_path en 'directorio'; devuelve su ruta. generaciones=None
+    no rota; pausa=pausa_activa=0 copia sin pausas.
+    """
+    if not Path(db_path).is_file():
+        raise ValueError(f"No existe la base de datos {db_path}")
+    d = Path(directorio)
+    d.mkdir(parents=True, exist_ok=True)
+    final = _nombre(d, _sufijo)
+    tmp = final.with_name(final.name + ".tmp")
+    try:
+        _copiar(db_path, tmp, paginas=paginas, pausa=pausa, pausa_activa=pausa_activa,
+                progreso=progreso, cancelar=cancelar)
+        problemas = verificar(tmp)
+        if problemas:
+            raise RuntimeError(f"El respaldo no pasó integrity_check: {'; '.join(problemas[:5])}")
+        os.replace(tmp, final)
+    finally:
+        for p in (tmp, tmp.with_name(tmp.name + "-journal")):
+            if p.exists():
+                p.unlink()
+    if generaciones is not None:
+        _rotar(d, generaciones)
+    return final
+
+
+def restaurar(respaldo: str | Path, db_path: str | Path = DB_PATH, directorio: str | Path = RESPALDO_DIR) -> Path | None:
+    """
+    Reemplaza el contenido de db_path por el del respaldo (con la app cerrada).
+    Antes guarda lo que había como mi_app-…-previo.db (no entra en la rotación)
+    y lo devuelve. Se hace con la API de backup y no copiando el archivo: así el
+    -wal que haya quedado de la BD anterior no se mezcla con el contenido nuevo.
+    """
+    respaldo = Path(respaldo)
+    problemas = verificar(respaldo)
+    if problemas:
+        raise ValueError(f"Respaldo inválido {respaldo.name}: {'; '.join(problemas[:5])}")
+    previo = None
+    if Path(db_path).is_file():
+        previo = respaldar(db_path, directorio, pausa=0, pausa_activa=0, generaciones=None,
+                            _sufijo="-previo")
+    src = sqlite3.connect(f"file:{respaldo}?mode=ro", uri=True)
+    dst = sqlite3.connect(str(db_path), isolation_level=None, timeout=30)
+    try:
+        src.backup(dst)
+        dst.execute("PRAGMA journal_mode=WAL")
+        filas = [r[0] for r in dst.execute("PRAGMA integrity_check")]
+    finally:
+        dst.close()
+        src.close()
+    if filas != ["ok"]:
+        raise RuntimeError(f"La base restaurada no pasó integrity_check: {'; '.join(filas[:5])}")
+    return previo
+
+
+# =========================
+# Servicio en segundo plano
+# =========================
+def bajar_prioridad():
+    """Prioridad baja para el hilo actual (best effort: Windows y Linux; en otros no hace nada)."""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            k32 = ctypes.windll.kernel32
+            k32.SetThreadPriority(k32.GetCurrentThread(), -1)      # THREAD_PRIORITY_BELOW_NORMAL
+        elif sys.platform.startswith("linux"):
+            # en Linux setpriority con el id nativo del hilo afecta sólo a ese hilo
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+    except (OSError, AttributeError):
+        pass
+
+
+class ServicioRespaldo:
+    """
+    Hilo daemon: cuando el respaldo más nuevo tiene más de 'intervalo' segundos
+    (o no hay ninguno) hace uno. Un fallo queda en ultimo_error y se reintenta
+    en el siguiente ciclo; detener() cancela el que esté en curso (no deja .tmp).
+    """
+    def __init__(self, db_path: str | Path = DB_PATH, directorio: str | Path = RESPALDO_DIR, *,
+                 intervalo: float = RESPALDO_INTERVALO_S, espera_inicial: float = 60.0,
+                 reintento: float = 600.0, **kw_respaldo):
+        self.db_path = db_path
+        self.directorio = Path(directorio)
+        self.intervalo = intervalo
+        self.reintento = reintento
+        self.kw = kw_respaldo
+        self.ultimo: Path | None = None
+        self.ultimo_error: str | None = None
+        self.progreso = 0.0
+        self._parar = threading.Event()
+        self._espera_inicial = espera_inicial
+        self._hilo = threading.Thread(target=self._loop, name="respaldos", daemon=True)
+        self._hilo.start()
+
+    def _pendiente(self) -> float:
+        """Segundos hasta que toque el próximo respaldo (0 = ya)."""
+        ps = [p for p in listar(self.directorio) if _RE_RESPALDO.match(p.name)]
+        if not ps:
+            return 0.0
+        return max(0.0, ps[0].stat().st_mtime + self.intervalo - time.time())
+
+    def _loop(self):
+        bajar_prioridad()
+        espera = self._espera_inicial
+        while not self._parar.wait(espera):
+            if self._pendiente() > 0:
+                espera = min(self._pendiente(), self.intervalo)
+                continue
+            espera = self.intervalo if self.correr() else self.reintento
+
+    def _progreso(self, hechas: int, total: int):
+        self.progreso = hechas / total if total else 1.0
+
+    def correr(self) -> bool:
+        try:
+            self.ultimo = respaldar(self.db_path, self.directorio, progreso=self._progreso,
+                                    cancelar=self._parar, **self.kw)
+            self.ultimo_error = None
+            return True
+        except RespaldoCancelado:
+            return False
+        except Exception as e:
+            self.ultimo_error = str(e)
+            return False
+
+    def detener(self, timeout: float | None = 10.0):
+        self._parar.set()
+        self._hilo.join(timeout)
+
+
+_servicio: ServicioRespaldo | None = None
+_servicio_lock = threading.Lock()
+
+
+def iniciar_respaldos(**kw) -> ServicioRespaldo:
+    """Servicio único de la app."""
+    global _servicio
+    with _servicio_lock:
+        if _servicio is None:
+            _servicio = ServicioRespaldo(**kw)
+        return _servicio
+
+
+def detener_respaldos(timeout: float = 10.0):
+    global _servicio
+    with _servicio_lock:
+        sv, _servicio = _servicio, None
+    if sv is not None:
+        sv.detener(timeout)
+
+
+# =========================
+# CLI
+# =========================
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m app.core.respaldo", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--db", default=str(DB_PATH))
+    ap.add_argument("--dir", default=str(RESPALDO_DIR), help="carpeta de los respaldos")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("crear", help="respaldo ahora (sin pausas entre pasos)")
+    sub.add_parser("listar", help="respaldos disponibles")
+    pv = sub.add_parser("verificar", help="integrity_check de un respaldo (o de todos)")
+    pv.add_argument("archivo", nargs="?")
+    pr = sub.add_parser("restaurar", help="reemplazar la BD por un respaldo (app cerrada)")
+    pr.add_argument("archivo")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "crear":
+        t0 = time.perf_counter()
+        p = respaldar(args.db, args.dir, pausa=0, pausa_activa=0)
+        print(f"{p}  {p.stat().st_size / 2**20:.1f} MB en {time.perf_counter() - t0:.1f}s")
+        return 0
+    if args.cmd == "listar":
+        for p in listar(args.dir):
+            print(f"{p.name:32} {p.stat().st_size / 2**20:8.1f} MB")
+        return 0
+    if args.cmd == "verificar":
+        ps = [Path(args.archivo)] if args.archivo else listar(args.dir)
+        malos = 0
+        for p in ps:
+            problemas = verificar(p)
+            malos += bool(problemas)
+            print(f"{p.name:32} {'ok' if not problemas else '; '.join(problemas[:3])}")
+        return 1 if malos else 0
+    archivo = Path(args.archivo)
+    if not archivo.exists() and (Path(args.dir) / archivo).exists():
+        archivo = Path(args.dir) / archivo
+    previo = restaurar(archivo, args.db, args.dir)
+    print(f"Restaurado {archivo.name} en {args.db}" + (f" (lo anterior quedó en {previo.name})" if previo else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,46 +1,344 @@
-from datetime import datetime
-from sqlalchemy import select
-from .db_local import SessionLocal
-from .models import Producto, Outbox, SyncState
-from .net import api_pull, api_push
+# app/core/sync_client.py
+"""
+Sincronización con el servidor, guiada por un registro declarativo de tablas.
+
+Cada tabla sincronizada se declara una vez en REGISTRO (registrar()):
+  clave      columnas del ON CONFLICT (por defecto la PK; transito usa producto_codigo, 1:1)
+  politica   "version"  gana version mayor; empate → updated_at más nuevo
+             "lww"      gana updated_at más nuevo (lo que hacía pull_productos)
+             "append"   sólo se insertan filas nuevas, nunca se modifican (boletas)
+  marca      columna de tiempo para "cambió desde" (updated_at / created_at);
+             None = hija sin marca: viaja con las filas de su 'padre'
+  padres     tablas que se aplican antes (sale de las FK; se puede declarar)
+  columnas   proyección: lo que viaja (por defecto todas)
+  direccion  "ambas" | "subir" | "bajar"
+  ledger     las existencias que cambia un pull quedan en movimientos_stock
+             (repositories.cuadrar_ledger, motivo "ajuste", referencia "sync")
+
+pull(): pide todas las tablas a la vez (pool de SYNC_HILOS hilos: la espera es de
+red) y aplica cada grupo de tablas relacionadas por FK en una transacción, padres
+antes que hijas. Lo que se pide es "lo que el servidor recibió después del cursor"
+(SyncState[recurso].last_version: número de su secuencia de cambios, cabecera
+net.CABECERA_CURSOR): una edición que llega tarde con un updated_at viejo (reloj
+de la terminal que la hizo) igual baja. SyncState[recurso].last_sync es el máximo
+'marca' recibido; sólo se pide por él (since) si el servidor no manda cursor.
+Ambos se guardan en la misma transacción que las filas.
+
+push(): sube lo cambiado desde la última subida (SyncState["<recurso>:push"]; la
+primera vez, desde la marca de bajada), padres antes que hijas; grupos
+independientes en paralelo. Lo bajado después de una subida puede volver a subir
+una vez: el servidor lo descarta (misma version y updated_at).
+"""
+from __future__ import annotations
+
 import ast
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime
 
-def _get_sync_state(session, table: str) -> SyncState:
-    st = session.get(SyncState, table)
-    if not st:
-        st = SyncState(table_name=table, last_sync=None, last_version=None)
-        session.add(st)
-    return st
+from sqlalchemy import Date, and_, or_, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
-def pull_productos():
-    with SessionLocal() as s, s.begin():
-        st = _get_sync_state(s, "productos")
-        since = st.last_sync.isoformat() if st.last_sync else None
+from .config import SYNC_HILOS
+from .db_local import SessionLocal, engine as _engine
+from .models import (Boleta, BoletaDetalle, CodigoAlterno, DetalleOrden, OrdenCompra, Outbox, Producto, Promocion,
+                     SyncState, Transito)
+from .net import api_pull_cursor, api_push
+from .repositories import cuadrar_ledger, existencias_de
+from .tiempo import MarcaTiempo
+
+LOTE = 500
+
+
+# =========================
+# Registro
+# =========================
+@dataclass
+class TablaSync:
+    modelo: type
+    politica: str = "version"
+    clave: tuple[str, ...] | None = None
+    marca: str | None = "updated_at"
+    padres: tuple[str, ...] | None = None
+    columnas: tuple[str, ...] | None = None
+    direccion: str = "ambas"
+    padre: tuple[str, str] | None = None        # (recurso padre, columna FK) si marca es None
+    ledger: bool = False
+    tabla: object = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.tabla = self.modelo.__table__
+        if self.politica not in ("version", "lww", "append"):
+            raise ValueError(f"Política desconocida: {self.politica}")
+        if self.direccion not in ("ambas", "subir", "bajar"):
+            raise ValueError(f"Dirección desconocida: {self.direccion}")
+        if self.marca is None and self.padre is None:
+            raise ValueError(f"{self.recurso}: sin 'marca' hay que indicar 'padre'")
+        self.clave = self.clave or tuple(c.name for c in self.tabla.primary_key)
+        self.columnas = self.columnas or tuple(c.name for c in self.tabla.columns)
+        faltan = set(self.clave) - set(self.columnas)
+        if faltan:
+            raise ValueError(f"{self.recurso}: la proyección no incluye la clave {sorted(faltan)}")
+        if self.padres is None:
+            self.padres = tuple(sorted({fk.column.table.name for fk in self.tabla.foreign_keys}
+                                       - {self.recurso}))
+
+    @property
+    def recurso(self) -> str:
+        return self.modelo.__tablename__
+
+
+REGISTRO: dict[str, TablaSync] = {}
+
+
+def registrar(modelo, **kw) -> TablaSync:
+    t = TablaSync(modelo, **kw)
+    REGISTRO[t.recurso] = t
+    return t
+
+
+registrar(Producto, politica="lww", ledger=True)
+registrar(Transito, clave=("producto_codigo",))
+registrar(CodigoAlterno)
+registrar(OrdenCompra)
+registrar(DetalleOrden)
+registrar(Boleta, politica="append", marca="created_at", direccion="subir")
+registrar(BoletaDetalle, politica="append", marca=None, padre=("boletas", "boleta_id"), direccion="subir")
+registrar(Promocion, direccion="bajar")
+
+
+def grupos(recursos=None) -> list[list[TablaSync]]:
+    """
+    Tablas agrupadas por dependencia (componentes conexos de las FK), cada grupo
+    en orden padres → hijas. Los padres no registrados (o no pedidos) se ignoran.
+    """
+    tablas = {r: REGISTRO[r] for r in (recursos or REGISTRO)}
+    vecinos = {r: set() for r in tablas}
+    for r, t in tablas.items():
+        for p in t.padres:
+            if p in tablas:
+                vecinos[r].add(p)
+                vecinos[p].add(r)
+    out, vistos = [], set()
+    for r in tablas:
+        if r in vistos:
+            continue
+        comp, pila = [], [r]
+        while pila:
+            x = pila.pop()
+            if x not in vistos:
+                vistos.add(x)
+                comp.append(x)
+                pila.extend(vecinos[x])
+        orden, hechos = [], set()
+        while len(orden) < len(comp):
+            listos = sorted(x for x in comp if x not in hechos
+                            and all(p in hechos or p not in tablas for p in tablas[x].padres))
+            if not listos:
+                raise ValueError(f"Ciclo de FK entre {sorted(set(comp) - hechos)}")
+            orden += listos
+            hechos.update(listos)
+        out.append([tablas[x] for x in orden])
+    return out
+
+
+# =========================
+# Filas ↔ JSON
+# =========================
+def _a_json(fila: dict) -> dict:
+    return {k: v.isoformat() if isinstance(v, (datetime, date)) else v for k, v in fila.items()}
+
+
+def _de_json(t: TablaSync, fila: dict) -> dict:
+    out = {}
+    for k in t.columnas:
+        if k not in fila:
+            continue
+        v = fila[k]
+        tipo = t.tabla.c[k].type
+        if isinstance(v, str) and isinstance(tipo, MarcaTiempo):
+            v = datetime.fromisoformat(v)
+        elif isinstance(v, str) and isinstance(tipo, Date):
+            v = date.fromisoformat(v)
+        out[k] = v
+    return out
+
+
+def _sync_state(conn, clave: str):
+    return conn.execute(select(SyncState.last_sync).where(SyncState.table_name == clave)).scalar()
+
+
+def _cursor(conn, clave: str) -> int | None:
+    return conn.execute(select(SyncState.last_version).where(SyncState.table_name == clave)).scalar()
+
+
+def _marcar(conn, clave: str, **valores):
+    conn.execute(sqlite_insert(SyncState).values(table_name=clave, **valores)
+                 .on_conflict_do_update(index_elements=["table_name"], set_=valores))
+
+
+# =========================
+# Aplicar (pull; también lo usa el servidor de prueba para los push)
+# =========================
+def aplicar(conn, t: TablaSync, filas: list[dict]) -> int:
+    """Upsert de 'filas' (ya con tipos Python) según la política de la tabla."""
+    if not filas:
+        return 0
+    T = t.tabla
+    ex = sqlite_insert(T).excluded
+    gana = None
+    if t.politica == "lww":
+        gana = ex.updated_at >= T.c.updated_at
+    elif t.politica == "version":
+        gana = or_(ex.version > T.c.version, and_(ex.version == T.c.version, ex.updated_at > T.c.updated_at))
+    pk = {c.name for c in T.primary_key}
+    cambiar = [c for c in t.columnas if c not in t.clave and c not in pk]
+    # una sentencia por tabla y executemany: un INSERT ... VALUES de muchas filas
+    # se vuelve a compilar en cada lote (sin caché) y eso domina el tiempo
+    ins = sqlite_insert(T)
+    if t.politica == "append" or not cambiar:
+        ins = ins.on_conflict_do_nothing(index_elements=list(t.clave))
+    else:
+        ins = ins.on_conflict_do_update(index_elements=list(t.clave), set_={c: ex[c] for c in cambiar}, where=gana)
+    for i in range(0, len(filas), LOTE):
+        conn.execute(ins, filas[i:i + LOTE])
+    return len(filas)
+
+
+def _bajar(t: TablaSync, since: datetime | None, cursor: int | None) -> tuple[list[dict], int | None]:
+    return api_pull_cursor(t.recurso, since.isoformat() if since else None, cursor)
+
+
+def pull(recursos=None, *, engine=None, hilos: int = SYNC_HILOS) -> dict:
+    """
+    Baja y aplica las tablas 'recursos' (por defecto todas las de bajada).
+    Devuelve {recurso: filas} o {recurso: "error: ..."}; un grupo que falla no
+    toca la BD (ni su marca de agua) y no impide los demás.
+    """
+    engine = engine or _engine
+    recursos = [r for r in (recursos or REGISTRO) if REGISTRO[r].direccion != "subir"]
+    with engine.connect() as c:
+        desde = {r: _sync_state(c, r) for r in recursos}
+        cursores = {r: _cursor(c, r) for r in recursos}
+    with ThreadPoolExecutor(max_workers=max(1, min(hilos, len(recursos)))) as pool:
+        futuros = {r: pool.submit(_bajar, REGISTRO[r], desde[r], cursores[r]) for r in recursos}
+    res = {}
+    for grupo in grupos(recursos):
         try:
-            data = api_pull("productos", since_iso=since)
+            datos = {t.recurso: futuros[t.recurso].result() for t in grupo}
+            with engine.connect().execution_options(inmediata=True) as c, c.begin():
+                for t in grupo:
+                    crudas, cursor = datos[t.recurso]
+                    filas = [_de_json(t, f) for f in crudas]
+                    antes = existencias_de(c, (f["codigo"] for f in filas)) if t.ledger else None
+                    res[t.recurso] = aplicar(c, t, filas)
+                    if antes:
+                        cuadrar_ledger(c, antes, referencia="sync")
+                    # con cursor llegan marcas viejas (ediciones tardías): last_sync no retrocede
+                    marcas = [m for m in (desde[t.recurso], *(f.get(t.marca) for f in filas if t.marca)) if m]
+                    valores = {"last_sync": max(marcas)} if filas and marcas else {}
+                    if cursor is not None and cursor != cursores[t.recurso]:
+                        valores["last_version"] = cursor
+                    if valores:
+                        _marcar(c, t.recurso, **valores)
         except Exception as e:
-            return False, f"Pull error: {e}"
-
-        for row in data:
-            local = s.get(Producto, row["id"])
-            incoming_updated = datetime.fromisoformat(row["updated_at"])
-            if not local:
-                local = Producto(**row)
-                local.updated_at = incoming_updated
-                if row.get("deleted_at"):
-                    local.deleted_at = datetime.fromisoformat(row["deleted_at"])
-                s.add(local)
-            else:
-                if incoming_updated >= local.updated_at:  # LWW
-                    for k, v in row.items():
-                        if k in {"updated_at", "deleted_at"} and isinstance(v, str) and v:
-                            v = datetime.fromisoformat(v)
-                        setattr(local, k, v)
-
-        st.last_sync = datetime.utcnow()
-        return True, f"Pull OK ({len(data)} cambios)"
+            for t in grupo:
+                res[t.recurso] = f"error: {e}"
+    return res
+
+
+# =========================
+# Push
+# =========================
+def _cambios(conn, t: TablaSync, desde: datetime | None, claves_padre: dict) -> tuple[list[dict], datetime | None]:
+    cols = [t.tabla.c[k] for k in t.columnas]
+    q = select(*cols)
+    if t.marca is not None:
+        if desde is not None:
+            q = q.where(t.tabla.c[t.marca] > desde)
+    else:
+        recurso, fk = t.padre
+        ids = claves_padre.get(recurso, [])
+        if not ids:
+            return [], None
+        filas = []
+        for i in range(0, len(ids), LOTE):
+            filas += [dict(r._mapping) for r in conn.execute(q.where(t.tabla.c[fk].in_(ids[i:i + LOTE])))]
+        return filas, None
+    filas = [dict(r._mapping) for r in conn.execute(q)]
+    hasta = max((f[t.marca] for f in filas), default=None)
+    return filas, hasta
+
+
+def _subir_grupo(engine, grupo: list[TablaSync]) -> dict:
+    res, claves, marcas = {}, {}, {}
+    for t in grupo:
+        with engine.connect() as c:
+            # primera subida: desde la marca de bajada (lo anterior vino del servidor)
+            desde = _sync_state(c, f"{t.recurso}:push") or _sync_state(c, t.recurso)
+            filas, marcas[t.recurso] = _cambios(c, t, desde, claves)
+        pk = [k.name for k in t.tabla.primary_key]
+        claves[t.recurso] = [f[pk[0]] for f in filas] if len(pk) == 1 else []
+        op = "insert" if t.politica == "append" else "upsert"
+        for i in range(0, len(filas), LOTE):
+            api_push(t.recurso, [{"op": op, "data": _a_json(f)} for f in filas[i:i + LOTE]])
+        res[t.recurso] = len(filas)
+    # las marcas al final: si una hija falla, el padre se vuelve a subir con ella
+    with engine.begin() as c:
+        for recurso, hasta in marcas.items():
+            if hasta is not None:
+                _marcar(c, f"{recurso}:push", last_sync=hasta)
+    return res
+
+
+def push(recursos=None, *, engine=None, hilos: int = SYNC_HILOS) -> dict:
+    """
+    Sube lo cambiado desde la última subida de cada tabla. Los grupos van en
+    paralelo; dentro de un grupo, padres antes que hijas (una hija nunca llega
+    antes que su padre). Una tabla que falla corta su grupo: lo pendiente se
+    reintenta la próxima vez desde la misma marca.
+    """
+    engine = engine or _engine
+    recursos = [r for r in (recursos or REGISTRO) if REGISTRO[r].direccion != "bajar"]
+    res = {}
+    with ThreadPoolExecutor(max_workers=max(1, hilos)) as pool:
+        futuros = [(g, pool.submit(_subir_grupo, engine, g)) for g in grupos(recursos)]
+    for g, f in futuros:
+        try:
+            res.update(f.result())
+        except Exception as e:
+            for t in g:
+                res.setdefault(t.recurso, f"error: {e}")
+    return res
+
+
+def resumen(titulo: str, res: dict) -> tuple[bool, str]:
+    errores = {r: v for r, v in res.items() if isinstance(v, str)}
+    partes = ", ".join(f"{r} {v}" for r, v in res.items() if not isinstance(v, str))
+    if errores:
+        return False, f"{titulo} con errores: " + "; ".join(f"{r}: {v}" for r, v in errores.items())
+    return True, f"{titulo} OK ({partes})"
+
+
+def sincronizar(engine=None) -> tuple[bool, str]:
+    """push() y luego pull() de todo el registro."""
+    ok_s, msg_s = resumen("Push", push(engine=engine))
+    ok_b, msg_b = resumen("Pull", pull(engine=engine))
+    return ok_s and ok_b, f"{msg_s}; {msg_b}"
+
+
+# =========================
+# API anterior
+# =========================
+def pull_productos():
+    res = pull(["productos"])
+    if isinstance(res["productos"], str):
+        return False, f"Pull error: {res['productos'][len('error: '):]}"
+    return True, f"Pull OK ({res['productos']} cambios)"
+
 
 def push_outbox():
+    """Outbox manual (tablas fuera del registro); las registradas suben con push()."""
     with SessionLocal() as s, s.begin():
         items = s.execute(select(Outbox).where(Outbox.sent.is_(False))).scalars().all()
         if not items:
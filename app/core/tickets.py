@@ -0,0 +1,188 @@
+# app/core/tickets.py
+"""
+Journal de carritos (tickets en curso y aparcados).
+
+Cada mutación del carrito se agrega como evento a una tabla SQLite en WAL, en un
+archivo propio (TICKETS_DB_PATH) para no competir con las escrituras de mi_app.db.
+Además se mantiene un espejo en memoria ya materializado por ticket, así
+reanudar un ticket aparcado es una copia de dict (sin leer disco ni reproducir eventos).
+
+Al arrancar se reproducen los eventos de los tickets abiertos: si la app se cayó
+a mitad de una venta, activo() devuelve ese carrito.
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from app.core.config import TICKETS_DB_PATH
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickets (
+    id          TEXT PRIMARY KEY,
+    estado      TEXT NOT NULL DEFAULT 'activo',     -- 'activo' | 'aparcado'
+    nombre      TEXT,
+    actualizado REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ticket_eventos (
+    seq         INTEGER PRIMARY KEY AUTOINCREMENT,
+    ticket_id   TEXT NOT NULL,
+    op          TEXT NOT NULL,                       -- 'add' | 'remove' | 'clear'
+    codigo      TEXT,
+    descripcion TEXT,
+    precio_unit INTEGER,
+    cant        INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_ticket_eventos_ticket ON ticket_eventos(ticket_id, seq);
+"""
+
+
+def _aplicar(items: dict, op: str, codigo=None, desc=None, precio_unit=None, cant=None):
+    """Misma semántica que VentasState.add/remove/clear."""
+    if op == "add":
+        it = items.get(codigo)
+        if it:
+            it["cant"] += cant
+        else:
+            items[codigo] = {"desc": desc, "precio_unit": precio_unit, "cant": cant}
+    elif op == "remove":
+        it = items.get(codigo)
+        if not it:
+            return
+        if cant is None or cant >= it["cant"]:
+            items.pop(codigo, None)
+        else:
+            it["cant"] -= cant
+    elif op == "clear":
+        items.clear()
+
+
+def _copia(items: dict) -> dict:
+    return {c: dict(v) for c, v in items.items()}
+
+
+class TicketJournal:
+    def __init__(self, path: str | Path = TICKETS_DB_PATH):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")   # commit = append al -wal, sin fsync
+        self._db.executescript(_SCHEMA)
+        self._carritos: dict[str, dict] = {}
+        self._meta: dict[str, dict] = {}                # {tid: {"estado", "nombre", "actualizado"}}
+        self._cargar()
+
+    def _cargar(self):
+        for tid, estado, nombre, act in self._db.execute(
+            "SELECT id, estado, nombre, actualizado FROM tickets"
+        ):
+            self._meta[tid] = {"estado": estado, "nombre": nombre, "actualizado": act}
+            self._carritos[tid] = {}
+        for tid, op, cod, desc, pu, cant in self._db.execute(
+            "SELECT ticket_id, op, codigo, descripcion, precio_unit, cant FROM ticket_eventos ORDER BY seq"
+        ):
+            if tid in self._carritos:
+                _aplicar(self._carritos[tid], op, cod, desc, pu, cant)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    # ---------- escritura ----------
+    def _evento(self, tid: str, op: str, codigo=None, desc=None, precio_unit=None, cant=None):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO ticket_eventos(ticket_id, op, codigo, descripcion, precio_unit, cant) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (tid, op, codigo, desc, precio_unit, cant),
+            )
+            _aplicar(self._carritos.setdefault(tid, {}), op, codigo, desc, precio_unit, cant)
+            self._meta.setdefault(tid, {"estado": "activo", "nombre": None})["actualizado"] = now
+
+    def nuevo(self) -> str:
+        tid = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT INTO tickets(id, estado, actualizado) VALUES (?, 'activo', ?)", (tid, now))
+            self._carritos[tid] = {}
+            self._meta[tid] = {"estado": "activo", "nombre": None, "actualizado": now}
+        return tid
+
+    def add(self, tid: str, codigo: str, desc: str, precio_unit: int, cant: int = 1):
+        self._evento(tid, "add", codigo, desc, int(precio_unit), int(cant))
+
+    def remove(self, tid: str, codigo: str, qty: int | None = None):
+        self._evento(tid, "remove", codigo, cant=qty)
+
+    def clear(self, tid: str):
+        self._evento(tid, "clear")
+
+    def _estado(self, tid: str, estado: str, nombre: str | None = None):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE tickets SET estado = ?, nombre = COALESCE(?, nombre), actualizado = ? WHERE id = ?",
+                (estado, nombre, now, tid),
+            )
+            m = self._meta.setdefault(tid, {"nombre": None})
+            m.update(estado=estado, actualizado=now)
+            if nombre is not None:
+                m["nombre"] = nombre
+
+    def aparcar(self, tid: str, nombre: str | None = None):
+        self._estado(tid, "aparcado", nombre)
+
+    def reanudar(self, tid: str) -> dict:
+        """Marca el ticket como activo y devuelve su carrito (copia, desde memoria)."""
+        if tid not in self._carritos:
+            raise KeyError(f"Ticket '{tid}' no existe")
+        self._estado(tid, "activo")
+        return _copia(self._carritos[tid])
+
+    def cerrar(self, tid: str):
+        """Ticket cobrado o vaciado: se borra del journal (el journal sólo guarda lo abierto)."""
+        with self._lock:
+            self._db.execute("DELETE FROM ticket_eventos WHERE ticket_id = ?", (tid,))
+            self._db.execute("DELETE FROM tickets WHERE id = ?", (tid,))
+            self._carritos.pop(tid, None)
+            self._meta.pop(tid, None)
+
+    # ---------- lectura ----------
+    def activo(self) -> tuple[str, dict] | None:
+        """El ticket 'activo' más reciente con productos (recuperación tras una caída)."""
+        cand = [
+            (m["actualizado"], tid) for tid, m in self._meta.items()
+            if m["estado"] == "activo" and self._carritos.get(tid)
+        ]
+        if not cand:
+            return None
+        _, tid = max(cand)
+        return tid, _copia(self._carritos[tid])
+
+    def aparcados(self) -> list[tuple[str, str, int, int, float]]:
+        """[(ticket_id, nombre, n_productos, total, actualizado)] del más reciente al más antiguo."""
+        out = []
+        for tid, m in self._meta.items():
+            if m["estado"] != "aparcado":
+                continue
+            items = self._carritos.get(tid, {})
+            total = sum(v["precio_unit"] * v["cant"] for v in items.values())
+            out.append((tid, m.get("nombre") or "", len(items), total, m["actualizado"]))
+        out.sort(key=lambda t: t[4], reverse=True)
+        return out
+
+
+_journal: TicketJournal | None = None
+_journal_lock = threading.Lock()
+
+
+def get_journal() -> TicketJournal:
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = TicketJournal()
+        return _journal
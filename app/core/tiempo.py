@@ -0,0 +1,81 @@
+# app/core/tiempo.py
+"""
+Marcas de tiempo como entero (µs desde 1970-01-01 UTC).
+
+SQLAlchemy DateTime en SQLite guarda texto ("2025-01-01 12:00:00.000000", 26
+bytes) y al leer pasa cada valor por un parser; comparar rangos es comparar
+strings. MarcaTiempo guarda un INTEGER (≤ 8 bytes, comparación numérica) y en
+Python sigue siendo datetime naive en UTC, como datetime.utcnow().
+
+TS_FORMATO = "us" (por defecto) | "texto" (DateTime de siempre). Para convertir
+una BD existente: revisión 0002 de migrations/ (app/core/migraciones.py).
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import BigInteger, DateTime
+from sqlalchemy.types import TypeDecorator
+
+from app.core.config import TS_FORMATO
+
+ENTERO = TS_FORMATO == "us"
+
+_EPOCH = datetime(1970, 1, 1)
+_UN_US = timedelta(microseconds=1)
+FORMATO_TEXTO = "%Y-%m-%d %H:%M:%S.%f"      # el mismo que usa SQLAlchemy DateTime en SQLite
+
+
+def a_us(v) -> int:
+    """datetime (naive = UTC, o con zona) | date | texto ISO → µs desde epoch."""
+    if isinstance(v, str):
+        v = datetime.fromisoformat(v)
+    elif not isinstance(v, datetime) and isinstance(v, date):
+        v = datetime(v.year, v.month, v.day)
+    if v.tzinfo is not None:
+        v = v.astimezone(timezone.utc).replace(tzinfo=None)
+    return (v - _EPOCH) // _UN_US
+
+
+def desde_us(us: int) -> datetime:
+    return _EPOCH + timedelta(0, 0, us)
+
+
+def a_texto(v) -> str:
+    """Valor guardado (entero o texto) → texto en el formato de DateTime."""
+    if isinstance(v, int):
+        return desde_us(v).strftime(FORMATO_TEXTO)
+    return str(v)
+
+
+class MarcaTiempo(TypeDecorator):
+    """datetime en Python; INTEGER µs (TS_FORMATO="us") o texto en la BD."""
+    impl = DateTime
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        return dialect.type_descriptor(BigInteger() if ENTERO else DateTime())
+
+    # bind/result_processor directos en vez de process_bind_param/process_result_value:
+    # se llaman por cada valor leído y la capa genérica de TypeDecorator duplicaba el costo
+    def bind_processor(self, dialect):
+        if not ENTERO:
+            return super().bind_processor(dialect)
+
+        def proc(value):
+            return None if value is None else a_us(value)
+        return proc
+
+    def result_processor(self, dialect, coltype):
+        if not ENTERO:
+            return super().result_processor(dialect, coltype)
+        epoch, td = _EPOCH, timedelta
+
+        def proc(value):
+            if value is None:
+                return None
+            try:
+                return epoch + td(0, 0, value)          # posicional: ~30% más rápido que microseconds=
+            except TypeError:                       # fila escrita por SQL plano en formato texto
+                return datetime.fromisoformat(value)
+        return proc
@@ -0,0 +1,163 @@
+# app/core/trazas.py
+"""
+Trazas de latencia del camino caliente (escaneo → línea y total en pantalla).
+
+    tr = get_trazador().traza("ventas.escaneo")
+    ...; tr.marca("parse")
+    ...; tr.marca("lookup")
+    tr.fin()                      # registra también el total "ventas.escaneo"
+
+Cada etapa alimenta un histograma estilo HDR (log-lineal: error relativo
+acotado, memoria fija, registrar es O(1)), p.ej. "ventas.escaneo.parse".
+Los percentiles se consultan con resumen() o se vuelcan a JSON con exportar()
+(main.py lo hace al cerrar, en TRAZAS_PATH).
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+class Histograma:
+    """
+    Histograma log-lineal en microsegundos, al estilo HdrHistogram:
+    2**bits sub-cubetas por potencia de 2 → error relativo ≤ 2**-(bits-1)
+    (bits=7 → <1.6%). Rango 1 µs .. 2**max_exp µs (~19 h con 36).
+    """
+    __slots__ = ("bits", "_sub", "_mitad", "cuentas", "n", "suma", "minimo", "maximo")
+
+    def __init__(self, bits: int = 7, max_exp: int = 36):
+        self.bits = bits
+        self._sub = 1 << bits
+        self._mitad = self._sub >> 1
+        self.cuentas = [0] * (self._sub + (max_exp - bits + 1) * self._mitad)
+        self.n = 0
+        self.suma = 0
+        self.minimo = None
+        self.maximo = 0
+
+    def _indice(self, v: int) -> int:
+        if v < self._sub:
+            return v
+        e = v.bit_length() - self.bits
+        return self._sub + (e - 1) * self._mitad + ((v >> e) - self._mitad)
+
+    def _valor(self, i: int) -> int:
+        """Punto medio de la cubeta i (en µs)."""
+        if i < self._sub:
+            return i
+        e, r = divmod(i - self._sub, self._mitad)
+        e += 1
+        bajo = (r + self._mitad) << e
+        return bajo + ((1 << e) >> 1)
+
+    def registrar(self, us: int):
+        us = max(0, int(us))
+        i = min(self._indice(us), len(self.cuentas) - 1)
+        self.cuentas[i] += 1
+        self.n += 1
+        self.suma += us
+        if us > self.maximo:
+            self.maximo = us
+        if self.minimo is None or us < self.minimo:
+            self.minimo = us
+
+    def percentil(self, p: float) -> int:
+        if not self.n:
+            return 0
+        objetivo = max(1, -(-self.n * p // 100))        # ceil(n*p/100)
+        acum = 0
+        for i, c in enumerate(self.cuentas):
+            if c:
+                acum += c
+                if acum >= objetivo:
+                    return min(self._valor(i), self.maximo)
+        return self.maximo
+
+    def fusionar(self, otro: "Histograma"):
+        for i, c in enumerate(otro.cuentas):
+            if c:
+                self.cuentas[i] += c
+        self.n += otro.n
+        self.suma += otro.suma
+        self.maximo = max(self.maximo, otro.maximo)
+        if otro.minimo is not None:
+            self.minimo = otro.minimo if self.minimo is None else min(self.minimo, otro.minimo)
+
+    def resumen(self) -> dict:
+        """{"n", "media_us", "min_us", "max_us", "p50_us", ...}"""
+        out = {
+            "n": self.n,
+            "media_us": round(self.suma / self.n, 1) if self.n else 0,
+            "min_us": self.minimo or 0,
+            "max_us": self.maximo,
+        }
+        for p in PERCENTILES:
+            out[f"p{p:g}_us"] = self.percentil(p)
+        return out
+
+
+class Traza:
+    """Cronómetro de una ejecución: cada marca() mide desde la marca anterior."""
+    __slots__ = ("_tr", "nombre", "_t0", "_ult")
+
+    def __init__(self, trazador: "Trazador", nombre: str):
+        self._tr = trazador
+        self.nombre = nombre
+        self._t0 = self._ult = time.perf_counter_ns()
+
+    def marca(self, etapa: str):
+        t = time.perf_counter_ns()
+        self._tr.registrar(f"{self.nombre}.{etapa}", (t - self._ult) // 1000)
+        self._ult = t
+
+    def fin(self, etapa: str | None = None):
+        if etapa:
+            self.marca(etapa)
+        self._tr.registrar(self.nombre, (time.perf_counter_ns() - self._t0) // 1000)
+
+
+class Trazador:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hist: dict[str, Histograma] = {}
+
+    def traza(self, nombre: str) -> Traza:
+        return Traza(self, nombre)
+
+    def registrar(self, nombre: str, us: int):
+        h = self._hist.get(nombre)
+        if h is None:
+            with self._lock:
+                h = self._hist.setdefault(nombre, Histograma())
+        h.registrar(us)
+
+    def histograma(self, nombre: str) -> Histograma | None:
+        return self._hist.get(nombre)
+
+    def resumen(self) -> dict[str, dict]:
+        with self._lock:
+            nombres = sorted(self._hist)
+        return {n: self._hist[n].resumen() for n in nombres}
+
+    def reiniciar(self):
+        with self._lock:
+            self._hist.clear()
+
+    def exportar(self, path: str | Path) -> dict:
+        """Escribe {generado, latencias: {nombre: resumen}} como JSON; devuelve el dict."""
+        datos = {"generado": datetime.now().isoformat(timespec="seconds"), "latencias": self.resumen()}
+        Path(path).write_text(json.dumps(datos, indent=2, ensure_ascii=False), encoding="utf-8")
+        return datos
+
+
+_trazador = Trazador()
+
+
+def get_trazador() -> Trazador:
+    return _trazador
@@ -1,16 +1,34 @@
 #app/main.py
+import multiprocessing
 import sys
 from PySide6.QtWidgets import QApplication, QDialog, QLineEdit
 
 # Importa los recursos compilados (activa rutas :/…)
 import assets.imagenes  # registra QResource para :/png/...
 
-from app.core.db_local import init_db
+from app.core.config import DIAGNOSTICO, TRAZAS_PATH
+from app.core.db_local import init_db, SessionLocal
+from app.core import diagnostico, eventos
+from app.core.analitica import iniciar_exportador, detener_exportador
+from app.core.repositories import crear_snapshots_stock
+from app.core.mantenimiento import iniciar_mantenimiento, detener_mantenimiento, correr_al_cierre
+from app.core.recibos import detener_spooler
+from app.core.respaldo import iniciar_respaldos, detener_respaldos
+from app.core.tickets import get_journal
+from app.core.trazas import get_trazador
 from app.ui.main_window import create_main_window
 from app.ui.a_py.login_runtime import create_login_dialog
 
 def main():
+    if DIAGNOSTICO:
+        diagnostico.instalar()   # contadores SQL por acción (panel Ctrl+Shift+D)
     init_db()
+    eventos.instalar()   # commits → tablas cambiadas: las páginas recargan sólo si hace falta
+    # checkpoint diario del ledger de stock (días cerrados desde el último arranque)
+    with SessionLocal() as s, s.begin():
+        crear_snapshots_stock(s)
+    # carrito en curso si la app se cerró a mitad de una venta (lo retoma pageVentas)
+    recuperado = get_journal().activo()
     app = QApplication(sys.argv)
 
     # 1) Mostrar login
@@ -21,8 +39,29 @@ def main():
     # 2) Abrir MainWindow
     w = create_main_window(username="admin")
     w.show()
+    iniciar_exportador()   # ventas/movimientos → Parquet en un proceso aparte (si hay pyarrow)
+    iniciar_respaldos()    # respaldo en caliente de mi_app.db cada RESPALDO_INTERVALO_S
+    iniciar_mantenimiento()   # purgas/vacuum/ANALYZE cuando la caja queda ociosa
+    if recuperado:
+        w.statusBar().showMessage(
+            f"Se recuperó el ticket en curso ({len(recuperado[1])} productos)", 10000
+        )
 
-    sys.exit(app.exec())
+    rc = app.exec()
+    detener_spooler()   # deja terminar los recibos en cola
+    detener_exportador()
+    detener_respaldos()    # cancela el respaldo en curso (no deja copias a medias)
+    detener_mantenimiento()
+    try:
+        correr_al_cierre()   # si hoy no corrió en ocio: ya no hay ventas que trabar
+    except Exception:
+        pass
+    try:
+        get_trazador().exportar(TRAZAS_PATH)
+    except Exception:
+        pass
+    sys.exit(rc)
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()   # el exportador usa procesos "spawn" (también en el .exe)
     main()
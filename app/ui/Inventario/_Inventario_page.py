@@ -4,13 +4,22 @@ from PySide6.QtWidgets import QWidget, QStackedWidget, QPushButton, QMessageBox
 from app.ui.Inventario.inv_agregar_page import enter_inv_agregar
 from app.ui.Inventario.inv_alertaStock_page import enter_inv_alerta_stock
 from app.ui.Inventario.inv_ajustes_page import enter_inv_ajustes
+from app.ui.a_py.enlaces import Enlaces, w, registro
+
+_W = Enlaces(
+    page=w(QWidget, "pageInventario"),
+    stack=w(QStackedWidget, "invStack", en="pageInventario"),
+    btnAgregar=w(QPushButton, "btnAgregar", opcional=True),
+    btnAjustes=w(QPushButton, "btnAjustes", opcional=True),
+    btnTabla=w(QPushButton, "btnInvTabla", "btnBajoInventario", opcional=True),
+)
 
 #Devuelve el QStackedWidget
 def _get_inv_stack(root):
-    page_inv = root.findChild(QWidget, "pageInventario")
-    if page_inv is None:
+    ws = _W.de(root)
+    if ws.page is None:
         raise RuntimeError("No existe 'pageInventario' en el .ui")
-    stk = page_inv.findChild(QStackedWidget, "invStack")
+    stk = ws.stack
     if stk is None:
         raise RuntimeError("Falta QStackedWidget 'invStack' dentro de pageInventario")
     return stk
@@ -22,12 +31,10 @@ def _sync_inv_state(root):
     except Exception:
         return
 
-    def _find(name): 
-        return root.findChild(QPushButton, name)
-
-    btnAgregar  = _find("btnAgregar")
-    btnTabla   = _find("btnInvTabla") or _find("btnBajoInventario")
-    btnAjustes = _find("btnAjustes")
+    ws = _W.de(root)
+    btnAgregar  = ws.btnAgregar
+    btnTabla   = ws.btnTabla
+    btnAjustes = ws.btnAjustes
 
     mapping = {
         "pageInvAgregar":  btnAgregar,
@@ -49,7 +56,7 @@ def _sync_inv_state(root):
 def show_inv_page(root, page_object_name: str):
     """Sub-router: cambia de subpágina y delega init/refresh a su enter_*."""
     stk = _get_inv_stack(root)
-    page = stk.findChild(QWidget, page_object_name)
+    page = registro(root).get(QWidget, page_object_name, en=stk)
     if page is None:
         QMessageBox.critical(root, "UI", f"No existe la página interna '{page_object_name}'")
         return
@@ -67,9 +74,10 @@ def show_inv_page(root, page_object_name: str):
 
 def init_inventory_page(root):
     """Cablea SOLO los botones internos y el sync visual."""
-    btnAgregar = root.findChild(QPushButton, "btnAgregar")
-    btnAjustes  = root.findChild(QPushButton, "btnAjustes")
-    btnInvTabla = root.findChild(QPushButton, "btnInvTabla") or root.findChild(QPushButton, "btnBajoInventario")
+    ws = _W.de(root)
+    btnAgregar = ws.btnAgregar
+    btnAjustes  = ws.btnAjustes
+    btnInvTabla = ws.btnTabla
 
     if btnAgregar:
         btnAgregar.clicked.connect(lambda: show_inv_page(root, "pageInvAgregar"))
@@ -91,7 +99,7 @@ def enter_inventory(root):
     Llamado por el router principal al entrar a 'pageInventario'.
     - 1ª vez: inicializa sub-router y muestra la subpágina por defecto.
     """
-    page = root.findChild(QWidget, "pageInventario")
+    page = _W.de(root).page
     if page is None:
         return
 
@@ -3,11 +3,14 @@ from dataclasses import dataclass
 from PySide6.QtWidgets import QWidget, QLineEdit, QLabel, QPushButton, QSpinBox, QMessageBox
 
 from app.core.db_local import SessionLocal
-from app.core.repositories import get_producto_por_codigo, update_producto
+from app.core.repositories import get_producto_por_codigo, ajustar_existencias
 
 from app.ui.a_py.ui_helpers import (
     find_any, text_get, text_set, num_get, num_set
 )
+from app.ui.a_py.enlaces import Enlaces, w
+
+_W = Enlaces(page=w(QWidget, "pageInvAgregar", en="pageInventario"))
 
 @dataclass
 class _View:
@@ -25,10 +28,7 @@ class _View:
 
 # ---------- localizar widgets ----------
 def _build_view(root: QWidget) -> _View:
-    page_inv = root.findChild(QWidget, "pageInventario")
-    if not page_inv:
-        raise RuntimeError("Falta 'pageInventario'")
-    page = page_inv.findChild(QWidget, "pageInvAgregar")
+    page = _W.de(root).page
     if not page:
         raise RuntimeError("Falta 'pageInvAgregar'")
 
@@ -101,30 +101,21 @@ def _agregar(v: _View):
     if qty <= 0:
         QMessageBox.information(v.page, "Cantidad inválida", "Debe ser mayor que 0.")
         return
-    # sumar existencias (existentes + qty)
+    # sumar existencias (existencias + qty) en un UPDATE atómico
     try:
         with SessionLocal() as s, s.begin():
-            p = get_producto_por_codigo(s, v.codigo_actual)
-            if not p:
-                QMessageBox.warning(v.page, "No encontrado", f"Código '{v.codigo_actual}' ya no existe.")
-                return
-            nuevo = int(p.existencias or 0) + qty
-            update_producto(s, v.codigo_actual, existencias=nuevo)
-            # feedback en UI
-            v.lblHay.setText(str(nuevo))
-            try: v.spinAgregar.setValue(1)
-            except Exception: pass
+            nuevo = ajustar_existencias(s, v.codigo_actual, qty, "ingreso")
+        # feedback en UI
+        v.lblHay.setText(str(nuevo))
+        try: v.spinAgregar.setValue(1)
+        except Exception: pass
+    except ValueError:
+        QMessageBox.warning(v.page, "No encontrado", f"Código '{v.codigo_actual}' ya no existe.")
+        return
     except Exception as e:
         QMessageBox.critical(v.page, "Error", f"No se pudo agregar: {e}")
         return
 
-    # refrescar tabla de "Alertas de stock" si está en uso
-    try:
-        from app.ui.Inventario.inv_alertaStock_page import refresh_inv_alerta_stock
-        refresh_inv_alerta_stock(v.page.window())
-    except Exception:
-        pass
-
     QMessageBox.information(v.page, "Listo", "Existencias actualizadas.")
 
 def _otro(v: _View):
@@ -144,7 +135,6 @@ def init_inv_agregar_page(root: QWidget):
 
 
 # Wrapper de entrada para el sub-router
-from PySide6.QtWidgets import QWidget as _QW
 
 def enter_inv_agregar(root):
     """
@@ -152,10 +142,7 @@ def enter_inv_agregar(root):
       - Primera vez: init_inv_agregar_page(root)
       - Reingresos: no requiere refresh (se espera interacción del usuario)
     """
-    page_inv = root.findChild(_QW, "pageInventario")
-    if page_inv is None:
-        return
-    page = page_inv.findChild(_QW, "pageInvAgregar")
+    page = _W.de(root).page
     if page is None:
         return
     if not getattr(page, "_inv_ag_inited", False):
@@ -5,11 +5,14 @@ from PySide6.QtWidgets import (
 )
 
 from app.core.db_local import SessionLocal
-from app.core.repositories import get_producto_por_codigo, update_producto
+from app.core.repositories import get_producto_por_codigo, update_producto, ajustar_existencias
 
 from app.ui.a_py.ui_helpers import (
     find_any, text_get, text_set, num_get, num_set
 )
+from app.ui.a_py.enlaces import Enlaces, w
+
+_W = Enlaces(page=w(QWidget, "pageInvAjustes", en="pageInventario"))
 
 @dataclass
 class _View:
@@ -23,14 +26,12 @@ class _View:
     btnMod: QPushButton
     btnOtro: QPushButton
     codigo_actual: str | None = None
+    exist_leidas: int = 0      # stock mostrado al buscar (base del delta)
 
 
 # --------- localizar widgets y construir vista ----------
 def _build_view(root: QWidget) -> _View:
-    page_inv = root.findChild(QWidget, "pageInventario")
-    if not page_inv:
-        raise RuntimeError("Falta 'pageInventario'")
-    page = page_inv.findChild(QWidget, "pageInvAjustes")
+    page = _W.de(root).page
     if not page:
         raise RuntimeError("Falta 'pageInvAjustes'")
 
@@ -95,6 +96,7 @@ def _do_buscar(v: _View):
         QMessageBox.information(v.page, "No encontrado", f"Código '{code}' no existe.")
         return
     v.codigo_actual = p.codigo
+    v.exist_leidas = int(p.existencias or 0)
     text_set(v.descEdit,  p.descripcion or "")
     num_set(v.precioFld,  int(p.precio_venta or 0))
     num_set(v.existFld,   int(p.existencias or 0))
@@ -116,21 +118,19 @@ def _do_modificar(v: _View):
     exist  = num_get(v.existFld)
     try:
         with SessionLocal() as s, s.begin():
-            p = update_producto(s, code, descripcion=desc, precio_venta=precio, existencias=exist)
+            p = update_producto(s, code, descripcion=desc, precio_venta=precio)
             if not p:
                 QMessageBox.warning(v.page, "No encontrado", f"Código '{code}' no existe.")
                 return
+            # se aplica la DIFERENCIA contra lo mostrado al buscar: las ventas
+            # hechas mientras tanto no se pisan
+            if int(exist) != v.exist_leidas:
+                s.flush()
+                ajustar_existencias(s, code, int(exist) - v.exist_leidas, "ajuste")
     except Exception as e:
         QMessageBox.critical(v.page, "Error", f"No se pudo actualizar: {e}")
         return
 
-    # Opcional: refresca la tabla de 'Bajo inventario' si esa subpágina está en uso.
-    try:
-        from app.ui.Inventario.inv_alertaStock_page import refresh_inv_alerta_stock
-        refresh_inv_alerta_stock(v.page.window())  # root
-    except Exception:
-        pass
-
     QMessageBox.information(v.page, "Listo", "Producto actualizado.")
     _do_otro(v)
 
@@ -154,7 +154,6 @@ def init_inv_ajustes_page(root: QWidget):
 
 
 # ---------- wrapper de entrada para el sub-router ----------
-from PySide6.QtWidgets import QWidget as _QW
 
 def enter_inv_ajustes(root):
     """
@@ -162,10 +161,7 @@ def enter_inv_ajustes(root):
       - Primera vez: init_inv_ajustes_page(root)
       - Reingresos: no requiere refresh (espera interacción del usuario)
     """
-    page_inv = root.findChild(_QW, "pageInventario")
-    if page_inv is None:
-        return
-    page = page_inv.findChild(_QW, "pageInvAjustes")
+    page = _W.de(root).page
     if page is None:
         return
     if not getattr(page, "_inv_aj_inited", False):
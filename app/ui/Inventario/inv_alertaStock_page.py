@@ -1,12 +1,14 @@
 # app/ui/Inventario/inv_alertaStock_page.py
 from PySide6.QtWidgets import QWidget
+from app.ui.a_py.enlaces import Enlaces, w
+
+_W = Enlaces(page=w(QWidget, "pageInvTabla", en="pageInventario"))
 
 
 # ---------- wrapper mínimo para el sub-router ----------
 
 def enter_inv_alerta_stock(root: QWidget):
     """Entry point al entrar a la subpágina de 'Bajo Inventario'."""
-    page_inv = root.findChild(QWidget, "pageInventario")
-    page_tab = page_inv.findChild(QWidget, "pageInvTabla") if page_inv else None
+    page_tab = _W.de(root).page
     if page_tab is None:
         return
@@ -1,22 +1,35 @@
 # app/ui/Ventas/_Ventas_page.py
-from PySide6.QtCore import Qt
-import re
-from PySide6.QtGui import QStandardItemModel, QStandardItem
-from PySide6.QtWidgets import QWidget, QLineEdit, QPushButton, QTableView, QLabel, QMessageBox
+from PySide6.QtCore import Qt, QTimer
+from datetime import datetime
+from PySide6.QtGui import QStandardItemModel, QStandardItem, QKeySequence, QShortcut
+from PySide6.QtWidgets import QWidget, QLineEdit, QPushButton, QTableView, QLabel, QMessageBox, QInputDialog
 
 from app.ui.Ventas.varios_dialog import open_varios_dialog
 from app.ui.Ventas.buscar_producto_dialog import open_buscar_producto_dialog
 
 from app.core.db_local import SessionLocal
-from app.core.repositories import get_producto_por_codigo, crear_boleta_con_detalles
-
-IVA_RATE = 0.19                 
-PRECIO_UNIT_INCLUYE_IVA = True   # True = P.Unit ya viene con IVA
-
-
-
-
-COLS = ["Código", "Descripción", "Cant.", "P.Unit", "Importe"]
+from app.core.repositories import get_producto_por_codigo, crear_boleta_con_detalles, get_impuestos_por_codigo
+from app.core.config import PRECIO_INCLUYE_IVA, IMPUESTO_REDONDEO, IVA_DEFAULT
+from app.core.impuestos import MotorImpuestos
+from app.core.promociones import Carrito, vigentes
+from app.core.codigos_barra import get_resolutor
+from app.core.recibos import Recibo, get_spooler
+from app.core.tickets import get_journal
+from app.core.diagnostico import accion
+from app.core.trazas import get_trazador
+from app.ui.a_py.enlaces import Enlaces, w
+
+
+_W = Enlaces(
+    page=w(QWidget, "pageVentas"),
+    code_edit=w(QLineEdit, "codigoEdit", en="pageVentas", unico=True),
+    btn_add=w(QPushButton, "btnAgregarTicket", "btnAgregar", en="pageVentas", unico=True),
+    table=w(QTableView, "tablaTicket", "tablaVentas", "tableView", en="pageVentas", unico=True),
+    btn_cobrar=w(QPushButton, "btnCobrar", "cobrar", en="pageVentas", unico=True),
+    lbl_total=w(QLabel, "lblTotal", "total", en="pageVentas", unico=True, opcional=True),
+)
+
+COLS = ["Código", "Descripción", "Cant.", "P.Unit", "Dto.", "Importe"]
 
 def _fmt_money(x: int) -> str:
     return f"$ {x:,}".replace(",", ".")
@@ -26,42 +39,162 @@ def _new_model(parent=None):
     m.setHorizontalHeaderLabels(COLS)
     return m
 
-def _add_row(model: QStandardItemModel, codigo, desc, cant, punit):
-    imp = cant * punit
+def _add_row(model: QStandardItemModel, codigo, desc, cant, punit, dto=0, promo=None):
+    imp = cant * punit - dto
     cells = [
         QStandardItem(str(codigo)),
         QStandardItem(str(desc)),
         QStandardItem(str(cant)),
         QStandardItem(str(punit)),
+        QStandardItem(f"-{dto}" if dto else ""),
         QStandardItem(str(imp)),
     ]
-    for i in (2,3,4):
+    if promo:
+        cells[4].setToolTip(promo)
+    for i in (2,3,4,5):
         cells[i].setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
     model.appendRow(cells)
 
+ETIQUETA = "@"   # clave de línea de una etiqueta de balanza: "<codigo>@<código leído>"
+
+
+def codigo_de(clave: str) -> str:
+    """Código del producto de una línea del carrito (las etiquetas de balanza van en líneas aparte)."""
+    return clave.split(ETIQUETA, 1)[0]
+
+
 class VentasState:
-    """Carrito en memoria: {codigo: {"desc", "precio_unit", "cant"}}"""
-    def __init__(self):
+    """
+    Carrito en memoria: {clave: {"desc", "precio_unit", "cant", "imp", "dto", "promo"}}
+    La clave es el código del producto, salvo las etiquetas de balanza (cada una con
+    su precio): "<codigo>@<etiqueta>", sin promociones (el precio ya viene puesto).
+    Si tiene journal, cada cambio queda también en el journal de tickets (recuperable).
+    self.impuestos lleva neto/IVA por tasa al día con cada cambio (app/core/impuestos.py).
+    self.promos (si se da 'promociones': un Indice o vigentes) recalcula sólo las
+    promociones que tocan la línea cambiada (app/core/promociones.py).
+    """
+    def __init__(self, journal=None, tasas=None, promociones=None):
         self.items = {}  # dict
+        self.journal = journal
+        self.ticket_id = None
+        self.tasas = tasas  # codigos → {codigo: porcentaje_impuesto}, para tickets que vienen del journal
+        self.impuestos = MotorImpuestos(incluye_iva=PRECIO_INCLUYE_IVA, redondeo=IMPUESTO_REDONDEO)
+        self.promos = Carrito(promociones) if promociones is not None else None
 
-    def add(self, codigo, desc, precio_unit, cant=1):
+    def _linea(self, codigo):
+        it = self.items.get(codigo)
+        if it is None:
+            self.impuestos.fijar(codigo, 0, 0, 0)
+        else:
+            self.impuestos.fijar(codigo, it["precio_unit"], it["cant"], it.get("imp", IVA_DEFAULT), it.get("dto", 0))
+
+    def _aplicar_promos(self, cambios):
+        for c, (dto, regla) in cambios.items():
+            it = self.items.get(c)
+            if it is not None:
+                it["dto"], it["promo"] = dto, (regla.nombre if regla else None)
+                self._linea(c)
+
+    def _cambio(self, codigo):
+        """La línea 'codigo' cambió: promociones que la tocan + impuestos de las líneas afectadas."""
+        if self.promos is not None and ETIQUETA not in codigo:
+            it = self.items.get(codigo)
+            self._aplicar_promos(self.promos.cambiar(codigo, it["precio_unit"] if it else 0, it["cant"] if it else 0))
+        self._linea(codigo)
+
+    def revisar_promos(self) -> bool:
+        """Reevalúa todo el ticket (vigencias que vencieron); True si cambió algún descuento."""
+        if self.promos is None:
+            return False
+        cambios = self.promos.reevaluar()
+        self._aplicar_promos(cambios)
+        return bool(cambios)
+
+    def cargar(self, ticket_id, items):
+        """Reemplaza el carrito (ticket retomado); el journal no guarda la tasa: se busca una vez."""
+        self.ticket_id, self.items = ticket_id, items
+        faltan = [c for c, v in items.items() if "imp" not in v]
+        tasas = {}
+        if faltan and self.tasas is not None:
+            try:
+                tasas = self.tasas({codigo_de(c) for c in faltan})
+            except Exception:
+                tasas = {}
+        for c in faltan:
+            items[c]["imp"] = tasas.get(codigo_de(c), IVA_DEFAULT)
+        self.impuestos.vaciar()
+        if self.promos is not None:
+            self.promos.vaciar()
+            for c, v in items.items():
+                v["dto"], v["promo"] = 0, None
+                if ETIQUETA not in c:
+                    self.promos.lineas[c] = (v["precio_unit"], v["cant"])
+            self._aplicar_promos(self.promos.reevaluar())
+        for c in items:
+            self._linea(c)
+
+    def _log(self, op, *args):
+        if self.journal is None:
+            return
+        try:
+            if self.ticket_id is None:
+                self.ticket_id = self.journal.nuevo()
+            getattr(self.journal, op)(self.ticket_id, *args)
+        except Exception:
+            pass  # el journal nunca debe frenar la venta
+
+    def add(self, codigo, desc, precio_unit, cant=1, impuesto=None):
         it = self.items.get(codigo)
         if it:
             it["cant"] += cant
         else:
-            self.items[codigo] = {"desc": desc, "precio_unit": precio_unit, "cant": cant}
+            self.items[codigo] = {"desc": desc, "precio_unit": precio_unit, "cant": cant,
+                                  "imp": IVA_DEFAULT if impuesto is None else int(impuesto), "dto": 0, "promo": None}
+        self._cambio(codigo)
+        self._log("add", codigo, desc, precio_unit, cant)
 
     def clear(self):
+        """Vacía el carrito y cierra su ticket (cobrado o descartado)."""
         self.items.clear()
+        self.impuestos.vaciar()
+        if self.promos is not None:
+            self.promos.vaciar()
+        if self.journal is not None and self.ticket_id is not None:
+            try:
+                self.journal.cerrar(self.ticket_id)
+            except Exception:
+                pass
+        self.ticket_id = None
+
+    def aparcar(self, nombre=None):
+        """Deja el ticket actual aparcado y empieza uno vacío."""
+        if not self.items or self.journal is None or self.ticket_id is None:
+            return False
+        self.journal.aparcar(self.ticket_id, nombre)
+        self.items = {}
+        self.impuestos.vaciar()
+        if self.promos is not None:
+            self.promos.vaciar()
+        self.ticket_id = None
+        return True
+
+    def reanudar(self, ticket_id):
+        """Retoma un ticket aparcado (el actual, si tiene productos, queda aparcado)."""
+        if self.items:
+            self.aparcar()
+        self.cargar(ticket_id, self.journal.reanudar(ticket_id))
 
     def total(self):
-        return sum(v["precio_unit"]*v["cant"] for v in self.items.values())
+        return self.impuestos.bruto  # suma de (P.Unit * Cant - Dto.), sin recorrer el carrito
+
+    def totales(self):
+        return self.impuestos.totales()
 
     def as_rows(self):
         # devuelve lista para la tabla
         out = []
         for cod, v in self.items.items():
-            out.append((cod, v["desc"], v["cant"], v["precio_unit"]))
+            out.append((cod, v["desc"], v["cant"], v["precio_unit"], v.get("dto", 0), v.get("promo")))
         return out
     
     def remove(self, codigo: str, qty: int | None = None):
@@ -73,16 +206,9 @@ class VentasState:
             self.items.pop(codigo, None)
         else:
             it["cant"] -= qty
+        self._cambio(codigo)
+        self._log("remove", codigo, qty)
     
-def _find_any(parent, cls, names):
-    """Busca por nombre dentro de parent; si no, toma el ÚNICO del tipo cls en toda la subjerarquía."""
-    for n in names:
-        w = parent.findChild(cls, n)
-        if w:
-            return w
-    lst = parent.findChildren(cls)  # recursivo
-    return lst[0] if len(lst) == 1 else None
-
 def init_ventas_page(root: QWidget):
     """
     Prepara la pageVentas dentro del MainWindow (cargado desde .ui).
@@ -93,16 +219,17 @@ def init_ventas_page(root: QWidget):
       - lblTotal (QLabel)
       - btnCobrar (QPushButton)
     """
-    page = root.findChild(QWidget, "pageVentas")
+    ws = _W.de(root)
+    page = ws.page
     if page is None:
         raise RuntimeError("No existe pageVentas en el stack")
 
-    # Widgets dentro de pageVentas (tolera TabWidget/frames)
-    code_edit  = _find_any(page, QLineEdit,  ["codigoEdit"])
-    btn_add    = _find_any(page, QPushButton,["btnAgregarTicket","btnAgregar"])
-    table      = _find_any(page, QTableView, ["tablaTicket","tablaVentas","tableView"])
-    lbl_total  = _find_any(page, QLabel,     ["lblTotal","total"])
-    btn_cobrar = _find_any(page, QPushButton,["btnCobrar","cobrar"])
+    # Widgets dentro de pageVentas (tolera TabWidget/frames): por nombre o el ÚNICO de su tipo
+    code_edit  = ws.code_edit
+    btn_add    = ws.btn_add
+    table      = ws.table
+    lbl_total  = ws.lbl_total
+    btn_cobrar = ws.btn_cobrar
     lbl_iva  = page.findChild(QLabel, "lblIVA")
     lbl_neto = page.findChild(QLabel, "lblNeto")
 
@@ -134,8 +261,22 @@ def init_ventas_page(root: QWidget):
     if missing:
         raise RuntimeError("Faltan widgets en pageVentas: " + ", ".join(missing))
 
-    # Estado (carrito) + modelo tabla
-    state = VentasState()
+    btn_aparcar   = page.findChild(QPushButton, "btnAparcarTicket")
+    btn_recuperar = page.findChild(QPushButton, "btnRecuperarTicket")
+
+    # Estado (carrito) + modelo tabla; si quedó un ticket abierto (caída), se retoma
+    try:
+        journal = get_journal()
+    except Exception:
+        journal = None
+    def _tasas(codigos):
+        with SessionLocal() as s:
+            return get_impuestos_por_codigo(s, codigos)
+
+    state = VentasState(journal=journal, tasas=_tasas, promociones=vigentes)
+    recuperado = journal.activo() if journal else None
+    if recuperado:
+        state.cargar(*recuperado)
     model = _new_model(page)
     table.setModel(model)
     table.horizontalHeader().setStretchLastSection(True)
@@ -149,30 +290,27 @@ def init_ventas_page(root: QWidget):
     page._ventas_model = model
 
     def _recalc():
-        bruto = state.total()  # suma de (P.Unit * Cant) del carrito
-        if PRECIO_UNIT_INCLUYE_IVA:
-            neto = round(bruto / (1 + IVA_RATE))
-            iva  = bruto - neto
-            total = bruto
-        else:
-            neto = bruto
-            iva  = round(neto * IVA_RATE)
-            total = neto + iva
-        
+        t = state.totales()  # acumulados por tasa: no recorre el carrito
+
         # pinta labels
         if lbl_total:
-            lbl_total.setText(_fmt_money(total))
+            lbl_total.setText(_fmt_money(t.total))
         if lbl_iva:
-            lbl_iva.setText(f"IVA: {_fmt_money(iva)}")
+            lbl_iva.setText(f"IVA: {_fmt_money(t.iva)}")
         if lbl_neto:
-            lbl_neto.setText(f"Neto: {_fmt_money(neto)}")
+            neto = f"Neto: {_fmt_money(t.neto)}"
+            lbl_neto.setText(neto + (f"  Exento: {_fmt_money(t.exento)}" if t.exento else ""))
 
-    def _repaint():
+    def _repaint(traza=None):
         m = page._ventas_model
         m.removeRows(0, m.rowCount())
-        for (codigo, desc, cant, punit) in state.as_rows():
-            _add_row(m, codigo, desc, cant, punit)
+        for (codigo, desc, cant, punit, dto, promo) in state.as_rows():
+            _add_row(m, codigo, desc, cant, punit, dto, promo)
+        if traza:
+            traza.marca("modelo")
         _recalc()
+        if traza:
+            traza.marca("recalc")
 
     def _remove_selected():
         sel = table.selectionModel().selectedRows()
@@ -195,6 +333,48 @@ def init_ventas_page(root: QWidget):
             state.clear()
             _repaint()
 
+    def _aparcar():
+        if not state.items:
+            return
+        nombre = f"{datetime.now():%H:%M} · {len(state.items)} prod. · {_fmt_money(state.total())}"
+        if state.aparcar(nombre):
+            _repaint()
+            _status(f"Ticket aparcado ({nombre})")
+        if code_edit:
+            code_edit.setFocus()
+
+    def _recuperar():
+        if journal is None:
+            return
+        lst = journal.aparcados()
+        if not lst:
+            QMessageBox.information(page, "Recuperar", "No hay tickets aparcados.")
+            return
+        etiquetas = [nombre or tid[:8] for (tid, nombre, _n, _t, _a) in lst]
+        elegido, ok = QInputDialog.getItem(page, "Recuperar ticket", "Ticket:", etiquetas, 0, False)
+        if not ok:
+            return
+        state.reanudar(lst[etiquetas.index(elegido)][0])
+        _repaint()
+        if code_edit:
+            code_edit.setFocus()
+
+    def _status(msg, ms=8000):
+        try:
+            root.statusBar().showMessage(msg, ms)
+        except Exception:
+            if lbl_total:
+                lbl_total.setToolTip(msg)
+
+    def _fallo_impresion(recibo, error):
+        # llega desde el hilo del spooler: el aviso se pinta en el hilo de la UI
+        QTimer.singleShot(0, page, lambda: _status(f"No se imprimió la boleta {recibo.folio}: {error}", 15000))
+
+    try:
+        get_spooler(on_error=_fallo_impresion)
+    except Exception:
+        pass  # sin impresora configurada la venta sigue igual
+
     def _open_buscar():
         open_buscar_producto_dialog(root, modal=True)  # modal y con parent; la X sólo cierra el diálogo
 
@@ -211,7 +391,7 @@ def init_ventas_page(root: QWidget):
                 QMessageBox.information(page, "No encontrado", f"Código '{code}' no existe.")
                 return
             # agregar al carrito y refrescar
-            state.add(p.codigo, p.descripcion, int(p.precio_venta), cant=qty)
+            state.add(p.codigo, p.descripcion, int(p.precio_venta), cant=qty, impuesto=p.porcentaje_impuesto)
             _repaint()
         open_varios_dialog(root, on_accept=_take, modal=True)
 
@@ -225,50 +405,62 @@ def init_ventas_page(root: QWidget):
         if not p:
             QMessageBox.information(page, "No encontrado", f"Código '{code}' no existe.")
             return
-        state.add(p.codigo, p.descripcion, int(p.precio_venta), cant=1)
+        state.add(p.codigo, p.descripcion, int(p.precio_venta), cant=1, impuesto=p.porcentaje_impuesto)
         _repaint()
         if code_edit:
             code_edit.clear()
             code_edit.setFocus()
 
-    # Override: soporta cantidad en codigo (ABC*3, ABC x3)
+    # Override: cantidad en el código (ABC*3, ABC x3), códigos alternos y etiquetas de balanza
+    @accion("ventas.escanear")
     def _add_by_code():
         raw = (code_edit.text().strip() if code_edit else "")
         if not raw:
             return
-        m = re.match(r"^\s*([^\s\*xX]+)\s*(?:[xX\*]\s*(\d+))?\s*$", raw)
-        if not m:
-            QMessageBox.information(page, "Formato no valido", "Usa: CODIGO o CODIGO*x (p.ej. ABC*3)")
-            return
-        code = m.group(1)
+        # Enter → línea y total en pantalla, por etapa (histogramas en app/core/trazas)
+        traza = get_trazador().traza("ventas.escaneo")
+        # escaneo repetido: lectura y ficha salen de memoria, sin BD (app/core/codigos_barra)
+        resolutor = get_resolutor()
         try:
-            qty = int(m.group(2) or 1)
-        except ValueError:
-            qty = 1
-        if qty <= 0:
-            QMessageBox.information(page, "Cantidad invalida", "La cantidad debe ser mayor que 0.")
+            lect = resolutor.resolver(raw)
+        except ValueError as e:
+            QMessageBox.information(page, "Código no válido", str(e))
             return
-        with SessionLocal() as s:
-            p = get_producto_por_codigo(s, code)
-        if not p:
-            QMessageBox.information(page, "No encontrado", f"Codigo '{code}' no existe.")
+        traza.marca("parse")
+        f = resolutor.ficha(lect.codigo) if lect is not None else None
+        traza.marca("lookup")
+        if f is None:
+            QMessageBox.information(page, "No encontrado", f"Codigo '{raw}' no existe.")
             return
-        state.add(p.codigo, p.descripcion, int(p.precio_venta), cant=qty)
-        _repaint()
+        clave = f"{lect.codigo}{ETIQUETA}{lect.etiqueta}" if lect.etiqueta else lect.codigo
+        state.add(clave, f.descripcion, lect.precio_para(f.precio_venta), cant=lect.cantidad,
+                  impuesto=f.porcentaje_impuesto)
+        traza.marca("add")
+        _repaint(traza)
         if code_edit:
             code_edit.clear()
             code_edit.setFocus()
+        # el repintado ocurre cuando vuelve el event loop: se cierra la traza después
+        QTimer.singleShot(0, lambda: traza.fin("pintado"))
 
+    @accion("ventas.cobrar")
     def _cobrar():
         if not state.items:
             QMessageBox.information(page, "Carrito vacío", "Agrega productos antes de cobrar.")
             return
+        if state.revisar_promos():
+            # alguna promoción empezó o venció desde el último escaneo: que se vea antes de cobrar
+            _repaint()
+            QMessageBox.information(page, "Promociones", "Las promociones del ticket cambiaron. Revisa el total.")
+            return
         items = [
             {
-                "codigo": cod,
+                "codigo": codigo_de(cod),
                 "descripcion": v["desc"],
                 "precio_unit": v["precio_unit"],
                 "cantidad": v["cant"],
+                "descuento": v.get("dto", 0),
+                "promocion": v.get("promo"),
             }
             for cod, v in state.items.items()
         ]
@@ -280,9 +472,18 @@ def init_ventas_page(root: QWidget):
         except Exception as e:
             QMessageBox.critical(page, "Error al cobrar", str(e))
             return
+        iva = state.totales().iva if PRECIO_INCLUYE_IVA else None
+        # la impresión va a la cola en segundo plano: la caja sigue libre
+        try:
+            get_spooler().encolar(Recibo.desde_items(folio, items, iva=iva))
+        except Exception:
+            pass
         state.clear()
         _repaint()
-        QMessageBox.information(page, "Venta registrada", f"Boleta {folio} guardada.\nTotal: {_fmt_money(total_val)}")
+        # aviso no modal: el siguiente escaneo entra de inmediato en codigoEdit
+        _status(f"Boleta {folio} guardada. Total: {_fmt_money(total_val)}")
+        if code_edit:
+            code_edit.setFocus()
 
     # Enlaces
     if code_edit:
@@ -299,6 +500,12 @@ def init_ventas_page(root: QWidget):
         btn_buscar.clicked.connect(_open_buscar)
     if btn_varios:
         btn_varios.clicked.connect(_open_varios)
+    if btn_aparcar:
+        btn_aparcar.clicked.connect(_aparcar)
+    if btn_recuperar:
+        btn_recuperar.clicked.connect(_recuperar)
+    QShortcut(QKeySequence("F8"), page, activated=_aparcar)
+    QShortcut(QKeySequence("F9"), page, activated=_recuperar)
 
     # expone repaint para re-entrada desde el router
     page._ventas_repaint = _repaint
@@ -307,7 +514,6 @@ def init_ventas_page(root: QWidget):
 
 
 # ---------- wrapper mínimo para el router ----------
-from PySide6.QtWidgets import QWidget as _QW
 
 def enter_ventas(root: QWidget):
     """
@@ -315,7 +521,7 @@ def enter_ventas(root: QWidget):
       - Primera vez: init_ventas_page(...)
       - Siguientes:  repinta para reflejar el estado actual del carrito
     """
-    page = root.findChild(_QW, "pageVentas")
+    page = _W.de(root).page
     if page is None:
         return
     if not getattr(page, "_ventas_inited", False):
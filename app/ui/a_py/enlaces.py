@@ -0,0 +1,179 @@
+# app/ui/a_py/enlaces.py
+"""
+Registro de widgets por objectName, armado una sola vez por cada .ui cargado.
+
+findChild/findChildren recorren recursivamente todo el árbol en cada llamada, y
+main_window.ui tiene cientos de widgets: cada navegación los pagaba varias veces
+(router, sub-router, enter_*, sync de botones). load_ui() ahora indexa todos los
+widgets con nombre en un dict (un recorrido) y las páginas resuelven en O(1).
+
+Cada módulo declara lo que usa, con nombres alternativos:
+
+    _W = Enlaces(
+        page=w(QWidget, "pageProCatalogo"),
+        table=w(QTableView, "tablaCatalogo", "tableView", en="pageProCatalogo", unico=True),
+        btn=w(QPushButton, "btnRefrescar", en="pageProCatalogo", opcional=True),
+    )
+    ws = _W.de(root)          # resuelto una vez por ventana y guardado
+    ws.table
+
+  en        el widget tiene que estar dentro de ese contenedor (los alternativos
+            suelen ser nombres genéricos que existen en otras páginas)
+  unico     si no aparece por nombre: el único de su clase dentro de 'en'
+  textos    si no aparece por nombre: el primero de su clase en 'en' con ese texto
+  opcional  si falta queda None; si no, validar() lo informa al arrancar
+
+validar(root) resuelve todas las declaraciones contra la ventana y devuelve lo que
+falta (create_main_window no arranca con un .ui incompleto).
+Con REGISTRO_ACTIVO = False todo vuelve a findChild (para medir el antes).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from types import SimpleNamespace
+
+from PySide6.QtCore import QObject
+from PySide6.QtWidgets import QWidget
+
+REGISTRO_ACTIVO = True
+
+
+class Registro:
+    """objectName → widget de todo el árbol de 'root' (los nombres de un .ui son únicos)."""
+
+    def __init__(self, root: QObject):
+        self.root = root
+        self._por_nombre: dict[str, QObject] = {}
+        self.refrescar()
+
+    def refrescar(self):
+        """Vuelve a indexar (widgets con nombre creados después de cargar el .ui)."""
+        self._por_nombre = {}
+        for obj in [self.root, *self.root.findChildren(QObject)]:
+            nombre = obj.objectName()
+            if nombre and nombre not in self._por_nombre:
+                self._por_nombre[nombre] = obj
+        self._resueltos: dict[int, SimpleNamespace] = {}
+        self._busquedas: dict[tuple, QObject | None] = {}
+
+    def __len__(self) -> int:
+        return len(self._por_nombre)
+
+    def contenedor(self, en) -> QObject | None:
+        return self.get(QObject, en) if isinstance(en, str) else en
+
+    def get(self, clase, *nombres: str, en=None) -> QObject | None:
+        """El primero de 'nombres' que exista, sea de 'clase' y (si se da) esté dentro de 'en'."""
+        cont = self.contenedor(en) if en is not None else None
+        if not REGISTRO_ACTIVO:
+            base = cont or self.root
+            for n in nombres:
+                obj = base.findChild(clase, n)
+                if obj is not None:
+                    return obj
+            return None
+        for n in nombres:
+            obj = self._por_nombre.get(n)
+            if obj is not None and isinstance(obj, clase) and (cont is None or _dentro(obj, cont)):
+                return obj
+        return None
+
+    def buscar(self, clase, en, *, unico: bool = False, textos=()) -> QObject | None:
+        """Respaldo sin nombre dentro de 'en' (recorre una vez y queda guardado)."""
+        cont = self.contenedor(en)
+        if cont is None:
+            return None
+        clave = (id(cont), clase, unico, tuple(textos))
+        if REGISTRO_ACTIVO and clave in self._busquedas:
+            return self._busquedas[clave]
+        obj = None
+        candidatos = cont.findChildren(clase)
+        if textos:
+            buscados = {t.lower() for t in textos if t}
+            obj = next((c for c in candidatos if (getattr(c, "text", lambda: "")() or "").lower() in buscados), None)
+        if obj is None and unico and len(candidatos) == 1:
+            obj = candidatos[0]
+        self._busquedas[clave] = obj
+        return obj
+
+
+def _dentro(obj: QObject, cont: QObject) -> bool:
+    p = obj.parent()
+    while p is not None:
+        if p is cont:
+            return True
+        p = p.parent()
+    return False
+
+
+def indexar(root: QObject) -> Registro:
+    reg = Registro(root)
+    root._registro = reg
+    return reg
+
+
+def registro(root: QObject) -> Registro:
+    """Registro de la ventana de 'root' (lo arma load_ui; si no, se arma al primer uso)."""
+    reg = getattr(root, "_registro", None)
+    if reg is None and isinstance(root, QWidget) and root.window() is not root:
+        reg = getattr(root.window(), "_registro", None)
+    return reg if reg is not None else indexar(root)
+
+
+def widget(root: QObject, clase, *nombres: str, en=None) -> QObject | None:
+    return registro(root).get(clase, *nombres, en=en)
+
+
+# =========================
+# Declaraciones por módulo
+# =========================
+@dataclass(frozen=True)
+class W:
+    clase: type
+    nombres: tuple[str, ...]
+    en: str | None = None
+    opcional: bool = False
+    unico: bool = False
+    textos: tuple[str, ...] = ()
+
+
+def w(clase, *nombres: str, en: str | None = None, opcional: bool = False, unico: bool = False,
+      textos=()) -> W:
+    return W(clase, nombres, en, opcional, unico, tuple(textos))
+
+
+DECLARADOS: list["Enlaces"] = []
+
+
+class Enlaces:
+    def __init__(self, **widgets: W):
+        self.widgets = widgets
+        DECLARADOS.append(self)
+
+    def _resolver(self, reg: Registro) -> SimpleNamespace:
+        ns = {}
+        for campo, d in self.widgets.items():
+            obj = reg.get(d.clase, *d.nombres, en=d.en)
+            if obj is None and d.en and (d.unico or d.textos):
+                obj = reg.buscar(d.clase, d.en, unico=d.unico, textos=d.textos)
+            ns[campo] = obj
+        return SimpleNamespace(**ns)
+
+    def de(self, root: QObject) -> SimpleNamespace:
+        reg = registro(root)
+        if not REGISTRO_ACTIVO:
+            return self._resolver(reg)
+        ns = reg._resueltos.get(id(self))
+        if ns is None:
+            ns = reg._resueltos[id(self)] = self._resolver(reg)
+        return ns
+
+    def faltan(self, root: QObject) -> list[str]:
+        ns = self.de(root)
+        return [f"{d.clase.__name__} {'/'.join(d.nombres) or '(único)'}" + (f" en {d.en}" if d.en else "")
+                for campo, d in self.widgets.items() if not d.opcional and getattr(ns, campo) is None]
+
+
+def validar(root: QObject) -> list[str]:
+    """Todo lo declarado (y no opcional) que no está en la ventana."""
+    return [f for e in DECLARADOS for f in e.faltan(root)]
@@ -1,12 +1,13 @@
 # app/ui/compras/ingresar_producto_dialog.py
 
 from __future__ import annotations
-import os, uuid
+import os
 from PySide6.QtCore import QFile, QIODevice
 from PySide6.QtWidgets import QDialog, QWidget, QLineEdit, QLabel, QDoubleSpinBox, QSpinBox, QPushButton, QMessageBox
 from PySide6.QtUiTools import QUiLoader
 
 from app.core.db_local import SessionLocal
+from app.core.ids import gen_id
 from app.core.repositories import get_producto_por_codigo
 
 
@@ -59,7 +60,7 @@ def open_ingresar_producto_dialog(parent: QWidget, on_accept=None, modal=True):
     on_accept(dlg, data_dict) será llamado al presionar 'Agregar' si los datos son válidos.
 
     data_dict = {
-        "id_detalle_orden": str(uuid),
+        "id_detalle_orden": str (UUIDv7),
         "codigo": str,
         "descripcion": str,
         "cantidad": int,
@@ -139,7 +140,7 @@ def open_ingresar_producto_dialog(parent: QWidget, on_accept=None, modal=True):
             return
 
         data = {
-            "id_detalle_orden": str(uuid.uuid4()),
+            "id_detalle_orden": gen_id(),
             "codigo": code,
             "descripcion": p.descripcion or "",
             "cantidad": qty,
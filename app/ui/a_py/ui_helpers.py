@@ -2,25 +2,17 @@
 from PySide6.QtWidgets import QWidget, QLineEdit, QTextEdit, QPlainTextEdit, QSpinBox, QDoubleSpinBox
 from contextlib import contextmanager
 
+from app.ui.a_py.enlaces import registro
+
 def find_by_name(parent: QWidget, klass, *names):
-    for n in names:
-        w = parent.findChild(klass, n)
-        if w:
-            return w
-    return None
+    # O(1) por el registro de la ventana (app/ui/a_py/enlaces.py), sólo dentro de parent
+    return registro(parent).get(klass, *names, en=parent)
 
 def find_any(parent: QWidget, klass, name_candidates=(), text_candidates=()):
     w = find_by_name(parent, klass, *name_candidates)
     if w:
         return w
-    if text_candidates:
-        needles = {t.lower() for t in text_candidates if t}
-        for obj in parent.findChildren(klass):
-            txt = getattr(obj, "text", lambda: "")()
-            if txt and txt.lower() in needles:
-                return obj
-    lst = parent.findChildren(klass)
-    return lst[0] if len(lst) == 1 else None
+    return registro(parent).buscar(klass, parent, unico=True, textos=text_candidates)
 
 def text_get(w):
     if not w: return ""
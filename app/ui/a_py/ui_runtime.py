@@ -3,6 +3,8 @@ import os, sys
 from PySide6.QtUiTools import QUiLoader
 from PySide6.QtCore import QFile, QIODevice
 
+from app.ui.a_py.enlaces import indexar
+
 def _resource_path(relative: str) -> str:
     # Soporta ejecución normal y ejecutable PyInstaller (onefile)
     base = getattr(sys, "_MEIPASS", os.path.abspath("."))
@@ -18,6 +20,7 @@ def load_ui(relative_path: str, parent=None):
         w = loader.load(f, parent)
         if w is None:
             raise RuntimeError(f"Fallo al cargar UI: {ui_path}")
+        indexar(w)   # widgets por nombre, una vez (app/ui/a_py/enlaces.py)
         return w
     finally:
         f.close()
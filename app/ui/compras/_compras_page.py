@@ -5,13 +5,23 @@ from app.ui.compras.com_ingresar_page import enter_com_ingresar
 from app.ui.compras.com_modificar_page import enter_com_modificar
 from app.ui.compras.com_eliminar_page import enter_com_eliminar
 from app.ui.compras.com_lis_page import enter_com_listar
+from app.ui.a_py.enlaces import Enlaces, w, registro
+
+_W = Enlaces(
+    page=w(QWidget, "pageCompras"),
+    stack=w(QStackedWidget, "comStack", en="pageCompras"),
+    btnComIng=w(QPushButton, "btnComIng", opcional=True),
+    btnComMod=w(QPushButton, "btnComMod", opcional=True),
+    btnComElim=w(QPushButton, "btnComElim", opcional=True),
+    btnComLis=w(QPushButton, "btnComLis", opcional=True),
+)
 
 #Devuelve el QStackedWidget
 def _get_inv_stack(root):
-    page_inv = root.findChild(QWidget, "pageCompras")
-    if page_inv is None:
+    ws = _W.de(root)
+    if ws.page is None:
         raise RuntimeError("No existe 'pageCompras' en el .ui")
-    stk = page_inv.findChild(QStackedWidget, "comStack")
+    stk = ws.stack
     if stk is None:
         raise RuntimeError("Falta QStackedWidget 'comStack' dentro de pageCompras")
     return stk
@@ -23,13 +33,11 @@ def _sync_inv_state(root):
     except Exception:
         return
 
-    def _find(name): 
-        return root.findChild(QPushButton, name)
-
-    btnComIng  = _find("btnComIng")
-    btnComMod  = _find("btnComMod")
-    btnComElim = _find("btnComElim")
-    btnComLis = _find("btnComLis")
+    ws = _W.de(root)
+    btnComIng  = ws.btnComIng
+    btnComMod  = ws.btnComMod
+    btnComElim = ws.btnComElim
+    btnComLis = ws.btnComLis
 
 
     mapping = {
@@ -54,7 +62,7 @@ def _sync_inv_state(root):
 def show_inv_page(root, page_object_name: str):
     """Sub-router: cambia de subpágina y delega init/refresh a su enter_*."""
     stk = _get_inv_stack(root)
-    page = stk.findChild(QWidget, page_object_name)
+    page = registro(root).get(QWidget, page_object_name, en=stk)
     if page is None:
         QMessageBox.critical(root, "UI", f"No existe la página interna '{page_object_name}'")
         return
@@ -75,10 +83,11 @@ def show_inv_page(root, page_object_name: str):
 
 def init_inventory_page(root):
     """Cablea SOLO los botones internos y el sync visual."""
-    btnComIng   = root.findChild(QPushButton, "btnComIng")
-    btnComMod   = root.findChild(QPushButton, "btnComMod")
-    btnComElim  = root.findChild(QPushButton, "btnComElim")
-    btnComLis   = root.findChild(QPushButton, "btnComLis")
+    ws = _W.de(root)
+    btnComIng   = ws.btnComIng
+    btnComMod   = ws.btnComMod
+    btnComElim  = ws.btnComElim
+    btnComLis   = ws.btnComLis
  
 
     if btnComIng:
@@ -104,7 +113,7 @@ def enter_compras(root):
     Llamado por el router principal al entrar a 'pageInventario'.
     - 1ª vez: inicializa sub-router y muestra la subpágina por defecto.
     """
-    page = root.findChild(QWidget, "pageCompras")
+    page = _W.de(root).page
     if page is None:
         return
 
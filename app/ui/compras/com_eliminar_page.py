@@ -1,7 +1,9 @@
 from PySide6.QtWidgets import QWidget
+from app.ui.a_py.enlaces import Enlaces, w
+
+_W = Enlaces(page=w(QWidget, "pageComElim", en="pageCompras"))
 
 def enter_com_eliminar(root: QWidget):
-    pagePro = root.findChild(QWidget, "pageCompras")
-    page    = pagePro.findChild(QWidget, "pageComElim")
+    page    = _W.de(root).page
     if not page: return
     # future: confirmar/eliminar con soft-delete
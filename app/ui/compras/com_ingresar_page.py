@@ -1,7 +1,5 @@
 # app/ui/compras/com_ingresar_page.py
 
-import uuid
-
 from datetime import date
 from PySide6.QtCore import Qt
 from PySide6.QtWidgets import (
@@ -11,10 +9,14 @@ from PySide6.QtGui import QStandardItemModel, QStandardItem
 from sqlalchemy import text
 
 from app.core.db_local import SessionLocal
+from app.core.ids import gen_id, id_a_bd
 from app.core import repositories  # intentaremos usar crear_orden_compra_con_detalles si existe
 
 from app.ui.a_py.ingresar_producto_dialog import open_ingresar_producto_dialog
 from app.ui.a_py.modificar_producto_dialog import open_modificar_producto_dialog
+from app.ui.a_py.enlaces import Enlaces, w
+
+_W = Enlaces(page=w(QWidget, "pageComIng", en="pageCompras"))
 
 
 COLS = ["Código", "Descripción", "Cant.", "P.Costo", "Subtotal"]
@@ -52,8 +54,7 @@ class OrdenCache:
             )
 
 def enter_com_ingresar(root: QWidget):
-    pagePro = root.findChild(QWidget, "pageCompras")
-    page    = pagePro.findChild(QWidget, "pageComIng") if pagePro else None
+    page    = _W.de(root).page
     if not page:
         return
     if getattr(page, "_com_ing_inited", False):
@@ -248,15 +249,15 @@ def enter_com_ingresar(root: QWidget):
 
                 # 2) Fallback SQL plano
                 if not created_via_repo:
+                    # la PK no es entera (UUIDv7): se genera aquí, no con last_insert_rowid()
+                    oc_id = gen_id()
                     s.execute(
                         text("""
-                            INSERT INTO ordenes_compra (folio_orden, fecha_llegada_orden, estado_orden)
-                            VALUES (:folio, :fecha, 'pendiente')
+                            INSERT INTO ordenes_compra (id_ordenes_com, folio_orden, fecha_llegada_orden, estado_orden)
+                            VALUES (:id, :folio, :fecha, 'pendiente')
                         """),
-                        {"folio": folio, "fecha": fecha_llegada_str},
+                        {"id": id_a_bd(oc_id), "folio": folio, "fecha": fecha_llegada_str},
                     )
-                    # id recién insertado en SQLite
-                    oc_id = s.execute(text("SELECT last_insert_rowid()")).scalar_one()
 
                     for r in cache.rows:
                         s.execute(
@@ -267,8 +268,8 @@ def enter_com_ingresar(root: QWidget):
                                 (:id_det, :oc_id, :cod, :cant, :precio, :desc)
                             """),
                             {
-                                "id_det": r.get("id_detalle_orden") or str(uuid.uuid4()),
-                                "oc_id":  oc_id,
+                                "id_det": id_a_bd(r.get("id_detalle_orden") or gen_id()),
+                                "oc_id":  id_a_bd(oc_id),
                                 "cod":    r.get("codigo"),
                                 "cant":   int(r.get("cantidad", 0)),
                                 "precio": int(r.get("precio_costo", 0)),
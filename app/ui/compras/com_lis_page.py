@@ -7,6 +7,14 @@ from PySide6.QtWidgets import QWidget, QComboBox, QDateEdit, QTableView, QPushBu
 from sqlalchemy import text
 
 from app.core.db_local import SessionLocal
+from app.core.diagnostico import accion
+from app.core.eventos import interes
+from app.ui.a_py.enlaces import Enlaces, w
+
+_W = Enlaces(page=w(QWidget, "pageComLis", en="pageCompras"))
+
+# re-entrar recarga sólo si cambiaron las órdenes (app/core/eventos)
+_ordenes = interes("ordenes_compra", "detalles_orden")
 
 COLS = ["Estado", "Folio", "Fecha llegada", "Detalles", "Total"]
 
@@ -31,16 +39,15 @@ def _new_model(parent=None):
     return m
 
 def enter_com_listar(root: QWidget):
-    pagePro = root.findChild(QWidget, "pageCompras")
-    page    = pagePro.findChild(QWidget, "pageComLis") if pagePro else None
+    page    = _W.de(root).page
     if not page:
         return
 
-    # Re-entrada: si ya está inicializado, solo refresca
+    # Re-entrada: si ya está inicializado, refresca sólo si hubo cambios
     if getattr(page, "_com_lis_inited", False):
         rep = getattr(page, "_com_lis_reload", None)
         if callable(rep):
-            rep()
+            _ordenes.si_cambio(rep)
         return
 
     # ---- Widgets ----
@@ -96,6 +103,7 @@ def enter_com_listar(root: QWidget):
             hasta = str(date.today() + timedelta(days=14))
         return desde, hasta
 
+    @accion("compras.listar")
     def _fetch_and_fill():
         m = page._com_lis_model
         m.removeRows(0, m.rowCount())
@@ -165,16 +173,19 @@ def enter_com_listar(root: QWidget):
     # Exponer para re-entradas
     page._com_lis_reload = _fetch_and_fill
 
+    def _forzar(*_):
+        _ordenes.si_cambio(_fetch_and_fill, forzar=True)
+
     # ---- Conexiones (refrescan al mover filtros) ----
     if combo_estado:
-        combo_estado.currentIndexChanged.connect(_fetch_and_fill)
+        combo_estado.currentIndexChanged.connect(_forzar)
     if date_desde:
-        date_desde.dateChanged.connect(_fetch_and_fill)
+        date_desde.dateChanged.connect(_forzar)
     if date_hasta:
-        date_hasta.dateChanged.connect(_fetch_and_fill)
+        date_hasta.dateChanged.connect(_forzar)
     if btn_refresh:
-        btn_refresh.clicked.connect(_fetch_and_fill)
+        btn_refresh.clicked.connect(_forzar)
 
     # ---- Carga inicial ----
-    _fetch_and_fill()
+    _forzar()
     page._com_lis_inited = True
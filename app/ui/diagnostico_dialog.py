@@ -0,0 +1,119 @@
+# app/ui/diagnostico_dialog.py
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget,
+    QTableWidgetItem, QTabWidget, QHeaderView,
+)
+
+from app.core.config import TRAZAS_PATH
+from app.core.diagnostico import get_diagnostico
+from app.core.trazas import get_trazador, PERCENTILES
+
+COLS_ACCIONES = ["Acción", "Llamadas", "Consultas", "Consultas/llamada", "SQL ms", "Total ms", "Máx ms"]
+COLS_LENTAS = ["Hora", "Acción", "ms", "SQL", "Parámetros"]
+COLS_LATENCIAS = ["Etapa", "n", "media ms"] + [f"p{p:g} ms" for p in PERCENTILES] + ["máx ms"]
+
+
+def _item(v, derecha=False):
+    it = QTableWidgetItem(str(v))
+    if derecha:
+        it.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+    return it
+
+
+def _tabla(cols):
+    t = QTableWidget(0, len(cols))
+    t.setHorizontalHeaderLabels(cols)
+    t.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+    t.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+    t.horizontalHeader().setStretchLastSection(True)
+    t.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+    return t
+
+
+def open_diagnostico_dialog(parent=None):
+    """Panel oculto (Ctrl+Shift+D): consultas por acción, consultas lentas y latencias."""
+    dlg = QDialog(parent)
+    dlg.setWindowTitle("Diagnóstico de consultas")
+    dlg.resize(900, 500)
+    lay = QVBoxLayout(dlg)
+
+    lbl = QLabel()
+    tabs = QTabWidget()
+    t_acc = _tabla(COLS_ACCIONES)
+    t_len = _tabla(COLS_LENTAS)
+    tabs.addTab(t_acc, "Por acción")
+    tabs.addTab(t_len, "Consultas lentas")
+    t_lat = _tabla(COLS_LATENCIAS)
+    tabs.addTab(t_lat, "Latencias")
+    lay.addWidget(lbl)
+    lay.addWidget(tabs)
+
+    botones = QHBoxLayout()
+    btn_ref = QPushButton("Refrescar")
+    btn_rei = QPushButton("Reiniciar contadores")
+    btn_exp = QPushButton("Exportar latencias")
+    btn_cer = QPushButton("Cerrar")
+    botones.addStretch(1)
+    for b in (btn_ref, btn_rei, btn_exp, btn_cer):
+        botones.addWidget(b)
+    lay.addLayout(botones)
+
+    def _cargar_latencias():
+        res = get_trazador().resumen()
+        t_lat.setRowCount(len(res))
+        for r, (nombre, h) in enumerate(res.items()):
+            vals = [nombre, h["n"], f"{h['media_us'] / 1000:.2f}"]
+            vals += [f"{h[f'p{p:g}_us'] / 1000:.2f}" for p in PERCENTILES]
+            vals.append(f"{h['max_us'] / 1000:.2f}")
+            for c, v in enumerate(vals):
+                t_lat.setItem(r, c, _item(v, derecha=c > 0))
+
+    def _cargar():
+        _cargar_latencias()
+        diag = get_diagnostico()
+        if diag is None:
+            lbl.setText("Instrumentación desactivada (SM_DIAGNOSTICO=0).")
+            t_acc.setRowCount(0)
+            t_len.setRowCount(0)
+            return
+        lbl.setText(f"Consultas lentas: ≥ {diag.lento_ms:g} ms")
+        acciones = diag.resumen()
+        t_acc.setRowCount(len(acciones))
+        for r, a in enumerate(acciones):
+            vals = [a.nombre, a.llamadas, a.consultas, f"{a.consultas_por_llamada:.1f}",
+                    f"{a.sql_ms:.1f}", f"{a.total_ms:.1f}", f"{a.max_ms:.1f}"]
+            for c, v in enumerate(vals):
+                t_acc.setItem(r, c, _item(v, derecha=c > 0))
+        lentas = diag.lentas()
+        t_len.setRowCount(len(lentas))
+        for r, q in enumerate(lentas):
+            vals = [q.cuando[11:], q.accion, f"{q.ms:.1f}", q.sql, q.parametros]
+            for c, v in enumerate(vals):
+                it = _item(v, derecha=c == 2)
+                if c >= 3:
+                    it.setToolTip(str(v))
+                t_len.setItem(r, c, it)
+
+    def _reiniciar():
+        diag = get_diagnostico()
+        if diag is not None:
+            diag.reiniciar()
+        get_trazador().reiniciar()
+        _cargar()
+
+    def _exportar():
+        try:
+            get_trazador().exportar(TRAZAS_PATH)
+            lbl.setText(f"Latencias exportadas a {TRAZAS_PATH}")
+        except Exception as e:
+            lbl.setText(f"No se pudo exportar: {e}")
+
+    btn_ref.clicked.connect(_cargar)
+    btn_rei.clicked.connect(_reiniciar)
+    btn_exp.clicked.connect(_exportar)
+    btn_cer.clicked.connect(dlg.close)
+
+    _cargar()
+    dlg.show()
+    return dlg
@@ -1,15 +1,31 @@
 # app/ui/main_window.py
 from app.ui.a_py.ui_runtime import load_ui
+from app.ui.a_py.enlaces import Enlaces, w as _w, registro, validar
 from PySide6.QtWidgets import QWidget, QStackedWidget, QPushButton
+from PySide6.QtGui import QKeySequence, QShortcut
 
 from app.ui.Ventas._Ventas_page import enter_ventas
 from app.ui.productos._producto_page import enter_productos
 from app.ui.Inventario._Inventario_page import enter_inventory
 from app.ui.compras._compras_page import enter_compras
+from app.ui.diagnostico_dialog import open_diagnostico_dialog
+
+# Widgets del router principal (se resuelven una vez; validar() al crear la ventana)
+_NAV = Enlaces(
+    stack=_w(QStackedWidget, "stack"),
+    pageVentas=_w(QWidget, "pageVentas"),
+    pageProductos=_w(QWidget, "pageProductos"),
+    pageInventario=_w(QWidget, "pageInventario"),
+    pageCompras=_w(QWidget, "pageCompras"),
+    btnVentas=_w(QPushButton, "btnVentas", opcional=True),
+    btnProducto=_w(QPushButton, "btnProducto", opcional=True),
+    btnInventario=_w(QPushButton, "btnInventario", opcional=True),
+    btnCompras=_w(QPushButton, "btnCompras", opcional=True),
+)
 
 #Devuelve el QStackedWidget principal
 def _get_stack(root):
-    stk = root.findChild(QStackedWidget, "stack")
+    stk = _NAV.de(root).stack
     if stk is None:
         raise RuntimeError("Falta QStackedWidget 'stack' en el .ui")
     return stk
@@ -22,15 +38,12 @@ def _sync_nav_state(root):
     except Exception:
         return
     
-    # Helper para encontrar tanto QPushButton como QToolButton
-    def _find(name):
-        return root.findChild(QPushButton, name)
-    
     # Botones de navegación (asegúrate de que los objectName coinciden en el .ui)
-    btnVentas   = _find("btnVentas")
-    btnProducto = _find("btnProducto")
-    btnInvent   = _find("btnInventario")
-    btnCompras   = _find("btnCompras")
+    ws = _NAV.de(root)
+    btnVentas   = ws.btnVentas
+    btnProducto = ws.btnProducto
+    btnInvent   = ws.btnInventario
+    btnCompras   = ws.btnCompras
 
     # Mapeo página → botón asociado
     mapping = {"pageVentas": btnVentas, 
@@ -48,7 +61,7 @@ def _sync_nav_state(root):
 # para inicializar paginas 
 def _show_page(root, page_object_name: str):
     stk = _get_stack(root)
-    page = root.findChild(QWidget, page_object_name)
+    page = registro(root).get(QWidget, page_object_name)
     if page is None:
         raise RuntimeError(f"No existe la página '{page_object_name}' en el .ui")
 
@@ -73,18 +86,26 @@ def _show_page(root, page_object_name: str):
 def create_main_window(username="admin"):
     w = load_ui("app/ui/main_window.ui")
     w.setWindowTitle(f"Ventas e Inventario - Santo Mardones — {username}")
+    faltan = validar(w)   # lo que declaran main_window y las páginas (app/ui/a_py/enlaces.py)
+    if faltan:
+        raise RuntimeError("Faltan widgets en main_window.ui: " + "; ".join(faltan))
 
     #botones de navegación principal
-    btnVentas = w.findChild(QPushButton, "btnVentas")
-    btnProducto = w.findChild(QPushButton, "btnProducto")
-    btnInventario = w.findChild(QPushButton, "btnInventario")
-    btnCompras = w.findChild(QPushButton, "btnCompras")
+    ws = _NAV.de(w)
+    btnVentas = ws.btnVentas
+    btnProducto = ws.btnProducto
+    btnInventario = ws.btnInventario
+    btnCompras = ws.btnCompras
 
     if btnVentas:     btnVentas.clicked.connect(lambda: _show_page(w, "pageVentas"))
     if btnProducto:   btnProducto.clicked.connect(lambda: _show_page(w, "pageProductos"))
     if btnInventario: btnInventario.clicked.connect(lambda: _show_page(w, "pageInventario"))
     if btnCompras:    btnCompras.clicked.connect(lambda: _show_page(w, "pageCompras"))
 
+    # Panel oculto de diagnóstico (consultas por acción / lentas)
+    sc = QShortcut(QKeySequence("Ctrl+Shift+D"), w)
+    sc.activated.connect(lambda: setattr(w, "_diag_dlg", open_diagnostico_dialog(w)))
+
     # Página inicial
     _show_page(w, "pageVentas")  # también inicializa inventario
     try:
@@ -1,5 +1,7 @@
 from PySide6.QtWidgets import QWidget, QStackedWidget, QPushButton, QMessageBox
 
+from app.ui.a_py.enlaces import Enlaces, w, registro
+
 # stubs (subpáginas)
 from app.ui.productos.pro_catalogo_page import enter_pro_catalogo, refresh_pro_catalogo
 from app.ui.productos.pro_nuevo_page    import enter_pro_nuevo
@@ -7,15 +9,24 @@ from app.ui.productos.pro_modificar_page import enter_pro_modificar
 from app.ui.productos.pro_eliminar_page  import enter_pro_eliminar
 
 
+_W = Enlaces(
+    page=w(QWidget, "pageProductos"),
+    stack=w(QStackedWidget, "proStack", en="pageProductos"),
+    btnCat=w(QPushButton, "btnProCatalogo", opcional=True),
+    btnNew=w(QPushButton, "btnProNuevo", opcional=True),
+    btnEdit=w(QPushButton, "btnProModificar", opcional=True),
+    btnDel=w(QPushButton, "btnProEliminar", opcional=True),
+)
+
+
 # ------- helpers internos -------
 def _get_pro_stack(root: QWidget) -> QStackedWidget:
-    page = root.findChild(QWidget, "pageProductos")
-    if page is None:
+    ws = _W.de(root)
+    if ws.page is None:
         raise RuntimeError("Falta 'pageProductos' en el .ui")
-    stk = page.findChild(QStackedWidget, "proStack")
-    if stk is None:
+    if ws.stack is None:
         raise RuntimeError("Falta QStackedWidget 'proStack' dentro de pageProductos")
-    return stk
+    return ws.stack
 
 def _sync_pro_buttons(root: QWidget):
     """Marca/desmarca y deshabilita el botón de la subpágina activa."""
@@ -24,12 +35,11 @@ def _sync_pro_buttons(root: QWidget):
     except Exception:
         return
 
-    def _f(name): return root.findChild(QPushButton, name)
-
-    btnCat  = _f("btnProCatalogo")
-    btnNew  = _f("btnProNuevo")
-    btnEdit = _f("btnProModificar")
-    btnDel  = _f("btnProEliminar")
+    ws = _W.de(root)
+    btnCat  = ws.btnCat
+    btnNew  = ws.btnNew
+    btnEdit = ws.btnEdit
+    btnDel  = ws.btnDel
 
     mapping = {
         "pageProCatalogo": btnCat,
@@ -51,7 +61,7 @@ def _sync_pro_buttons(root: QWidget):
 def show_pro_page(root: QWidget, page_object_name: str):
     """Cambia a una subpágina de proStack haciendo lazy-init la primera vez."""
     stk  = _get_pro_stack(root)
-    page = stk.findChild(QWidget, page_object_name)
+    page = registro(root).get(QWidget, page_object_name, en=stk)
     if page is None:
         QMessageBox.critical(root, "UI", f"No existe la subpágina '{page_object_name}'")
         return
@@ -79,10 +89,11 @@ def show_pro_page(root: QWidget, page_object_name: str):
 def init_product_page(root: QWidget):
     """Se llama una sola vez cuando entras por primera vez a pageProductos."""
     # Conectar botones
-    btnCat  = root.findChild(QPushButton, "btnProCatalogo")
-    btnNew  = root.findChild(QPushButton, "btnProNuevo")
-    btnEdit = root.findChild(QPushButton, "btnProModificar")
-    btnDel  = root.findChild(QPushButton, "btnProEliminar")
+    ws = _W.de(root)
+    btnCat  = ws.btnCat
+    btnNew  = ws.btnNew
+    btnEdit = ws.btnEdit
+    btnDel  = ws.btnDel
 
     if btnCat:  btnCat.clicked.connect( lambda: show_pro_page(root, "pageProCatalogo") )
     if btnNew:  btnNew.clicked.connect( lambda: show_pro_page(root, "pageProNuevo") )
@@ -97,7 +108,6 @@ def init_product_page(root: QWidget):
 
 
 # Entry point para el router de Productos (lo llamas desde main_window)
-from PySide6.QtWidgets import QWidget as _QW
 
 def enter_productos(root: QWidget):
     """
@@ -105,7 +115,7 @@ def enter_productos(root: QWidget):
       - Primera vez: init_product_page(...) y abrir Catálogo
       - Siguientes: si estás en Catálogo, refrescar listado
     """
-    page = root.findChild(_QW, "pageProductos")
+    page = _W.de(root).page
     if page is None:
         return
 
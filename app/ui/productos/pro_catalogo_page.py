@@ -5,10 +5,17 @@ from PySide6.QtCore import Qt
 
 from sqlalchemy import select
 from app.core.db_local import SessionLocal
+from app.core.diagnostico import accion
+from app.core.eventos import interes
 from app.core.models import Producto
 from app.ui.a_py.precios import calcular_precio_venta
+from app.ui.productos.pro_importar_page import importar_desde_dialogo, exportar_desde_dialogo
+from app.ui.a_py.enlaces import Enlaces, w
 
 
+# recarga sólo si productos cambió desde la última carga (app/core/eventos)
+_catalogo = interes("productos")
+
 COLS = [
     "Código", "Descripción",
     "Precio costo", "Precio venta", "% Impuesto",
@@ -17,17 +24,16 @@ COLS = [
 ]
 
 
-# ---------------- helpers de búsqueda "tolerante" ----------------
-def _find_any(parent: QWidget, klass, name_candidates=(), text_candidates=()):
-    # por objectName (preferido)
-    for n in name_candidates:
-        w = parent.findChild(klass, n)
-        if w:
-            return w
-    # si solo hay uno de ese tipo dentro del contenedor, úsalo
-    lst = parent.findChildren(klass)
-    return lst[0] if len(lst) == 1 else None
-# -----------------------------------------------------------------
+# Widgets "tolerantes": por objectName (preferido) o, si no, el único de su tipo en la página
+_W = Enlaces(
+    page=w(QWidget, "pageProCatalogo", en="pageProductos"),
+    combo=w(QComboBox, "comboFiltro", "cbFiltro", "comboBox", en="pageProCatalogo", unico=True, opcional=True),
+    table=w(QTableView, "tablaCatalogo", "tableCatalogo", "tableView", en="pageProCatalogo", unico=True),
+    btn=w(QPushButton, "btnRefrescarCatalogo", "btnRefrescar", "btnActualizar", "actionRefrescar_6",
+          en="pageProCatalogo", unico=True, opcional=True),
+    btn_imp=w(QPushButton, "btnImportarCatalogo", en="pageProCatalogo", opcional=True),
+    btn_exp=w(QPushButton, "btnExportarCatalogo", en="pageProCatalogo", opcional=True),
+)
 
 
 def _new_model(parent=None):
@@ -55,6 +61,7 @@ def _append_row(model: QStandardItemModel, p: Producto):
     model.appendRow(items)
 
 
+@accion("productos.catalogo")
 def _load_rows_into(model: QStandardItemModel, filtro: str | None):
     """filtro: None = todos, 'catalogado', 'albergado y catalogado' (case-insensitive)."""
     model.removeRows(0, model.rowCount())
@@ -84,20 +91,22 @@ def enter_pro_catalogo(root: QWidget):
       - Combo de filtro: 'Todos' | 'Solo catalogados' | 'Albergados y catalogados'
       - Botón Refrescar: recarga desde DB
     """
-    pagePro = root.findChild(QWidget, "pageProductos")
-    page    = pagePro.findChild(QWidget, "pageProCatalogo") if pagePro else None
+    ws   = _W.de(root)
+    page = ws.page
     if not page:
         return
 
     if getattr(page, "_catalogo_inited", False):
-        # ya inicializado → solo refresca
-        _refresh(page)
+        # ya inicializado → refresca sólo si productos cambió
+        _catalogo.si_cambio(lambda: _refresh(page))
         return
 
     # Widgets (si no tienen objectName, tomamos el único de su tipo en el contenedor)
-    combo = _find_any(page, QComboBox, name_candidates=("comboFiltro", "cbFiltro", "comboBox"))
-    table = _find_any(page, QTableView, name_candidates=("tablaCatalogo", "tableCatalogo", "tableView"))
-    btn   = _find_any(page, QPushButton, name_candidates=("btnRefrescarCatalogo", "btnRefrescar", "btnActualizar"))
+    combo = ws.combo
+    table = ws.table
+    btn   = ws.btn
+    btn_imp = ws.btn_imp
+    btn_exp = ws.btn_exp
 
     if table is None:
         raise RuntimeError("No encontré el QTableView del catálogo (asigna objectName o deja uno solo en la página).")
@@ -116,21 +125,32 @@ def enter_pro_catalogo(root: QWidget):
     if combo:
         if combo.count() == 0:
             combo.addItems(["Todos", "Solo catalogados", "Albergados y catalogados"])
-        combo.currentIndexChanged.connect(lambda _i: _refresh(page))
+        combo.currentIndexChanged.connect(lambda _i: _refrescar(page))
 
     # Botón refrescar
     if btn:
-        btn.clicked.connect(lambda: _refresh(page))
+        btn.clicked.connect(lambda: _refrescar(page))
+
+    # Importar / exportar masivo
+    if btn_imp:
+        btn_imp.clicked.connect(lambda: importar_desde_dialogo(page, on_done=lambda: _refrescar(page)))
+    if btn_exp:
+        btn_exp.clicked.connect(lambda: exportar_desde_dialogo(page))
 
     # guardar referencias en la página para futuros refresh
     page._catalogo_model = model
     page._catalogo_combo = combo
 
     # primera carga
-    _refresh(page)
+    _refrescar(page)
     setattr(page, "_catalogo_inited", True)
 
 
+def _refrescar(page: QWidget):
+    """Recarga forzada (botón, filtro, importación); deja al día la versión vista."""
+    _catalogo.si_cambio(lambda: _refresh(page), forzar=True)
+
+
 def _refresh(page: QWidget):
     """Recarga la tabla según el estado actual del combo."""
     model = getattr(page, "_catalogo_model", None)
@@ -143,11 +163,10 @@ def _refresh(page: QWidget):
 
 # Para que el sub-router de Productos pueda pedir un refresh explícito:
 def refresh_pro_catalogo(root: QWidget):
-    pagePro = root.findChild(QWidget, "pageProductos")
-    page    = pagePro.findChild(QWidget, "pageProCatalogo") if pagePro else None
+    page = _W.de(root).page
     if not page:
         return
     if not getattr(page, "_catalogo_inited", False):
         enter_pro_catalogo(root)
     else:
-        _refresh(page)
+        _catalogo.si_cambio(lambda: _refresh(page))
@@ -1,7 +1,9 @@
 from PySide6.QtWidgets import QWidget
+from app.ui.a_py.enlaces import Enlaces, w
+
+_W = Enlaces(page=w(QWidget, "pageProEliminar", en="pageProductos"))
 
 def enter_pro_eliminar(root: QWidget):
-    pagePro = root.findChild(QWidget, "pageProductos")
-    page    = pagePro.findChild(QWidget, "pageProEliminar")
+    page    = _W.de(root).page
     if not page: return
     # future: confirmar/eliminar con soft-delete
@@ -0,0 +1,63 @@
+# app/ui/productos/pro_importar_page.py
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QWidget, QFileDialog, QProgressDialog, QMessageBox, QApplication
+
+from app.core.importacion import importar_productos, exportar_productos, escribir_reporte_errores
+
+_FILTRO = "Planillas (*.csv *.xlsx);;CSV (*.csv);;Excel (*.xlsx)"
+
+
+def importar_desde_dialogo(page: QWidget, on_done=None):
+    """Pide el archivo, importa por bloques mostrando progreso y ofrece guardar el reporte de errores."""
+    path, _ = QFileDialog.getOpenFileName(page, "Importar productos", "", _FILTRO)
+    if not path:
+        return
+
+    prog = QProgressDialog("Importando productos...", None, 0, 0, page)
+    prog.setWindowTitle("Importar")
+    prog.setWindowModality(Qt.WindowModal)
+    prog.setMinimumDuration(0)
+    prog.show()
+
+    def _on_progress(leidas, ok):
+        prog.setLabelText(f"{leidas} filas leídas / {ok} importadas")
+        QApplication.processEvents()
+
+    try:
+        res = importar_productos(path, on_progress=_on_progress)
+    except Exception as e:
+        prog.close()
+        QMessageBox.critical(page, "Importar", f"No se pudo importar:\n{e}")
+        return
+    prog.close()
+
+    if res.errores:
+        resp = QMessageBox.question(
+            page, "Importar",
+            f"{res.resumen()}\n\n¿Guardar el detalle de errores en un CSV?",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes
+        )
+        if resp == QMessageBox.Yes:
+            out, _ = QFileDialog.getSaveFileName(page, "Guardar errores", "errores_importacion.csv", "CSV (*.csv)")
+            if out:
+                escribir_reporte_errores(res.errores, out)
+    else:
+        QMessageBox.information(page, "Importar", res.resumen())
+
+    if callable(on_done):
+        on_done()
+
+
+def exportar_desde_dialogo(page: QWidget):
+    path, _ = QFileDialog.getSaveFileName(page, "Exportar catálogo", "catalogo.csv", _FILTRO)
+    if not path:
+        return
+    try:
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        n = exportar_productos(path)
+    except Exception as e:
+        QMessageBox.critical(page, "Exportar", f"No se pudo exportar:\n{e}")
+        return
+    finally:
+        QApplication.restoreOverrideCursor()
+    QMessageBox.information(page, "Exportar", f"{n} productos exportados.")
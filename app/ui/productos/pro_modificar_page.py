@@ -1,7 +1,9 @@
 from PySide6.QtWidgets import QWidget
+from app.ui.a_py.enlaces import Enlaces, w
+
+_W = Enlaces(page=w(QWidget, "pageProModificar", en="pageProductos"))
 
 def enter_pro_modificar(root: QWidget):
-    pagePro = root.findChild(QWidget, "pageProductos")
-    page    = pagePro.findChild(QWidget, "pageProModificar")
+    page    = _W.de(root).page
     if not page: return
     # future: preparar buscador/selector y formulario de edición
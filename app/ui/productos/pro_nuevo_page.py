@@ -8,12 +8,14 @@ from app.core.db_local import SessionLocal
 from app.core import repositories  # para insert_producto
 from app.ui.a_py.precios import calcular_precio_venta, calc_ganancia_pct_desde_pv
 from app.ui.a_py.ui_helpers import signals_blocked
+from app.ui.a_py.enlaces import Enlaces, w
+
+_W = Enlaces(page=w(QWidget, "pageProNuevo", en="pageProductos"))
 
 IVA_DEFAULT = 19.0  # IVA Chile
 
 def enter_pro_nuevo(root: QWidget):
-    pagePro = root.findChild(QWidget, "pageProductos")
-    page    = pagePro.findChild(QWidget, "pageProNuevo") if pagePro else None
+    page    = _W.de(root).page
     if not page:
         return
     if getattr(page, "_pro_nuevo_setup_done", False):
@@ -0,0 +1 @@
+# paquete bench (benchmarks sobre una BD SQLite temporal, nunca sobre DB_PATH)
@@ -0,0 +1,168 @@
+# bench/analitica.py
+"""
+Exportación a Parquet (app/core/analitica): costo, consultas y efecto sobre la caja.
+
+    python -m bench.analitica [--productos 10000] [--boletas 200000] [--dias 90]
+
+1. Exportación completa de una tienda sintética (bench.dataset) y tamaño en disco.
+2. Consultas: ventas por día y por producto sobre Parquet vs la misma agregación en
+   SQLite; falla si los resultados difieren.
+3. Incremental: --nuevas boletas con crear_boleta_con_detalles (una de cada tres con
+   promoción) y una segunda corrida (sólo debe exportar esas), y una tercera sin
+   cambios (debe exportar 0). Antes, una parte de detalles se reescribe sin
+   descuento/promocion (formato anterior): los descuentos por promoción leídos
+   del Parquet deben coincidir con SQLite.
+4. Caja: p50/p99 de crear_boleta_con_detalles sin exportación y mientras el proceso
+   de ExportadorAnalitica exporta todo de nuevo (a otra carpeta).
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core import analitica, archivo
+from app.core.db_local import make_engine
+from app.core.models import BoletaDetalle, SyncState
+from app.core.repositories import crear_boleta_con_detalles
+from bench.dataset import Tamano, generar, codigo_producto
+
+
+def _mb(d: Path) -> float:
+    return sum(p.stat().st_size for p in d.rglob("*.parquet")) / 2**20
+
+
+def _crear(Session, rnd, n_prod, promocion: str | None = None):
+    cod = codigo_producto(rnd.randrange(n_prod))
+    item = {"codigo": cod, "descripcion": cod, "precio_unit": 990, "cantidad": 1}
+    if promocion:
+        item.update(descuento=100, promocion=promocion)
+    with Session() as s, s.begin():
+        crear_boleta_con_detalles(s, [item])
+
+
+def _latencias(Session, rnd, n_prod, n=None, mientras=None) -> list[float]:
+    out = []
+    while (mientras() if mientras else len(out) < n):
+        t0 = time.perf_counter()
+        _crear(Session, rnd, n_prod)
+        out.append(1000 * (time.perf_counter() - t0))
+    return out
+
+
+def _pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(len(xs) * p / 100))]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--productos", type=int, default=10_000)
+    ap.add_argument("--boletas", type=int, default=200_000)
+    ap.add_argument("--dias", type=int, default=90)
+    ap.add_argument("--nuevas", type=int, default=1000)
+    ap.add_argument("--semilla", type=int, default=1)
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "mi_app.db")
+        dir1, dir2 = Path(tmp) / "analitica", Path(tmp) / "analitica2"
+        engine = make_engine(db)
+        info = generar(engine, Tamano(args.productos, args.boletas, 10, args.dias), args.semilla, log=lambda m: None)
+        with engine.begin() as c:
+            c.exec_driver_sql("UPDATE productos SET existencias = 1000000")
+        Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+        rnd = random.Random(args.semilla)
+        desde, hasta = info["desde"], info["hasta"]
+
+        # 1) completa
+        t0 = time.perf_counter()
+        res = analitica.exportar_todo(engine, dir1)
+        seg_total = time.perf_counter() - t0
+        print(f"exportación completa: {res['boletas']:,} boletas + {res['movimientos']:,} movimientos "
+              f"en {seg_total:.1f}s → {_mb(dir1):.1f} MB Parquet (SQLite {os.path.getsize(db) / 2**20:.1f} MB)")
+
+        # 2) consultas
+        def _sql_por_producto():
+            D = BoletaDetalle.__table__
+            with engine.connect() as c:
+                filas = c.execute(select(D.c.codigo_producto, func.sum(D.c.cantidad), func.sum(D.c.subtotal))
+                                  .group_by(D.c.codigo_producto)).all()
+            return sorted(((a, b, s) for a, b, s in filas), key=lambda f: (-f[2], f[0]))
+
+        casos = [
+            ("ventas por día", lambda: analitica.ventas_por_dia(desde, hasta, dir1),
+             lambda: archivo.ventas_por_dia(engine, desde, hasta, directorio=Path(tmp) / "sin_archivo")),
+            ("ventas por producto", lambda: sorted(analitica.ventas_por_producto(desde, hasta, directorio=dir1),
+                                                   key=lambda f: (-f[2], f[0])),
+             _sql_por_producto),
+        ]
+        ok = True
+        print(f"\n{'consulta':22} {'Parquet ms':>11} {'SQLite ms':>10} {'razón':>7}")
+        for nombre, f_pq, f_sql in casos:
+            t0 = time.perf_counter(); r_pq = f_pq(); a = 1000 * (time.perf_counter() - t0)
+            t0 = time.perf_counter(); r_sql = f_sql(); b = 1000 * (time.perf_counter() - t0)
+            igual = [tuple(x) for x in r_pq] == [tuple(x) for x in r_sql]
+            ok &= igual
+            print(f"{nombre:22} {a:>11.1f} {b:>10.1f} {b / a:>6.1f}x  {'' if igual else 'DIFIEREN'}")
+
+        # 3) incremental; una parte de detalles con el formato anterior (sin descuento/promocion)
+        vieja = sorted((dir1 / "detalles").rglob("*.parquet"))[0]
+        pq = analitica._arrow()[3]
+        pq.write_table(pq.read_table(vieja).drop_columns(["descuento", "promocion"]), vieja, compression="zstd")
+        for i in range(args.nuevas):
+            _crear(Session, rnd, args.productos, promocion=("Pack bench", "Día bench")[i % 2] if i % 3 == 0 else None)
+        despues = datetime.utcnow() + timedelta(seconds=1)
+        t0 = time.perf_counter()
+        inc = analitica.exportar_todo(engine, dir1, lag_s=0, ahora=despues)
+        seg_inc = time.perf_counter() - t0
+        otra = analitica.exportar_todo(engine, dir1, lag_s=0, ahora=despues)
+        print(f"\nincremental: {inc['boletas']} boletas + {inc['movimientos']} movimientos en {seg_inc * 1000:.0f} ms;"
+              f" repetida: {otra['boletas']} + {otra['movimientos']}")
+        ok &= inc["boletas"] == args.nuevas and otra == {"boletas": 0, "movimientos": 0}
+        t = analitica.leer("detalles", columnas=["promocion", "descuento"], directorio=dir1)
+        g = t.filter(t["promocion"].is_valid()).group_by("promocion").aggregate([("descuento", "sum")])
+        desc_pq = sorted(zip(g["promocion"].to_pylist(), g["descuento_sum"].to_pylist()))
+        D = BoletaDetalle.__table__
+        with engine.connect() as c:
+            desc_sql = sorted(tuple(f) for f in c.execute(select(D.c.promocion, func.sum(D.c.descuento))
+                                                            .where(D.c.promocion.is_not(None))
+                                                            .group_by(D.c.promocion)))
+        print(f"descuentos por promoción (Parquet, con una parte del formato anterior): {desc_pq}"
+              f"{'' if desc_pq == desc_sql else f'  DIFIEREN de SQLite {desc_sql}'}")
+        ok &= bool(desc_pq) and desc_pq == desc_sql
+
+        # 4) caja sin / con exportación en segundo plano
+        base = _latencias(Session, rnd, args.productos, n=300)
+        with Session() as s, s.begin():
+            s.execute(delete(SyncState).where(SyncState.table_name.like("analitica.%")))
+        ex = analitica.ExportadorAnalitica(db, dir2, intervalo=3600, lag_s=0)
+        hilo = threading.Thread(target=ex.correr)
+        hilo.start()
+        time.sleep(0.2)
+        con = _latencias(Session, rnd, args.productos, mientras=hilo.is_alive)
+        hilo.join()
+        ex.detener()
+        print(f"\ncaja (crear_boleta)   {'n':>5} {'p50 ms':>8} {'p99 ms':>8}")
+        print(f"  sin exportación     {len(base):>5} {statistics.median(base):>8.2f} {_pct(base, 99):>8.2f}")
+        print(f"  exportando          {len(con):>5} {statistics.median(con):>8.2f} {_pct(con, 99):>8.2f}"
+              f"   (proceso: {'ok' if ex.ultimo_error is None else ex.ultimo_error})")
+        ok &= ex.ultimo_error is None
+        engine.dispose()
+
+    if not ok:
+        raise SystemExit("FALLA: resultados distintos entre Parquet y SQLite o incremental incorrecto")
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
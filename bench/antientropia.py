@@ -0,0 +1,207 @@
+# bench/antientropia.py
+"""
+Anti-entropía del catálogo (app/core/antientropia): bytes y tiempo para verificar
+y reparar réplicas de productos, contra comparar la tabla completa.
+
+    python -m bench.antientropia [--productos 1000000] [--deriva 20]
+
+Levanta bench.servidor_sync sobre un catálogo sintético y arranca una terminal
+desde su snapshot (app/core/bootstrap). Luego:
+  1. réplicas iguales: comparar() sólo debería intercambiar la raíz
+  2. deriva: en la terminal --deriva productos con otras existencias sin tocar
+     version (lo que deja hoy un pull LWW a medias) y --deriva/4 borrados; en el
+     servidor --deriva con version+1 y --deriva/4 nuevos; en la terminal --deriva/4
+     con version+1 (más nuevos acá: no se deben pisar)
+  3. comparar() debe encontrar exactamente esos, reparar() traer sólo esas filas
+     y una segunda comparación dejar sólo los más nuevos de la terminal; los dos
+     árboles se mantienen con ae_cambios, sin volver a recorrer productos; lo que
+     reparar() cambió de existencias queda en el ledger (ajuste "antientropía")
+  4. si el mantenimiento purga cambios que el índice no leyó, éste reconstruye
+  5. tombstones: un producto borrado en ambos y purgado sólo en la terminal
+     (mantenimiento.purgar_tombstones) no es diferencia ni vuelve con reparar();
+     uno borrado sólo en el servidor sale como solo_local y reparar() trae el borrado
+Referencia: lo que pesaría mandar {codigo: [version, existencias]} de todo el catálogo.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from itertools import islice
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, select, update
+
+from app.core import net
+from app.core.antientropia import Indice, ParRemoto, comparar, filas_de_hojas, reparar
+from app.core.bootstrap import bootstrap
+from app.core.db_local import make_engine
+from app.core.mantenimiento import CLAVE_PUSH_PRODUCTOS, _marcar, purgar_cambios_ae, purgar_tombstones
+from app.core.models import MovimientoStock, Producto
+from bench.dataset import Tamano, codigo_producto, generar
+from bench.servidor_sync import ServidorSync
+
+
+def _todo(engine) -> dict:
+    with engine.connect() as c:
+        return {cod: [v, e] for cod, v, e in c.execute(
+            select(Producto.codigo, Producto.version, Producto.existencias))}
+
+
+def _ledger(engine, referencia: str) -> dict:
+    M = MovimientoStock
+    with engine.connect() as c:
+        return dict(tuple(r) for r in c.execute(
+            select(M.codigo_producto, func.sum(M.delta)).where(M.referencia == referencia).group_by(M.codigo_producto)))
+
+
+def _precios(engine, codigos) -> dict:
+    with engine.connect() as c:
+        return dict(tuple(r) for r in c.execute(
+            select(Producto.codigo, Producto.precio_venta).where(Producto.codigo.in_(codigos))))
+
+
+def _kb(n) -> str:
+    return f"{n / 1024:,.1f} KB"
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--productos", type=int, default=1_000_000)
+    ap.add_argument("--deriva", type=int, default=20)
+    ap.add_argument("--semilla", type=int, default=1)
+    args = ap.parse_args(argv)
+    k, k4 = args.deriva, max(1, args.deriva // 4)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        srv_db = os.path.join(tmp, "servidor.db")
+        t0 = time.perf_counter()
+        generar(make_engine(srv_db), Tamano(args.productos, 0, 0, 30), args.semilla, log=lambda m: None)
+        print(f"catálogo sintético: {args.productos:,} productos ({time.perf_counter() - t0:.1f}s)")
+        srv = ServidorSync(srv_db, dir_snapshot=os.path.join(tmp, "snap")).iniciar()
+        net.BASE_URL = srv.url
+        eng = make_engine(os.path.join(tmp, "mi_app.db"))
+        indice = Indice(eng)
+        try:
+            srv.manifiesto(nuevo=True)
+            bootstrap(eng, log=lambda m: None)
+            completo = len(json.dumps(_todo(srv.engine)))
+
+            # ---- 1. iguales ----
+            t0 = time.perf_counter()
+            indice.arbol()
+            srv.par.indice.arbol()
+            seg_arbol = time.perf_counter() - t0
+            remoto = ParRemoto()
+            t0 = time.perf_counter()
+            igual = comparar(indice, remoto)
+            seg_igual, bytes_igual, viajes_igual = time.perf_counter() - t0, remoto.bytes, remoto.viajes
+
+            # ---- 2. deriva ----
+            rnd = random.Random(args.semilla)
+            elegidos = [codigo_producto(i) for i in rnd.sample(range(args.productos), 2 * k + 2 * k4)]
+            local_exist, local_borr = elegidos[:k], elegidos[k:k + k4]
+            srv_version, local_nuevo = elegidos[k + k4:2 * k + k4], elegidos[2 * k + k4:]
+            nuevos = [f"N-{i:07d}" for i in range(k4)]
+            ahora = datetime.utcnow()
+            with eng.begin() as c:
+                c.execute(update(Producto).where(Producto.codigo.in_(local_exist))
+                          .values(existencias=Producto.existencias + 7))
+                c.execute(delete(Producto).where(Producto.codigo.in_(local_borr)))
+                c.execute(update(Producto).where(Producto.codigo.in_(local_nuevo))
+                          .values(version=Producto.version + 1, existencias=Producto.existencias - 1))
+            with srv.engine.begin() as c:
+                c.execute(update(Producto).where(Producto.codigo.in_(srv_version))
+                          .values(version=Producto.version + 1, precio_venta=Producto.precio_venta + 10,
+                                  updated_at=ahora))
+                c.execute(insert(Producto), [{"codigo": n, "descripcion": f"Nuevo {n}", "updated_at": ahora}
+                                             for n in nuevos])
+
+            # ---- 3. comparar / reparar / volver a comparar ----
+            remoto = ParRemoto()
+            t0 = time.perf_counter()
+            dif = comparar(indice, remoto)
+            seg_dif, bytes_dif, viajes_dif = time.perf_counter() - t0, remoto.bytes, remoto.viajes
+            antes = _todo(eng)
+            t0 = time.perf_counter()
+            rep = reparar(indice, remoto, dif)
+            seg_rep, bytes_rep = time.perf_counter() - t0, remoto.bytes - bytes_dif
+            despues = comparar(indice, ParRemoto())
+
+            ok_igual = igual["iguales"]
+            ok_dif = (set(dif["distintos"]) == set(local_exist) | set(srv_version) | set(local_nuevo)
+                      and set(dif["solo_remoto"]) == set(local_borr) | set(nuevos) and not dif["solo_local"])
+            ok_rep = (rep["aplicadas"] == k + 2 * k4 + k and set(rep["local_mas_nuevo"]) == set(local_nuevo))
+            ok_final = set(despues["distintos"]) == set(local_nuevo) and not despues["solo_remoto"]
+            mios, suyos = _todo(eng), _todo(srv.engine)
+            movido = {c: e - antes.get(c, [0, 0])[1] for c, (_v, e) in mios.items()}
+            ok_ledger = _ledger(eng, "antientropía") == {c: d for c, d in movido.items() if d}
+            ok_filas = {c for c in mios.keys() | suyos.keys() if mios.get(c) != suyos.get(c)} == set(local_nuevo)
+            ok_srv = _precios(eng, srv_version) == _precios(srv.engine, srv_version)
+            hojas_filas = len(filas_de_hojas(eng, dif["hojas"]))
+            ok_incremental = indice.reconstrucciones == 1 and srv.par.indice.reconstrucciones == 1
+
+            # ---- 4. registro purgado por el mantenimiento: el índice lo nota ----
+            with eng.begin() as c:
+                c.execute(update(Producto).where(Producto.codigo.in_(local_nuevo)).values(existencias=0))
+            purgar_cambios_ae(eng, conservar=0)
+            raiz = indice.arbol().raiz
+            nuevo = Indice(eng)
+            ok_purga = indice.reconstrucciones == 2 and raiz == nuevo.arbol().raiz
+            nuevo.cerrar()
+
+            # ---- 5. tombstones ----
+            usados = set(elegidos)
+            purgado, borrado_srv = islice((c for c in map(codigo_producto, range(args.productos)) if c not in usados), 2)
+            marca = datetime.utcnow()
+            for e, codigos in ((eng, [purgado]), (srv.engine, [purgado, borrado_srv])):
+                with e.begin() as c:
+                    c.execute(update(Producto).where(Producto.codigo.in_(codigos))
+                              .values(deleted_at=marca, version=Producto.version + 1, updated_at=marca))
+            _marcar(eng, CLAVE_PUSH_PRODUCTOS, marca)
+            purgar_tombstones(eng, retencion_dias=0, ahora=marca + timedelta(seconds=1))
+            dif5 = comparar(indice, ParRemoto())
+            rep5 = reparar(indice, ParRemoto(), dif5)
+            fin5 = comparar(indice, ParRemoto())
+            with eng.connect() as c:
+                quedan = dict(tuple(r) for r in c.execute(
+                    select(Producto.codigo, Producto.deleted_at).where(Producto.codigo.in_([purgado, borrado_srv]))))
+            ok_tomb = (dif5["solo_local"] == [borrado_srv] and not dif5["solo_remoto"]
+                       and rep5["aplicadas"] == 1 and not rep5["solo_local"]
+                       and set(fin5["distintos"]) == set(local_nuevo) and not fin5["solo_local"]
+                       and not fin5["solo_remoto"]
+                       and purgado not in quedan and quedan.get(borrado_srv) is not None)
+        finally:
+            indice.cerrar()
+            srv.detener()
+            eng.dispose()
+
+    print(f"árbol: {16 ** 4:,} hojas, {seg_arbol:.1f}s en construir los dos (después queda en caché)")
+    print(f"\n{'caso':34} {'viajes':>6} {'tráfico':>11} {'ms':>8}")
+    for caso, viajes, tráfico, seg in (
+            ("réplicas iguales", viajes_igual, bytes_igual, seg_igual),
+            (f"con deriva ({len(dif['hojas'])} hojas distintas)", viajes_dif, bytes_dif, seg_dif),
+            (f"reparar ({rep['aplicadas']} filas)", 1, bytes_rep, seg_rep),
+            ("tabla completa (referencia)", 1, completo, None)):
+        print(f"  {caso:32} {viajes:>6} {_kb(tráfico):>11} {'' if seg is None else f'{seg * 1000:.0f}':>8}")
+    print(f"\nfilas en hojas distintas (lo único que se listó): {hojas_filas} de {args.productos:,}")
+    checks = {"iguales: sólo raíz": ok_igual and viajes_igual == 1,
+              "comparar encuentra exactamente la deriva": ok_dif,
+              "reparar trae sólo las filas que difieren": ok_rep and ok_srv,
+              "existencias reparadas quedan en el ledger": ok_ledger,
+              "después: sólo quedan los más nuevos de la terminal": ok_final and ok_filas,
+              "árboles mantenidos con ae_cambios (sin reconstruir)": ok_incremental,
+              "registro purgado: reconstruye y coincide": ok_purga,
+              "tombstone purgado no vuelve; borrado del servidor llega": ok_tomb}
+    for n, v in checks.items():
+        print(f"  {'ok ' if v else 'MAL'} {n}")
+    if not all(checks.values()):
+        raise SystemExit("FALLA")
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+# bench/archivo.py
+"""
+BD caliente antes y después de archivar los meses cerrados (app/core/archivo).
+
+    python -m bench.archivo [--productos 10000] [--boletas 500000] [--dias 365] [--meses-vivos 3]
+
+Genera una tienda sintética con un año de boletas (bench.dataset), mide sobre
+mi_app.db, archiva con archivar_antiguas(vacuum=True) y vuelve a medir:
+  crear_boleta          crear_boleta_con_detalles (incluye _next_folio, que recorre boletas)
+  ventas_semana         COUNT/SUM de boletas de los últimos 7 días
+  reporte_anual         ventas_por_dia del año completo (después: vivas + archivos adjuntos)
+  boleta_antigua        buscar_boleta de un folio del primer mes
+y el tamaño de mi_app.db. Falla si el reporte anual no da lo mismo antes y después.
+
+Antes de medir comprueba la marca de subida (SyncState["boletas:push"]): sin marca
+no se archiva nada, y con la marca a mitad del último mes cerrado las boletas
+posteriores se quedan en mi_app.db. Después se mueve la marca al final y se archiva
+el resto.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core import archivo
+from app.core.db_local import make_engine
+from app.core.models import Boleta, SyncState
+from app.core.repositories import crear_boleta_con_detalles
+from bench.dataset import Tamano, generar, codigo_producto
+
+
+def _ms(fn, reps: int) -> float:
+    fn()
+    t = []
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        fn()
+        t.append(1000 * (time.perf_counter() - t0))
+    return statistics.median(t)
+
+
+def _tam_mb(path: str) -> float:
+    return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p)) / 2**20
+
+
+def _marcar_subida(engine, cuando):
+    with engine.begin() as c:
+        c.execute(sqlite_insert(SyncState).values(table_name=archivo.CLAVE_PUSH_BOLETAS, last_sync=cuando)
+                  .on_conflict_do_update(index_elements=["table_name"], set_={"last_sync": cuando}))
+
+
+def _medir(engine, Session, info, dir_arch, folio_viejo, reps, rnd) -> dict:
+    desde, hasta = info["desde"], info["hasta"]
+    n_prod = info["tamano"].productos
+
+    def crear_boleta():
+        cod = codigo_producto(rnd.randrange(n_prod))
+        with Session() as s, s.begin():
+            crear_boleta_con_detalles(s, [{"codigo": cod, "descripcion": cod, "precio_unit": 990, "cantidad": 1}])
+
+    def ventas_semana():
+        with engine.connect() as c:
+            c.execute(select(func.count(), func.sum(Boleta.total))
+                      .where(Boleta.created_at >= hasta - timedelta(days=7))).one()
+
+    def reporte_anual():
+        archivo.ventas_por_dia(engine, desde, hasta, directorio=dir_arch)
+
+    def boleta_antigua():
+        assert archivo.buscar_boleta(engine, folio_viejo, directorio=dir_arch) is not None
+
+    return {
+        "crear_boleta": _ms(crear_boleta, reps * 5),
+        "ventas_semana": _ms(ventas_semana, reps),
+        "reporte_anual": _ms(reporte_anual, max(3, reps // 4)),
+        "boleta_antigua": _ms(boleta_antigua, reps),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--productos", type=int, default=10_000)
+    ap.add_argument("--boletas", type=int, default=500_000)
+    ap.add_argument("--dias", type=int, default=365)
+    ap.add_argument("--meses-vivos", type=int, default=3)
+    ap.add_argument("--reps", type=int, default=20)
+    ap.add_argument("--semilla", type=int, default=1)
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "mi_app.db")
+        dir_arch = Path(tmp) / "archivo"
+        engine = make_engine(path)
+        t0 = time.perf_counter()
+        info = generar(engine, Tamano(productos=args.productos, boletas=args.boletas, ordenes=10, dias=args.dias),
+                       args.semilla, log=lambda m: None)
+        # existencias de sobra para crear boletas durante la medición
+        with engine.begin() as c:
+            c.exec_driver_sql("UPDATE productos SET existencias = 1000000")
+        print(f"  dataset: {time.perf_counter() - t0:.1f}s")
+        Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+        with engine.connect() as c:
+            folio_viejo = c.execute(select(Boleta.folio).order_by(Boleta.created_at).limit(1)).scalar_one()
+        rnd = random.Random(args.semilla)
+
+        reporte_antes = archivo.ventas_por_dia(engine, info["desde"], info["hasta"], directorio=dir_arch)
+        antes = _medir(engine, Session, info, dir_arch, folio_viejo, args.reps, rnd)
+        mb_antes = _tam_mb(path)
+
+        hoy = info["hasta"].date()
+        tope = archivo.primer_mes_vivo(hoy, args.meses_vivos)
+        try:
+            archivo.archivar_antiguas(engine, meses_vivos=args.meses_vivos, directorio=dir_arch,
+                                      hoy=hoy, log=lambda m: None)
+            sin_marca_rechaza = False
+        except ValueError:
+            sin_marca_rechaza = not dir_arch.exists() or not any(dir_arch.glob("*.db"))
+
+        # marca a mitad del último mes cerrado: lo posterior todavía no subió
+        marca = archivo._inicio(*tope) - timedelta(days=10)
+        _marcar_subida(engine, marca)
+        t0 = time.perf_counter()
+        res = archivo.archivar_antiguas(engine, meses_vivos=args.meses_vivos, directorio=dir_arch,
+                                        hoy=hoy, log=lambda m: None)
+        seg_arch = time.perf_counter() - t0
+        with engine.connect() as c:
+            cerradas = (Boleta.created_at < archivo._inicio(*tope))
+            quedan = c.execute(select(func.count()).where(cerradas)).scalar_one()
+            quedan_antes = c.execute(select(func.count()).where(cerradas, Boleta.created_at <= marca)).scalar_one()
+
+        _marcar_subida(engine, info["hasta"])
+        t0 = time.perf_counter()
+        resto = archivo.archivar_antiguas(engine, meses_vivos=args.meses_vivos, directorio=dir_arch,
+                                          hoy=hoy, vacuum=True, log=lambda m: None)
+        seg_arch += time.perf_counter() - t0
+        for ym, n in resto.items():
+            res[ym] = res.get(ym, 0) + n
+        with engine.connect() as c:
+            quedan_fin = c.execute(select(func.count()).where(Boleta.created_at < archivo._inicio(*tope))).scalar_one()
+        reporte_despues = archivo.ventas_por_dia(engine, info["desde"], info["hasta"], directorio=dir_arch)
+        despues = _medir(engine, Session, info, dir_arch, folio_viejo, args.reps, rnd)
+        mb_despues = _tam_mb(path)
+        mb_arch = sum(p.stat().st_size for p in dir_arch.glob("*.db")) / 2**20
+        engine.dispose()
+
+    # las boletas creadas durante la medición caen "hoy": fuera del rango del dataset
+    checks = [
+        ("sin marca de subida no se archiva nada", sin_marca_rechaza),
+        (f"boletas posteriores a la marca se quedan ({quedan:,})", quedan > 0 and quedan_antes == 0),
+        ("con la marca al día se archiva el resto", quedan_fin == 0),
+    ]
+    ok = reporte_antes == reporte_despues
+    print(f"\n{args.boletas:,} boletas en {args.dias} días; archivados {len(res)} meses "
+          f"({sum(res.values()):,} boletas) en {seg_arch:.1f}s, quedan {args.meses_vivos} meses vivos")
+    print(f"{'operación':16} {'antes ms':>10} {'después ms':>11} {'razón':>7}")
+    for n in antes:
+        print(f"{n:16} {antes[n]:>10.2f} {despues[n]:>11.2f} {antes[n] / despues[n]:>6.2f}x")
+    print(f"{'mi_app.db MB':16} {mb_antes:>10.1f} {mb_despues:>11.1f} {mb_antes / mb_despues:>6.2f}x"
+          f"   (archivos: {mb_arch:.1f} MB)")
+    print(f"reporte anual idéntico antes/después: {'sí' if ok else 'NO'}")
+    for nombre, bien in checks:
+        print(f"  {'ok ' if bien else 'MAL'} {nombre}")
+    if not ok:
+        raise SystemExit("FALLA: el reporte anual cambió al archivar")
+    if not all(b for _, b in checks):
+        raise SystemExit("FALLA")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# bench/bootstrap.py
+"""
+Terminal nueva: pull inicial fila a fila vs. bootstrap desde snapshot (app/core/bootstrap).
+
+    python -m bench.bootstrap [--productos 500000] [--cambios 1000]
+
+Levanta bench.servidor_sync sobre un catálogo sintético (bench.dataset) y mide,
+para una terminal vacía:
+  actual     GET /sync/pull/productos sin since (todo el catálogo en un JSON) y
+             get + add por el ORM, en una transacción (la lógica de pull_productos,
+             pero buscando por codigo: pull_productos usa row["id"] y Producto no
+             tiene esa columna)
+  snapshot   GET /sync/snapshot + descarga del .db.gz + verificación + carga
+Y comprueba:
+  - que ambos catálogos queden idénticos al del servidor
+  - reanudación: tras --cambios modificaciones en el servidor, since=hwm trae sólo esas,
+    y pull() desde el cursor del manifiesto también
+  - que la terminal tenga los triggers de la app y no los del origen (srv_cambios)
+  - que un snapshot dañado se rechace sin tocar la BD y que una terminal con datos no se pise
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import func, select, text, update
+from sqlalchemy.orm import sessionmaker
+
+from app.core import net
+from app.core.bootstrap import MANIFIESTO, bootstrap
+from app.core.db_local import make_engine
+from app.core.migraciones import actualizar_bd
+from app.core.models import Producto
+from app.core.sync_client import pull
+from bench.dataset import Tamano, codigo_producto, generar
+from bench.servidor_sync import ServidorSync
+
+_COLS = [c for c in Producto.__table__.columns]
+
+
+def _huella(engine) -> tuple[int, str]:
+    h = hashlib.sha256()
+    n = 0
+    with engine.connect() as c:
+        for r in c.execute(select(*_COLS).order_by(Producto.codigo)):
+            h.update(repr(tuple(r)).encode())
+            n += 1
+    return n, h.hexdigest()
+
+
+def _aplicar(Session, data: list[dict]):
+    """Lo que hace pull_productos con cada fila (LWW), buscando por la PK real (codigo)."""
+    with Session() as s, s.begin():
+        for row in data:
+            local = s.get(Producto, row["codigo"])
+            incoming_updated = datetime.fromisoformat(row["updated_at"])
+            if not local:
+                local = Producto(**row)
+                local.updated_at = incoming_updated
+                if row.get("deleted_at"):
+                    local.deleted_at = datetime.fromisoformat(row["deleted_at"])
+                s.add(local)
+            elif incoming_updated >= local.updated_at:
+                for k, v in row.items():
+                    if k in {"updated_at", "deleted_at"} and isinstance(v, str) and v:
+                        v = datetime.fromisoformat(v)
+                    setattr(local, k, v)
+
+
+def _mb(ruta) -> float:
+    """BD + -wal (lo que ocupa en disco antes del checkpoint)."""
+    wal = ruta + "-wal"
+    return (os.path.getsize(ruta) + (os.path.getsize(wal) if os.path.exists(wal) else 0)) / 2**20
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--productos", type=int, default=500_000)
+    ap.add_argument("--cambios", type=int, default=1_000)
+    ap.add_argument("--semilla", type=int, default=1)
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        srv_db = os.path.join(tmp, "servidor.db")
+        t0 = time.perf_counter()
+        generar(make_engine(srv_db), Tamano(args.productos, 0, 0, 30), args.semilla, log=lambda m: None)
+        print(f"catálogo sintético: {args.productos:,} productos ({time.perf_counter() - t0:.1f}s)")
+        srv = ServidorSync(srv_db, dir_snapshot=os.path.join(tmp, "snap")).iniciar()
+        net.BASE_URL = srv.url
+        try:
+            t0 = time.perf_counter()
+            man = srv.manifiesto(nuevo=True)
+            seg_crear = time.perf_counter() - t0
+            ref = _huella(srv.engine)
+
+            # ---- actual: pull completo fila a fila ----
+            eng_a = make_engine(os.path.join(tmp, "actual.db"))
+            actualizar_bd(eng_a)
+            t0 = time.perf_counter()
+            timeout_app = None
+            try:
+                data = net.api_pull("productos", since_iso=None)
+            except httpx.TimeoutException:
+                # con catálogos grandes el JSON completo no alcanza a llegar en HTTP_TIMEOUT
+                timeout_app, net.HTTP_TIMEOUT = net.HTTP_TIMEOUT, 600
+                data = net.api_pull("productos", since_iso=None)
+                net.HTTP_TIMEOUT = timeout_app
+            seg_json = time.perf_counter() - t0
+            _aplicar(sessionmaker(bind=eng_a, autoflush=False), data)
+            seg_actual = time.perf_counter() - t0
+            del data
+            ok_actual = _huella(eng_a) == ref
+
+            # ---- snapshot ----
+            eng_b = make_engine(os.path.join(tmp, "snapshot.db"))
+            res = bootstrap(eng_b, log=lambda m: None)
+            ok_snap = _huella(eng_b) == ref
+
+            # ---- reanudación desde la marca de agua ----
+            rnd = random.Random(args.semilla)
+            cambiados = {codigo_producto(i) for i in rnd.sample(range(args.productos), args.cambios)}
+            despues = datetime.fromisoformat(man["hwm"]) + timedelta(seconds=1)
+            with srv.engine.begin() as c:
+                c.execute(update(Producto).where(Producto.codigo.in_(cambiados))
+                          .values(precio_venta=Producto.precio_venta + 10, updated_at=despues))
+            with eng_b.connect() as c:
+                since = c.execute(select(func.max(Producto.updated_at))).scalar_one()
+            t0 = time.perf_counter()
+            delta = net.api_pull("productos", since_iso=man["hwm"])
+            _aplicar(sessionmaker(bind=eng_b, autoflush=False), delta)
+            seg_delta = time.perf_counter() - t0
+            ok_delta = {r["codigo"] for r in delta} == cambiados and _huella(eng_b) == _huella(srv.engine)
+            por_cursor = pull(["productos"], engine=eng_b)["productos"]
+            with eng_b.connect() as c:
+                triggers = set(c.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'")).scalars())
+            ok_triggers = ({f"trg_productos_ae_{x}" for x in ("insert", "update", "delete")} <= triggers
+                           and not any(n.startswith("srv_") for n in triggers))
+            ok_hwm = since is not None and since.isoformat() == man["hwm"]
+
+            # ---- rechazos ----
+            dañado = os.path.join(tmp, "dañado")
+            shutil.copytree(os.path.join(tmp, "snap"), dañado)
+            gz = os.path.join(dañado, man["archivo"])
+            with open(gz, "r+b") as f:
+                f.seek(os.path.getsize(gz) // 2)
+                b = f.read(1)
+                f.seek(-1, os.SEEK_CUR)
+                f.write(bytes([b[0] ^ 0xFF]))
+            eng_c = make_engine(os.path.join(tmp, "dañada.db"))
+            try:
+                bootstrap(eng_c, desde=dañado, log=lambda m: None)
+                ok_dañado = False
+            except ValueError as e:
+                ok_dañado = "Checksum" in str(e)
+            ok_dañado = ok_dañado and not os.path.exists(os.path.join(tmp, "dañada.db"))
+            try:
+                bootstrap(eng_b, desde=os.path.join(tmp, "snap"), log=lambda m: None)
+                ok_ocupada = False
+            except ValueError:
+                ok_ocupada = True
+            ok_ocupada = ok_ocupada and _huella(eng_b) == _huella(srv.engine)
+
+            tam_a, tam_b = _mb(os.path.join(tmp, "actual.db")), _mb(os.path.join(tmp, "snapshot.db"))
+            for e in (eng_a, eng_b, eng_c):
+                e.dispose()
+        finally:
+            srv.detener()
+
+    print(f"snapshot en el origen: {seg_crear:.1f}s, {man['bytes'] / 2**20:.1f} MB gz "
+          f"({man['bytes_db'] / 2**20:.1f} MB sin comprimir), {MANIFIESTO} hwm={man['hwm']}")
+    print(f"\n{'terminal nueva':26} {'seg':>8} {'MB BD':>8}")
+    print(f"  actual (fila a fila)     {seg_actual:>8.1f} {tam_a:>8.1f}   (de eso, JSON: {seg_json:.1f}s)")
+    if timeout_app is not None:
+        print(f"    ¡el pull completo excede HTTP_TIMEOUT={timeout_app}s! (medido con 600s)")
+    print(f"  snapshot                 {res['seg']:>8.1f} {tam_b:>8.1f}   (de eso, descarga: {res['seg_descarga']:.1f}s)")
+    print(f"  aceleración              {seg_actual / res['seg']:>8.1f}x")
+    print(f"\nreanudación: {len(delta)} cambios desde hwm en {seg_delta * 1000:.0f} ms; "
+          f"pull() desde el cursor {man['cursor']}: {por_cursor}")
+    checks = {"catálogo actual = servidor": ok_actual, "catálogo snapshot = servidor": ok_snap,
+              "hwm = max(updated_at) local": ok_hwm, "since=hwm trae sólo lo cambiado": ok_delta,
+              "pull() desde el cursor del manifiesto trae sólo lo cambiado": por_cursor == len(cambiados),
+              "triggers de la app y no los del origen": ok_triggers,
+              "snapshot dañado rechazado sin crear BD": ok_dañado, "terminal con datos no se pisa": ok_ocupada}
+    for k, v in checks.items():
+        print(f"  {'ok ' if v else 'MAL'} {k}")
+    if not all(checks.values()):
+        raise SystemExit("FALLA")
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
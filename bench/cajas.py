@@ -0,0 +1,267 @@
+# bench/cajas.py
+"""
+Carga concurrente de varias cajas contra la BD local.
+
+    python -m bench.cajas [--cajas 4] [--modo hilos|procesos] [--segundos 10]
+                          [--mezcla escaneo=70,cobro=20,ajuste=8,recepcion=2]
+                          [--busy-timeout 5000] [--begin deferred|immediate] [--db ruta.db]
+
+Cada caja es un hilo o un proceso que usa las funciones reales de
+app/core/repositories a través de db_local.SessionLocal (re-apuntado al archivo
+de prueba). Sin --db se crea una BD temporal con --productos productos.
+
+Reporta throughput por operación, esperas por bloqueo ("database is locked"),
+reintentos y fallas, y verifica al final:
+  - stock:   Σexistencias_final == inicial + ajustes + recepciones − ventas
+  - ventas:  boletas nuevas == cobros confirmados, Σcantidad vendida coincide, folios únicos
+  - ledger:  Σdelta de movimientos nuevos == Σexistencias_final − inicial
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from sqlalchemy import event, select, func
+from sqlalchemy.exc import OperationalError
+
+from app.core import db_local
+from app.core.db_local import make_engine, _sqlite_begin
+from app.core.models import Base, Producto, Boleta, BoletaDetalle, MovimientoStock
+from app.core.repositories import (
+    get_producto_por_codigo, crear_boleta_con_detalles, ajustar_existencias,
+    crear_orden_compra_con_detalles, recepcionar_orden_total,
+)
+
+OPERACIONES = ("escaneo", "cobro", "ajuste", "recepcion")
+STOCK_INICIAL = 1_000_000
+
+
+# =========================
+# Engine / SessionLocal
+# =========================
+def _configurar(path: str, busy_ms: int, begin: str):
+    """Re-apunta db_local.SessionLocal al archivo de prueba (una vez por proceso)."""
+    eng = make_engine(path, connect_args={"timeout": busy_ms / 1000})
+    if begin == "immediate":
+        # toma el lock de escritura al abrir la transacción: sin "upgrade" fallido
+        # cuando otra caja escribió entre nuestra lectura y nuestra escritura
+        event.remove(eng, "begin", _sqlite_begin)
+        event.listen(eng, "begin", lambda conn: conn.exec_driver_sql("BEGIN IMMEDIATE"))
+    db_local.SessionLocal.configure(bind=eng)
+    return eng
+
+
+def _es_bloqueo(e: Exception) -> bool:
+    msg = str(getattr(e, "orig", e)).lower()
+    return "locked" in msg or "busy" in msg
+
+
+def _parse_mezcla(txt: str) -> dict[str, int]:
+    out = {}
+    for parte in txt.split(","):
+        k, _, v = parte.partition("=")
+        k = k.strip()
+        if k not in OPERACIONES:
+            raise argparse.ArgumentTypeError(f"Operación desconocida: {k}")
+        out[k] = int(v)
+    return out
+
+
+# =========================
+# Una caja
+# =========================
+def _cajero(idx: int, cfg: dict) -> dict:
+    if cfg["modo"] == "procesos":
+        _configurar(cfg["db"], cfg["busy_ms"], cfg["begin"])
+    rnd = random.Random(cfg["semilla"] + idx)
+    codigos = cfg["codigos"]
+    ops, pesos = zip(*cfg["mezcla"].items())
+    st = {
+        "ok": dict.fromkeys(OPERACIONES, 0), "lat": {o: [] for o in OPERACIONES},
+        "bloqueos": 0, "reintentos": 0, "fallidas": 0, "rechazos": 0,
+        "vendido": 0, "ajustado": 0, "recibido": 0,
+    }
+    carrito: dict[str, dict] = {}
+
+    def tx(fn):
+        """Ejecuta fn(session) en su transacción, reintentando si la BD está bloqueada."""
+        for intento in range(cfg["reintentos"] + 1):
+            try:
+                with db_local.SessionLocal() as s, s.begin():
+                    return fn(s)
+            except OperationalError as e:
+                if not _es_bloqueo(e):
+                    raise
+                st["bloqueos"] += 1
+                if intento == cfg["reintentos"]:
+                    raise
+                st["reintentos"] += 1
+                time.sleep(min(0.2, 0.005 * 2 ** intento) * rnd.random())
+
+    def escanear(s):
+        p = get_producto_por_codigo(s, rnd.choice(codigos))
+        if p:
+            it = carrito.setdefault(p.codigo, {"codigo": p.codigo, "descripcion": p.descripcion,
+                                               "precio_unit": int(p.precio_venta or 0), "cantidad": 0})
+            it["cantidad"] += 1
+
+    def cobrar(s):
+        crear_boleta_con_detalles(s, list(carrito.values()))
+
+    fin = time.perf_counter() + cfg["segundos"]
+    n_oc = 0
+    while time.perf_counter() < fin:
+        op = rnd.choices(ops, pesos)[0]
+        t0 = time.perf_counter()
+        try:
+            if op == "escaneo":
+                tx(escanear)
+            elif op == "cobro":
+                while not carrito:
+                    tx(escanear)
+                tx(cobrar)
+                st["vendido"] += sum(it["cantidad"] for it in carrito.values())
+                carrito.clear()
+            elif op == "ajuste":
+                cod, d = rnd.choice(codigos), rnd.choice((-1, 1)) * rnd.randint(1, 5)
+                tx(lambda s: ajustar_existencias(s, cod, d, "ajuste", referencia=f"caja{idx}"))
+                st["ajustado"] += d
+            else:
+                n_oc += 1
+                folio = f"OC-CAJA{idx}-{n_oc:06d}"
+                lineas = [{"codigo_producto": c, "cantidad": rnd.randint(1, 20), "precio_unitario": 500}
+                          for c in set(rnd.sample(codigos, min(3, len(codigos))))]
+                oc_id = tx(lambda s: crear_orden_compra_con_detalles(
+                    s, folio_orden=folio, fecha_llegada_orden=None, detalle_items=lineas).id_ordenes_com)
+                tx(lambda s: recepcionar_orden_total(s, oc_id))
+                st["recibido"] += sum(l["cantidad"] for l in lineas)
+        except OperationalError:
+            st["fallidas"] += 1
+            if op == "cobro":
+                carrito.clear()
+            continue
+        except ValueError:
+            st["rechazos"] += 1                       # regla de negocio (stock insuficiente, etc.)
+            continue
+        st["ok"][op] += 1
+        st["lat"][op].append((time.perf_counter() - t0) * 1e3)
+    return st
+
+
+# =========================
+# Orquestación
+# =========================
+def _preparar(path: str | None, n_productos: int) -> tuple[str, list[str]]:
+    if path:
+        eng = make_engine(path)
+        Base.metadata.create_all(bind=eng)
+        with eng.connect() as c:
+            codigos = list(c.execute(
+                select(Producto.codigo).where(Producto.deleted_at.is_(None)).limit(n_productos)
+            ).scalars())
+        eng.dispose()
+        return path, codigos
+    path = os.path.join(tempfile.mkdtemp(prefix="cajas_"), "cajas.db")
+    eng = make_engine(path)
+    Base.metadata.create_all(bind=eng)
+    codigos = [f"C-{i:05d}" for i in range(n_productos)]
+    with eng.begin() as c:
+        c.execute(Producto.__table__.insert(), [
+            {"codigo": cod, "descripcion": cod, "existencias": STOCK_INICIAL, "precio_costo": 500,
+             "precio_venta": 990, "porcentaje_impuesto": 19, "version": 1}
+            for cod in codigos
+        ])
+    eng.dispose()
+    return path, codigos
+
+
+def _foto(eng) -> dict:
+    with eng.connect() as c:
+        return {
+            "stock": c.execute(select(func.coalesce(func.sum(Producto.existencias), 0))).scalar_one(),
+            "boletas": c.execute(select(func.count(Boleta.id))).scalar_one(),
+            "folios": c.execute(select(func.count(func.distinct(Boleta.folio)))).scalar_one(),
+            "vendido": c.execute(select(func.coalesce(func.sum(BoletaDetalle.cantidad), 0))).scalar_one(),
+            "mov_id": c.execute(select(func.coalesce(func.max(MovimientoStock.id), 0))).scalar_one(),
+        }
+
+
+def _pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(len(xs) * p))] if xs else 0.0
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--cajas", type=int, default=4)
+    ap.add_argument("--modo", choices=("hilos", "procesos"), default="procesos")
+    ap.add_argument("--segundos", type=float, default=10)
+    ap.add_argument("--mezcla", type=_parse_mezcla, default="escaneo=70,cobro=20,ajuste=8,recepcion=2")
+    ap.add_argument("--busy-timeout", type=int, default=5000, help="ms de espera ante bloqueo (sqlite3 timeout)")
+    ap.add_argument("--begin", choices=("deferred", "immediate"), default="deferred")
+    ap.add_argument("--reintentos", type=int, default=3)
+    ap.add_argument("--productos", type=int, default=500)
+    ap.add_argument("--db", help="BD existente (por defecto una temporal)")
+    ap.add_argument("--semilla", type=int, default=1)
+    args = ap.parse_args(argv)
+
+    path, codigos = _preparar(args.db, args.productos)
+    if not codigos:
+        raise SystemExit("La BD no tiene productos")
+    eng = _configurar(path, args.busy_timeout, args.begin)
+    antes = _foto(eng)
+
+    cfg = {
+        "db": path, "busy_ms": args.busy_timeout, "begin": args.begin, "modo": args.modo,
+        "mezcla": args.mezcla, "segundos": args.segundos, "reintentos": args.reintentos,
+        "codigos": codigos, "semilla": args.semilla,
+    }
+    Pool = ProcessPoolExecutor if args.modo == "procesos" else ThreadPoolExecutor
+    t0 = time.perf_counter()
+    with Pool(max_workers=args.cajas) as ex:
+        stats = list(ex.map(_cajero, range(args.cajas), [cfg] * args.cajas))
+    dt = time.perf_counter() - t0
+    despues = _foto(eng)
+    with eng.connect() as c:
+        ledger = c.execute(
+            select(func.coalesce(func.sum(MovimientoStock.delta), 0)).where(MovimientoStock.id > antes["mov_id"])
+        ).scalar_one()
+    eng.dispose()
+
+    tot = {k: sum(s[k] for s in stats) for k in ("bloqueos", "reintentos", "fallidas", "rechazos",
+                                                  "vendido", "ajustado", "recibido")}
+    print(f"{args.cajas} cajas ({args.modo}), {dt:.1f}s, busy_timeout {args.busy_timeout} ms, BEGIN {args.begin.upper()}")
+    print(f"{'operación':10} {'ok':>8} {'ops/s':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for op in OPERACIONES:
+        lat = [x for s in stats for x in s["lat"][op]]
+        n = sum(s["ok"][op] for s in stats)
+        print(f"{op:10} {n:>8} {n / dt:>9.1f} {_pct(lat, .5):>9.2f} {_pct(lat, .99):>9.2f}")
+    print(f"bloqueos {tot['bloqueos']} | reintentos {tot['reintentos']} | "
+          f"fallidas {tot['fallidas']} | rechazos {tot['rechazos']}")
+
+    cobros = sum(s["ok"]["cobro"] for s in stats)
+    delta = despues["stock"] - antes["stock"]
+    checks = {
+        "stock": delta == tot["ajustado"] + tot["recibido"] - tot["vendido"],
+        "boletas": despues["boletas"] - antes["boletas"] == cobros,
+        "cantidad vendida": despues["vendido"] - antes["vendido"] == tot["vendido"],
+        "folios únicos": despues["folios"] == despues["boletas"],
+    }
+    checks["ledger"] = ledger == delta
+    if not args.db:
+        shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+    for nombre, ok in checks.items():
+        print(f"  invariante {nombre:17} {'OK' if ok else 'ROTO'}")
+    if not all(checks.values()):
+        raise SystemExit("FALLA: invariante roto")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+# bench/carga_sync.py
+"""
+Carga de sync: N terminales simuladas contra bench.servidor_sync con fallas de red.
+
+    python -m bench.carga_sync [--terminales 8] [--rondas 5] [--ventas 20] [--ediciones 5]
+                               [--productos 20000] [--latencia 0.02] [--jitter 0.02]
+                               [--perdida 0.01] [--perdida-respuesta 0.01] [--error-5xx 0.02]
+
+Cada terminal es una BD propia (mi_app.db) con el cliente de verdad (app/core/sync_client):
+  arranque   pull() inicial de todas a la vez (se reintenta hasta completar)
+  rondas     cada terminal, en paralelo: --ventas boletas de 3 líneas (folio con prefijo
+             de terminal) y --ediciones cambios de precio sobre productos al azar (pueden
+             chocar entre terminales: LWW), y luego push() + pull()
+  cierre     sin fallas: dos vueltas de push() de todas y pull() de todas
+  tardía     la terminal 0 edita un producto y la 1 otro después; la 1 sube, todas
+             bajan (su marca de agua ya pasó la edición de la 0), la 0 sube tarde
+             y todas vuelven a bajar: con since = max(updated_at) esa edición se pierde
+Mide filas subidas/bajadas por segundo y la duración del ciclo (p50/p95/máx), y
+comprueba que el servidor tenga exactamente cada boleta y detalle una vez y que
+ninguna terminal quede con productos distintos del servidor (pull por cursor del
+servidor, no por updated_at puesto por las terminales).
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from sqlalchemy import func, insert, select, update
+
+from app.core import net
+from app.core.db_local import make_engine
+from app.core.ids import gen_id
+from app.core.migraciones import actualizar_bd
+from app.core.models import Boleta, BoletaDetalle, Producto
+from app.core.sync_client import pull, push
+from bench.dataset import Tamano, codigo_producto, generar
+from bench.servidor_sync import ServidorSync
+
+
+class Terminal:
+    def __init__(self, n: int, tmp: str, productos: int, semilla: int):
+        self.n = n
+        self.engine = make_engine(os.path.join(tmp, f"terminal{n:02d}.db"))
+        actualizar_bd(self.engine)
+        self.productos = productos
+        self.rnd = random.Random(semilla * 1000 + n)
+        self.boletas = 0
+
+    def vender(self, ronda: int, ventas: int):
+        ahora = datetime.utcnow()
+        boletas, detalles = [], []
+        for i in range(ventas):
+            bid = gen_id()
+            lineas = [{"id": gen_id(), "boleta_id": bid, "codigo_producto": codigo_producto(self.rnd.randrange(self.productos)),
+                       "descripcion": "carga", "precio_unitario": 990, "cantidad": 1, "subtotal": 990}
+                      for _ in range(3)]
+            boletas.append({"id": bid, "folio": f"T{self.n:02d}-{ronda:03d}-{i:05d}", "total": 2970, "created_at": ahora})
+            detalles += lineas
+        with self.engine.begin() as c:
+            if boletas:
+                c.execute(insert(Boleta), boletas)
+                c.execute(insert(BoletaDetalle), detalles)
+        self.boletas += len(boletas)
+
+    def editar(self, ediciones: int, codigos: list[str] | None = None):
+        codigos = codigos or [codigo_producto(self.rnd.randrange(self.productos)) for _ in range(ediciones)]
+        with self.engine.begin() as c:
+            c.execute(update(Producto).where(Producto.codigo.in_(codigos))
+                      .values(precio_venta=Producto.precio_venta + 1, version=Producto.version + 1,
+                              updated_at=datetime.utcnow()))
+
+
+def _filas(res: dict) -> int:
+    return sum(v for v in res.values() if isinstance(v, int))
+
+
+def _errores(res: dict) -> int:
+    return sum(isinstance(v, str) for v in res.values())
+
+
+def _ciclo(t: Terminal, ronda: int, ventas: int, ediciones: int) -> dict:
+    t.vender(ronda, ventas)
+    t.editar(ediciones)
+    t0 = time.perf_counter()
+    sub, baj = push(engine=t.engine), pull(engine=t.engine)
+    return {"seg": time.perf_counter() - t0, "subidas": _filas(sub), "bajadas": _filas(baj),
+            "errores": _errores(sub) + _errores(baj)}
+
+
+def _catalogo(engine) -> dict:
+    with engine.connect() as c:
+        return {r[0]: tuple(r[1:]) for r in c.execute(
+            select(Producto.codigo, Producto.precio_venta, Producto.version))}
+
+
+def _pct(xs, p) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(p * len(xs)))]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--terminales", type=int, default=8)
+    ap.add_argument("--rondas", type=int, default=5)
+    ap.add_argument("--ventas", type=int, default=20)
+    ap.add_argument("--ediciones", type=int, default=5)
+    ap.add_argument("--productos", type=int, default=20_000)
+    ap.add_argument("--latencia", type=float, default=0.02)
+    ap.add_argument("--jitter", type=float, default=0.02)
+    ap.add_argument("--perdida", type=float, default=0.01)
+    ap.add_argument("--perdida-respuesta", type=float, default=0.01)
+    ap.add_argument("--error-5xx", type=float, default=0.02)
+    ap.add_argument("--semilla", type=int, default=1)
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        srv_db = os.path.join(tmp, "servidor.db")
+        generar(make_engine(srv_db), Tamano(args.productos, 0, 0, 30), args.semilla, log=lambda m: None)
+        srv = ServidorSync(srv_db, latencia_s=args.latencia, jitter_s=args.jitter, perdida=args.perdida,
+                           perdida_respuesta=args.perdida_respuesta, error_5xx=args.error_5xx,
+                           semilla=args.semilla).iniciar()
+        net.BASE_URL = srv.url
+        terminales = [Terminal(n, tmp, args.productos, args.semilla) for n in range(args.terminales)]
+        try:
+            with ThreadPoolExecutor(max_workers=args.terminales) as pool:
+                # ---- arranque ----
+                t0 = time.perf_counter()
+                pendientes, intentos = list(terminales), 0
+                while pendientes and intentos < 20:
+                    intentos += 1
+                    res = list(pool.map(lambda t: pull(engine=t.engine), pendientes))
+                    pendientes = [t for t, r in zip(pendientes, res) if _errores(r)]
+                seg_arranque = time.perf_counter() - t0
+                ok_arranque = not pendientes
+
+                # ---- rondas ----
+                ciclos = []
+                t0 = time.perf_counter()
+                for ronda in range(args.rondas):
+                    ciclos += pool.map(lambda t: _ciclo(t, ronda, args.ventas, args.ediciones), terminales)
+                seg_rondas = time.perf_counter() - t0
+                fallas = dict(srv.stats)
+
+                # ---- cierre sin fallas ----
+                srv.perdida = srv.perdida_respuesta = srv.error_5xx = 0.0
+                t0 = time.perf_counter()
+                for _ in range(2):
+                    cierre = list(pool.map(lambda t: push(engine=t.engine), terminales))
+                    cierre += pool.map(lambda t: pull(engine=t.engine), terminales)
+                seg_cierre = time.perf_counter() - t0
+                ok_cierre = not any(_errores(r) for r in cierre)
+
+                # ---- edición tardía ----
+                tardio = codigo_producto(0)
+                a, b = terminales[0], terminales[-1]
+                a.editar(0, [tardio])
+                b.editar(0, [codigo_producto(1)])
+                tardia = [push(["productos"], engine=b.engine)]
+                tardia += pool.map(lambda t: pull(["productos"], engine=t.engine), terminales)
+                tardia.append(push(["productos"], engine=a.engine))
+                tardia += pool.map(lambda t: pull(["productos"], engine=t.engine), terminales)
+                ok_cierre = ok_cierre and not any(_errores(r) for r in tardia)
+                ultimo = list(pool.map(lambda t: push(["boletas", "boleta_detalles"], engine=t.engine), terminales))
+
+            creadas = sum(t.boletas for t in terminales)
+            with srv.engine.connect() as c:
+                nb = c.execute(select(func.count()).select_from(Boleta)).scalar_one()
+                nd = c.execute(select(func.count()).select_from(BoletaDetalle)).scalar_one()
+            ref = _catalogo(srv.engine)
+            divergentes, tardia_ok = [], []
+            for t in terminales:
+                mio = _catalogo(t.engine)
+                divergentes.append(sum(mio.get(k) != v for k, v in ref.items()))
+                tardia_ok.append(mio.get(tardio) == ref[tardio])
+        finally:
+            for t in terminales:
+                t.engine.dispose()
+            srv.detener()
+
+    segs = [c["seg"] for c in ciclos]
+    subidas, bajadas = sum(c["subidas"] for c in ciclos), sum(c["bajadas"] for c in ciclos)
+    con_error = sum(1 for c in ciclos if c["errores"])
+    print(f"{args.terminales} terminales, {args.productos:,} productos; red: {args.latencia * 1000:.0f}"
+          f"+{args.jitter * 1000:.0f} ms, pérdida {args.perdida:.0%}, respuesta perdida "
+          f"{args.perdida_respuesta:.0%}, 5xx {args.error_5xx:.0%}")
+    print(f"\narranque: pull inicial de todas en {seg_arranque:.1f}s ({intentos} vuelta(s)), "
+          f"{args.terminales * args.productos / seg_arranque:,.0f} filas/s")
+    print(f"rondas: {args.rondas} × {args.terminales} ciclos en {seg_rondas:.1f}s")
+    print(f"  subidas   {subidas:>9,} filas  {subidas / seg_rondas:>9,.0f} filas/s")
+    print(f"  bajadas   {bajadas:>9,} filas  {bajadas / seg_rondas:>9,.0f} filas/s")
+    print(f"  ciclo push+pull  p50 {statistics.median(segs) * 1000:.0f} ms  p95 {_pct(segs, 0.95) * 1000:.0f} ms  "
+          f"máx {max(segs) * 1000:.0f} ms")
+    print(f"  ciclos con algún error: {con_error} de {len(ciclos)} (se reintentan en el siguiente)")
+    print(f"  fallas inyectadas: { {k: v for k, v in fallas.items() if not k.startswith('filas')} }")
+    print(f"cierre: {seg_cierre:.1f}s; boletas en el servidor {nb:,} de {creadas:,}, detalles {nd:,}")
+    print(f"productos distintos del servidor tras el cierre, por terminal: {divergentes}")
+    checks = {"arranque completo": ok_arranque,
+              "cierre sin errores": ok_cierre,
+              "cada boleta y detalle exactamente una vez": nb == creadas and nd == 3 * creadas,
+              "marcas de subida al día (último push vacío)":
+                  all(r.get("boletas") == 0 and r.get("boleta_detalles") == 0 for r in ultimo),
+              "edición tardía bajó a todas las terminales": all(tardia_ok),
+              "ninguna terminal distinta del servidor": not any(divergentes)}
+    for n, v in checks.items():
+        print(f"  {'ok ' if v else 'MAL'} {n}")
+    if not all(checks.values()):
+        raise SystemExit("FALLA")
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+# bench/codigos_barra.py
+"""
+Códigos alternos, GS1 y etiquetas de balanza (app/core/codigos_barra.py): resolución por escaneo.
+
+    python -m bench.codigos_barra [--productos 20000] [--alternos 8000] [--packs 1000]
+                                  [--balanza 300] [--escaneos 20000] [--ticket 40]
+
+Tienda sintética (bench.dataset) con --alternos EAN-13 de proveedor ("780…" con su
+dígito de control), --packs códigos de pack (6 o 12 unidades por escaneo) y
+--balanza PLU de balanza, todos en codigos_alternos. Traza Zipf de escaneos que
+mezcla código propio, EAN, pack con "*2", etiquetas de balanza con precio y alguna
+mala lectura (un dígito cambiado); cada --ticket escaneos hay un commit sobre
+productos (el stock del cobro), que vacía las fichas. Mide por escaneo el camino
+completo de _add_by_code hasta tener la línea (producto, cantidad, precio, impuesto):
+  escaneo     resolver() + ficha(): lectura y ficha en memoria
+    repetido  ... de un producto ya escaneado (el primer escaneo de cada uno va a la BD)
+  consulta    lo de antes: get_producto_por_codigo() en una sesión nueva por escaneo
+Comprueba que cada escaneo da el producto, la cantidad, el precio y la ficha
+esperados; que toda mala lectura de un dígito se rechaza por dígito de control;
+el formato de balanza por peso; la x de cantidad cuando el código la contiene; que
+un alterno agregado o quitado, un precio cambiado o un producto borrado con commit
+se ven en el siguiente escaneo (bus de cambios); y que una venta con dos etiquetas
+del mismo producto valida el stock sumado.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.codigos_barra import (Ficha, FormatoBalanza, Lectura, Resolutor, completar_gtin, gtin_valido,
+                                    separar_cantidad)
+from app.core.db_local import make_engine
+from app.core.eventos import Bus
+from app.core.models import CodigoAlterno, Producto
+from app.core.repositories import (agregar_codigo_alterno, ajustar_existencias, crear_boleta_con_detalles,
+                                   get_producto_por_codigo, quitar_codigo_alterno, soft_delete_producto,
+                                   update_producto)
+from bench.dataset import Tamano, codigo_producto, generar
+
+
+def _us(xs):
+    xs = sorted(xs)
+    return statistics.fmean(xs), xs[len(xs) // 2], xs[int(len(xs) * 0.99)], xs[-1]
+
+
+def _corromper(rnd: random.Random, codigo: str) -> str:
+    i = rnd.randrange(len(codigo))
+    d = str((int(codigo[i]) + rnd.randint(1, 9)) % 10)
+    return codigo[:i] + d + codigo[i + 1:]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--productos", type=int, default=20_000)
+    ap.add_argument("--alternos", type=int, default=8_000)
+    ap.add_argument("--packs", type=int, default=1_000)
+    ap.add_argument("--balanza", type=int, default=300)
+    ap.add_argument("--escaneos", type=int, default=20_000)
+    ap.add_argument("--ticket", type=int, default=40, help="escaneos entre cobros (commit sobre productos)")
+    ap.add_argument("--semilla", type=int, default=1)
+    args = ap.parse_args(argv)
+    rnd = random.Random(args.semilla)
+    checks = {}
+
+    # ---- GS1 ----
+    checks["GS1: EAN-13, UPC-A, EAN-8 conocidos válidos; con un dígito cambiado no"] = (
+        all(gtin_valido(c) for c in ("4006381333931", "036000291452", "96385074", "7801234567894"))
+        and not any(gtin_valido(c) for c in ("4006381333932", "036000291453", "96385075")))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        eng = make_engine(os.path.join(tmp, "codigos.db"))
+        generar(eng, Tamano(args.productos, 0, 0, 30), args.semilla, log=lambda m: None)
+        Session = sessionmaker(bind=eng, autoflush=False)
+        bus = Bus()
+        bus.instalar(eng)
+
+        # ---- alternos: EAN de proveedor, packs y PLU de balanza ----
+        esperado: dict[str, Lectura] = {}      # código escaneable → lectura esperada (sin cantidad del "*")
+        filas, usados = [], set()
+        for k in range(args.alternos + args.packs):
+            i = rnd.randrange(args.productos)
+            while True:
+                ean = completar_gtin("780" + f"{rnd.randrange(10**9):09d}")
+                if ean not in usados:
+                    break
+            usados.add(ean)
+            unidades = 1 if k < args.alternos else rnd.choice((6, 12))
+            filas.append({"codigo_barra": ean, "codigo_producto": codigo_producto(i), "unidades": unidades,
+                          "descripcion": f"Pack {unidades}" if unidades > 1 else "EAN proveedor"})
+            esperado[ean] = Lectura(codigo_producto(i), unidades)
+        pesables = []
+        for k in range(args.balanza):
+            plu = f"{k + 1:05d}"
+            cod = codigo_producto(args.productos - 1 - k)
+            filas.append({"codigo_barra": plu, "codigo_producto": cod, "unidades": 1, "descripcion": "PLU balanza"})
+            pesables.append((plu, cod))
+        with Session() as s, s.begin():
+            s.execute(insert(CodigoAlterno), filas)
+
+        alternos = list(esperado)
+        formato = FormatoBalanza(prefijos=("20",), plu=5, valor="precio")
+
+        def etiqueta():
+            plu, cod = rnd.choice(pesables)
+            precio = rnd.randrange(100, 99_999)
+            c = completar_gtin(f"20{plu}{precio:05d}")
+            return c, Lectura(cod, 1, precio=precio, etiqueta=c)
+
+        # ---- traza ----
+        pesos = [1 / (r + 1) for r in range(args.productos)]
+        propios = rnd.choices(range(args.productos), weights=pesos, k=args.escaneos)
+        traza: list[tuple[str, Lectura | None]] = []
+        for i in propios:
+            x = rnd.random()
+            if x < 0.45:
+                c = codigo_producto(i)
+                traza.append((c, Lectura(c)))
+            elif x < 0.85:
+                c = alternos[i % len(alternos)]
+                if rnd.random() < 0.1:
+                    traza.append((c + "*2", Lectura(esperado[c].codigo, esperado[c].cantidad * 2)))
+                else:
+                    traza.append((c, esperado[c]))
+            elif x < 0.99:
+                traza.append(etiqueta())
+            else:
+                malo = _corromper(rnd, alternos[i % len(alternos)])
+                traza.append((malo, None))
+
+        with Session() as s:
+            fichas = {c: Ficha(d, int(pv), int(imp)) for c, d, pv, imp in s.execute(
+                select(Producto.codigo, Producto.descripcion, Producto.precio_venta, Producto.porcentaje_impuesto))}
+
+        res = Resolutor(Session, formato=formato, bus=bus)
+        t_res, t_rep, vistos, errores, rechazos, malas, cobros = [], [], set(), [], 0, 0, 0
+        for k, (raw, esp) in enumerate(traza):
+            if k and k % args.ticket == 0:
+                # cobro: la venta escribe productos (stock) y el bus deja viejas las fichas
+                with Session() as s, s.begin():
+                    ajustar_existencias(s, codigo_producto(0), 1, "bench")
+                cobros += 1
+            t0 = time.perf_counter()
+            try:
+                got = res.resolver(raw)
+                ficha = res.ficha(got.codigo) if got is not None else None
+            except ValueError:
+                got, ficha = "rechazo", None
+            dt = (time.perf_counter() - t0) * 1e6
+            t_res.append(dt)
+            if esp is not None:
+                if esp.codigo in vistos:
+                    t_rep.append(dt)
+                vistos.add(esp.codigo)
+            if esp is None:
+                malas += 1
+                rechazos += got == "rechazo"
+            elif got != esp or ficha != fichas[esp.codigo]:
+                errores.append((raw, got, esp))
+
+        muestra = rnd.sample([r for r, e in traza if e is not None and e.etiqueta is None and "*" not in r],
+                             min(2_000, len(traza)))
+        t_sql = []
+        for raw in muestra:
+            t0 = time.perf_counter()
+            with Session() as s:
+                get_producto_por_codigo(s, raw)
+            t_sql.append((time.perf_counter() - t0) * 1e6)
+
+        checks["cada escaneo: producto, cantidad, precio y ficha esperados"] = not errores
+
+        # ---- precio cambiado / producto borrado: el siguiente escaneo lo ve ----
+        raw, esp = next((r, e) for r, e in traza if e is not None)
+        cod = esp.codigo
+        antes = res.ficha(res.resolver(raw).codigo)
+        with Session() as s, s.begin():
+            update_producto(s, cod, precio_venta=antes.precio_venta + 100)
+        subio = res.ficha(cod)
+        borrado = codigo_producto(args.productos // 2)
+        res.ficha(borrado)
+        with Session() as s, s.begin():
+            soft_delete_producto(s, borrado)
+        checks["precio cambiado o producto borrado: visible en el siguiente escaneo"] = (
+            subio.precio_venta == antes.precio_venta + 100 and res.ficha(borrado) is None)
+        checks["toda mala lectura de un dígito se rechaza (dígito de control)"] = rechazos == malas
+
+        # ---- formato de peso y x de cantidad ----
+        peso = FormatoBalanza(prefijos=("21",), plu=5, valor="peso")
+        lab = completar_gtin("21" + "00001" + "01250")
+        dec = peso.decodificar(lab)
+        checks["balanza por peso: 1,250 kg a $2.000/kg son $2.500"] = (
+            dec == ("00001", 1250) and Lectura("X", gramos=1250).precio_para(2000) == 2500)
+        with Session() as s, s.begin():
+            agregar_codigo_alterno(s, "BOX12", codigo_producto(3))
+        checks["'BOX12' alterno se resuelve entero; 'P*3' y 'Px3' llevan cantidad"] = (
+            res.resolver("BOX12") == Lectura(codigo_producto(3))
+            and res.resolver(codigo_producto(5) + "*3") == Lectura(codigo_producto(5), 3)
+            and res.resolver(codigo_producto(5) + "x3") == Lectura(codigo_producto(5), 3)
+            and separar_cantidad("ABC*3") == [("ABC", 3)])
+
+        # ---- alterno nuevo / quitado: se ve al siguiente escaneo ----
+        nuevo = completar_gtin("789000000001")
+        antes = res.resolver(nuevo)
+        with Session() as s, s.begin():
+            agregar_codigo_alterno(s, nuevo, codigo_producto(7), unidades=6)
+        despues = res.resolver(nuevo)
+        with Session() as s, s.begin():
+            quitar_codigo_alterno(s, nuevo)
+        quitado = res.resolver(nuevo)
+        with Session() as s:
+            por_alterno = get_producto_por_codigo(s, alternos[0])
+        checks["alterno agregado/quitado con commit: visible en el siguiente escaneo"] = (
+            antes is None and despues == Lectura(codigo_producto(7), 6) and quitado is None)
+        checks["get_producto_por_codigo encuentra por alterno"] = (
+            por_alterno is not None and por_alterno.codigo == esperado[alternos[0]].codigo)
+        try:
+            with Session() as s, s.begin():
+                agregar_codigo_alterno(s, _corromper(rnd, nuevo), codigo_producto(7))
+            checks["alterno con dígito de control malo se rechaza"] = False
+        except ValueError:
+            checks["alterno con dígito de control malo se rechaza"] = True
+
+        # ---- venta con dos etiquetas del mismo producto ----
+        plu, cod = pesables[0]
+        with Session() as s, s.begin():
+            s.get(Producto, cod).existencias = 1
+        items = [{"codigo": cod, "descripcion": "pesable", "precio_unit": p, "cantidad": 1} for p in (1500, 2300)]
+        try:
+            with Session() as s, s.begin():
+                crear_boleta_con_detalles(s, items)
+            checks["dos etiquetas con stock 1: se rechaza (stock sumado)"] = False
+        except ValueError:
+            checks["dos etiquetas con stock 1: se rechaza (stock sumado)"] = True
+        with Session() as s, s.begin():
+            s.get(Producto, cod).existencias = 2
+        with Session() as s, s.begin():
+            b = crear_boleta_con_detalles(s, items)
+            ok_venta = int(b.total) == 3800
+        with Session() as s:
+            ok_venta = ok_venta and s.get(Producto, cod).existencias == 0
+        checks["dos etiquetas con stock 2: una boleta de $3.800, stock 0"] = ok_venta
+        res.cerrar()
+        bus.desinstalar()
+        eng.dispose()
+
+    r, rr, q = _us(t_res), _us(t_rep), _us(t_sql)
+    print(f"{args.productos:,} productos, {len(alternos):,} alternos ({args.packs:,} packs), "
+          f"{len(pesables)} PLU de balanza; {len(traza):,} escaneos, {malas} malas lecturas")
+    print(f"lecturas: {res.aciertos:,} de caché, {res.fallos:,} resueltas en la BD; {cobros} cobros\n")
+    print(f"  {'':10} {'n':>6} {'media':>9} {'p50':>9} {'p99':>9} {'máx':>9}  (µs por escaneo)")
+    print(f"  {'escaneo':10} {len(t_res):6} " + " ".join(f"{x:9.1f}" for x in r))
+    print(f"  {'  repetido':10} {len(t_rep):6} " + " ".join(f"{x:9.1f}" for x in rr))
+    print(f"  {'consulta':10} {len(t_sql):6} " + " ".join(f"{x:9.1f}" for x in q))
+    print(f"  aceleración (p50): {q[1] / r[1]:.1f}x todos, {q[1] / rr[1]:.0f}x producto ya escaneado")
+    if errores:
+        print(f"  p.ej. {errores[0]}")
+    for k, v in checks.items():
+        print(f"  {'ok ' if v else 'MAL'} {k}")
+    if not all(checks.values()):
+        raise SystemExit("FALLA")
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
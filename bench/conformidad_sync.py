@@ -0,0 +1,411 @@
+# bench/conformidad_sync.py
+"""
+Conformidad del protocolo de sync: lo que app/core/sync_client espera de BASE_URL.
+
+    python -m bench.conformidad_sync [--url https://api.ejemplo.com]
+
+Sin --url levanta bench.servidor_sync (la referencia) sobre una BD temporal y,
+además del protocolo, prueba al cliente contra las fallas inyectables. Con --url
+sólo el protocolo, contra ese backend: escribe filas de prueba (productos CONF-<hex>,
+una orden de compra y una boleta) que quedan ahí.
+
+Protocolo (HTTP directo):
+  health               GET /health → 200
+  recurso desconocido  GET /sync/pull/<x> → 404
+  push                 POST /sync/push/<recurso> [{"op", "data"}] → 200 {"recibidos": n}
+  since estricto       pull?since=T trae marca > T (no = T); sin since, todo
+  cursor               pull responde X-Sync-Cursor; pull?cursor=N trae lo recibido después
+                       de N aunque su marca sea más vieja que lo ya bajado (edición tardía)
+  ida y vuelta         lo subido vuelve igual (fechas ISO, enteros)
+  lww                  productos: un updated_at más viejo no pisa; uno más nuevo sí
+  version              ordenes_compra: gana version mayor; con empate, updated_at más nuevo
+  idempotente          el mismo lote dos veces → 200 las dos (el cliente reintenta)
+  lote grande          500 filas (sync_client.LOTE) en un POST
+  entrada inválida     cuerpo mal formado / since o cursor ilegible → 4xx, nunca 5xx ni cortar
+Cliente (sólo contra la referencia):
+  5xx en una tabla     su grupo de FK entero no se aplica ni avanza marcas; al volver, completo
+  petición perdida     pull sin respuesta: error, la terminal no cambia
+  respuesta perdida    push aplicado sin respuesta: se reintenta sin duplicar
+  timeout              latencia > HTTP_TIMEOUT: error acotado, no se cuelga
+  5xx aleatorio        sincronizar() repetido converge a lo mismo que el servidor
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+import httpx
+from sqlalchemy import func, insert, select
+
+from app.core import net
+from app.core.db_local import make_engine
+from app.core.ids import gen_id
+from app.core.migraciones import actualizar_bd
+from app.core.models import Boleta, BoletaDetalle, OrdenCompra, Producto, SyncState
+from app.core.sync_client import LOTE, REGISTRO, _a_json, _de_json, pull, push, sincronizar
+from bench.servidor_sync import ServidorSync
+
+US = timedelta(microseconds=1)
+
+
+class NoCumple(Exception):
+    pass
+
+
+def _exigir(cond, msg: str):
+    if not cond:
+        raise NoCumple(msg)
+
+
+class Prueba:
+    """Estado compartido: cliente HTTP, prefijo de las filas de prueba y un instante base."""
+
+    def __init__(self, url: str, servidor: ServidorSync | None = None, tmp: str | None = None):
+        self.url = url
+        self.srv = servidor
+        self.tmp = tmp
+        self.http = httpx.Client(base_url=url, timeout=net.HTTP_TIMEOUT, headers=net._headers())
+        self.prefijo = f"CONF-{uuid.uuid4().hex[:8]}-"
+        # base en el pasado cercano y truncada a ms: las marcas que se comparan son exactas
+        ahora = datetime.utcnow() - timedelta(minutes=5)
+        self.t = ahora.replace(microsecond=ahora.microsecond // 1000 * 1000)
+        self.terminales = 0
+        self.reintentos = None
+
+    def push(self, recurso: str, filas: list[dict], op: str = "upsert") -> httpx.Response:
+        return self.http.post(f"/sync/push/{recurso}", json=[{"op": op, "data": _a_json(f)} for f in filas])
+
+    def pull(self, recurso: str, since: datetime | None) -> list[dict]:
+        r = self.http.get(f"/sync/pull/{recurso}", params={"since": since.isoformat()} if since else {})
+        _exigir(r.status_code == 200, f"pull {recurso}: HTTP {r.status_code}")
+        return r.json()
+
+    def mios(self, recurso: str, since: datetime, clave: str, valores) -> dict:
+        valores = set(valores)
+        return {f[clave]: f for f in self.pull(recurso, since) if f[clave] in valores}
+
+    def producto(self, n: int, **kw) -> dict:
+        fila = {"codigo": f"{self.prefijo}{n:04d}", "descripcion": f"Conformidad {n}", "existencias": 10 + n,
+                "inv_minimo": 1, "inv_maximo": 99, "precio_costo": 500, "precio_venta": 990,
+                "porcentaje_impuesto": 19, "albergado": "Albergado y catalogado",
+                "updated_at": self.t, "deleted_at": None, "version": 1}
+        fila.update(kw)
+        return fila
+
+    def terminal(self):
+        self.terminales += 1
+        eng = make_engine(os.path.join(self.tmp, f"terminal{self.terminales}.db"))
+        actualizar_bd(eng)
+        return eng
+
+
+# =========================
+# Protocolo
+# =========================
+def p_health(p: Prueba):
+    r = p.http.get("/health")
+    _exigir(r.status_code == 200, f"HTTP {r.status_code}")
+
+
+def p_desconocido(p: Prueba):
+    r = p.http.get("/sync/pull/no_existe")
+    _exigir(r.status_code == 404, f"HTTP {r.status_code}, se esperaba 404")
+
+
+def p_push(p: Prueba):
+    filas = [p.producto(i, updated_at=p.t + timedelta(seconds=i)) for i in range(3)]
+    r = p.push("productos", filas)
+    _exigir(r.status_code == 200, f"HTTP {r.status_code}: {r.text[:200]}")
+    _exigir(r.json().get("recibidos") == 3, f"respuesta {r.json()}")
+
+
+def p_since(p: Prueba):
+    codigos = [p.producto(i)["codigo"] for i in range(3)]
+    todos = p.mios("productos", p.t - US, "codigo", codigos)
+    _exigir(len(todos) == 3, f"since=T-1µs trajo {len(todos)} de 3")
+    sin_borde = p.mios("productos", p.t, "codigo", codigos)
+    _exigir(sorted(sin_borde) == codigos[1:], f"since=T trajo {sorted(sin_borde)}: debe ser marca > T")
+    ultimo = p.mios("productos", p.t + timedelta(seconds=1), "codigo", codigos)
+    _exigir(sorted(ultimo) == codigos[2:], f"since=T+1s trajo {sorted(ultimo)}")
+
+
+def p_cursor(p: Prueba):
+    def bajar(cursor):
+        r = p.http.get("/sync/pull/productos", params={"cursor": cursor} if cursor is not None else {})
+        _exigir(r.status_code == 200, f"pull cursor={cursor}: HTTP {r.status_code}")
+        _exigir(r.headers.get(net.CABECERA_CURSOR, "").isdigit(), f"sin cabecera {net.CABECERA_CURSOR}")
+        return ({f["codigo"] for f in r.json() if f["codigo"].startswith(p.prefijo)},
+                int(r.headers[net.CABECERA_CURSOR]))
+
+    _, n0 = bajar(None)
+    nueva, vieja = p.producto(2000, updated_at=p.t + timedelta(hours=1)), p.producto(2001, updated_at=p.t)
+    _exigir(p.push("productos", [nueva]).status_code == 200, "push de la fila nueva")
+    codigos, n1 = bajar(n0)
+    _exigir(codigos == {nueva["codigo"]} and n1 > n0, f"cursor={n0} trajo {sorted(codigos)}, cursor {n1}")
+    # llega después, con una marca anterior a la ya bajada: since la perdería
+    _exigir(p.push("productos", [vieja]).status_code == 200, "push de la fila tardía")
+    codigos, n2 = bajar(n1)
+    _exigir(codigos == {vieja["codigo"]} and n2 > n1, f"cursor={n1} trajo {sorted(codigos)}: falta la tardía")
+    codigos, n3 = bajar(n2)
+    _exigir(not codigos and n3 >= n2, f"cursor={n2} (al día) trajo {sorted(codigos)}, cursor {n3}")
+
+
+def p_ida_vuelta(p: Prueba):
+    t = REGISTRO["productos"]
+    enviadas = [p.producto(i, updated_at=p.t + timedelta(seconds=i)) for i in range(3)]
+    vueltas = p.mios("productos", p.t - US, "codigo", [f["codigo"] for f in enviadas])
+    for f in enviadas:
+        v = _de_json(t, vueltas.get(f["codigo"], {}))
+        distintas = {k: (f[k], v.get(k)) for k in f if v.get(k) != f[k]}
+        _exigir(not distintas, f"{f['codigo']}: {distintas}")
+
+
+def p_lww(p: Prueba):
+    cod = p.producto(0)["codigo"]
+    r = p.push("productos", [p.producto(0, precio_venta=1, updated_at=p.t - timedelta(seconds=1))])
+    _exigir(r.status_code == 200, f"HTTP {r.status_code}")
+    precio = p.mios("productos", p.t - US, "codigo", [cod])[cod]["precio_venta"]
+    _exigir(precio == 990, f"un updated_at más viejo pisó el precio ({precio})")
+    nuevo = p.t + timedelta(seconds=10)
+    p.push("productos", [p.producto(0, precio_venta=1290, updated_at=nuevo)])
+    precio = p.mios("productos", nuevo - US, "codigo", [cod]).get(cod, {}).get("precio_venta")
+    _exigir(precio == 1290, f"un updated_at más nuevo no se aplicó ({precio})")
+
+
+def p_version(p: Prueba):
+    oid = gen_id()
+
+    def oc(version, seg, estado):
+        return {"id_ordenes_com": oid, "folio_orden": f"{p.prefijo}OC", "fecha_llegada_orden": date(2025, 3, 1),
+                "estado_orden": estado, "updated_at": p.t + timedelta(seconds=seg), "deleted_at": None,
+                "version": version}
+
+    def estado():
+        fila = p.mios("ordenes_compra", p.t - timedelta(seconds=60), "id_ordenes_com", [oid]).get(oid, {})
+        return fila.get("estado_orden"), fila.get("fecha_llegada_orden")
+
+    pasos = [(oc(2, 0, "v2"), "v2", "primera"),
+             (oc(1, 30, "v1"), "v2", "version menor con updated_at más nuevo"),
+             (oc(2, 5, "v2b"), "v2b", "misma version, updated_at más nuevo"),
+             (oc(2, 1, "v2c"), "v2b", "misma version, updated_at más viejo"),
+             (oc(3, -30, "v3"), "v3", "version mayor con updated_at más viejo")]
+    for fila, esperado, caso in pasos:
+        r = p.push("ordenes_compra", [fila])
+        _exigir(r.status_code == 200, f"{caso}: HTTP {r.status_code}")
+        visto, fecha = estado()
+        _exigir(visto == esperado, f"{caso}: quedó {visto!r}, se esperaba {esperado!r}")
+    _exigir(fecha == "2025-03-01", f"fecha_llegada_orden volvió como {fecha!r}")
+
+
+def p_idempotente(p: Prueba):
+    bid = gen_id()
+    boleta = {"id": bid, "folio": f"{p.prefijo}BLT", "total": 1980, "created_at": p.t}
+    detalles = [{"id": gen_id(), "boleta_id": bid, "codigo_producto": p.producto(i)["codigo"],
+                 "descripcion": "x", "precio_unitario": 990, "cantidad": 1, "subtotal": 990} for i in range(2)]
+    for vez in (1, 2):
+        for recurso, filas in (("boletas", [boleta]), ("boleta_detalles", detalles)):
+            r = p.push(recurso, filas, op="insert")
+            _exigir(r.status_code == 200, f"{recurso}, envío {vez}: HTTP {r.status_code}: {r.text[:200]}")
+    if p.srv is not None:
+        with p.srv.engine.connect() as c:
+            n = c.execute(select(func.count()).select_from(BoletaDetalle)
+                          .where(BoletaDetalle.boleta_id == bid)).scalar_one()
+        _exigir(n == 2, f"{n} detalles en el servidor, se esperaban 2")
+
+
+def p_lote(p: Prueba):
+    base = p.t + timedelta(seconds=100)
+    filas = [p.producto(1000 + i, updated_at=base) for i in range(LOTE)]
+    r = p.push("productos", filas)
+    _exigir(r.status_code == 200 and r.json().get("recibidos") == LOTE, f"HTTP {r.status_code}: {r.text[:200]}")
+    vueltas = p.mios("productos", base - US, "codigo", [f["codigo"] for f in filas])
+    _exigir(len(vueltas) == LOTE, f"volvieron {len(vueltas)} de {LOTE}")
+
+
+def p_invalido(p: Prueba):
+    casos = {"cuerpo no es lista": p.http.post("/sync/push/productos", json={"x": 1}),
+             "JSON ilegible": p.http.post("/sync/push/productos", content=b"{no es json",
+                                          headers={"Content-Type": "application/json"}),
+             "fila sin clave": p.push("productos", [{"descripcion": "sin codigo", "updated_at": p.t}]),
+             "since ilegible": p.http.get("/sync/pull/productos", params={"since": "ayer"}),
+             "cursor ilegible": p.http.get("/sync/pull/productos", params={"cursor": "ayer"})}
+    malos = {caso: r.status_code for caso, r in casos.items() if not 400 <= r.status_code < 500}
+    _exigir(not malos, f"se esperaba 4xx: {malos}")
+
+
+PROTOCOLO = [("health", p_health), ("recurso desconocido → 404", p_desconocido),
+             ("push → recibidos", p_push), ("since estricto (marca > since)", p_since),
+             ("cursor: trae ediciones tardías", p_cursor),
+             ("ida y vuelta sin perder tipos", p_ida_vuelta), ("lww: el más viejo no pisa", p_lww),
+             ("version: mayor gana, empate por updated_at", p_version),
+             ("push repetido es idempotente", p_idempotente), (f"lote de {LOTE} filas", p_lote),
+             ("entrada inválida → 4xx", p_invalido)]
+
+
+# =========================
+# Cliente contra fallas (referencia)
+# =========================
+def _conteo(engine, modelo) -> int:
+    with engine.connect() as c:
+        return c.execute(select(func.count()).select_from(modelo)).scalar_one()
+
+
+def _marca(engine, recurso):
+    with engine.connect() as c:
+        return c.execute(select(SyncState.last_sync).where(SyncState.table_name == recurso)).scalar()
+
+
+def c_5xx_grupo(p: Prueba):
+    eng = p.terminal()
+    p.srv.fallar = {"detalles_orden"}
+    try:
+        res = pull(engine=eng)
+    finally:
+        p.srv.fallar = set()
+    # productos, transito, codigos_alternos, ordenes_compra y detalles_orden son un solo grupo
+    # (FK a productos); los otros grupos (promociones) se aplican igual
+    grupo = {"productos", "transito", "codigos_alternos", "ordenes_compra", "detalles_orden"}
+    _exigir(all(isinstance(v, str) for r, v in res.items() if r in grupo), f"el grupo debía fallar entero: {res}")
+    _exigir(all(isinstance(v, int) for r, v in res.items() if r not in grupo), f"otro grupo no se aplicó: {res}")
+    with eng.connect() as c:
+        marcas = set(c.execute(select(SyncState.table_name)).scalars())
+    _exigir(_conteo(eng, Producto) == 0 and not marcas & grupo, "el grupo fallido dejó filas o marcas")
+    res = pull(engine=eng)
+    _exigir(res["productos"] == _conteo(p.srv.engine, Producto)
+            and res["ordenes_compra"] == _conteo(p.srv.engine, OrdenCompra), f"al volver: {res}")
+    eng.dispose()
+
+
+def c_perdida(p: Prueba):
+    eng = p.terminal()
+    p.srv.perdida = 1.0
+    try:
+        res = pull(engine=eng)
+    finally:
+        p.srv.perdida = 0.0
+    _exigir(all(isinstance(v, str) for v in res.values()), f"con todo perdido: {res}")
+    _exigir(_conteo(eng, Producto) == 0 and _conteo(eng, SyncState) == 0, "la terminal cambió")
+    eng.dispose()
+
+
+def c_respuesta_perdida(p: Prueba):
+    eng = p.terminal()
+    bid = gen_id()
+    ahora = datetime.utcnow()
+    with eng.begin() as c:
+        c.execute(insert(Boleta).values(id=bid, folio=f"{p.prefijo}RP", total=990, created_at=ahora))
+        c.execute(insert(BoletaDetalle), [{"id": gen_id(), "boleta_id": bid, "codigo_producto": "X",
+                                           "descripcion": "x", "precio_unitario": 330, "cantidad": 1,
+                                           "subtotal": 330} for _ in range(3)])
+    p.srv.perdida_respuesta = 1.0
+    try:
+        r1 = push(engine=eng)
+    finally:
+        p.srv.perdida_respuesta = 0.0
+    _exigir(isinstance(r1["boletas"], str), f"sin respuesta el push debía fallar: {r1}")
+    r2, r3 = push(engine=eng), push(engine=eng)
+    with p.srv.engine.connect() as c:
+        nb = c.execute(select(func.count()).select_from(Boleta).where(Boleta.id == bid)).scalar_one()
+        nd = c.execute(select(func.count()).select_from(BoletaDetalle)
+                       .where(BoletaDetalle.boleta_id == bid)).scalar_one()
+    r2, r3 = ({k: r[k] for k in ("boletas", "boleta_detalles")} for r in (r2, r3))
+    _exigir(r2 == {"boletas": 1, "boleta_detalles": 3}, f"reintento: {r2}")
+    _exigir((nb, nd) == (1, 3), f"servidor con {nb} boletas y {nd} detalles (1 y 3)")
+    _exigir(r3 == {"boletas": 0, "boleta_detalles": 0}, f"tercer push: {r3}")
+    eng.dispose()
+
+
+def c_timeout(p: Prueba):
+    eng = p.terminal()
+    timeout, latencia = net.HTTP_TIMEOUT, p.srv.latencia_s
+    net.HTTP_TIMEOUT, p.srv.latencia_s = 0.2, 0.5
+    t0 = time.perf_counter()
+    try:
+        res = pull(["productos"], engine=eng)
+    finally:
+        net.HTTP_TIMEOUT, p.srv.latencia_s = timeout, latencia
+    seg = time.perf_counter() - t0
+    _exigir(isinstance(res["productos"], str), f"debía vencer: {res}")
+    _exigir(seg < 1.0, f"tardó {seg:.1f}s con HTTP_TIMEOUT=0.2")
+    eng.dispose()
+
+
+# sincronizar() da ok sólo si TODAS sus peticiones salen bien: con 40% de 5xx y ~8
+# peticiones por vuelta son ~60 vueltas esperadas (cada tabla registrada suma una)
+INTENTOS_5XX = 200
+
+
+def c_5xx_aleatorio(p: Prueba):
+    eng = p.terminal()
+    p.srv.error_5xx = 0.4
+    try:
+        for intento in range(1, INTENTOS_5XX + 1):
+            ok, msg = sincronizar(engine=eng)
+            if ok:
+                break
+    finally:
+        p.srv.error_5xx = 0.0
+    _exigir(ok, f"no convergió en {INTENTOS_5XX} intentos: {msg}")
+    for modelo in (Producto, OrdenCompra):
+        _exigir(_conteo(eng, modelo) == _conteo(p.srv.engine, modelo), f"{modelo.__tablename__} distinto")
+    p.reintentos = intento
+    eng.dispose()
+
+
+CLIENTE = [("5xx en una tabla: su grupo no se aplica", c_5xx_grupo),
+           ("petición perdida: error, terminal intacta", c_perdida),
+           ("respuesta perdida en push: reintento sin duplicar", c_respuesta_perdida),
+           ("latencia > HTTP_TIMEOUT: error acotado", c_timeout),
+           ("5xx aleatorio (40%): sincronizar() converge", c_5xx_aleatorio)]
+
+
+def _correr(p: Prueba, pruebas) -> dict:
+    res = {}
+    for nombre, f in pruebas:
+        try:
+            f(p)
+            res[nombre] = None
+        except NoCumple as e:
+            res[nombre] = str(e)
+        except httpx.HTTPError as e:
+            res[nombre] = f"{type(e).__name__}: {e}"
+        print(f"  {'ok ' if res[nombre] is None else 'MAL'} {nombre}"
+              + ("" if res[nombre] is None else f"\n        {res[nombre]}"))
+    return res
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--url", help="backend a probar (por defecto, la referencia local)")
+    args = ap.parse_args(argv)
+
+    if args.url:
+        net.BASE_URL = args.url.rstrip("/")
+        print(f"protocolo contra {net.BASE_URL}")
+        res = _correr(Prueba(net.BASE_URL), PROTOCOLO)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            srv = ServidorSync(os.path.join(tmp, "servidor.db"), semilla=1).iniciar()
+            net.BASE_URL = srv.url
+            p = Prueba(srv.url, srv, tmp)
+            try:
+                print(f"protocolo contra la referencia ({srv.url})")
+                res = _correr(p, PROTOCOLO)
+                print("cliente (app/core/sync_client) contra fallas inyectadas")
+                res |= _correr(p, CLIENTE)
+                print(f"\nservidor: {dict(srv.stats)}; 5xx aleatorio convergió en "
+                      f"{p.reintentos} sincronizar()")
+            finally:
+                p.http.close()
+                srv.detener()
+    if any(v is not None for v in res.values()):
+        raise SystemExit("FALLA")
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
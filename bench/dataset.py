@@ -0,0 +1,174 @@
+# bench/dataset.py
+"""
+Generador de tiendas sintéticas reproducibles (misma semilla → mismos datos).
+
+    python -m bench.dataset salida.db --productos 100000 [--semilla 1]
+
+Inserta directo con las tablas de app/core/models (executemany por bloques):
+productos (+ transito), boletas con detalles, órdenes de compra con líneas
+(pendientes y cerradas) y el ledger de movimientos correspondiente a las ventas.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db_local import make_engine
+from app.core.models import (
+    Base, Producto, Boleta, BoletaDetalle, OrdenCompra, DetalleOrden, MovimientoStock,
+)
+
+BLOQUE = 10_000
+
+
+@dataclass
+class Tamano:
+    productos: int
+    boletas: int
+    ordenes: int
+    dias: int = 90
+
+    @classmethod
+    def desde_escala(cls, n: int) -> "Tamano":
+        """Escala = cantidad de productos; el resto proporcional."""
+        return cls(productos=n, boletas=max(10, n // 2), ordenes=max(10, n // 100))
+
+
+def codigo_producto(i: int) -> str:
+    return f"P-{i:07d}"
+
+
+def _uuid(rnd: random.Random, ts: datetime) -> str:
+    """UUIDv7 reproducible con el instante 'ts' (como app.core.ids.gen_id, pero con la semilla)."""
+    ms = int(ts.replace(tzinfo=timezone.utc).timestamp() * 1000)
+    r = rnd.getrandbits(128)        # mismos bits que antes: el resto del dataset no cambia con la semilla
+    return str(uuid.UUID(int=(ms << 80) | (0x7 << 76) | ((r >> 64) & 0x0FFF) << 64
+                         | (0b10 << 62) | (r & ((1 << 62) - 1))))
+
+
+def _volcar(session, tabla, filas: list[dict]):
+    if filas:
+        session.execute(insert(tabla), filas)
+        filas.clear()
+
+
+def generar(engine, tam: Tamano, semilla: int = 1, log=print) -> dict:
+    """Llena 'engine' (BD vacía) y devuelve un resumen con los ids útiles para los benchmarks."""
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    rnd = random.Random(semilla)
+    t0 = time.perf_counter()
+    ahora = datetime(2025, 1, 1) + timedelta(days=tam.dias)
+    inicio = ahora - timedelta(days=tam.dias)
+
+    with Session() as s, s.begin():
+        # ---- productos ----
+        filas = []
+        for i in range(tam.productos):
+            costo = rnd.randint(200, 20000)
+            minimo = rnd.randint(0, 20)
+            filas.append({
+                "codigo": codigo_producto(i),
+                "descripcion": f"Producto sintético {i}",
+                "existencias": rnd.randint(0, 200),
+                "inv_minimo": minimo,
+                "inv_maximo": minimo + rnd.randint(0, 200),
+                "precio_costo": costo,
+                "precio_venta": int(costo * 1.3 * 1.19),
+                "porcentaje_impuesto": 19,
+                "albergado": "catalogado y albergado",
+                # repartidos en el período (sin tocar rnd): rangos por updated_at con sentido
+                "updated_at": inicio + timedelta(seconds=tam.dias * 86400 * i // tam.productos),
+                "version": 1,
+            })
+            if len(filas) >= BLOQUE:
+                _volcar(s, Producto.__table__, filas)
+        _volcar(s, Producto.__table__, filas)
+        log(f"  productos: {tam.productos} ({time.perf_counter() - t0:.1f}s)")
+
+        # ---- boletas + detalles + movimientos de venta ----
+        bol, det, mov = [], [], []
+        seg = tam.dias * 86400
+        folio_dia: dict[str, int] = {}
+        for b in range(tam.boletas):
+            ts = inicio + timedelta(seconds=seg * b // tam.boletas)
+            dia = ts.strftime("%Y%m%d")
+            folio_dia[dia] = folio_dia.get(dia, 0) + 1
+            bid = _uuid(rnd, ts)
+            folio = f"BLT-{dia}-{folio_dia[dia]:06d}"
+            total = 0
+            for _ in range(rnd.randint(1, 5)):
+                i = rnd.randrange(tam.productos)
+                cant = rnd.randint(1, 4)
+                pu = rnd.randint(300, 25000)
+                total += cant * pu
+                det.append({
+                    "id": _uuid(rnd, ts), "boleta_id": bid, "codigo_producto": codigo_producto(i),
+                    "descripcion": f"Producto sintético {i}", "precio_unitario": pu,
+                    "cantidad": cant, "subtotal": cant * pu,
+                })
+                mov.append({
+                    "codigo_producto": codigo_producto(i), "delta": -cant, "existencias": None,
+                    "motivo": "venta", "referencia": folio, "created_at": ts,
+                })
+            bol.append({"id": bid, "folio": folio, "total": total, "created_at": ts})
+            if len(det) >= BLOQUE:
+                _volcar(s, Boleta.__table__, bol)
+                _volcar(s, BoletaDetalle.__table__, det)
+                _volcar(s, MovimientoStock.__table__, mov)
+        _volcar(s, Boleta.__table__, bol)
+        _volcar(s, BoletaDetalle.__table__, det)
+        _volcar(s, MovimientoStock.__table__, mov)
+        log(f"  boletas: {tam.boletas} ({time.perf_counter() - t0:.1f}s)")
+
+        # ---- órdenes de compra: la mitad pendientes (para cancelar / recepcionar) ----
+        ocs, lineas, pendientes = [], [], []
+        for o in range(tam.ordenes):
+            oid = _uuid(rnd, inicio)
+            estado = "pendiente" if o % 2 == 0 else "cerrada"
+            ocs.append({
+                "id_ordenes_com": oid, "folio_orden": f"OC-{o:07d}",
+                "fecha_llegada_orden": (inicio + timedelta(days=rnd.randrange(tam.dias))).date(),
+                "estado_orden": estado, "updated_at": inicio, "version": 1,
+            })
+            if estado == "pendiente":
+                pendientes.append(oid)
+            for _ in range(rnd.randint(1, 10)):
+                i = rnd.randrange(tam.productos)
+                lineas.append({
+                    "id_detalle_orden": _uuid(rnd, inicio), "orden_id": oid,
+                    "codigo_producto": codigo_producto(i), "cant_enorden": rnd.randint(1, 50),
+                    "precio_unitario_orden": rnd.randint(200, 20000),
+                    "descripcion_enorden": f"Producto sintético {i}",
+                    "updated_at": inicio, "version": 1,
+                })
+            if len(lineas) >= BLOQUE:
+                _volcar(s, OrdenCompra.__table__, ocs)
+                _volcar(s, DetalleOrden.__table__, lineas)
+        _volcar(s, OrdenCompra.__table__, ocs)
+        _volcar(s, DetalleOrden.__table__, lineas)
+        log(f"  órdenes: {tam.ordenes} ({time.perf_counter() - t0:.1f}s)")
+
+    return {"tamano": tam, "ordenes_pendientes": pendientes, "desde": inicio, "hasta": ahora}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("salida")
+    ap.add_argument("--productos", type=int, default=10_000)
+    ap.add_argument("--semilla", type=int, default=1)
+    args = ap.parse_args(argv)
+    engine = make_engine(args.salida)
+    generar(engine, Tamano.desde_escala(args.productos), args.semilla)
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
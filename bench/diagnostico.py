@@ -0,0 +1,104 @@
+# bench/diagnostico.py
+"""
+Sobrecosto de la instrumentación SQL (app/core/diagnostico).
+
+    python -m bench.diagnostico [--n 3000] [--rondas 7]
+
+Mide el escaneo típico de la caja (get_producto_por_codigo en su propia sesión,
+dentro de accion("ventas.escanear")) con y sin instalar(), alternando rondas.
+
+La diferencia de extremo a extremo queda dentro del ruido del equipo, así que
+el criterio (--max-pct, 2% por defecto) usa el costo directo: los ganchos de la
+instrumentación ejecutados en aislamiento, tantas veces como consultas hace un
+escaneo, sobre el tiempo de un escaneo sin instrumentar.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+from app.core import diagnostico
+from app.core.db_local import make_engine
+from app.core.diagnostico import accion
+from app.core.models import Base, Producto
+from app.core.repositories import get_producto_por_codigo
+
+
+def _ronda(Session, codigos, n, rnd) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        with accion("ventas.escanear"), Session() as s:
+            get_producto_por_codigo(s, rnd.choice(codigos))
+    return time.perf_counter() - t0
+
+
+class _Ctx:
+    """Stand-in del ExecutionContext de SQLAlchemy (sólo recibe el atributo de tiempo)."""
+
+
+def _costo_directo(diag, consultas_por_escaneo: float, n: int = 200_000) -> float:
+    """µs que agregan accion() + before/after_cursor_execute a un escaneo."""
+    ctx = _Ctx()
+    reps = max(1, round(consultas_por_escaneo))
+    t0 = time.perf_counter()
+    for _ in range(n):
+        with accion("bench"):
+            for _ in range(reps):
+                diag._antes(None, None, "SELECT 1", (), ctx, False)
+                diag._despues(None, None, "SELECT 1", (), ctx, False)
+    return 1e6 * (time.perf_counter() - t0) / n
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--n", type=int, default=3000)
+    ap.add_argument("--rondas", type=int, default=10)
+    ap.add_argument("--max-pct", type=float, default=2.0)
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(os.path.join(tmp, "bench.db"))
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+        codigos = [f"P-{i:05d}" for i in range(5000)]
+        with Session() as s, s.begin():
+            s.add_all(Producto(codigo=c, descripcion=c, existencias=10, precio_venta=990) for c in codigos)
+
+        rnd = random.Random(1)
+        _ronda(Session, codigos, args.n // 3, rnd)            # calentar
+        sin, con = [], []
+        consultas = 0.0
+        for i in range(args.rondas):
+            # alterna el orden para que el calentamiento/GC no favorezca a ninguno
+            for instrumentado in ((False, True) if i % 2 == 0 else (True, False)):
+                if instrumentado:
+                    diag = diagnostico.instalar(engine, log_path=os.path.join(tmp, "diag.jsonl"))
+                    con.append(_ronda(Session, codigos, args.n, rnd))
+                    consultas = diag.resumen()[0].consultas_por_llamada
+                    diagnostico.desinstalar()
+                else:
+                    sin.append(_ronda(Session, codigos, args.n, rnd))
+        engine.dispose()
+
+    diag = diagnostico.instalar(engine, log_path=None)
+    directo = _costo_directo(diag, consultas)
+    diagnostico.desinstalar()
+
+    m_sin, m_con = min(sin), min(con)     # el mínimo es lo menos afectado por ruido del equipo
+    us_sin = 1e6 * m_sin / args.n
+    pct = 100.0 * directo / us_sin
+    print(f"sin instrumentación: {us_sin:8.1f} µs/escaneo")
+    print(f"con instrumentación: {1e6 * m_con / args.n:8.1f} µs/escaneo  "
+          f"({100.0 * (m_con - m_sin) / m_sin:+.2f}%, extremo a extremo)")
+    print(f"costo directo:       {directo:8.2f} µs/escaneo ({consultas:g} consultas)  → {pct:.2f}%")
+    if pct > args.max_pct:
+        raise SystemExit(f"FALLA: sobrecosto {pct:.2f}% > {args.max_pct}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# bench/eventos.py
+"""
+Navegación entre páginas con y sin el bus de cambios (app/core/eventos).
+
+    python -m bench.eventos [--productos 50000] [--ordenes 500] [--navegaciones 300] [--venta-cada 10]
+
+Sin Qt: las "páginas" son las consultas que hacen al entrar pro_catalogo_page
+(productos vivos por código, por el ORM) y com_lis_page (cabeceras + detalles por
+orden, con text()). Se recorre una secuencia de --navegaciones entradas alternando
+catálogo / compras, con una venta (crear_boleta_con_detalles) cada --venta-cada:
+  antes     cada entrada recarga
+  bus       Interes.si_cambio(): recarga sólo si sus tablas cambiaron
+Y comprueba:
+  - una venta publica productos/boletas y NO ordenes_compra; un rollback no publica
+  - un UPDATE con text() publica su tabla
+  - un commit desde otro proceso se detecta por PRAGMA data_version (TODAS)
+  - los commits locales no se toman por externos
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db_local import make_engine
+from app.core.eventos import TODAS, Bus, Interes
+from app.core.models import Producto
+from app.core.repositories import crear_boleta_con_detalles
+from bench.dataset import Tamano, codigo_producto, generar
+
+_CABECERAS = text("""
+    SELECT id_ordenes_com, folio_orden, fecha_llegada_orden, estado_orden
+    FROM ordenes_compra ORDER BY fecha_llegada_orden DESC, folio_orden ASC
+""")
+_DETALLES = text("""
+    SELECT id_detalle_orden, codigo_producto, cant_enorden, precio_unitario_orden, descripcion_enorden
+    FROM detalles_orden WHERE orden_id = :oid ORDER BY rowid ASC
+""")
+
+
+def _catalogo(Session):
+    with Session() as s:
+        return len(s.execute(select(Producto).where(Producto.deleted_at.is_(None))
+                             .order_by(Producto.codigo.asc())).scalars().all())
+
+
+def _compras(Session):
+    with Session() as s:
+        n = 0
+        for (oid, *_r) in s.execute(_CABECERAS).fetchall():
+            n += len(s.execute(_DETALLES, {"oid": oid}).fetchall())
+        return n
+
+
+def _navegar(Session, paginas, n: int, venta_cada: int, rnd, productos: int) -> tuple[float, int]:
+    """Devuelve (segundos en entrar a páginas, recargas); las ventas no se cuentan en el tiempo."""
+    seg, recargas = 0.0, 0
+    for i in range(n):
+        if venta_cada and i % venta_cada == venta_cada - 1:
+            with Session() as s, s.begin():
+                crear_boleta_con_detalles(s, [{"codigo": codigo_producto(rnd.randrange(productos)), "descripcion": "x",
+                                               "precio_unit": 990, "cantidad": 1}])
+        entrar = paginas[i % len(paginas)]
+        t0 = time.perf_counter()
+        recargas += entrar()
+        seg += time.perf_counter() - t0
+    return seg, recargas
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--productos", type=int, default=50_000)
+    ap.add_argument("--ordenes", type=int, default=500)
+    ap.add_argument("--navegaciones", type=int, default=300)
+    ap.add_argument("--venta-cada", type=int, default=10)
+    ap.add_argument("--semilla", type=int, default=1)
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "mi_app.db")
+        eng = make_engine(ruta)
+        generar(eng, Tamano(args.productos, 0, args.ordenes, 30), args.semilla, log=lambda m: None)
+        with eng.begin() as c:
+            c.execute(Producto.__table__.update().values(existencias=1_000_000))
+        Session = sessionmaker(bind=eng, autoflush=False)
+        bus = Bus()
+        bus.instalar(eng)
+        try:
+            # ---- antes: cada entrada recarga ----
+            antes = [lambda: (_catalogo(Session), 1)[1], lambda: (_compras(Session), 1)[1]]
+            seg_antes, rec_antes = _navegar(Session, antes, args.navegaciones, args.venta_cada,
+                                            random.Random(args.semilla), args.productos)
+
+            # ---- bus: recarga sólo si cambió ----
+            cat, com = Interes(["productos"], bus), Interes(["ordenes_compra", "detalles_orden"], bus)
+            con_bus = [lambda: cat.si_cambio(lambda: _catalogo(Session)),
+                       lambda: com.si_cambio(lambda: _compras(Session))]
+            seg_bus, rec_bus = _navegar(Session, con_bus, args.navegaciones, args.venta_cada,
+                                        random.Random(args.semilla), args.productos)
+            t0 = time.perf_counter()
+            for _ in range(10_000):
+                cat.si_cambio(lambda: None)
+            us_limpio = (time.perf_counter() - t0) / 10_000 * 1e6
+
+            # ---- qué se publica ----
+            vistos = []
+            quitar = bus.suscribir(["productos", "boletas", "ordenes_compra", "movimientos_stock"], vistos.append)
+            bus.revisar()
+            with Session() as s, s.begin():
+                crear_boleta_con_detalles(s, [{"codigo": codigo_producto(0), "descripcion": "x",
+                                               "precio_unit": 990, "cantidad": 1}])
+            venta = set(vistos[-1]) if vistos else set()
+            ok_local = not bus.revisar()
+            n = len(vistos)
+            try:
+                with Session() as s, s.begin():
+                    crear_boleta_con_detalles(s, [{"codigo": codigo_producto(1), "descripcion": "x",
+                                                   "precio_unit": 990, "cantidad": 10**9}])
+            except ValueError:
+                pass
+            ok_rollback = len(vistos) == n
+            with Session() as s, s.begin():
+                s.execute(text("UPDATE ordenes_compra SET estado_orden = 'cerrado' WHERE rowid = 1"))
+            ok_text = bool(vistos) and "ordenes_compra" in vistos[-1]
+            quitar()
+
+            com.si_cambio(lambda: None)
+            sin_cambio = not com.cambio()
+            subprocess.run([sys.executable, "-c",
+                            "import sqlite3, sys; c = sqlite3.connect(sys.argv[1]); "
+                            "c.execute(\"UPDATE ordenes_compra SET estado_orden = 'externo' WHERE rowid = 2\"); "
+                            "c.commit()", ruta], check=True)
+            ok_externo = sin_cambio and com.cambio() and bus.externos == 1
+        finally:
+            bus.desinstalar()
+            eng.dispose()
+
+    print(f"{args.productos:,} productos, {args.ordenes} órdenes; {args.navegaciones} entradas "
+          f"catálogo/compras, una venta cada {args.venta_cada}")
+    print(f"\n{'':10} {'recargas':>9} {'seg':>8} {'ms/entrada':>11}")
+    for nombre, rec, seg in (("antes", rec_antes, seg_antes), ("bus", rec_bus, seg_bus)):
+        print(f"  {nombre:8} {rec:>9} {seg:>8.2f} {seg / args.navegaciones * 1000:>11.2f}")
+    print(f"  aceleración {seg_antes / seg_bus:.1f}x; entrar sin cambios: {us_limpio:.1f} µs (PRAGMA data_version + versión)")
+    print(f"\nuna venta publicó: {sorted(venta)}")
+    checks = {"venta publica productos y boletas, no ordenes_compra":
+                  {"productos", "boletas"} <= venta and "ordenes_compra" not in venta,
+              "rollback no publica": ok_rollback,
+              "UPDATE con text() publica su tabla": ok_text,
+              "commit local no se toma por externo": ok_local,
+              "commit de otro proceso: data_version lo detecta": ok_externo,
+              "compras no recarga por ventas": rec_bus < rec_antes and TODAS not in venta}
+    for k, v in checks.items():
+        print(f"  {'ok ' if v else 'MAL'} {k}")
+    if not all(checks.values()):
+        raise SystemExit("FALLA")
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# bench/existencias.py
+"""
+Ingresos de stock concurrentes con ventas.
+
+    python -m bench.existencias [--segundos 5] [--vendedores 2] [--ajustadores 2]
+
+Compara el camino antiguo (leer Producto + update_producto con el valor absoluto)
+contra ajustar_existencias (UPDATE existencias = existencias + :d RETURNING),
+con hilos vendiendo en paralelo vía crear_boleta_con_detalles. Reporta ops/s,
+errores (database is locked / snapshot obsoleto) y verifica el invariante:
+    stock_final == stock_inicial + ingresos_confirmados - ventas_confirmadas
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from sqlalchemy import select, func
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db_local import make_engine
+from app.core.models import Base, Producto
+from app.core.repositories import (
+    get_producto_por_codigo, update_producto,
+    ajustar_existencias, crear_boleta_con_detalles,
+)
+
+STOCK_INICIAL = 1_000_000
+
+
+def _ingreso_rmw(s, codigo, qty):
+    p = get_producto_por_codigo(s, codigo)
+    update_producto(s, codigo, existencias=int(p.existencias or 0) + qty)
+
+
+def _ingreso_atomico(s, codigo, qty):
+    ajustar_existencias(s, codigo, qty, "ingreso")
+
+
+def _run(Session, codigos, modo, segundos, n_vend, n_ajus):
+    ingreso = _ingreso_atomico if modo == "atomico" else _ingreso_rmw
+    stop = time.perf_counter() + segundos
+    lock = threading.Lock()
+    tot = {"ventas": 0, "ingresos": 0, "vendido": 0, "ingresado": 0, "err_venta": 0, "err_ingreso": 0}
+
+    def vendedor(seed):
+        rnd = random.Random(seed)
+        while time.perf_counter() < stop:
+            cod, cant = rnd.choice(codigos), rnd.randint(1, 3)
+            try:
+                with Session() as s, s.begin():
+                    crear_boleta_con_detalles(s, [{"codigo": cod, "descripcion": cod,
+                                                   "precio_unit": 100, "cantidad": cant}])
+            except Exception:
+                with lock: tot["err_venta"] += 1
+                continue
+            with lock:
+                tot["ventas"] += 1; tot["vendido"] += cant
+
+    def ajustador(seed):
+        rnd = random.Random(seed)
+        while time.perf_counter() < stop:
+            cod, qty = rnd.choice(codigos), rnd.randint(1, 10)
+            try:
+                with Session() as s, s.begin():
+                    ingreso(s, cod, qty)
+            except Exception:
+                with lock: tot["err_ingreso"] += 1
+                continue
+            with lock:
+                tot["ingresos"] += 1; tot["ingresado"] += qty
+
+    hilos = [threading.Thread(target=vendedor, args=(i,)) for i in range(n_vend)]
+    hilos += [threading.Thread(target=ajustador, args=(100 + i,)) for i in range(n_ajus)]
+    t0 = time.perf_counter()
+    for h in hilos: h.start()
+    for h in hilos: h.join()
+    dt = time.perf_counter() - t0
+
+    with Session() as s:
+        final = s.execute(select(func.sum(Producto.existencias))).scalar_one()
+    esperado = STOCK_INICIAL * len(codigos) + tot["ingresado"] - tot["vendido"]
+    print(f"[{modo:8}] ingresos {tot['ingresos'] / dt:8.0f}/s | ventas {tot['ventas'] / dt:8.0f}/s | "
+          f"errores ingreso/venta {tot['err_ingreso']:5d}/{tot['err_venta']:5d} | invariante {'OK' if final == esperado else f'ROTO ({final - esperado:+d})'}")
+    return final == esperado
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--segundos", type=float, default=5)
+    ap.add_argument("--vendedores", type=int, default=2)
+    ap.add_argument("--ajustadores", type=int, default=2)
+    ap.add_argument("--productos", type=int, default=20)
+    args = ap.parse_args(argv)
+
+    ok = True
+    for modo in ("rmw", "atomico"):
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = make_engine(os.path.join(tmp, "bench.db"))
+            Base.metadata.create_all(bind=engine)
+            Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+            codigos = [f"P-{i:04d}" for i in range(args.productos)]
+            with Session() as s, s.begin():
+                s.add_all(Producto(codigo=c, descripcion=c, existencias=STOCK_INICIAL) for c in codigos)
+            ok &= _run(Session, codigos, modo, args.segundos, args.vendedores, args.ajustadores)
+            engine.dispose()
+    if not ok:
+        raise SystemExit("FALLA: invariante de stock roto")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# bench/ids.py
+"""
+Formatos de clave para boleta_detalles: inserción, tamaño y consultas.
+
+    python -m bench.ids [--filas 1000000] [--lote 1000] [--formatos uuid4,uuid7,bin16]
+    python -m bench.ids --filas 10000000          # escala objetivo (~10-15 min, varios GB en /tmp)
+
+Con el mismo DDL que boleta_detalles (PK + índice por boleta_id) y los PRAGMA
+de la app (WAL, synchronous=NORMAL, caché por defecto), compara:
+  uuid4  texto 36 chars, aleatorio (formato anterior)
+  uuid7  texto 36 chars, ordenado por tiempo
+  bin16  BLOB 16 bytes, ordenado por tiempo, WITHOUT ROWID (ID_FORMATO="bin16")
+Informa filas/s (global y del último 10%: con claves aleatorias cae a medida que
+el índice deja de caber en caché), tamaño del archivo, "últimas 100 líneas" y
+búsqueda puntual por id.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import uuid
+
+from app.core.ids import uuid7
+
+DDL = """
+CREATE TABLE boleta_detalles (
+    id {tipo} NOT NULL,
+    boleta_id {tipo} NOT NULL,
+    codigo_producto VARCHAR NOT NULL,
+    descripcion VARCHAR NOT NULL,
+    precio_unitario INTEGER NOT NULL,
+    cantidad INTEGER NOT NULL,
+    subtotal INTEGER NOT NULL,
+    PRIMARY KEY (id)
+){extra};
+CREATE INDEX ix_boleta_detalles_boleta_id ON boleta_detalles (boleta_id);
+"""
+
+FORMATOS = {
+    # nombre: (tipo, extra DDL, generador, "recientes" SQL)
+    "uuid4": ("VARCHAR(36)", "", lambda: str(uuid.uuid4()),
+              "SELECT id FROM boleta_detalles ORDER BY rowid DESC LIMIT 100"),
+    "uuid7": ("VARCHAR(36)", "", lambda: str(uuid7()),
+              "SELECT id FROM boleta_detalles ORDER BY id DESC LIMIT 100"),
+    "bin16": ("BLOB", " WITHOUT ROWID", lambda: uuid7().bytes,
+              "SELECT id FROM boleta_detalles ORDER BY id DESC LIMIT 100"),
+}
+
+
+def _conectar(path):
+    con = sqlite3.connect(path, isolation_level=None)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    return con
+
+
+def _tam_mb(path) -> float:
+    return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p)) / 2**20
+
+
+def _medir(nombre: str, path: str, filas: int, lote: int, semilla: int) -> dict:
+    tipo, extra, gen, sql_recientes = FORMATOS[nombre]
+    rnd = random.Random(semilla)
+    con = _conectar(path)
+    con.executescript(DDL.format(tipo=tipo, extra=extra))
+
+    sql = "INSERT INTO boleta_detalles VALUES (?,?,?,?,?,?,?)"
+    muestras = []
+    cola = max(lote, filas // 10)
+    t0 = time.perf_counter()
+    t_cola = None
+    hechas = 0
+    while hechas < filas:
+        n = min(lote, filas - hechas)
+        buf = []
+        while len(buf) < n:
+            bid = gen()
+            for _ in range(min(rnd.randint(1, 5), n - len(buf))):    # 1-5 líneas por boleta
+                cant, pu = rnd.randint(1, 4), rnd.randint(300, 25000)
+                i = rnd.randrange(10_000)
+                buf.append((gen(), bid, f"P-{i:07d}", f"Producto {i}", pu, cant, cant * pu))
+        if t_cola is None and hechas >= filas - cola:
+            t_cola = time.perf_counter()
+            h_cola = hechas
+        con.execute("BEGIN")
+        con.executemany(sql, buf)
+        con.execute("COMMIT")
+        hechas += n
+        if rnd.random() < 0.01:
+            muestras.append(buf[0][0])
+    seg = time.perf_counter() - t0
+    seg_cola = time.perf_counter() - t_cola
+    con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def _ms(q, params=(), rep=200):
+        t = time.perf_counter()
+        for _ in range(rep):
+            con.execute(q, params).fetchall()
+        return 1000 * (time.perf_counter() - t) / rep
+
+    recientes = _ms(sql_recientes)
+    t = time.perf_counter()
+    for k in muestras[:500]:
+        con.execute("SELECT * FROM boleta_detalles WHERE id = ?", (k,)).fetchone()
+    puntual = 1000 * (time.perf_counter() - t) / max(1, len(muestras[:500]))
+    con.close()
+    return {
+        "formato": nombre,
+        "filas_s": filas / seg,
+        "filas_s_cola": (filas - h_cola) / seg_cola,
+        "mb": _tam_mb(path),
+        "recientes_ms": recientes,
+        "puntual_ms": puntual,
+        "seg": seg,
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--filas", type=int, default=1_000_000)
+    ap.add_argument("--lote", type=int, default=1000, help="filas por transacción")
+    ap.add_argument("--formatos", default=",".join(FORMATOS))
+    ap.add_argument("--semilla", type=int, default=1)
+    ap.add_argument("--dir", help="carpeta para las BD (por defecto un temporal)")
+    args = ap.parse_args(argv)
+
+    formatos = [f.strip() for f in args.formatos.split(",") if f.strip()]
+    desconocidos = set(formatos) - set(FORMATOS)
+    if desconocidos:
+        raise SystemExit(f"Formatos desconocidos: {', '.join(sorted(desconocidos))}")
+
+    res = []
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        for f in formatos:
+            r = _medir(f, os.path.join(tmp, f"{f}.db"), args.filas, args.lote, args.semilla)
+            print(f"  {f}: {r['seg']:.1f}s")
+            res.append(r)
+            os.remove(os.path.join(tmp, f"{f}.db"))
+
+    print(f"\n{args.filas:,} líneas de boleta, {args.lote} por transacción")
+    print(f"{'formato':8} {'filas/s':>10} {'último 10%':>11} {'MB':>9} {'recientes ms':>13} {'por id ms':>10}")
+    for r in res:
+        print(f"{r['formato']:8} {r['filas_s']:>10,.0f} {r['filas_s_cola']:>11,.0f} {r['mb']:>9.1f} "
+              f"{r['recientes_ms']:>13.3f} {r['puntual_ms']:>10.3f}")
+    base = next((r for r in res if r["formato"] == "uuid4"), None)
+    if base:
+        for r in res:
+            if r is not base:
+                print(f"{r['formato']} vs uuid4: inserción x{r['filas_s'] / base['filas_s']:.2f}, "
+                      f"tamaño {100 * (r['mb'] / base['mb'] - 1):+.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# bench/importacion.py
+"""
+Importación/exportación masiva del catálogo.
+
+    python -m bench.importacion [--filas 100000] [--lote 5000]
+
+Genera un CSV de proveedor sintético, lo importa dos veces (inserción y luego
+upsert sobre productos existentes) y exporta el catálogo completo.
+Objetivo: 100k filas en menos de OBJETIVO_SEG segundos.
+
+Comprueba además que un archivo parcial (codigo;descripcion;costo) sobre un
+producto existente cambia sólo el costo: precio_venta, impuesto, mínimo y máximo
+quedan como estaban; que con la columna ganancia sí se recalcula precio_venta; y
+que el stock de los productos nuevos entra al ledger una sola vez (el upsert no
+lo toca).
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import tempfile
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db_local import make_engine
+from app.core.models import Base, MovimientoStock, Producto
+from app.core.importacion import importar_productos, exportar_productos
+
+OBJETIVO_SEG = 10.0
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--filas", type=int, default=100_000)
+    ap.add_argument("--lote", type=int, default=5000)
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(os.path.join(tmp, "bench.db"))
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+        src = os.path.join(tmp, "proveedor.csv")
+        with open(src, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f, delimiter=";")
+            w.writerow(["Código", "Descripción", "Costo", "Ganancia", "IVA", "Stock", "Mínimo", "Máximo"])
+            for i in range(args.filas):
+                w.writerow([f"SKU-{i:07d}", f"Producto {i}", 100 + i % 9000, 30, 19, i % 40, 5, 60])
+
+        peor = 0.0
+        for fase in ("inserción", "upsert"):
+            res = importar_productos(src, Session, lote=args.lote)
+            peor = max(peor, res.segundos)
+            print(f"{fase:10}: {res.resumen()} → {res.leidas / res.segundos:,.0f} filas/s")
+
+        with Session() as s:
+            en_ledger = s.execute(select(func.sum(MovimientoStock.delta))
+                                  .where(MovimientoStock.referencia == "importación")).scalar()
+            stock = s.execute(select(func.sum(Producto.existencias))).scalar()
+
+        t0 = time.perf_counter()
+        n = exportar_productos(os.path.join(tmp, "catalogo.csv"), Session)
+        dt = time.perf_counter() - t0
+        print(f"{'export':10}: {n} filas en {dt:.2f}s → {n / dt:,.0f} filas/s")
+
+        # ---- archivo parcial sobre un producto existente ----
+        with Session() as s, s.begin():
+            s.add(Producto(codigo="A1", descripcion="Leche", precio_costo=800, precio_venta=1290,
+                           porcentaje_impuesto=19, existencias=10, inv_minimo=5, inv_maximo=50))
+        parcial = os.path.join(tmp, "parcial.csv")
+        with open(parcial, "w", newline="", encoding="utf-8") as f:
+            f.write("codigo;descripcion;costo\nA1;Leche entera;850\n")
+        importar_productos(parcial, Session)
+        with Session() as s:
+            p = s.get(Producto, "A1")
+            solo_costo = (p.descripcion, p.precio_costo, p.precio_venta, p.porcentaje_impuesto,
+                          p.inv_minimo, p.inv_maximo, p.existencias) == ("Leche entera", 850, 1290, 19, 5, 50, 10)
+        with open(parcial, "w", newline="", encoding="utf-8") as f:
+            f.write("codigo;descripcion;ganancia\nA1;Leche entera;30\n")
+        importar_productos(parcial, Session)
+        with Session() as s:
+            p = s.get(Producto, "A1")
+            con_margen = (p.precio_costo, p.precio_venta, p.inv_minimo) == (850, round(850 * 1.3 * 1.19), 5)
+        engine.dispose()
+
+    checks = {"archivo sin pv/margen/mín/máx: sólo cambia el costo": solo_costo,
+              "archivo con ganancia: precio_venta desde el costo actual": con_margen,
+              "stock de los nuevos en el ledger, una vez": en_ledger == stock}
+    for k, v in checks.items():
+        print(f"  {'ok ' if v else 'MAL'} {k}")
+    if not all(checks.values()):
+        raise SystemExit("FALLA")
+    if peor > OBJETIVO_SEG * args.filas / 100_000:
+        raise SystemExit(f"FALLA: importación tardó {peor:.1f}s")
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
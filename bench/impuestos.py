@@ -0,0 +1,130 @@
+# bench/impuestos.py
+"""
+Motor de impuestos del carrito (app/core/impuestos.py): propiedad + costo por escaneo.
+
+    python -m bench.impuestos [--casos 2000] [--operaciones 60] [--lineas 300]
+
+Propiedad: --casos carritos al azar, cada uno con --operaciones cambios (agregar,
+fijar, quitar parcial/total, vaciar) sobre códigos con tasas 19 / 0 (exento) / 10
+y precios que caen en medios pesos. Tras cada cambio, totales() del motor
+incremental tiene que ser igual a MotorImpuestos.recalcular() sobre las líneas
+vivas, en las cuatro combinaciones de incluye_iva × redondeo ("linea"/"documento").
+También: total = neto + iva + exento, y con IVA incluido total = suma de importes.
+
+Costo: un carrito de --lineas líneas al que se le escanea una vez más; se compara
+totales() contra recalcular el carrito completo (lo que hacía _recalc en cada repintado).
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from app.core.impuestos import MotorImpuestos, REDONDEOS
+
+TASAS = (19, 19, 19, 0, 10)
+
+
+def _caso(rnd: random.Random, operaciones: int, incluye_iva: bool, redondeo: str) -> str | None:
+    """None si el motor coincide con el recálculo en cada paso; si no, la descripción del primer error."""
+    mot = MotorImpuestos(incluye_iva=incluye_iva, redondeo=redondeo)
+    lineas: dict[str, list] = {}            # espejo simple: codigo → [punit, cant, tasa]
+    for paso in range(operaciones):
+        cod = f"P{rnd.randrange(12)}"
+        op = rnd.random()
+        if op < 0.5:
+            punit, cant, tasa = rnd.choice((119, 238, 595, 990, 1, 5, rnd.randrange(1, 20_000))), rnd.randint(1, 7), rnd.choice(TASAS)
+            mot.agregar(cod, punit, cant, tasa)
+            if cod in lineas:
+                lineas[cod][1] += cant
+            else:
+                lineas[cod] = [punit, cant, tasa]
+        elif op < 0.7:
+            punit, cant, tasa = rnd.randrange(1, 20_000), rnd.randint(0, 5), rnd.choice(TASAS)
+            mot.fijar(cod, punit, cant, tasa)
+            if cant:
+                lineas[cod] = [punit, cant, tasa]
+            else:
+                lineas.pop(cod, None)
+        elif op < 0.95:
+            cant = rnd.choice((None, 1, 2, 10))
+            mot.quitar(cod, cant)
+            l = lineas.get(cod)
+            if l is not None:
+                if cant is None or cant >= l[1]:
+                    del lineas[cod]
+                else:
+                    l[1] -= cant
+        else:
+            mot.vaciar()
+            lineas.clear()
+        got = mot.totales()
+        ref = MotorImpuestos.recalcular(lineas.values(), incluye_iva=incluye_iva, redondeo=redondeo)
+        importes = sum(p * c for p, c, _t in lineas.values())
+        if got != ref:
+            return f"paso {paso}: {got} != {ref}"
+        if got.total != got.neto + got.iva + got.exento or mot.bruto != importes:
+            return f"paso {paso}: totales inconsistentes {got}"
+        if incluye_iva and got.total != importes:
+            return f"paso {paso}: con IVA incluido total {got.total} != {importes}"
+    return None
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--casos", type=int, default=2_000)
+    ap.add_argument("--operaciones", type=int, default=60)
+    ap.add_argument("--lineas", type=int, default=300)
+    ap.add_argument("--semilla", type=int, default=1)
+    args = ap.parse_args(argv)
+
+    rnd = random.Random(args.semilla)
+    fallas = {}
+    for incluye_iva in (True, False):
+        for redondeo in REDONDEOS:
+            errores = [e for e in (_caso(rnd, args.operaciones, incluye_iva, redondeo) for _ in range(args.casos)) if e]
+            fallas[(incluye_iva, redondeo)] = errores
+
+    # ---- costo por escaneo ----
+    mot = MotorImpuestos()
+    lineas = []
+    for i in range(args.lineas):
+        punit, cant, tasa = rnd.randrange(1, 20_000), rnd.randint(1, 5), rnd.choice(TASAS)
+        mot.fijar(f"P{i}", punit, cant, tasa)
+        lineas.append((punit, cant, tasa))
+    n = 2_000
+    t0 = time.perf_counter()
+    for k in range(n):
+        mot.agregar("P0", 0, 1, 19)
+        mot.totales()
+    us_inc = (time.perf_counter() - t0) / n * 1e6
+    t0 = time.perf_counter()
+    for k in range(n):
+        MotorImpuestos.recalcular(lineas)
+    us_full = (time.perf_counter() - t0) / n * 1e6
+
+    ej = MotorImpuestos()
+    ej.fijar("7801", 990, 2, 19)
+    ej.fijar("PAN", 1500, 1, 0)
+    ejemplo = ej.totales()
+
+    print(f"{args.casos} carritos × {args.operaciones} cambios por combinación")
+    for (incluye_iva, redondeo), errores in fallas.items():
+        print(f"  incluye_iva={incluye_iva!s:5} redondeo={redondeo:9} errores: {len(errores)}"
+              + (f"  (p.ej. {errores[0]})" if errores else ""))
+    print(f"\ncarrito de {args.lineas} líneas, por escaneo: incremental {us_inc:.1f} µs, "
+          f"recálculo completo {us_full:.1f} µs ({us_full / us_inc:.0f}x)")
+    print(f"ejemplo 2×990 (19%) + 1500 exento: {ejemplo}")
+    checks = {"incremental = recálculo completo en cada paso": not any(fallas.values()),
+              "ejemplo: neto 1664, IVA 316, exento 1500, total 3480":
+                  ejemplo[:4] == (1664, 316, 1500, 3480),
+              "incremental no depende del largo del carrito": us_inc < us_full}
+    for k, v in checks.items():
+        print(f"  {'ok ' if v else 'MAL'} {k}")
+    if not all(checks.values()):
+        raise SystemExit("FALLA")
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+# bench/mantenimiento.py
+"""
+Mantenimiento programado (app/core/mantenimiento): espacio recuperado, estadísticas y efecto en la caja.
+
+    python -m bench.mantenimiento [--productos 20000] [--boletas 100000] [--outbox 200000] [--borrados 0.25]
+
+Sobre una tienda sintética (bench.dataset) agrega basura de meses:
+  - --outbox filas de outbox enviadas hace 60 días (+ 500 pendientes de hoy)
+  - --borrados de los productos con deleted_at de hace 60 días; a 200 de ellos les
+    deja mercadería en tránsito (no se deben purgar)
+  - un código alterno por cada borrado y por 1000 vivos (los de los purgados se
+    van con ellos; ninguno queda huérfano)
+Antes comprueba que sin marca de subida de productos (SyncState "productos:push")
+no se purga ningún tombstone, ni con una marca anterior a los borrados; después
+deja la marca en ahora (todo subido).
+Luego corre pasadas de correr() con la configuración de la app hasta terminar,
+mientras la caja vende (crear_boleta_con_detalles cada --pausa segundos): cada
+pasada cede apenas la caja escribe y la siguiente sigue desde ahí. Mide:
+  - p50/p99/máx de la caja con y sin mantenimiento (el máx acota lo que una venta esperó)
+  - tiempo por tarea (suma de las pasadas y la más larga) vs MANT_LIMITE_S
+  - filas purgadas, MB devueltos por incremental_vacuum y tablas con estadísticas
+Falla si se purga algo que no correspondía.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import sessionmaker
+
+from app.core import mantenimiento
+from app.core.config import MANT_LIMITE_S
+from app.core.db_local import make_engine
+from app.core.ids import gen_id
+from app.core.models import CodigoAlterno, DetalleOrden, Outbox, Producto, Transito
+from app.core.repositories import crear_boleta_con_detalles
+from bench.dataset import Tamano, generar, codigo_producto
+
+
+def _crear(Session, rnd, codigos):
+    cod = rnd.choice(codigos)
+    with Session() as s, s.begin():
+        crear_boleta_con_detalles(s, [{"codigo": cod, "descripcion": cod, "precio_unit": 990, "cantidad": 1}])
+
+
+def _latencias(Session, rnd, codigos, n=None, mientras=None, pausa=0.0) -> list[float]:
+    out = []
+    while (mientras() if mientras else len(out) < n):
+        t0 = time.perf_counter()
+        _crear(Session, rnd, codigos)
+        out.append(1000 * (time.perf_counter() - t0))
+        time.sleep(pausa)
+    return out
+
+
+def _pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(len(xs) * p / 100))]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--productos", type=int, default=20_000)
+    ap.add_argument("--boletas", type=int, default=100_000)
+    ap.add_argument("--outbox", type=int, default=200_000)
+    ap.add_argument("--borrados", type=float, default=0.25)
+    ap.add_argument("--n", type=int, default=300, help="boletas de la medición base")
+    ap.add_argument("--pausa", type=float, default=0.05, help="segundos entre ventas (0 = caja sin respiro)")
+    ap.add_argument("--semilla", type=int, default=1)
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "mi_app.db")
+        engine = make_engine(db)
+        generar(engine, Tamano(args.productos, args.boletas, 50, 90), args.semilla, log=lambda m: None)
+        rnd = random.Random(args.semilla)
+        hace = datetime.utcnow() - timedelta(days=60)
+        P, T, D, O = Producto.__table__, Transito.__table__, DetalleOrden.__table__, Outbox.__table__
+        A = CodigoAlterno.__table__
+
+        with engine.begin() as c:
+            c.execute(update(P).values(existencias=1_000_000))
+            en_oc = set(c.execute(select(D.c.codigo_producto).distinct()).scalars())
+            borrados = sorted(rnd.sample(range(args.productos), int(args.productos * args.borrados)))
+            borrados = [codigo_producto(i) for i in borrados]
+            c.execute(update(P).where(P.c.codigo.in_(borrados)).values(deleted_at=hace))
+            # tránsito 1:1: inactivo para la mayoría, con mercadería en camino para 200
+            activos = set(borrados[:200])
+            c.execute(insert(T), [{"id_transito": gen_id(), "producto_codigo": cod,
+                                   "mas_existencias": 5 if cod in activos else 0, "new_precio_costo": 0,
+                                   "estado_transito": "pendiente" if cod in activos else "desactivado",
+                                   "updated_at": hace, "version": 1} for cod in borrados])
+            ya = set(borrados)
+            con_alterno = borrados + [c for c in map(codigo_producto, range(args.productos)) if c not in ya][:1000]
+            c.execute(insert(A), [{"codigo_barra": f"ALT-{cod}", "codigo_producto": cod, "unidades": 6,
+                                   "updated_at": hace} for cod in con_alterno])
+            for i in range(0, args.outbox, 50_000):
+                c.execute(insert(O), [{"id": gen_id(), "table": "productos", "op": "update",
+                                       "payload": "{}", "created_at": hace, "sent": True}
+                                      for _ in range(min(50_000, args.outbox - i))])
+            c.execute(insert(O), [{"id": gen_id(), "table": "boletas", "op": "insert", "payload": "{}",
+                                   "created_at": datetime.utcnow(), "sent": False}
+                                  for _ in range(500)])
+        deben_quedar = activos | (set(borrados) & en_oc)
+        vivos = [codigo_producto(i) for i in range(args.productos) if codigo_producto(i) not in set(borrados)]
+        Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+        # tombstones: sólo lo ya subido al servidor
+        sin_marca = mantenimiento.purgar_tombstones(engine)["filas"]
+        mantenimiento._marcar(engine, mantenimiento.CLAVE_PUSH_PRODUCTOS, hace - timedelta(days=1))
+        antes_de_marca = mantenimiento.purgar_tombstones(engine)["filas"]
+        mantenimiento._marcar(engine, mantenimiento.CLAVE_PUSH_PRODUCTOS, datetime.utcnow())
+
+        antes = mantenimiento.espacio(engine)
+        sin_stat = sum(f["filas_stat"] is None for f in mantenimiento.frescura(engine))
+        _latencias(Session, rnd, vivos, n=30)
+        base = _latencias(Session, rnd, vivos, n=args.n, pausa=args.pausa)
+
+        # pasadas de correr() mientras la caja vende: cada una cede apenas la caja hace
+        # commit, y la siguiente sigue desde ahí (peor caso: el hilo vuelve a encontrar ocio enseguida)
+        informe, pasadas = [], []
+
+        def _mantener():
+            while True:
+                r = mantenimiento.correr(engine)
+                pasadas.append(r)
+                if all(t.get("completo") or "error" in t for t in r):
+                    return
+
+        hilo = threading.Thread(target=_mantener)
+        hilo.start()
+        con = _latencias(Session, rnd, vivos, mientras=hilo.is_alive, pausa=args.pausa)
+        hilo.join()
+        for nombre in mantenimiento.TAREAS:
+            hechas = [t for r in pasadas for t in r if t["tarea"] == nombre]
+            suma = {k: sum(t.get(k, 0) for t in hechas) for k in ("seg", "filas", "paginas", "analyze") if k in hechas[0]}
+            informe.append({"tarea": nombre, **suma, "max_ms": round(max(t["seg"] for t in hechas) * 1000),
+                            "completo": hechas[-1].get("completo")})
+        extra = len(pasadas)
+        cedidas = sum(not t.get("completo", True) for r in pasadas for t in r)
+        despues = mantenimiento.espacio(engine)
+        fres = mantenimiento.frescura(engine)
+
+        with engine.connect() as c:
+            quedan_borrados = set(c.execute(select(P.c.codigo).where(P.c.deleted_at.is_not(None))).scalars())
+            quedan_outbox = c.execute(select(func.count()).select_from(O)).scalar_one()
+            huerfanos = c.execute(select(func.count()).select_from(T)
+                                  .where(~T.c.producto_codigo.in_(select(P.c.codigo)))).scalar_one()
+            alt_huerfanos = c.execute(select(func.count()).select_from(A)
+                                      .where(~A.c.codigo_producto.in_(select(P.c.codigo)))).scalar_one()
+            quedan_alternos = c.execute(select(func.count()).select_from(A)).scalar_one()
+        engine.dispose()
+
+    print(f"{'tarea':14} {'ms':>8}  (tope {MANT_LIMITE_S * 1000:.0f} ms por tarea)")
+    for r in informe:
+        extra_r = "  ".join(f"{k}={v}" for k, v in r.items() if k not in ("tarea", "seg", "corte"))
+        print(f"{r['tarea']:14} {r['seg'] * 1000:>8.0f}  {extra_r}")
+    print(f"pasadas de correr() hasta terminar: {extra} (tareas que cedieron a la caja o al tope: {cedidas})")
+    print(f"\ncaja (crear_boleta)      {'n':>5} {'p50 ms':>8} {'p99 ms':>8} {'máx ms':>8}")
+    print(f"  sin mantenimiento      {len(base):>5} {statistics.median(base):>8.2f} {_pct(base, 99):>8.2f} {max(base):>8.2f}")
+    print(f"  con mantenimiento      {len(con):>5} {statistics.median(con):>8.2f} {_pct(con, 99):>8.2f} {max(con):>8.2f}")
+    print(f"\nmi_app.db: {antes['bytes'] / 2**20:.1f} MB ({antes['bytes_libres'] / 2**20:.1f} libres) → "
+          f"{despues['bytes'] / 2**20:.1f} MB ({despues['bytes_libres'] / 2**20:.1f} libres), auto_vacuum={despues['auto_vacuum']}")
+    print(f"tablas sin estadísticas: {sin_stat} → {sum(f['filas_stat'] is None for f in fres)}")
+
+    alt_esperados = 1000 + len(deben_quedar)
+    ok = (quedan_borrados == deben_quedar and quedan_outbox == 500 and huerfanos == 0
+          and sin_marca == 0 and antes_de_marca == 0 and alt_huerfanos == 0 and quedan_alternos == alt_esperados)
+    print(f"tombstones purgados sin marca de subida: {sin_marca}; con la marca antes del borrado: {antes_de_marca}")
+    print(f"tombstones: quedan {len(quedan_borrados)} (esperados {len(deben_quedar)}: en tránsito u OC); "
+          f"outbox: quedan {quedan_outbox} (pendientes); tránsito huérfano: {huerfanos}")
+    print(f"códigos alternos: quedan {quedan_alternos} (esperados {alt_esperados}); huérfanos: {alt_huerfanos}")
+    if not ok:
+        raise SystemExit("FALLA: la purga no dejó lo esperado")
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# bench/motor_precios.py
+"""
+Re-precio masivo (app/core/motor_precios.py): equivalencia con precios.py y política identidad.
+
+    python -m bench.motor_precios [--productos 50000]
+
+Tienda sintética (bench.dataset) con precios de venta al azar (no siempre salen de
+un margen entero). Comprueba:
+  identidad    conservar margen e impuesto, redondeo 1: ningún precio cambia y
+               aplicar() no escribe nada
+  margen fijo  pv_nuevo = calcular_precio_venta() de precios.py, producto a producto
+  por código   un dict de márgenes sólo mueve los códigos que trae
+  impuesto     19 → 0 conservando el margen: pv_nuevo = pv·100/119 (±1 por redondeo)
+y mide calcular() sobre todo el catálogo.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db_local import make_engine
+from app.core.models import Producto
+from app.core.motor_precios import PoliticaPrecio, aplicar, calcular, cargar_columnas
+from app.ui.a_py.precios import calcular_precio_venta
+from bench.dataset import Tamano, generar
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--productos", type=int, default=50_000)
+    ap.add_argument("--semilla", type=int, default=1)
+    args = ap.parse_args(argv)
+    rnd = random.Random(args.semilla)
+    checks = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        eng = make_engine(os.path.join(tmp, "precios.db"))
+        generar(eng, Tamano(args.productos, 0, 0, 30), args.semilla, log=lambda m: None)
+        Session = sessionmaker(bind=eng, autoflush=False)
+        with Session() as s, s.begin():
+            t = Producto.__table__
+            cods = [c for (c,) in s.execute(t.select().with_only_columns(t.c.codigo))]
+            s.execute(update(t).where(t.c.codigo == bindparam("b_cod")).values(precio_venta=bindparam("b_pv")),
+                      [{"b_cod": c, "b_pv": rnd.randint(100, 40_000)} for c in rnd.sample(cods, len(cods) // 2)])
+            s.execute(update(t).where(t.c.codigo == cods[0]).values(porcentaje_impuesto=0))
+
+        with Session() as s:
+            cols = cargar_columnas(s)
+
+        t0 = time.perf_counter()
+        ident = calcular(cols, PoliticaPrecio())
+        ms = (time.perf_counter() - t0) * 1e3
+        with Session() as s, s.begin():
+            escritos = aplicar(s, ident)
+        checks["identidad: ningún precio cambia y aplicar() no escribe"] = (
+            not ident.cambia.any() and escritos == 0)
+
+        fijo = calcular(cols, PoliticaPrecio(ganancia_pct=35))
+        ref = [calcular_precio_venta(pc, 35, imp) if pc > 0 else pv
+               for pc, pv, imp in zip(cols["precio_costo"], cols["precio_venta"], cols["porcentaje_impuesto"])]
+        checks["margen fijo 35%: igual a precios.calcular_precio_venta"] = np.array_equal(fijo.pv_nuevo, np.array(ref))
+
+        elegidos = set(rnd.sample(list(cols["codigo"]), 100))
+        por_cod = calcular(cols, PoliticaPrecio(ganancia_pct={c: 50 for c in elegidos}))
+        movidos = {str(c) for c, _a, _n, _d, _p in por_cod.filas()}
+        checks["márgenes por código: sólo se mueven esos códigos"] = movidos <= elegidos
+
+        gravados = cols["porcentaje_impuesto"] == 19
+        exento = calcular(cols, PoliticaPrecio(impuesto_pct=0))
+        esperado = cols["precio_venta"] * 100 / 119
+        con_costo = gravados & (cols["precio_costo"] > 0)
+        checks["impuesto 19 → 0 conservando margen: pv·100/119 (±1)"] = bool(
+            np.all(np.abs(exento.pv_nuevo[con_costo] - esperado[con_costo]) <= 1))
+        eng.dispose()
+
+    print(f"{len(cols['codigo']):,} productos; calcular() {ms:.1f} ms")
+    for k, v in checks.items():
+        print(f"  {'ok ' if v else 'MAL'} {k}")
+    if not all(checks.values()):
+        raise SystemExit("FALLA")
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# bench/movimientos.py
+"""
+Throughput del ledger de stock.
+
+    python -m bench.movimientos [--n 5000] [--productos 500]
+
+Mide:
+  - append unitario (1 movimiento por transacción, como inv_agregar/inv_ajustes)
+  - append en lote (crear_boleta_con_detalles / recepcionar_orden_total)
+  - consultas existencias_a_fecha con y sin snapshot
+  - stock escrito por fuera de ajustar_existencias (alta con stock, update_producto
+    con valor absoluto): el ledger lo recoge y el stock de ayer no se mueve
+Objetivo: >= 1000 movimientos/s en append unitario.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db_local import make_engine
+from app.core.models import Base, Producto
+from app.core.repositories import (
+    registrar_movimiento, registrar_movimientos,
+    existencias_a_fecha, crear_snapshots_stock,
+    insert_producto, update_producto,
+)
+
+OBJETIVO_MOV_SEG = 1000
+
+
+def _scratch_session(path: str):
+    engine = make_engine(path)
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--n", type=int, default=5000)
+    ap.add_argument("--productos", type=int, default=500)
+    args = ap.parse_args(argv)
+
+    rnd = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, Session = _scratch_session(os.path.join(tmp, "bench.db"))
+        codigos = [f"P-{i:06d}" for i in range(args.productos)]
+        with Session() as s, s.begin():
+            s.add_all(Producto(codigo=c, descripcion=c, existencias=1000) for c in codigos)
+
+        # 1) append unitario: una transacción por movimiento
+        t0 = time.perf_counter()
+        for _ in range(args.n):
+            with Session() as s, s.begin():
+                registrar_movimiento(s, rnd.choice(codigos), rnd.randint(-3, 5), "ajuste")
+        dt = time.perf_counter() - t0
+        unit_rate = args.n / dt
+        print(f"append unitario : {unit_rate:10.0f} mov/s  ({args.n} en {dt:.2f}s)")
+
+        # 2) append en lote (executemany), repartido en días pasados para los snapshots
+        base = datetime.utcnow() - timedelta(days=30)
+        lote = [
+            {
+                "codigo_producto": rnd.choice(codigos),
+                "delta": rnd.randint(-3, 5),
+                "motivo": "venta",
+                "created_at": base + timedelta(seconds=i * (30 * 86400 // args.n)),
+            }
+            for i in range(args.n)
+        ]
+        t0 = time.perf_counter()
+        with Session() as s, s.begin():
+            registrar_movimientos(s, lote)
+        dt = time.perf_counter() - t0
+        print(f"append en lote  : {args.n / dt:10.0f} mov/s")
+
+        # 3) existencias a fecha: sin snapshot (hacia atrás) vs con snapshot + cola
+        fechas = [(base + timedelta(days=d)).date() for d in range(1, 30)]
+        muestras = [(rnd.choice(codigos), rnd.choice(fechas)) for _ in range(500)]
+        with Session() as s:
+            t0 = time.perf_counter()
+            sin = [existencias_a_fecha(s, c, f) for c, f in muestras]
+            dt_sin = time.perf_counter() - t0
+        with Session() as s, s.begin():
+            t0 = time.perf_counter()
+            n_snap = crear_snapshots_stock(s)
+            print(f"snapshots       : {n_snap} filas en {time.perf_counter() - t0:.2f}s")
+        with Session() as s:
+            t0 = time.perf_counter()
+            con = [existencias_a_fecha(s, c, f) for c, f in muestras]
+            dt_con = time.perf_counter() - t0
+        print(f"stock a fecha   : {dt_sin / len(muestras) * 1e3:.3f} ms (sin snapshot) | "
+              f"{dt_con / len(muestras) * 1e3:.3f} ms (snapshot + cola)")
+        if sin != con:
+            raise SystemExit("ERROR: snapshot + cola no coincide con el cálculo completo")
+
+        # 4) alta con stock y edición con valor absoluto: pasan por el ledger
+        ayer = datetime.utcnow().date() - timedelta(days=1)
+        nuevos = [f"N-{i:04d}" for i in range(50)]
+        with Session() as s, s.begin():
+            for c in nuevos:
+                insert_producto(s, c, c, 100, 40, 0, 0)
+        with Session() as s, s.begin():
+            for c in nuevos:
+                update_producto(s, c, existencias=rnd.randint(0, 200))
+        with Session() as s:
+            ahora = datetime.utcnow() + timedelta(seconds=1)
+            previo = [existencias_a_fecha(s, c, ayer) for c in nuevos]
+            actual = [existencias_a_fecha(s, c, ahora) for c in nuevos]
+            vivo = [s.execute(select(Producto.existencias).where(Producto.codigo == c)).scalar_one() for c in nuevos]
+        print(f"fuera del ledger: stock de ayer {'sin cambios' if set(previo) == {0} else 'MOVIDO'}, "
+              f"hoy {'= existencias' if actual == vivo else 'DISTINTO'}")
+        engine.dispose()
+        if set(previo) != {0} or actual != vivo:
+            raise SystemExit("ERROR: alta o edición de existencias fuera del ledger")
+
+    if unit_rate < OBJETIVO_MOV_SEG:
+        raise SystemExit(f"FALLA: {unit_rate:.0f} mov/s < objetivo {OBJETIVO_MOV_SEG}")
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
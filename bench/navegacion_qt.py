@@ -0,0 +1,130 @@
+# bench/navegacion_qt.py
+"""
+Latencia de navegación de la ventana real, con y sin el registro de widgets.
+
+    python -m bench.navegacion_qt [--productos 2000] [--vueltas 50]
+
+Carga main_window con QT_QPA_PLATFORM=offscreen contra una tienda sintética
+(bench.dataset) y recorre --vueltas veces todas las páginas y sub-páginas
+(_show_page + show_pro_page / show_inv_page de cada módulo), primero con
+enlaces.REGISTRO_ACTIVO = False (findChild recursivo en cada búsqueda, el antes)
+y luego con el registro. Las recargas de datos van por el bus de cambios y la BD
+no cambia durante el recorrido: lo que se mide es resolver widgets y cambiar de
+página. Comprueba además que validar() no encuentre faltantes.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication
+
+from app.core import db_local, eventos, tickets
+from app.core.db_local import make_engine
+from app.ui.a_py import enlaces
+from bench.dataset import Tamano, generar
+
+RECORRIDO = [
+    ("pageVentas", None),
+    ("pageProductos", "pageProCatalogo"), ("pageProductos", "pageProNuevo"),
+    ("pageProductos", "pageProModificar"), ("pageProductos", "pageProEliminar"),
+    ("pageInventario", "pageInvTabla"), ("pageInventario", "pageInvAgregar"),
+    ("pageInventario", "pageInvAjustes"),
+    ("pageCompras", "pageComLis"), ("pageCompras", "pageComIng"),
+    ("pageCompras", "pageComMod"), ("pageCompras", "pageComElim"),
+]
+
+
+def _recorrer(app, w, vueltas: int) -> list[float]:
+    from app.ui.main_window import _show_page
+    from app.ui.productos._producto_page import show_pro_page
+    from app.ui.Inventario._Inventario_page import show_inv_page
+    from app.ui.compras._compras_page import show_inv_page as show_com_page
+    sub = {"pageProductos": show_pro_page, "pageInventario": show_inv_page, "pageCompras": show_com_page}
+
+    ms = []
+    for _ in range(vueltas):
+        for pagina, subpagina in RECORRIDO:
+            t0 = time.perf_counter()
+            _show_page(w, pagina)
+            if subpagina:
+                sub[pagina](w, subpagina)
+            app.processEvents()
+            ms.append((time.perf_counter() - t0) * 1000)
+    return ms
+
+
+def _pct(xs, p) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(p * len(xs)))]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--productos", type=int, default=2_000)
+    ap.add_argument("--vueltas", type=int, default=50)
+    ap.add_argument("--semilla", type=int, default=1)
+    args = ap.parse_args(argv)
+
+    tmp = tempfile.TemporaryDirectory()
+    engine = make_engine(os.path.join(tmp.name, "navegacion.db"))
+    generar(engine, Tamano.desde_escala(args.productos), args.semilla, log=lambda m: None)
+    db_local.SessionLocal.configure(bind=engine)
+    eventos.instalar(engine)
+    tickets._journal = tickets.TicketJournal(os.path.join(tmp.name, "tickets.db"))
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    try:
+        import assets.imagenes  # noqa: F401  (íconos :/png del .ui)
+    except Exception:
+        pass
+    from app.ui.main_window import create_main_window
+
+    t0 = time.perf_counter()
+    w = create_main_window("bench")
+    ms_arranque = (time.perf_counter() - t0) * 1000
+    w.show()
+    app.processEvents()
+    reg = enlaces.registro(w)
+    faltan = enlaces.validar(w)
+    _recorrer(app, w, 1)                         # calienta: cada página ya inicializada
+
+    resultados = {}
+    for nombre, activo in (("findChild", False), ("registro", True)):
+        enlaces.REGISTRO_ACTIVO = activo
+        resultados[nombre] = _recorrer(app, w, args.vueltas)
+    enlaces.REGISTRO_ACTIVO = True
+
+    w.close()
+    tickets._journal.close()
+    eventos.get_bus().desinstalar()
+    engine.dispose()
+    tmp.cleanup()
+
+    print(f"{len(reg)} widgets con nombre en el registro; ventana creada en {ms_arranque:.0f} ms")
+    print(f"{args.vueltas} vueltas × {len(RECORRIDO)} páginas\n")
+    print(f"{'':12} {'media':>8} {'p50':>8} {'p95':>8} {'máx':>8}  (ms por navegación)")
+    for nombre, ms in resultados.items():
+        print(f"  {nombre:10} {statistics.mean(ms):>8.3f} {statistics.median(ms):>8.3f} "
+              f"{_pct(ms, 0.95):>8.3f} {max(ms):>8.3f}")
+    antes, despues = statistics.mean(resultados["findChild"]), statistics.mean(resultados["registro"])
+    print(f"  aceleración {antes / despues:.1f}x")
+    checks = {"validar(): nada declarado falta en main_window.ui": not faltan,
+              "el registro no es más lento que findChild": despues <= antes}
+    for k, v in checks.items():
+        print(f"  {'ok ' if v else 'MAL'} {k}")
+    if faltan:
+        print("  faltan: " + "; ".join(faltan))
+    if not all(checks.values()):
+        raise SystemExit("FALLA")
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+# bench/promociones.py
+"""
+Promociones compiladas (app/core/promociones.py): costo por escaneo con miles de reglas.
+
+    python -m bench.promociones [--reglas 5000] [--productos 20000] [--en-promocion 2000]
+                                [--escaneos 5000] [--ticket 40]
+
+Arma --reglas promociones al azar sobre una tienda sintética (bench.dataset) y las
+guarda en la tabla promociones: % por código, NxM, precio con vigencia (algunas
+vencidas o por empezar), combos mix & match de 3-20 códigos y % por familia
+(prefijo), sobre los --en-promocion productos más vendidos. Las carga con
+cargar() y las compila. Luego recorre una traza de escaneos tipo Zipf (como
+bench.ventas_qt; cantidad 1-3, alguna línea que se quita), vaciando cada
+--ticket escaneos, y mide por escaneo:
+  compilado   Carrito.cambiar(): sólo las reglas que tocan la línea
+  ingenuo     todas las reglas contra todo el carrito (sin índice), en una muestra
+Comprueba que en cada escaneo el incremental da lo mismo que reevaluar el ticket
+desde cero, y en la muestra lo mismo que el ingenuo; que una venta guarda
+descuento/promoción en boleta_detalles con subtotal y total netos; que una
+promoción que empieza después no aplica hasta que el reloj llega; y que una BD en
+la revisión 0002 recibe las columnas nuevas con actualizar_bd().
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import sessionmaker
+
+from app.core.db_local import make_engine
+from app.core.ids import gen_id
+from app.core.models import BoletaDetalle, Producto, Promocion
+from app.core.promociones import Carrito, Regla, cargar, compilar
+from app.core.repositories import crear_boleta_con_detalles
+from bench.dataset import Tamano, codigo_producto, generar
+
+
+def _reglas(rnd: random.Random, n: int, en_promocion: int, ahora: datetime) -> list[dict]:
+    def cod():
+        return codigo_producto(rnd.randrange(en_promocion))
+
+    filas = []
+    for i in range(n):
+        x = rnd.random()
+        f = {"id": gen_id(), "nombre": f"Promo {i}", "codigos": None, "prefijo": None, "n": None, "m": None,
+             "porcentaje": None, "precio": None, "desde": None, "hasta": None, "activa": True,
+             "updated_at": ahora, "version": 1}
+        if x < 0.40:
+            f.update(tipo="porcentaje", porcentaje=rnd.choice((5, 10, 15, 20, 30, 50)),
+                     codigos=" ".join({cod() for _ in range(rnd.randint(1, 5))}))
+        elif x < 0.60:
+            n_ = rnd.choice((2, 3, 4))
+            f.update(tipo="nxm", n=n_, m=n_ - 1, codigos=cod())
+        elif x < 0.75:
+            ini = ahora + timedelta(hours=rnd.choice((-48, -1, 2)))
+            f.update(tipo="precio", precio=rnd.randrange(100, 2_000), codigos=cod(),
+                     desde=ini, hasta=ini + timedelta(hours=rnd.choice((24, 72))))
+        elif x < 0.90:
+            f.update(tipo="combo", n=rnd.randint(2, 4), precio=rnd.randrange(500, 4_000),
+                     codigos=",".join({cod() for _ in range(rnd.randint(3, 20))}))
+        else:
+            # familia de 100 códigos consecutivos (P-00001xx)
+            f.update(tipo="porcentaje", porcentaje=rnd.choice((5, 10)),
+                     prefijo=codigo_producto(rnd.randrange(en_promocion))[:-2])
+        filas.append(f)
+    return filas
+
+
+def _ingenuo(reglas: list[Regla], lineas: dict, ahora: datetime) -> dict:
+    """Todas las reglas contra todo el carrito: {codigo: (descuento, id de regla)}."""
+    mejor: dict[str, tuple[int, str]] = {}
+    for r in reglas:
+        if not r.vigente(ahora):
+            continue
+        if r.de_linea:
+            res = {c: r.descuento_linea(*l) for c, l in lineas.items() if r.aplica(c)}
+        else:
+            res = r.descuentos_combo(lineas, [c for c in lineas if r.aplica(c)])
+        for c, d in res.items():
+            if d and d > mejor.get(c, (0, ""))[0]:
+                mejor[c] = (d, r.id)
+    return mejor
+
+
+def _ids(car: Carrito) -> dict:
+    return {c: (d, r.id) for c, (d, r) in car.aplicado.items()}
+
+
+def _pct(xs, p) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(p * len(xs)))]
+
+
+def _migracion(tmp: str) -> bool:
+    """Una BD en 0002 (sin las columnas) queda con boleta_detalles.descuento/promocion."""
+    from alembic import command
+
+    from app.core.migraciones import _config, actualizar_bd
+
+    ruta = os.path.join(tmp, "vieja.db")
+    eng = make_engine(ruta)
+    actualizar_bd(eng)
+    command.stamp(_config(eng), "0002", purge=True)
+    eng.dispose()
+    con = sqlite3.connect(ruta)
+    con.execute("ALTER TABLE boleta_detalles DROP COLUMN promocion")
+    con.execute("ALTER TABLE boleta_detalles DROP COLUMN descuento")
+    con.commit()
+    con.close()
+    eng = make_engine(ruta)
+    try:
+        actualizar_bd(eng)
+        with eng.connect() as c:
+            cols = {r[1] for r in c.exec_driver_sql("PRAGMA table_info(boleta_detalles)")}
+            rev = c.exec_driver_sql("SELECT version_num FROM alembic_version").scalar_one()
+    finally:
+        eng.dispose()
+    return {"descuento", "promocion"} <= cols and rev == "0003"
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--reglas", type=int, default=5_000)
+    ap.add_argument("--productos", type=int, default=20_000)
+    ap.add_argument("--en-promocion", type=int, default=2_000, help="los N productos más vendidos")
+    ap.add_argument("--escaneos", type=int, default=5_000)
+    ap.add_argument("--ticket", type=int, default=40)
+    ap.add_argument("--muestra", type=int, default=200, help="escaneos comparados contra el ingenuo")
+    ap.add_argument("--semilla", type=int, default=1)
+    args = ap.parse_args(argv)
+    rnd = random.Random(args.semilla)
+    ahora = datetime.utcnow()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        eng = make_engine(os.path.join(tmp, "promos.db"))
+        generar(eng, Tamano(args.productos, 0, 0, 30), args.semilla, log=lambda m: None)
+        Session = sessionmaker(bind=eng, autoflush=False)
+        with eng.begin() as c:
+            c.execute(update(Producto).values(existencias=1_000_000))
+            filas = _reglas(rnd, args.reglas, min(args.en_promocion, args.productos), ahora)
+            c.execute(insert(Promocion), filas)
+            c.execute(insert(Promocion), [{"id": gen_id(), "nombre": "sin códigos", "tipo": "porcentaje",
+                                           "porcentaje": 10, "activa": True, "updated_at": ahora, "version": 1}])
+            precios = dict(c.execute(select(Producto.codigo, Producto.precio_venta)).all())
+
+        t0 = time.perf_counter()
+        with Session() as s:
+            reglas = cargar(s, ahora=ahora)
+        seg_carga = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        idx = compilar(reglas)
+        seg_compilar = time.perf_counter() - t0
+
+        # ---- traza ----
+        reloj = lambda: ahora
+        car = Carrito(idx, reloj=reloj)
+        muestra = set(rnd.sample(range(args.escaneos), min(args.muestra, args.escaneos)))
+        traza = rnd.choices(range(args.productos), weights=[1.0 / (i + 1) for i in range(args.productos)],
+                            k=args.escaneos)
+        us_comp, us_ing, con_dto, distintos_full, distintos_ing = [], [], 0, 0, 0
+        for i in range(args.escaneos):
+            if i % args.ticket == 0:
+                car.vaciar()
+            cod = codigo_producto(traza[i])
+            punit, cant = int(precios[cod]), car.lineas.get(cod, (0, 0))[1]
+            cant = 0 if (cant and rnd.random() < 0.05) else cant + rnd.choice((1, 1, 1, 2, 3))
+            t0 = time.perf_counter()
+            car.cambiar(cod, punit, cant)
+            us_comp.append((time.perf_counter() - t0) * 1e6)
+            ref = Carrito(idx, reloj=reloj)
+            ref.lineas = dict(car.lineas)
+            ref.reevaluar()
+            distintos_full += _ids(ref) != _ids(car)
+            con_dto += bool(car.aplicado)
+            if i in muestra:
+                t0 = time.perf_counter()
+                ing = _ingenuo(reglas, car.lineas, ahora)
+                us_ing.append((time.perf_counter() - t0) * 1e6)
+                distintos_ing += ing != _ids(car)
+
+        # ---- vigencia ----
+        r_tarde = Regla("T", "Desde mañana", "porcentaje", frozenset({"X"}), porcentaje=50,
+                        desde=ahora + timedelta(days=1))
+        hora = [ahora]
+        c2 = Carrito(compilar([r_tarde]), reloj=lambda: hora[0])
+        c2.cambiar("X", 1000, 1)
+        antes = c2.descuento("X")[0]
+        hora[0] = ahora + timedelta(days=2)
+        c2.reevaluar()
+        ok_vigencia = antes == 0 and c2.descuento("X")[0] == 500
+
+        # ---- venta persistida ----
+        promo = next(r for r in reglas if r.tipo == "porcentaje" and r.codigos)
+        cod = sorted(promo.codigos)[0]
+        vc = Carrito(idx, reloj=reloj)
+        vc.cambiar(cod, int(precios[cod]), 2)
+        dto, regla = vc.descuento(cod)
+        items = [{"codigo": cod, "descripcion": "x", "precio_unit": int(precios[cod]), "cantidad": 2,
+                  "descuento": dto, "promocion": regla.nombre if regla else None},
+                 {"codigo": codigo_producto(args.productos - 1), "descripcion": "y", "precio_unit": 990, "cantidad": 1}]
+        with Session() as s, s.begin():
+            b = crear_boleta_con_detalles(s, items)
+            total, bid = b.total, b.id
+        with Session() as s:
+            dets = s.execute(select(BoletaDetalle).where(BoletaDetalle.boleta_id == bid)).scalars().all()
+            guardado = {d.codigo_producto: (d.descuento, d.promocion, d.subtotal) for d in dets}
+        ok_venta = (dto > 0 and guardado[cod] == (dto, regla.nombre, 2 * int(precios[cod]) - dto)
+                    and total == sum(v[2] for v in guardado.values()))
+        eng.dispose()
+        ok_migracion = _migracion(tmp)
+
+    tipos = {}
+    for r in reglas:
+        tipos[r.tipo] = tipos.get(r.tipo, 0) + 1
+    print(f"{len(reglas):,} reglas cargadas de {args.reglas + 1:,} filas ({tipos}); "
+          f"carga {seg_carga * 1000:.0f} ms, compilación {seg_compilar * 1000:.0f} ms")
+    print(f"{args.escaneos:,} escaneos, tickets de {args.ticket}; {con_dto:,} con algún descuento en el ticket")
+    print(f"\n{'':11} {'n':>6} {'media':>9} {'p50':>9} {'p99':>9} {'máx':>9}  (µs por escaneo)")
+    for nombre, xs in (("compilado", us_comp), ("ingenuo", us_ing)):
+        print(f"  {nombre:9} {len(xs):>6} {statistics.mean(xs):>9.1f} {statistics.median(xs):>9.1f} "
+              f"{_pct(xs, 0.99):>9.1f} {max(xs):>9.1f}")
+    print(f"  aceleración (media) {statistics.mean(us_ing) / statistics.mean(us_comp):.0f}x")
+    checks = {"incremental = ticket reevaluado desde cero, en cada escaneo": distintos_full == 0,
+              "incremental = todas las reglas contra todo el carrito (muestra)": distintos_ing == 0,
+              "la fila mal armada y las vencidas no se cargan":
+                  len(reglas) == sum(1 for f in filas if f["hasta"] is None or f["hasta"] > ahora),
+              "vigencia: no aplica antes de 'desde', sí después": ok_vigencia,
+              "venta: descuento y promoción en boleta_detalles, subtotal y total netos": ok_venta,
+              "BD en 0002 recibe las columnas (revisión 0003)": ok_migracion}
+    for k, v in checks.items():
+        print(f"  {'ok ' if v else 'MAL'} {k}")
+    if not all(checks.values()):
+        raise SystemExit("FALLA")
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
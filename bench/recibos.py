@@ -0,0 +1,101 @@
+# bench/recibos.py
+"""
+Render de recibos y latencia de encolado.
+
+    python -m bench.recibos [--n 2000] [--latencia-impresora 0.2]
+
+- Render: recibos/s por formato (texto, escpos, pdf) con la plantilla en cache.
+- Encolado: lo que paga _cobrar por boleta (p50/p99 de Spooler.encolar) contra
+  una impresora de archivo artificialmente lenta; debe quedar en microsegundos.
+- Falla de render: un recibo que no se puede armar queda en fallidos, avisa por
+  on_error y el hilo sigue imprimiendo los siguientes.
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import tempfile
+import time
+
+from app.core import recibos as mod_recibos
+from app.core.recibos import Recibo, Spooler, ImpresoraArchivo, render, FORMATOS
+
+
+class _ImpresoraLenta(ImpresoraArchivo):
+    def __init__(self, directorio, latencia):
+        super().__init__(directorio)
+        self.latencia = latencia
+
+    def enviar(self, nombre, data):
+        time.sleep(self.latencia)
+        super().enviar(nombre, data)
+
+
+def _recibo(i: int) -> Recibo:
+    items = [{"codigo": f"P-{j}", "descripcion": f"Producto de prueba {j}",
+              "precio_unit": 990 + 10 * j, "cantidad": 1 + j % 3} for j in range(12)]
+    return Recibo.desde_items(f"BLT-BENCH-{i:06d}", items)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--n", type=int, default=2000)
+    ap.add_argument("--latencia-impresora", type=float, default=0.2)
+    args = ap.parse_args(argv)
+
+    recibos = [_recibo(i) for i in range(args.n)]
+    for fmt in FORMATOS:
+        t0 = time.perf_counter()
+        for r in recibos:
+            render(r, fmt)
+        dt = time.perf_counter() - t0
+        print(f"render {fmt:7}: {args.n / dt:10.0f} recibos/s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sp = Spooler(_ImpresoraLenta(tmp, args.latencia_impresora), "escpos")
+        lat = []
+        for r in recibos[:50]:
+            t0 = time.perf_counter()
+            sp.encolar(r)
+            lat.append((time.perf_counter() - t0) * 1e6)
+        lat.sort()
+        p99 = lat[int(len(lat) * 0.99) - 1]
+        print(f"encolar       : p50 {statistics.median(lat):.1f} µs | p99 {p99:.1f} µs "
+              f"(impresora tarda {args.latencia_impresora * 1e3:.0f} ms por recibo)")
+        sp.detener(timeout=60)
+        print(f"impresos      : {sp.impresos} | fallidos {len(sp.fallidos)}")
+
+        # ---- render que falla una vez ----
+        avisos = []
+        original = mod_recibos.render
+
+        def _render_roto(recibo, *a, **kw):
+            if recibo.folio == "BLT-ROTO":
+                raise ValueError("plantilla rota")
+            return original(recibo, *a, **kw)
+
+        mod_recibos.render = _render_roto
+        try:
+            sp = Spooler(ImpresoraArchivo(tmp), "texto", on_error=lambda r, e: avisos.append((r.folio, e)))
+            roto = _recibo(0)
+            roto.folio = "BLT-ROTO"
+            sp.encolar(roto)
+            sp.encolar(_recibo(1))
+            vacia = sp.esperar(timeout=10)
+            vivo = sp._hilo.is_alive()
+            sp.detener(timeout=10)
+        finally:
+            mod_recibos.render = original
+
+    checks = {"render que falla: el hilo sigue y el siguiente se imprime": vacia and vivo and sp.impresos == 1,
+              "render que falla: queda en fallidos y avisa por on_error":
+                  [t.recibo.folio for t in sp.fallidos] == ["BLT-ROTO"] and [f for f, _e in avisos] == ["BLT-ROTO"]}
+    for k, v in checks.items():
+        print(f"  {'ok ' if v else 'MAL'} {k}")
+    if not all(checks.values()):
+        raise SystemExit("FALLA")
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+# bench/repositorios.py
+"""
+Suite de benchmarks de app/core/repositories.
+
+    python -m bench.repositorios                              # escalas 1k y 100k, compara con baseline
+    python -m bench.repositorios --escalas 1000 100000 1000000
+    python -m bench.repositorios --guardar-baseline           # reescribe bench/baseline_repositorios.json
+
+Por cada escala se genera una tienda sintética (bench.dataset) en un SQLite temporal,
+en un proceso aparte (así el pico de RSS es el de esa escala), y se mide cada
+función pública del módulo: consultas SQL por llamada, p50/p99 de latencia.
+Falla (exit 1) si una función:
+  - no tiene caso de benchmark (toda función pública nueva debe agregarse a CASOS),
+  - emite más consultas por llamada que en el baseline,
+  - o su p50 supera al del baseline en más de --tolerancia (y de --margen-ms).
+El baseline es de la máquina donde se grabó: regrabarlo al cambiar de equipo.
+"""
+from __future__ import annotations
+
+import argparse
+import inspect
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core import repositories as repo
+from app.core.db_local import make_engine
+from app.core.models import Producto
+from bench.dataset import Tamano, generar, codigo_producto
+
+BASELINE = Path(__file__).with_name("baseline_repositorios.json")
+ESCALAS_DEFAULT = (1_000, 100_000)
+
+
+# =========================
+# Casos: nombre → (repeticiones, fn(session, ctx, i))
+# =========================
+def _prod(ctx) -> str:
+    return codigo_producto(ctx["rnd"].randrange(ctx["n"]))
+
+
+def _con_stock(ctx) -> str:
+    return ctx["rnd"].choice(ctx["con_stock"])
+
+
+def _fecha(ctx):
+    d = ctx["desde"] + timedelta(days=ctx["rnd"].randrange(ctx["dias"]))
+    return d.date()
+
+
+CASOS = {
+    "insert_producto": (200, lambda s, c, i: repo.insert_producto(
+        s, f"N-{i:07d}", "nuevo", 1000, 5, 1, 10, 1500)),
+    "update_producto": (200, lambda s, c, i: repo.update_producto(
+        s, _prod(c), descripcion=f"editado {i}")),
+    "get_producto_por_codigo": (500, lambda s, c, i: repo.get_producto_por_codigo(s, _prod(c))),
+    "get_impuestos_por_codigo": (300, lambda s, c, i: repo.get_impuestos_por_codigo(
+        s, [_prod(c) for _ in range(40)])),
+    "agregar_codigo_alterno": (200, lambda s, c, i: repo.agregar_codigo_alterno(
+        s, f"ALT-{i:06d}", _prod(c), unidades=6)),
+    "get_codigos_alternos": (300, lambda s, c, i: repo.get_codigos_alternos(s, _prod(c))),
+    "quitar_codigo_alterno": (200, lambda s, c, i: repo.quitar_codigo_alterno(s, f"ALT-{i:06d}")),
+    "get_productos_bajo_inventario": (5, lambda s, c, i: repo.get_productos_bajo_inventario(s)),
+    "get_productos_sobre_inventario": (5, lambda s, c, i: repo.get_productos_sobre_inventario(s)),
+    "ajustar_existencias": (300, lambda s, c, i: repo.ajustar_existencias(s, _prod(c), 1, "bench")),
+    "ajustar_existencias_lote": (50, lambda s, c, i: repo.ajustar_existencias_lote(
+        s, {_prod(c): 1 for _ in range(50)}, "bench")),
+    "crear_boleta_con_detalles": (200, lambda s, c, i: repo.crear_boleta_con_detalles(s, [
+        {"codigo": cod, "descripcion": cod, "precio_unit": 990, "cantidad": 1}
+        for cod in {_con_stock(c) for _ in range(3)}
+    ])),
+    "crear_orden_compra_con_detalles": (100, lambda s, c, i: repo.crear_orden_compra_con_detalles(
+        s, folio_orden=f"OCB-{i:06d}", fecha_llegada_orden="2025-03-01",
+        detalle_items=[{"codigo_producto": cod, "cantidad": 5, "precio_unitario": 800}
+                       for cod in {_prod(c) for _ in range(3)}])),
+    "cancelar_orden_compra": (50, lambda s, c, i: repo.cancelar_orden_compra(s, c["pendientes"][i])),
+    "recepcionar_orden_total": (50, lambda s, c, i: repo.recepcionar_orden_total(
+        s, c["pendientes"][-1 - i])),
+    "registrar_movimiento": (500, lambda s, c, i: repo.registrar_movimiento(s, _prod(c), 1, "bench")),
+    "registrar_movimientos": (50, lambda s, c, i: repo.registrar_movimientos(s, [
+        {"codigo_producto": _prod(c), "delta": 1, "motivo": "bench"} for _ in range(100)])),
+    "existencias_de": (300, lambda s, c, i: repo.existencias_de(s, [_prod(c) for _ in range(40)])),
+    "cuadrar_ledger": (100, lambda s, c, i: repo.cuadrar_ledger(
+        s, repo.existencias_de(s, [_prod(c) for _ in range(40)]), referencia="bench")),
+    "movimientos_por_producto": (300, lambda s, c, i: repo.movimientos_por_producto(s, _prod(c))),
+    "existencias_a_fecha": (300, lambda s, c, i: repo.existencias_a_fecha(s, _prod(c), _fecha(c))),
+    "crear_snapshots_stock": (3, lambda s, c, i: repo.crear_snapshots_stock(s)),
+    # al final: deja productos fuera del catálogo (las órdenes pendientes podrían referirlos)
+    "soft_delete_producto": (100, lambda s, c, i: repo.soft_delete_producto(
+        s, codigo_producto(c["n"] - 1 - i))),
+}
+
+
+CONSUMEN_PENDIENTES = {"cancelar_orden_compra", "recepcionar_orden_total"}
+
+
+def funciones_publicas() -> list[str]:
+    return sorted(
+        n for n, f in inspect.getmembers(repo, inspect.isfunction)
+        if f.__module__ == repo.__name__ and not n.startswith("_")
+    )
+
+
+# =========================
+# Medición
+# =========================
+def _peak_rss_mb() -> float | None:
+    try:
+        import resource
+        kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return kb / 1024 / (1024 if sys.platform == "darwin" else 1)
+    except ImportError:
+        pass
+    try:  # Windows
+        import ctypes
+        from ctypes import wintypes
+
+        class PMC(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+        pmc = PMC(); pmc.cb = ctypes.sizeof(PMC)
+        ctypes.windll.psapi.GetProcessMemoryInfo(
+            ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(pmc), pmc.cb)
+        return pmc.PeakWorkingSetSize / 1024 / 1024
+    except Exception:
+        return None
+
+
+def _pct(xs: list[float], p: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(len(xs) * p))]
+
+
+def correr_escala(n: int, semilla: int = 1, solo: list[str] | None = None) -> dict:
+    """Genera la tienda de escala n y mide cada caso. Pensado para correr en un proceso aparte."""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(os.path.join(tmp, f"bench_{n}.db"))
+        print(f"[{n}] generando tienda...", flush=True)
+        info = generar(engine, Tamano.desde_escala(n), semilla, log=lambda m: print(f"[{n}]{m}", flush=True))
+        Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+        consultas = [0]
+        event.listen(engine, "before_cursor_execute", lambda *a, **k: consultas.__setitem__(0, consultas[0] + 1))
+
+        with Session() as s:
+            con_stock = s.execute(
+                select(Producto.codigo).where(Producto.existencias >= 100).limit(5000)
+            ).scalars().all()
+        tam = info["tamano"]
+        ctx = {
+            "n": n,
+            "con_stock": con_stock, "pendientes": info["ordenes_pendientes"],
+            "desde": info["desde"], "dias": tam.dias,
+        }
+
+        out = {}
+        for nombre, (reps, fn) in CASOS.items():
+            if solo and nombre not in solo:
+                continue
+            if nombre in CONSUMEN_PENDIENTES:    # cancelar toma del inicio, recepcionar del final
+                reps = min(reps, len(ctx["pendientes"]) // 2)
+            # semilla propia por caso: agregar o filtrar casos (--solo) no cambia lo que elige cada uno
+            ctx["rnd"] = random.Random(f"{semilla}:{nombre}")
+            lat, q0 = [], consultas[0]
+            for i in range(reps):
+                t0 = time.perf_counter()
+                with Session() as s, s.begin():
+                    fn(s, ctx, i)
+                lat.append((time.perf_counter() - t0) * 1e3)
+            out[nombre] = {
+                "reps": reps,
+                "consultas": round((consultas[0] - q0) / max(1, reps), 2),
+                "p50_ms": round(_pct(lat, 0.50), 4),
+                "p99_ms": round(_pct(lat, 0.99), 4),
+            }
+        engine.dispose()
+    return {"funciones": out, "peak_rss_mb": _peak_rss_mb()}
+
+
+# =========================
+# Comparación con baseline
+# =========================
+def comparar(resultados: dict, baseline: dict, tolerancia: float, margen_ms: float) -> list[str]:
+    fallas = []
+    for escala, res in resultados.items():
+        base = baseline.get(escala, {}).get("funciones", {})
+        for nombre, m in res["funciones"].items():
+            b = base.get(nombre)
+            if not b:
+                continue
+            if m["consultas"] > b["consultas"]:
+                fallas.append(f"[{escala}] {nombre}: {m['consultas']} consultas/llamada (baseline {b['consultas']})")
+            if m["p50_ms"] > b["p50_ms"] * (1 + tolerancia) and m["p50_ms"] - b["p50_ms"] > margen_ms:
+                fallas.append(f"[{escala}] {nombre}: p50 {m['p50_ms']:.3f} ms (baseline {b['p50_ms']:.3f} ms)")
+    return fallas
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--escalas", type=int, nargs="+", default=list(ESCALAS_DEFAULT))
+    ap.add_argument("--solo", nargs="*", help="limitar a estas funciones")
+    ap.add_argument("--semilla", type=int, default=1)
+    ap.add_argument("--tolerancia", type=float, default=1.0, help="p50 permitido sobre baseline (1.0 = +100%%)")
+    ap.add_argument("--margen-ms", type=float, default=1.0, help="diferencia absoluta mínima para reportar (ruido)")
+    ap.add_argument("--guardar-baseline", action="store_true")
+    ap.add_argument("--json", help="guardar resultados en este archivo")
+    args = ap.parse_args(argv)
+
+    faltan = [f for f in funciones_publicas() if f not in CASOS]
+    if faltan:
+        print("Funciones públicas sin caso de benchmark: " + ", ".join(faltan))
+        return 1
+
+    resultados = {}
+    for n in args.escalas:
+        with ProcessPoolExecutor(max_workers=1) as ex:
+            resultados[str(n)] = ex.submit(correr_escala, n, args.semilla, args.solo).result()
+
+    for escala, res in resultados.items():
+        rss = res["peak_rss_mb"]
+        print(f"\n== escala {escala} productos | pico RSS {rss:.0f} MB" if rss else f"\n== escala {escala}")
+        print(f"{'función':34} {'reps':>5} {'consultas':>10} {'p50 ms':>10} {'p99 ms':>10}")
+        for nombre, m in res["funciones"].items():
+            print(f"{nombre:34} {m['reps']:>5} {m['consultas']:>10} {m['p50_ms']:>10.3f} {m['p99_ms']:>10.3f}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(resultados, indent=2), encoding="utf-8")
+
+    if args.guardar_baseline:
+        # por función: con --solo sólo se regraban esas (el resto del baseline queda)
+        base = json.loads(BASELINE.read_text(encoding="utf-8")) if BASELINE.exists() else {}
+        for escala, res in resultados.items():
+            b = base.setdefault(escala, {"funciones": {}})
+            b["funciones"].update(res["funciones"])
+            if not args.solo:
+                b["peak_rss_mb"] = res["peak_rss_mb"]
+        BASELINE.write_text(json.dumps(base, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"\nBaseline guardado en {BASELINE}")
+        return 0
+
+    if not BASELINE.exists():
+        print("\n(sin baseline: usa --guardar-baseline)")
+        return 0
+    fallas = comparar(resultados, json.loads(BASELINE.read_text(encoding="utf-8")),
+                      args.tolerancia, args.margen_ms)
+    if fallas:
+        print("\nREGRESIONES:")
+        for f in fallas:
+            print("  " + f)
+        return 1
+    print("\nSin regresiones contra el baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+# bench/respaldo.py
+"""
+Respaldo en caliente (app/core/respaldo): efecto sobre la caja y simulacro de restauración.
+
+    python -m bench.respaldo [--productos 10000] [--boletas 200000] [--dias 90] [--n 400]
+
+1. Caja: p50/p99 de crear_boleta_con_detalles (vendiendo sin respiro) con y sin
+   respaldos corriendo uno tras otro en un hilo con la configuración de la app
+   (RESPALDO_PAGINAS, RESPALDO_PAUSA_S, RESPALDO_PAUSA_ACTIVA_S, prioridad baja;
+   --paginas/--pausa/--pausa-activa para probar otras). Las mediciones se alternan
+   en ventanas de --ventana boletas (en las "sin", el hilo espera detenido entre
+   pasos) hasta tener --n de cada una y al menos un respaldo terminado: el ruido
+   de la máquina cae parejo en ambas. Falla si el p50 empeora más de --tolerancia.
+2. Cancelación: detener() a mitad de un respaldo no deja .tmp.
+3. Simulacro: respaldo → más ventas → restaurar → la BD vuelve exactamente al estado
+   del respaldo, pasa integrity_check, la copia -previo tiene las ventas posteriores
+   y la caja puede seguir vendiendo. Un respaldo dañado se rechaza.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core import respaldo
+from app.core.db_local import make_engine
+from app.core.models import Boleta, Producto
+from app.core.repositories import crear_boleta_con_detalles
+from bench.dataset import Tamano, generar, codigo_producto
+
+
+def _crear(Session, rnd, n_prod):
+    cod = codigo_producto(rnd.randrange(n_prod))
+    with Session() as s, s.begin():
+        crear_boleta_con_detalles(s, [{"codigo": cod, "descripcion": cod, "precio_unit": 990, "cantidad": 1}])
+
+
+def _latencias(Session, rnd, n_prod, n) -> list[float]:
+    out = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        _crear(Session, rnd, n_prod)
+        out.append(1000 * (time.perf_counter() - t0))
+    return out
+
+
+def _pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(len(xs) * p / 100))]
+
+
+def _estado(engine) -> tuple:
+    with engine.connect() as c:
+        return (tuple(c.execute(select(func.count(), func.sum(Boleta.total))).one())
+                + tuple(c.execute(select(func.sum(Producto.existencias))).one()))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--productos", type=int, default=10_000)
+    ap.add_argument("--boletas", type=int, default=200_000)
+    ap.add_argument("--dias", type=int, default=90)
+    ap.add_argument("--n", type=int, default=400, help="boletas por medición")
+    ap.add_argument("--ventana", type=int, default=100, help="boletas por ventana con/sin respaldo")
+    ap.add_argument("--tolerancia", type=float, default=0.10)
+    ap.add_argument("--paginas", type=int, default=respaldo.RESPALDO_PAGINAS)
+    ap.add_argument("--pausa", type=float, default=respaldo.RESPALDO_PAUSA_S)
+    ap.add_argument("--pausa-activa", type=float, default=respaldo.RESPALDO_PAUSA_ACTIVA_S)
+    ap.add_argument("--semilla", type=int, default=1)
+    args = ap.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "mi_app.db")
+        dir_r = Path(tmp) / "respaldos"
+        engine = make_engine(db)
+        generar(engine, Tamano(args.productos, args.boletas, 10, args.dias), args.semilla, log=lambda m: None)
+        with engine.begin() as c:
+            c.exec_driver_sql("UPDATE productos SET existencias = 1000000")
+        Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+        rnd = random.Random(args.semilla)
+        ok = True
+
+        # 1) caja con y sin respaldo, en ventanas alternadas
+        _latencias(Session, rnd, args.productos, 50)         # calentar caché
+        parar, activo, detenido = threading.Event(), threading.Event(), threading.Event()
+        hechos, segs = [], []
+
+        def _esperar(*_):
+            # ventana "sin": el hilo queda quieto (entre pasos o entre respaldos)
+            if not activo.is_set():
+                detenido.set()
+                while not activo.wait(0.05) and not parar.is_set():
+                    pass
+                detenido.clear()
+
+        def _respaldos():
+            respaldo.bajar_prioridad()          # como el hilo de ServicioRespaldo
+            while not parar.is_set():
+                _esperar()
+                t0 = time.perf_counter()
+                try:
+                    hechos.append(respaldo.respaldar(db, dir_r, paginas=args.paginas, pausa=args.pausa,
+                                                     pausa_activa=args.pausa_activa, generaciones=2,
+                                                     progreso=_esperar, cancelar=parar))
+                    segs.append(time.perf_counter() - t0)
+                except respaldo.RespaldoCancelado:
+                    return
+
+        hilo = threading.Thread(target=_respaldos)
+        hilo.start()
+        base, con = [], []
+        while len(base) < args.n or len(con) < args.n or not hechos:
+            activo.set()
+            con += _latencias(Session, rnd, args.productos, args.ventana)
+            activo.clear()
+            while not detenido.wait(0.05) and hilo.is_alive():
+                pass
+            base += _latencias(Session, rnd, args.productos, args.ventana)
+        parar.set()
+        activo.set()
+        hilo.join()
+        mb = os.path.getsize(db) / 2**20
+        print(f"mi_app.db {mb:.0f} MB; respaldos durante la medición: {len(hechos)}"
+              f" ({statistics.mean(segs) if segs else float('nan'):.1f}s c/u, contando las ventanas sin)")
+        print(f"pasos de {args.paginas} páginas, pausa {args.pausa}s / {args.pausa_activa}s con la caja activa")
+        print(f"\ncaja (crear_boleta)   {'n':>5} {'p50 ms':>8} {'p99 ms':>8}")
+        print(f"  sin respaldo        {len(base):>5} {statistics.median(base):>8.2f} {_pct(base, 99):>8.2f}")
+        print(f"  respaldando         {len(con):>5} {statistics.median(con):>8.2f} {_pct(con, 99):>8.2f}")
+        razon = statistics.median(con) / statistics.median(base)
+        print(f"  p50 con/sin: {razon:.3f} (tolerancia {1 + args.tolerancia:.2f})")
+        ok &= bool(hechos) and razon <= 1 + args.tolerancia
+        ok &= not list(dir_r.glob("*.tmp")) and len(respaldo.listar(dir_r)) <= 2
+
+        # 2) cancelación a mitad de camino
+        dir_c = Path(tmp) / "cancelados"          # vacía: el servicio respalda de inmediato
+        sv = respaldo.ServicioRespaldo(db, dir_c, espera_inicial=0, generaciones=2)
+        fin = time.monotonic() + 30
+        while sv.progreso == 0 and sv.ultimo is None and time.monotonic() < fin:
+            time.sleep(0.01)
+        sv.detener()
+        restos = list(dir_c.glob("*.tmp*"))
+        print(f"\ncancelado al {sv.progreso:.0%}: {'sin restos' if not restos else restos}")
+        ok &= not restos and sv.ultimo is None and sv.progreso > 0
+
+        # 3) simulacro de restauración
+        estado_a = _estado(engine)
+        r = respaldo.respaldar(db, dir_r, generaciones=None)
+        for _ in range(50):
+            _crear(Session, rnd, args.productos)
+        estado_b = _estado(engine)
+        engine.dispose()
+        t0 = time.perf_counter()
+        previo = respaldo.restaurar(r, db, dir_r)
+        seg_rest = time.perf_counter() - t0
+        engine = make_engine(db)
+        Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+        restaurado = _estado(engine)
+        e_previo = make_engine(previo)
+        en_previo = _estado(e_previo)
+        e_previo.dispose()
+        _crear(Session, rnd, args.productos)
+        sigue = _estado(engine)[0] == restaurado[0] + 1
+        engine.dispose()
+        integro = respaldo.verificar(db) == []
+
+        danado = Path(tmp) / "danado.db"
+        shutil.copy(r, danado)
+        with open(danado, "r+b") as f:
+            f.seek(os.path.getsize(danado) // 2)
+            f.write(b"\xff" * 8192)
+        try:
+            respaldo.restaurar(danado, db, dir_r)
+            rechazado = False
+        except ValueError:
+            rechazado = True
+
+        print(f"\nsimulacro: restaurado en {seg_rest:.1f}s")
+        for nombre, v in [("estado = respaldo", restaurado == estado_a), ("previo = antes de restaurar", en_previo == estado_b),
+                          ("integrity_check", integro), ("caja sigue vendiendo", sigue),
+                          ("respaldo dañado rechazado", rechazado)]:
+            print(f"  {nombre:28} {'sí' if v else 'NO'}")
+            ok &= v
+
+    if not ok:
+        raise SystemExit("FALLA")
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+# bench/servidor_sync.py
+"""
+Servidor de sync local (stand-in de BASE_URL) para probar el cliente sin backend.
+
+    python -m bench.servidor_sync --db servidor.db [--puerto 8765] [--productos 500000]
+                                  [--latencia 0.05] [--jitter 0.02] [--perdida 0.01]
+                                  [--perdida-respuesta 0.01] [--error-5xx 0.02]
+
+Sirve, sobre un SQLite con el esquema de la app:
+  GET  /health                       {"ok": true}
+  GET  /sync/pull/<recurso>?since=   filas con marca > since (todas sin since), JSON;
+                                     recursos y marcas de app.core.sync_client.REGISTRO
+  GET  /sync/pull/<recurso>?cursor=  filas recibidas después de ese número de la secuencia
+                                     de cambios (srv_cambios), sea cual sea su marca
+                                     Toda respuesta de pull trae el cursor vigente en la
+                                     cabecera X-Sync-Cursor (app.core.net.CABECERA_CURSOR)
+  POST /sync/push/<recurso>          aplica el lote con la política del registro → {"recibidos": n}
+  GET  /sync/snapshot                manifiesto del snapshot del catálogo (lo crea si no hay
+                                     o si es más viejo que --snapshot-max-s)
+  GET  /sync/snapshot/<archivo>      el .db.gz del manifiesto
+  POST /sync/ae/productos/<accion>   anti-entropía: hijos | hojas | productos (app/core/antientropia.Par)
+
+Fallas inyectables (atributos públicos, se pueden cambiar con el servidor andando):
+  latencia_s, jitter_s   demora por petición: latencia_s + uniforme(0, jitter_s)
+  perdida                probabilidad de perder la petición: se cierra la conexión sin
+                         responder y sin aplicar nada
+  perdida_respuesta      probabilidad de perder la respuesta: el push SÍ se aplica pero el
+                         cliente no se entera (lo reintenta: tiene que ser idempotente)
+  error_5xx              probabilidad de responder 500/502/503 sin hacer nada
+  fallar                 recursos que responden siempre 503
+Conteos en 'stats'. Conformidad del protocolo: bench.conformidad_sync; carga: bench.carga_sync.
+
+Para apuntar la app o un benchmark: app.core.net.BASE_URL = servidor.url
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, func, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.antientropia import Par
+from app.core.bootstrap import MANIFIESTO, crear_snapshot
+from app.core.db_local import make_engine
+from app.core.migraciones import actualizar_bd
+from app.core.net import CABECERA_CURSOR
+from app.core.sync_client import REGISTRO, _a_json, _de_json, aplicar
+
+# Secuencia de cambios: cada INSERT/UPDATE de una tabla de bajada le da a su fila
+# el siguiente seq (triggers; AUTOINCREMENT: nunca se reusa).
+# Los escritores de SQLite van de a uno, así que el orden de seq es el de commit:
+# quien leyó hasta N ya vio todo lo <= N. La clave es el valor de la PK, no el
+# rowid (VACUUM puede renumerar rowids).
+CAMBIOS = Table("srv_cambios", MetaData(),
+                Column("seq", Integer, primary_key=True),
+                Column("recurso", String, nullable=False),
+                Column("clave", nullable=False))
+
+
+class ServidorSync:
+    def __init__(self, db_path: str | Path, *, puerto: int = 0, dir_snapshot: str | Path | None = None,
+                 snapshot_max_s: float = 3600.0, latencia_s: float = 0.0, jitter_s: float = 0.0,
+                 perdida: float = 0.0, perdida_respuesta: float = 0.0, error_5xx: float = 0.0,
+                 semilla: int | None = None):
+        self.db_path = Path(db_path)
+        self.engine = make_engine(self.db_path)
+        actualizar_bd(self.engine)
+        self._preparar_cambios()
+        self.dir_snapshot = Path(dir_snapshot) if dir_snapshot else self.db_path.parent / "snapshot"
+        self.snapshot_max_s = snapshot_max_s
+        self.latencia_s = latencia_s        # demora por petición (red lenta)
+        self.jitter_s = jitter_s
+        self.perdida = perdida              # petición perdida: no se aplica ni se responde
+        self.perdida_respuesta = perdida_respuesta  # se aplica, pero la respuesta no llega
+        self.error_5xx = error_5xx
+        self.fallar: set[str] = set()       # recursos que responden 503 (pull y push)
+        self.stats: Counter = Counter()     # peticiones, perdidas, respuestas_perdidas, errores_5xx
+        self._rnd = random.Random(semilla)
+        self.pulls = 0
+        self.push_recibidos = 0
+        self.llegadas: list[str] = []       # recurso de cada lote de push, en orden de llegada
+        self.par = Par(self.engine)
+        self._lock = threading.Lock()
+        servidor = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def log_message(self, *_):
+                pass
+
+            def do_GET(self):
+                try:
+                    servidor._get(self)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass                    # el cliente se fue (timeout): no hay a quién responder
+
+            def do_POST(self):
+                try:
+                    servidor._post(self)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+        self._http = ThreadingHTTPServer(("127.0.0.1", puerto), _Handler)
+        self._hilo = threading.Thread(target=self._http.serve_forever, name="servidor-sync", daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, puerto = self._http.server_address[:2]
+        return f"http://{host}:{puerto}"
+
+    def iniciar(self) -> "ServidorSync":
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._http.shutdown()
+        self._http.server_close()
+        self.par.indice.cerrar()
+        self.engine.dispose()
+
+    def _preparar_cambios(self):
+        """srv_cambios, sus triggers e índice; las filas que ya estaban entran con un seq."""
+        with self.engine.begin() as c:
+            # clave sin tipo declarado: compara con la PK de cada tabla con la afinidad de ésta
+            c.exec_driver_sql("CREATE TABLE IF NOT EXISTS srv_cambios (seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                              "recurso TEXT NOT NULL, clave NOT NULL, UNIQUE (recurso, clave))")
+            c.exec_driver_sql("CREATE INDEX IF NOT EXISTS idx_srv_cambios_recurso_seq ON srv_cambios (recurso, seq)")
+            for t in REGISTRO.values():
+                pk = [k.name for k in t.tabla.primary_key]
+                if t.direccion == "subir" or len(pk) != 1:
+                    continue
+                # DELETE + INSERT y no INSERT OR REPLACE: dentro de un upsert (aplicar) el
+                # OR REPLACE del trigger no corre y el UNIQUE falla
+                for ev in ("INSERT", "UPDATE"):
+                    c.exec_driver_sql(
+                        f"CREATE TRIGGER IF NOT EXISTS srv_cambios_{t.recurso}_{ev.lower()} AFTER {ev} ON {t.recurso} "
+                        f"BEGIN DELETE FROM srv_cambios WHERE recurso = '{t.recurso}' AND clave = NEW.{pk[0]}; "
+                        f"INSERT INTO srv_cambios (recurso, clave) VALUES ('{t.recurso}', NEW.{pk[0]}); END")
+                c.exec_driver_sql(f"INSERT OR IGNORE INTO srv_cambios (recurso, clave) "
+                                  f"SELECT '{t.recurso}', {pk[0]} FROM {t.recurso}")
+
+    def cursor(self) -> int:
+        with self.engine.connect() as c:
+            return c.execute(select(func.coalesce(func.max(CAMBIOS.c.seq), 0))).scalar_one()
+
+    # ---- rutas ----
+    def _json(self, h, codigo: int, datos, cabeceras: dict | None = None):
+        if getattr(h, "perder_respuesta", False):
+            return None                     # ya se aplicó; se cierra la conexión sin responder
+        cuerpo = json.dumps(datos).encode("utf-8")
+        h.send_response(codigo)
+        h.send_header("Content-Type", "application/json")
+        h.send_header("Content-Length", str(len(cuerpo)))
+        for k, v in (cabeceras or {}).items():
+            h.send_header(k, str(v))
+        h.end_headers()
+        h.wfile.write(cuerpo)
+
+    def _falla(self, h, ruta: str) -> bool:
+        """Aplica las fallas inyectadas; True si la petición ya terminó (no procesar)."""
+        with self._lock:
+            demora = self.latencia_s + self._rnd.uniform(0, self.jitter_s)
+            sorteo = self._rnd.random(), self._rnd.random(), self._rnd.random()
+            self.stats["peticiones"] += 1
+        time.sleep(demora)
+        recurso = ruta.rsplit("/", 1)[1]
+        if ruta.startswith("/sync/") and recurso in self.fallar:
+            self._json(h, 503, {"error": f"{recurso} no disponible"})
+            return True
+        if sorteo[0] < self.perdida:
+            self._contar("perdidas")
+            return True                     # sin respuesta: el cliente ve la conexión cerrada
+        if sorteo[1] < self.error_5xx:
+            self._contar("errores_5xx")
+            self._json(h, (500, 502, 503)[int(sorteo[1] / self.error_5xx * 3) % 3], {"error": "falla inyectada"})
+            return True
+        if sorteo[2] < self.perdida_respuesta:
+            self._contar("respuestas_perdidas")
+            h.perder_respuesta = True
+        return False
+
+    def _contar(self, clave: str, n: int = 1):
+        with self._lock:
+            self.stats[clave] += n
+
+    def _get(self, h):
+        url = urlparse(h.path)
+        if self._falla(h, url.path):
+            return None
+        if url.path == "/health":
+            return self._json(h, 200, {"ok": True})
+        if url.path.startswith("/sync/pull/"):
+            t = REGISTRO.get(url.path.rsplit("/", 1)[1])
+            if t is None or t.marca is None:
+                return self._json(h, 404, {"error": f"recurso no sincronizable {url.path}"})
+            params = parse_qs(url.query)
+            since, cursor = params.get("since", [None])[0], params.get("cursor", [None])[0]
+            q = select(*[t.tabla.c[k] for k in t.columnas])
+            try:
+                if cursor is not None:
+                    pk = t.tabla.primary_key.columns.values()[0]
+                    q = q.join_from(t.tabla, CAMBIOS, (CAMBIOS.c.recurso == t.recurso) & (CAMBIOS.c.clave == pk))
+                    q = q.where(CAMBIOS.c.seq > int(cursor))
+                elif since:
+                    q = q.where(t.tabla.c[t.marca] > datetime.fromisoformat(since))
+            except ValueError:
+                return self._json(h, 400, {"error": f"since/cursor inválido: {since or cursor}"})
+            with self.engine.connect() as c:
+                # una sola transacción de lectura: nada con seq <= hasta queda afuera
+                hasta = c.execute(select(func.coalesce(func.max(CAMBIOS.c.seq), 0))).scalar_one()
+                if cursor is not None:
+                    q = q.where(CAMBIOS.c.seq <= hasta)
+                filas = [_a_json(dict(r._mapping)) for r in c.execute(q)]
+            self.pulls += 1
+            self._contar("filas_bajadas", len(filas))
+            return self._json(h, 200, filas, {CABECERA_CURSOR: hasta})
+        if url.path == "/sync/snapshot":
+            return self._json(h, 200, self.manifiesto())
+        if url.path.startswith("/sync/snapshot/"):
+            nombre = url.path.rsplit("/", 1)[1]
+            ruta = self.dir_snapshot / nombre
+            if "/" in nombre or not nombre.startswith("snapshot-") or not ruta.is_file():
+                return self._json(h, 404, {"error": "no existe"})
+            h.send_response(200)
+            h.send_header("Content-Type", "application/gzip")
+            h.send_header("Content-Length", str(ruta.stat().st_size))
+            h.end_headers()
+            with open(ruta, "rb") as f:
+                while b := f.read(1 << 20):
+                    h.wfile.write(b)
+            return None
+        return self._json(h, 404, {"error": f"ruta desconocida {url.path}"})
+
+    def _post(self, h):
+        largo = int(h.headers.get("Content-Length") or 0)
+        crudo = h.rfile.read(largo)
+        if self._falla(h, h.path):
+            return None
+        try:
+            lote = json.loads(crudo or b"[]")
+        except ValueError:
+            return self._json(h, 400, {"error": "JSON inválido"})
+        if h.path.startswith("/sync/ae/productos/"):
+            try:
+                return self._json(h, 200, self.par.responder(h.path.rsplit("/", 1)[1], lote))
+            except ValueError as e:
+                return self._json(h, 400, {"error": str(e)})
+        if not h.path.startswith("/sync/push/"):
+            return self._json(h, 404, {"error": f"ruta desconocida {h.path}"})
+        recurso = h.path.rsplit("/", 1)[1]
+        if not isinstance(lote, list) or not all(isinstance(x, dict) and isinstance(x.get("data"), dict)
+                                                 for x in lote):
+            return self._json(h, 400, {"error": 'se espera [{"op": ..., "data": {...}}, ...]'})
+        t = REGISTRO.get(recurso)
+        if t is not None:
+            if t.direccion == "bajar":
+                return self._json(h, 403, {"error": f"{recurso} sólo se baja"})
+            sin_clave = sorted({k for x in lote for k in t.clave if x["data"].get(k) is None})
+            if sin_clave:
+                return self._json(h, 400, {"error": f"filas sin {sin_clave}"})
+            try:
+                with self.engine.connect().execution_options(inmediata=True) as c, c.begin():
+                    aplicar(c, t, [_de_json(t, x["data"]) for x in lote])
+            except (SQLAlchemyError, KeyError, TypeError, ValueError) as e:
+                return self._json(h, 400, {"error": str(e).splitlines()[0]})
+        with self._lock:
+            self.llegadas.append(recurso)
+            self.push_recibidos += len(lote)
+            self.stats["filas_subidas"] += len(lote)
+        return self._json(h, 200, {"recibidos": len(lote)})
+
+    def manifiesto(self, *, nuevo: bool = False) -> dict:
+        """Manifiesto vigente; crea el snapshot si falta, está viejo o nuevo=True."""
+        with self._lock:
+            ruta = self.dir_snapshot / MANIFIESTO
+            if not nuevo and ruta.is_file() and time.time() - ruta.stat().st_mtime < self.snapshot_max_s:
+                return json.loads(ruta.read_text(encoding="utf-8"))
+            return crear_snapshot(self.db_path, self.dir_snapshot, cursor=self.cursor())
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--db", required=True)
+    ap.add_argument("--puerto", type=int, default=8765)
+    ap.add_argument("--productos", type=int, default=0, help="llenar una BD vacía con N productos sintéticos")
+    ap.add_argument("--snapshot-max-s", type=float, default=3600.0)
+    ap.add_argument("--latencia", type=float, default=0.0, help="segundos por petición")
+    ap.add_argument("--jitter", type=float, default=0.0, help="más uniforme(0, jitter) segundos")
+    ap.add_argument("--perdida", type=float, default=0.0, help="probabilidad de perder la petición")
+    ap.add_argument("--perdida-respuesta", type=float, default=0.0,
+                    help="probabilidad de aplicar y perder la respuesta")
+    ap.add_argument("--error-5xx", type=float, default=0.0, help="probabilidad de responder 5xx")
+    ap.add_argument("--semilla", type=int, default=None)
+    args = ap.parse_args(argv)
+
+    if args.productos and not Path(args.db).exists():
+        from bench.dataset import Tamano, generar
+        generar(make_engine(args.db), Tamano(args.productos, 0, 0, 30))
+    s = ServidorSync(args.db, puerto=args.puerto, snapshot_max_s=args.snapshot_max_s,
+                     latencia_s=args.latencia, jitter_s=args.jitter, perdida=args.perdida,
+                     perdida_respuesta=args.perdida_respuesta, error_5xx=args.error_5xx,
+                     semilla=args.semilla).iniciar()
+    print(f"Servidor de sync en {s.url} (Ctrl+C para salir)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print(dict(s.stats))
+        s.detener()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+# bench/sync_registro.py
+"""
+Sync por registro (app/core/sync_client): todas las tablas, en paralelo y en orden de FK.
+
+    python -m bench.sync_registro [--productos 50000] [--ordenes 2000] [--boletas 500] [--latencia 0.2]
+
+Contra bench.servidor_sync (con --latencia segundos por petición, como una red real):
+  1. terminal vacía: pull() de productos, transito, ordenes_compra y detalles_orden,
+     con 1 hilo y con SYNC_HILOS; productos además con la lógica anterior
+     (get + add por el ORM, como pull_productos pero por codigo)
+  2. incremental: cambios en el servidor → el siguiente pull() trae sólo esos; una OC
+     con version más nueva en la terminal no se pisa; el stock que cambia el pull
+     queda en el ledger (un ajuste "sync" por producto)
+  3. push(): --boletas ventas hechas en la terminal llegan al servidor con sus
+     detalles, boletas antes que boleta_detalles; el segundo push() no sube nada
+  4. falla en boleta_detalles: push() informa el error, no avanza la marca, y al
+     volver el servidor se suben las que faltaban
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import sessionmaker
+
+from app.core import net
+from app.core.config import SYNC_HILOS
+from app.core.db_local import make_engine
+from app.core.ids import gen_id
+from app.core.migraciones import actualizar_bd
+from app.core.models import Boleta, BoletaDetalle, DetalleOrden, MovimientoStock, OrdenCompra, Producto, Transito
+from app.core.repositories import crear_boleta_con_detalles
+from app.core.sync_client import REGISTRO, grupos, pull, push
+from bench.bootstrap import _aplicar
+from bench.dataset import Tamano, codigo_producto, generar
+from bench.servidor_sync import ServidorSync
+
+BAJADA = [r for r, t in REGISTRO.items() if t.direccion != "subir"]
+
+
+def _conteos(engine, modelos) -> dict:
+    with engine.connect() as c:
+        return {m.__tablename__: c.execute(select(func.count()).select_from(m)).scalar_one() for m in modelos}
+
+
+def _terminal(tmp, nombre):
+    eng = make_engine(os.path.join(tmp, nombre))
+    actualizar_bd(eng)
+    return eng
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--productos", type=int, default=50_000)
+    ap.add_argument("--ordenes", type=int, default=2_000)
+    ap.add_argument("--boletas", type=int, default=500)
+    ap.add_argument("--latencia", type=float, default=0.2)
+    ap.add_argument("--semilla", type=int, default=1)
+    args = ap.parse_args(argv)
+    rnd = random.Random(args.semilla)
+    modelos = [Producto, Transito, OrdenCompra, DetalleOrden]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        srv_db = os.path.join(tmp, "servidor.db")
+        generar(make_engine(srv_db), Tamano(args.productos, 0, args.ordenes, 30), args.semilla, log=lambda m: None)
+        srv = ServidorSync(srv_db, latencia_s=args.latencia).iniciar()
+        net.BASE_URL = srv.url
+        try:
+            ahora = datetime.utcnow()
+            with srv.engine.begin() as c:
+                c.execute(insert(Transito), [
+                    {"id_transito": gen_id(), "producto_codigo": codigo_producto(i), "mas_existencias": 5,
+                     "new_precio_costo": 100, "estado_transito": "pendiente", "updated_at": ahora, "version": 1}
+                    for i in rnd.sample(range(args.productos), min(1000, args.productos))])
+            esperado = _conteos(srv.engine, modelos)
+
+            # ---- 1. terminal vacía ----
+            eng_a = _terminal(tmp, "anterior.db")
+            t0 = time.perf_counter()
+            _aplicar(sessionmaker(bind=eng_a, autoflush=False), net.api_pull("productos", since_iso=None))
+            seg_anterior = time.perf_counter() - t0
+            eng_1 = _terminal(tmp, "un_hilo.db")
+            t0 = time.perf_counter()
+            r1 = pull(engine=eng_1, hilos=1)
+            seg_1 = time.perf_counter() - t0
+            eng = _terminal(tmp, "mi_app.db")
+            t0 = time.perf_counter()
+            rn = pull(engine=eng)
+            seg_n = time.perf_counter() - t0
+            ok_completo = (_conteos(eng, modelos) == esperado == _conteos(eng_1, modelos)
+                           and all(isinstance(v, int) for v in (r1 | rn).values()))
+
+            # ---- 2. incremental ----
+            cambiados = [codigo_producto(i) for i in rnd.sample(range(args.productos), 100)]
+            with eng.connect() as c:
+                oc_local, oc_srv = c.execute(select(OrdenCompra.id_ordenes_com).limit(2)).scalars().all()
+            despues = ahora + timedelta(seconds=5)
+            with eng.begin() as c:
+                c.execute(update(OrdenCompra).where(OrdenCompra.id_ordenes_com == oc_local)
+                          .values(version=OrdenCompra.version + 5, estado_orden="local"))
+            with srv.engine.begin() as c:
+                c.execute(update(Producto).where(Producto.codigo.in_(cambiados))
+                          .values(precio_venta=Producto.precio_venta + 1, existencias=Producto.existencias + 3,
+                                  updated_at=despues))
+                c.execute(update(OrdenCompra).where(OrdenCompra.id_ordenes_com.in_([oc_local, oc_srv]))
+                          .values(version=OrdenCompra.version + 1, estado_orden="servidor", updated_at=despues))
+            with eng.connect() as c:
+                ultimo_mov = c.execute(select(func.max(MovimientoStock.id))).scalar() or 0
+            t0 = time.perf_counter()
+            inc = pull(engine=eng)
+            seg_inc = time.perf_counter() - t0
+            with eng.connect() as c:
+                movs = dict(tuple(r) for r in c.execute(
+                    select(MovimientoStock.codigo_producto, MovimientoStock.delta)
+                    .where(MovimientoStock.id > ultimo_mov, MovimientoStock.referencia == "sync")))
+            with eng.connect() as c:
+                estados = dict(tuple(r) for r in c.execute(
+                    select(OrdenCompra.id_ordenes_com, OrdenCompra.estado_orden)
+                    .where(OrdenCompra.id_ordenes_com.in_([oc_local, oc_srv]))))
+            ok_inc = (inc["productos"] == 100 and inc["ordenes_compra"] == 2 and inc["detalles_orden"] == 0
+                      and estados == {oc_local: "local", oc_srv: "servidor"}
+                      and movs == {c: 3 for c in cambiados})
+
+            # ---- 3. push ----
+            Session = sessionmaker(bind=eng, autoflush=False)
+            vivos = [codigo_producto(i) for i in range(min(args.productos, 1000))]
+            with eng.begin() as c:
+                c.execute(update(Producto).where(Producto.codigo.in_(vivos)).values(existencias=1_000_000))
+
+            def vender(n):
+                for _ in range(n):
+                    with Session() as s, s.begin():
+                        crear_boleta_con_detalles(s, [{"codigo": cod, "descripcion": cod, "precio_unit": 990,
+                                                       "cantidad": 1} for cod in rnd.sample(vivos, 3)])
+
+            vender(args.boletas)
+            t0 = time.perf_counter()
+            p1 = push(engine=eng)
+            seg_push = time.perf_counter() - t0
+            p2 = push(engine=eng)
+            subidas = _conteos(srv.engine, [Boleta, BoletaDetalle])
+            orden_ok = all(srv.llegadas.index("boletas") < i
+                           for i, r in enumerate(srv.llegadas) if r == "boleta_detalles")
+            ok_push = (subidas == {"boletas": args.boletas, "boleta_detalles": 3 * args.boletas}
+                       and orden_ok and p2.get("boletas") == 0 and p2.get("boleta_detalles") == 0)
+
+            # ---- 4. falla en la hija ----
+            vender(10)
+            srv.fallar = {"boleta_detalles"}
+            p3 = push(engine=eng)
+            srv.fallar = set()
+            p4 = push(engine=eng)
+            subidas2 = _conteos(srv.engine, [Boleta, BoletaDetalle])
+            ok_falla = (isinstance(p3.get("boleta_detalles"), str) and p4.get("boletas") == 10
+                        and subidas2 == {"boletas": args.boletas + 10, "boleta_detalles": 3 * (args.boletas + 10)})
+            for e in (eng, eng_1, eng_a):
+                e.dispose()
+        finally:
+            srv.detener()
+
+    print(f"grupos de FK: {[[t.recurso for t in g] for g in grupos(BAJADA)]}")
+    print(f"servidor: {esperado}  (latencia {args.latencia * 1000:.0f} ms por petición)")
+    print(f"\n{'terminal vacía':40} {'seg':>8}")
+    print(f"  productos, lógica anterior (ORM)       {seg_anterior:>8.2f}")
+    print(f"  pull() 4 tablas, 1 hilo                {seg_1:>8.2f}")
+    print(f"  pull() 4 tablas, {SYNC_HILOS} hilos               {seg_n:>8.2f}")
+    print(f"incremental: {inc} en {seg_inc * 1000:.0f} ms")
+    print(f"push: {p1} en {seg_push * 1000:.0f} ms; segundo push: {p2}")
+    print(f"con falla en boleta_detalles: {({r: v if isinstance(v, int) else 'error' for r, v in p3.items()})}; "
+          f"al volver: {p4}")
+    checks = {"pull completo = servidor (1 y N hilos)": ok_completo,
+              "incremental trae sólo lo cambiado, stock al ledger; version local más nueva se respeta": ok_inc,
+              "push sube boletas y detalles, padres primero, sin repetir": ok_push,
+              "falla en la hija: no avanza la marca y se recupera": ok_falla}
+    for n, v in checks.items():
+        print(f"  {'ok ' if v else 'MAL'} {n}")
+    if not all(checks.values()):
+        raise SystemExit("FALLA")
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
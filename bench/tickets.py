@@ -0,0 +1,73 @@
+# bench/tickets.py
+"""
+Latencia del journal de tickets.
+
+    python -m bench.tickets [--escaneos 5000] [--aparcados 50]
+
+- add: costo por escaneo que agrega el journal (p50/p99), objetivo muy por debajo de 1 ms.
+- reanudar: retomar un ticket aparcado (copia desde el espejo en memoria).
+- recuperación: reabrir el journal y reproducir los eventos de los tickets abiertos.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from app.core.tickets import TicketJournal
+
+
+def _pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(len(xs) * p))]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--escaneos", type=int, default=5000)
+    ap.add_argument("--aparcados", type=int, default=50)
+    args = ap.parse_args(argv)
+
+    rnd = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "tickets.db")
+        j = TicketJournal(path)
+
+        tid = j.nuevo()
+        lat = []
+        for i in range(args.escaneos):
+            t0 = time.perf_counter()
+            j.add(tid, f"P-{rnd.randint(0, 300)}", "Producto", 1990, 1)
+            lat.append((time.perf_counter() - t0) * 1e6)
+        print(f"add       : p50 {statistics.median(lat):7.1f} µs | p99 {_pct(lat, 0.99):7.1f} µs")
+
+        ids = []
+        for k in range(args.aparcados):
+            t = j.nuevo()
+            for _ in range(rnd.randint(3, 40)):
+                j.add(t, f"P-{rnd.randint(0, 300)}", "Producto", 990, rnd.randint(1, 3))
+            j.aparcar(t, f"cliente {k}")
+            ids.append(t)
+        lat = []
+        for t in ids:
+            t0 = time.perf_counter()
+            j.reanudar(t)
+            lat.append((time.perf_counter() - t0) * 1e6)
+            j.aparcar(t)
+        print(f"reanudar  : p50 {statistics.median(lat):7.1f} µs | p99 {_pct(lat, 0.99):7.1f} µs")
+        j.close()
+
+        t0 = time.perf_counter()
+        j2 = TicketJournal(path)
+        act = j2.activo()
+        dt = (time.perf_counter() - t0) * 1e3
+        print(f"recuperar : {dt:.1f} ms ({len(j2.aparcados())} aparcados, "
+              f"activo con {len(act[1]) if act else 0} productos)")
+        j2.close()
+
+
+if __name__ == "__main__":
+    main()
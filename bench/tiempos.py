@@ -0,0 +1,138 @@
+# bench/tiempos.py
+"""
+Marcas de tiempo texto (DateTime) vs INTEGER µs (app/core/tiempo.MarcaTiempo).
+
+    python -m bench.tiempos [--productos 100000] [--boletas 500000] [--reps 20]
+
+Genera la misma tienda sintética (bench.dataset) dos veces, una por formato,
+cada una en un proceso aparte con SM_TS_FORMATO fijado (el tipo de columna se
+decide al importar los modelos), y mide:
+  boletas.rango      COUNT/SUM de boletas en una semana (recorrido completo, sin índice)
+  productos.rango    COUNT de productos con updated_at > desde (idx_productos_updated)
+  boletas.hidratar   ORM: Boleta de una semana (created_at → datetime)
+  productos.pull     ORM: productos modificados desde un instante (como pull_productos)
+  boletas.columna    Core: todos los created_at (sólo costo de lectura/conversión)
+y el tamaño del archivo. Informa ms por operación (mediana de --reps) y la razón.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+FORMATOS = ("texto", "us")
+
+
+def _mediana_ms(fn, reps: int) -> float:
+    fn()                                    # calentar caché de páginas
+    t = []
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        fn()
+        t.append(1000 * (time.perf_counter() - t0))
+    return statistics.median(t)
+
+
+def _hijo(args) -> dict:
+    from sqlalchemy import func, select
+    from sqlalchemy.orm import sessionmaker
+
+    from app.core.db_local import make_engine
+    from app.core.models import Boleta, Producto
+    from bench.dataset import Tamano, generar
+
+    tmp = tempfile.TemporaryDirectory()
+    path = os.path.join(tmp.name, "tiempos.db")
+    engine = make_engine(path)
+    tam = Tamano(productos=args.productos, boletas=args.boletas, ordenes=10)
+    info = generar(engine, tam, args.semilla, log=lambda m: None)
+    with engine.connect() as c:
+        c.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    mb = os.path.getsize(path) / 2**20
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    desde, dias = info["desde"], tam.dias
+    rnd = random.Random(args.semilla)
+
+    def _semana():
+        a = desde + timedelta(days=rnd.randrange(dias - 7))
+        return a, a + timedelta(days=7)
+
+    def boletas_rango():
+        a, b = _semana()
+        with engine.connect() as c:
+            c.execute(select(func.count(), func.sum(Boleta.total))
+                      .where(Boleta.created_at >= a, Boleta.created_at < b)).one()
+
+    def productos_rango():
+        a, _ = _semana()
+        with engine.connect() as c:
+            c.execute(select(func.count()).select_from(Producto).where(Producto.updated_at > a)).scalar_one()
+
+    def boletas_hidratar():
+        a, b = _semana()
+        with Session() as s:
+            s.scalars(select(Boleta).where(Boleta.created_at >= a, Boleta.created_at < b)).all()
+
+    def productos_pull():
+        a = desde + timedelta(days=dias - 7)
+        with Session() as s:
+            s.scalars(select(Producto).where(Producto.updated_at > a)).all()
+
+    def boletas_columna():
+        with engine.connect() as c:
+            c.execute(select(Boleta.created_at)).scalars().all()
+
+    casos = {
+        "boletas.rango": boletas_rango,
+        "productos.rango": productos_rango,
+        "boletas.hidratar": boletas_hidratar,
+        "productos.pull": productos_pull,
+        "boletas.columna": boletas_columna,
+    }
+    res = {"mb": mb, "ms": {n: _mediana_ms(fn, args.reps) for n, fn in casos.items()}}
+    engine.dispose()
+    tmp.cleanup()
+    return res
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--productos", type=int, default=100_000)
+    ap.add_argument("--boletas", type=int, default=500_000)
+    ap.add_argument("--reps", type=int, default=20)
+    ap.add_argument("--semilla", type=int, default=1)
+    ap.add_argument("--_hijo", choices=FORMATOS, help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args._hijo:
+        print(json.dumps(_hijo(args)))
+        return
+
+    res = {}
+    for f in FORMATOS:
+        t0 = time.perf_counter()
+        cmd = [sys.executable, "-m", "bench.tiempos", "--_hijo", f, "--productos", str(args.productos),
+               "--boletas", str(args.boletas), "--reps", str(args.reps), "--semilla", str(args.semilla)]
+        out = subprocess.run(cmd, env={**os.environ, "SM_TS_FORMATO": f},
+                             capture_output=True, text=True, check=True).stdout
+        res[f] = json.loads(out.strip().splitlines()[-1])
+        print(f"  {f}: {time.perf_counter() - t0:.1f}s")
+
+    tx, us = res["texto"], res["us"]
+    print(f"\n{args.productos:,} productos, {args.boletas:,} boletas (mediana de {args.reps}, ms)")
+    print(f"{'operación':18} {'texto':>10} {'us':>10} {'razón':>7}")
+    for n in tx["ms"]:
+        a, b = tx["ms"][n], us["ms"][n]
+        print(f"{n:18} {a:>10.2f} {b:>10.2f} {a / b if b else 0:>6.2f}x")
+    print(f"{'archivo MB':18} {tx['mb']:>10.1f} {us['mb']:>10.1f} {tx['mb'] / us['mb']:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# bench/ventas_qt.py
+"""
+Reproduce una traza de escaneos sobre la página de Ventas real, sin pantalla.
+
+    python -m bench.ventas_qt [--escaneos 10000] [--productos 10000] [--traza codigos.txt]
+                              [--ticket 25] [--max-p99-ms 0]
+
+Carga app/ui/main_window.ui con QT_QPA_PLATFORM=offscreen, inicializa pageVentas
+contra una tienda sintética (bench.dataset) y por cada código escribe en
+codigoEdit + Enter y deja correr el event loop (repintado incluido). Cada
+--ticket escaneos se vacía el carrito, como tras un cobro.
+
+--traza: un código por línea (acepta CODIGO*N); los que no existen se descartan.
+Sin traza se genera una con popularidad tipo Zipf y ~10% de escaneos con cantidad.
+Informa los percentiles de app/core/trazas por etapa; con --max-p99-ms > 0
+falla si el p99 de extremo a extremo lo supera.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import Qt
+from PySide6.QtTest import QTest
+from PySide6.QtWidgets import QApplication, QLineEdit, QWidget
+from sqlalchemy import select
+
+from app.core import db_local, tickets
+from app.core.db_local import make_engine
+from app.core.models import Producto
+from app.core.trazas import get_trazador, PERCENTILES
+from bench.dataset import Tamano, generar, codigo_producto
+
+
+def traza_sintetica(n_productos: int, escaneos: int, semilla: int = 1) -> list[str]:
+    rnd = random.Random(semilla)
+    pesos = [1.0 / (i + 1) for i in range(n_productos)]
+    out = []
+    for i in rnd.choices(range(n_productos), weights=pesos, k=escaneos):
+        cod = codigo_producto(i)
+        out.append(f"{cod}*{rnd.randint(2, 6)}" if rnd.random() < 0.1 else cod)
+    return out
+
+
+def _leer_traza(path: str, engine) -> list[str]:
+    lineas = [l.strip() for l in open(path, encoding="utf-8") if l.strip()]
+    with engine.connect() as c:
+        existen = set(c.execute(select(Producto.codigo)).scalars())
+    ok = [l for l in lineas if l.split("*")[0].strip() in existen]
+    if len(ok) < len(lineas):
+        print(f"  ({len(lineas) - len(ok)} códigos de la traza no existen: descartados)")
+    return ok
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--escaneos", type=int, default=10_000)
+    ap.add_argument("--productos", type=int, default=10_000)
+    ap.add_argument("--traza", help="archivo con un código por línea")
+    ap.add_argument("--ticket", type=int, default=25, help="escaneos por ticket antes de vaciar")
+    ap.add_argument("--semilla", type=int, default=1)
+    ap.add_argument("--max-p99-ms", type=float, default=0.0)
+    ap.add_argument("--json", help="guardar los percentiles en este archivo")
+    args = ap.parse_args(argv)
+
+    tmp = tempfile.TemporaryDirectory()
+    engine = make_engine(os.path.join(tmp.name, "ventas.db"))
+    generar(engine, Tamano.desde_escala(args.productos), args.semilla, log=lambda m: None)
+    db_local.SessionLocal.configure(bind=engine)
+    tickets._journal = tickets.TicketJournal(os.path.join(tmp.name, "tickets.db"))
+
+    codigos = (_leer_traza(args.traza, engine) if args.traza
+               else traza_sintetica(args.productos, args.escaneos, args.semilla))
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    try:
+        import assets.imagenes  # noqa: F401  (íconos :/png del .ui)
+    except Exception:
+        pass
+    from app.ui.a_py.ui_runtime import load_ui
+    from app.ui.Ventas._Ventas_page import enter_ventas
+
+    w = load_ui("app/ui/main_window.ui")
+    enter_ventas(w)
+    w.show()
+    page = w.findChild(QWidget, "pageVentas")
+    code_edit = page.findChild(QLineEdit, "codigoEdit")
+    app.processEvents()
+
+    tr = get_trazador()
+    tr.reiniciar()
+    for i, cod in enumerate(codigos, 1):
+        code_edit.setText(cod)
+        QTest.keyClick(code_edit, Qt.Key_Return)
+        app.processEvents()
+        if i % args.ticket == 0:
+            page._ventas_state.clear()
+            page._ventas_repaint()
+            app.processEvents()
+
+    res = tr.resumen()
+    print(f"{len(codigos)} escaneos, {args.productos} productos, tickets de {args.ticket}")
+    print(f"{'etapa':28} {'n':>7} {'media':>8}" + "".join(f"{f'p{p:g}':>9}" for p in PERCENTILES) + f"{'máx':>9}  (ms)")
+    for nombre, h in res.items():
+        print(f"{nombre:28} {h['n']:>7} {h['media_us'] / 1000:>8.2f}"
+              + "".join(f"{h[f'p{p:g}_us'] / 1000:>9.2f}" for p in PERCENTILES)
+              + f"{h['max_us'] / 1000:>9.2f}")
+    if args.json:
+        tr.exportar(args.json)
+
+    w.close()
+    tickets._journal.close()
+    engine.dispose()
+    tmp.cleanup()
+
+    p99 = res.get("ventas.escaneo", {}).get("p99_us", 0) / 1000
+    print(f"\np99 escaneo → pantalla: {p99:.2f} ms")
+    if args.max_p99_ms and p99 > args.max_p99_ms:
+        raise SystemExit(f"FALLA: p99 {p99:.2f} ms > {args.max_p99_ms} ms")
+
+
+if __name__ == "__main__":
+    main()
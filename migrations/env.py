@@ -0,0 +1,35 @@
+# migrations/env.py
+"""
+Entorno de Alembic. Usa el engine que pasa app.core.migraciones (config.attributes["engine"])
+o, desde la línea de comandos (`alembic upgrade head`), uno sobre config.DB_PATH.
+"""
+from alembic import context
+
+from app.core.db_local import make_engine
+from app.core.config import DB_PATH
+from app.core.models import Base
+
+config = context.config
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    context.configure(url=f"sqlite:///{DB_PATH}", target_metadata=target_metadata,
+                      literal_binds=True, render_as_batch=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    engine = config.attributes.get("engine") or make_engine(DB_PATH)
+    with engine.connect() as conn:
+        # render_as_batch: SQLite no soporta ALTER COLUMN, batch recrea la tabla
+        context.configure(connection=conn, target_metadata=target_metadata, render_as_batch=True)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,29 @@
+# migrations/versions/0001_ids_compactos.py
+"""Claves UUID de boletas/detalles/OC/tránsito/outbox al formato de config.ID_FORMATO
+
+Las BD creadas antes de Alembic tienen las claves como texto (uuid4, 36 chars).
+Con ID_FORMATO="bin16" se guardan como BLOB de 16 bytes y boletas, boleta_detalles
+y transito pasan a WITHOUT ROWID. Los ids viejos (uuid4) se conservan tal cual:
+sólo los nuevos son UUIDv7.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+from app.core.config import ID_FORMATO
+from app.core.migraciones import convertir_ids
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    convertir_ids(op, ID_FORMATO)
+
+
+def downgrade():
+    convertir_ids(op, "texto")
@@ -0,0 +1,27 @@
+# migrations/versions/0002_marcas_tiempo_enteras.py
+"""created_at/updated_at/deleted_at/last_sync al formato de config.TS_FORMATO
+
+Con TS_FORMATO="us" las marcas de tiempo pasan de texto DateTime a INTEGER
+(µs desde epoch, UTC). Los triggers del ledger se recrean tras copiar la tabla.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+from app.core.config import TS_FORMATO
+from app.core.migraciones import convertir_tiempos
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    convertir_tiempos(op, TS_FORMATO)
+
+
+def downgrade():
+    convertir_tiempos(op, "texto")
@@ -0,0 +1,30 @@
+# migrations/versions/0003_promociones_en_detalles.py
+"""boleta_detalles.descuento / promocion (promoción aplicada a la línea)
+
+La tabla promociones la crea create_all (actualizar_bd) antes del upgrade; aquí
+sólo se agregan las columnas nuevas de boleta_detalles. subtotal pasa a ser
+precio × cantidad − descuento; las filas viejas quedan con descuento 0.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+from app.core.migraciones import completar_columnas
+from app.core.models import BoletaDetalle
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    completar_columnas(op.get_bind().connection.driver_connection, [BoletaDetalle.__table__])
+
+
+def downgrade():
+    with op.batch_alter_table("boleta_detalles") as b:
+        b.drop_column("promocion")
+        b.drop_column("descuento")
@@ -0,0 +1,48 @@
+# migrations/versions/0004_ae_sin_tombstones.py
+"""triggers de anti-entropía sólo para productos vivos (deleted_at IS NULL)
+
+El árbol de app/core/antientropia deja afuera los tombstones: si no, purgarlos en
+una réplica y no en la otra hace distinto el árbol para siempre. Los triggers de
+ae_cambios se recrean con models.AE_TRIGGERS; el árbol en memoria se construye de
+nuevo al arrancar (Indice), así que los cambios viejos del registro no se releen.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from alembic import op
+from sqlalchemy import inspect
+
+from app.core.models import AE_TRIGGERS
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+_AE = "INSERT INTO ae_cambios (codigo, version, existencias, signo) VALUES "
+_ANTERIORES = {
+    "insert": f"AFTER INSERT ON productos BEGIN {_AE}(NEW.codigo, NEW.version, NEW.existencias, 1); END",
+    "update": "AFTER UPDATE OF codigo, version, existencias ON productos "
+              "WHEN OLD.codigo IS NOT NEW.codigo OR OLD.version IS NOT NEW.version "
+              "OR OLD.existencias IS NOT NEW.existencias "
+              f"BEGIN {_AE}(OLD.codigo, OLD.version, OLD.existencias, -1), "
+              "(NEW.codigo, NEW.version, NEW.existencias, 1); END",
+    "delete": f"AFTER DELETE ON productos BEGIN {_AE}(OLD.codigo, OLD.version, OLD.existencias, -1); END",
+}
+
+
+def _recrear(cuerpos: dict):
+    if not inspect(op.get_bind()).has_table("ae_cambios"):
+        return              # create_all los crea con la tabla
+    for nombre, cuerpo in cuerpos.items():
+        op.execute(f"DROP TRIGGER IF EXISTS trg_productos_ae_{nombre}")
+        op.execute(f"CREATE TRIGGER trg_productos_ae_{nombre} {cuerpo}")
+
+
+def upgrade():
+    _recrear(AE_TRIGGERS)
+
+
+def downgrade():
+    _recrear(_ANTERIORES)